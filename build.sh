@@ -8,6 +8,21 @@ pip install -r requirements.txt
 # Ejecutar migraciones
 python manage.py migrate --noinput
 
-# Recopilar archivos estáticos
+# Expandir los horarios en cupos de agenda (además, cron diario con el mismo comando)
+python manage.py generar_cupos
+
+# Tabla del caché compartido (ver CACHES en settings.py)
+python manage.py createcachetable
+
+# Descargar librerías y generar bundles JS/CSS (static/dist/)
+python manage.py construir_assets
+
+# Recopilar archivos estáticos (agrega hash al nombre y genera variantes .gz/.br)
 python manage.py collectstatic --noinput
 
+# Verificar que todos los templates compilan (el loader cacheado los precarga al iniciar)
+python manage.py precargar_templates
+
+# Arranque en frío contra la referencia versionada (arranque.json); márgenes
+# amplios porque la referencia se midió en otra máquina
+python manage.py benchmark_arranque --repeticiones 3 --tolerancia 1 --margen-ms 200
@@ -41,10 +41,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.metricas.MetricasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.perfilado.PerfiladoMiddleware',
+    'core.auditoria.AuditoriaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,11 +67,26 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.assets',
             ],
         },
     },
 ]
 
+# En producción se activa explícitamente el loader cacheado: cada worker
+# compila un template una sola vez y reutiliza el árbol compilado.
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Compilar todos los templates al iniciar cada worker (ver core/template_warmup.py)
+PRECARGAR_TEMPLATES = os.environ.get('PRECARGAR_TEMPLATES', str(not DEBUG)) == 'True'
+
 WSGI_APPLICATION = 'clinica_veterinaria.wsgi.application'
 
 # ---------------------------
@@ -117,6 +135,117 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# Usar los bundles generados por `construir_assets` (static/dist/) en lugar de los CDN.
+# WhiteNoise sirve los archivos con hash en el nombre con caché de largo plazo (immutable)
+# y entrega la variante .br/.gz precomprimida según el Accept-Encoding del navegador.
+ASSETS_EMPAQUETADOS = os.environ.get('ASSETS_EMPAQUETADOS', str(not DEBUG)) == 'True'
+WHITENOISE_KEEP_ONLY_HASHED_FILES = not DEBUG
+
+# ---------------------------
+# Feed en vivo de citas (Server-Sent Events)
+# ---------------------------
+# 'memoria': broadcaster en proceso alimentado por señales (un solo worker).
+# 'db': cada conexión consulta la BD periódicamente (válido con varios workers).
+CITAS_EVENTOS_BACKEND = os.environ.get(
+    'CITAS_EVENTOS_BACKEND',
+    'db' if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1 else 'memoria'
+)
+CITAS_EVENTOS_POLL_SEGUNDOS = 5
+# Backend 'db': segundos antes del último evento que se vuelven a leer (commits tardíos)
+CITAS_EVENTOS_VENTANA_SEGUNDOS = 10
+CITAS_EVENTOS_HEARTBEAT = 15
+CITAS_EVENTOS_DURACION_MAX = 300
+CITAS_EVENTOS_REINTENTO_MS = 3000
+# Conexiones SSE simultáneas por proceso; por sobre el límite se responde 503.
+# Por defecto la mitad de los hilos de gunicorn (GUNICORN_THREADS, ver start.sh),
+# para que la otra mitad siga atendiendo el resto del sitio.
+CITAS_EVENTOS_MAX_CONEXIONES = int(os.environ.get(
+    'CITAS_EVENTOS_MAX_CONEXIONES',
+    max(1, int(os.environ.get('GUNICORN_THREADS', '16')) // 2)
+))
+
+# ---------------------------
+# Archivo de registros antiguos (comando archivar_registros)
+# ---------------------------
+# Antigüedad en días a partir de la cual citas e historiales pasan al archivo.
+ARCHIVO_DIAS = int(os.environ.get('ARCHIVO_DIAS', '730'))
+
+# ---------------------------
+# Eliminación de tutores (ver core/purga.py)
+# ---------------------------
+# Eliminar un tutor borra todo su historial: se ejecuta en un hilo aparte y la
+# página de la purga muestra el avance (False: en la misma petición).
+PURGA_ASINCRONA = os.environ.get('PURGA_ASINCRONA', 'True') == 'True'
+# Minutos sin avance tras los cuales una purga activa se da por abandonada
+# (el comando reanudar_purgas la retoma; volver a eliminar el tutor también).
+PURGA_ABANDONADA_MINUTOS = int(os.environ.get('PURGA_ABANDONADA_MINUTOS', '10'))
+
+# ---------------------------
+# Auditoría de cambios clínicos y de pagos (ver core/auditoria.py)
+# ---------------------------
+# Registros que se acumulan en memoria antes de escribirlos juntos; además se
+# escriben siempre al terminar cada petición.
+AUDITORIA_LOTE = int(os.environ.get('AUDITORIA_LOTE', '200'))
+# Si la BD rechaza una escritura los registros vuelven al buffer para el siguiente
+# intento; por sobre este máximo se descartan los más antiguos.
+AUDITORIA_MAX_PENDIENTES = int(os.environ.get('AUDITORIA_MAX_PENDIENTES', '5000'))
+
+# ---------------------------
+# Caché (reportes, ver core/cache_reportes.py)
+# ---------------------------
+# 'db': tabla compartida por todos los workers y por los comandos de gestión,
+#       que también invalidan reportes (se crea con createcachetable en build.sh).
+# 'memoria': caché del proceso; solo sirve con un worker y sin comandos en paralelo.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memoria' if DEBUG else 'db')
+CACHES = {
+    'default': {
+        'BACKEND': (
+            'django.core.cache.backends.db.DatabaseCache' if CACHE_BACKEND == 'db'
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': 'core_cache' if CACHE_BACKEND == 'db' else 'clinica',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+# Un reporte cuyo resultado serializado supera este tamaño (bytes) no se guarda
+# en la caché: con DatabaseCache cada entrada es una fila de la tabla.
+REPORTES_CACHE_MAX_BYTES = int(os.environ.get('REPORTES_CACHE_MAX_BYTES', str(512 * 1024)))
+
+# ---------------------------
+# Tarjetas del panel (ver core/dashboard.py)
+# ---------------------------
+# Segundos que los contadores se consideran al día; luego se muestran marcados
+# como desactualizados mientras se recalculan en segundo plano, hasta
+# PANEL_ESTADISTICAS_OBSOLETO_MAX segundos (después se recalculan en la petición).
+PANEL_ESTADISTICAS_TTL = int(os.environ.get('PANEL_ESTADISTICAS_TTL', '30'))
+PANEL_ESTADISTICAS_OBSOLETO_MAX = int(os.environ.get('PANEL_ESTADISTICAS_OBSOLETO_MAX', '600'))
+
+# ---------------------------
+# Cupos de agenda (ver core/cupos.py)
+# ---------------------------
+# Semanas hacia adelante que se expanden los horarios semanales en cupos;
+# el comando generar_cupos (cron diario) corre la ventana.
+CUPOS_SEMANAS = int(os.environ.get('CUPOS_SEMANAS', '8'))
+
+# ---------------------------
+# Perfilado bajo demanda (ver core/perfilado.py)
+# ---------------------------
+# Un ADMIN agrega ?perfilar=1 (o ?perfilar=muestreo) a cualquier URL; los
+# perfiles quedan en PERFILADO_DIR y se listan en /perfiles/.
+PERFILADO_DIR = os.environ.get('PERFILADO_DIR', str(BASE_DIR / 'perfiles'))
+PERFILADO_MAX = int(os.environ.get('PERFILADO_MAX', '50'))
+PERFILADO_INTERVALO_MS = int(os.environ.get('PERFILADO_INTERVALO_MS', '5'))
+
+# ---------------------------
+# Métricas de latencia (ver core/metricas.py)
+# ---------------------------
+# /metricas/ (Prometheus) responde a estas IPs sin sesión; a un ADMIN, desde cualquiera.
+METRICAS_IPS = os.environ.get('METRICAS_IPS', '127.0.0.1,::1').split(',')
+# Una línea JSON por petición en el logger core.acceso (por defecto solo en Render).
+METRICAS_ACCESO_LOG = os.environ.get('METRICAS_ACCESO_LOG', '1' if 'RENDER' in os.environ else '0') == '1'
+# Cada cuánto se escribe en core.metricas el resumen p50/p95/p99 por URL.
+METRICAS_RESUMEN_SEGUNDOS = int(os.environ.get('METRICAS_RESUMEN_SEGUNDOS', '300'))
+
 # ---------------------------
 # Modelo de usuario personalizado
 # ---------------------------
@@ -129,10 +258,20 @@ AUTH_USER_MODEL = 'core.Usuario'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        # Las líneas de core.acceso y core.metricas ya son JSON
+        'json': {
+            'format': '%(message)s',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'json': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -144,5 +283,15 @@ LOGGING = {
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': False,
         },
+        'core.acceso': {
+            'handlers': ['json'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.metricas': {
+            'handlers': ['json'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -2,128 +2,66 @@
 
 from django.contrib import admin
 from django.urls import path
-from core.views import (
-    login_view, 
-    panel_view, 
-    logout_view,
-    
-    # Vistas de Citas
-    listar_citas,
-    crear_cita,
-    editar_cita,
-    eliminar_cita,
-    detalle_cita,
-    confirmar_cita,
-
-    # Vistas de Tutores
-    listar_tutores,
-    crear_tutor,
-    editar_tutor,
-    eliminar_tutor,
-
-    # Vistas de Pacientes
-    listar_pacientes,
-    crear_paciente,
-    editar_paciente,
-    eliminar_paciente,
-
-    # Vistas de Horarios
-    listar_horarios_vet,
-    gestionar_horarios,
-    eliminar_horario,
-
-    # NUEVAS VISTAS DE PERSONAL
-    gestionar_personal,
-    eliminar_personal,
 
-    # Vistas de Historial Clínico
-    # listar_historiales,
-    # crear_historial,
-    # detalle_historial,
-    # editar_historial,
-    # eliminar_historial,
-
-    # Vistas de Reportes
-    reportes_view,
-
-    # Vistas de Gestión de Usuarios
-    gestion_usuarios,
-    crear_usuario,
-    crear_veterinario,
-    editar_usuario,
-    eliminar_usuario,
-
-        # Vistas de Citas Actuales
-    listar_citas_actuales,
-    finalizar_cita,
-    cancelar_cita,
-    
-    # Vistas de Ficha Médica
-    ficha_medica_paciente,
-    agregar_vacuna,
-    agregar_cirugia,
-    agregar_alergia,
-    toggle_alergia,
-    agregar_historial,
-    
-    # Vistas de Pagos
-    cuentas_por_cobrar,
-    registrar_abono,
-    
-    # API Endpoints
-    dashboard_data,
-
-)
+# Cada vista se importa con la primera petición que la usa (ver core/views/__init__.py)
+from core.views import perezosa
 
 urlpatterns = [
     # --- Administración ---
     path('admin/', admin.site.urls),
 
     # --- Autenticación ---
-    path('login/', login_view, name='login'),
-    path('logout/', logout_view, name='logout'),
-    path('panel/', panel_view, name='panel'),
+    path('login/', perezosa('autenticacion.login_view'), name='login'),
+    path('logout/', perezosa('autenticacion.logout_view'), name='logout'),
+    path('panel/', perezosa('autenticacion.panel_view'), name='panel'),
 
     # --- Página principal (raíz del sitio) ---
-    path('', login_view, name='home'),
+    path('', perezosa('autenticacion.login_view'), name='home'),
 
     # --- Rutas del CRUD de Citas ---
-    path('agenda/', listar_citas, name='listar_citas'),
-    path('agenda/nueva/', crear_cita, name='crear_cita'),
-    path('agenda/detalle/<int:pk>/', detalle_cita, name='detalle_cita'),
-    path('agenda/editar/<int:pk>/', editar_cita, name='editar_cita'),
-    path('agenda/cancelar/<int:pk>/', eliminar_cita, name='eliminar_cita'),
-    path('agenda/confirmar/<int:pk>/', confirmar_cita, name='confirmar_cita'),
+    path('agenda/', perezosa('citas.listar_citas'), name='listar_citas'),
+    path('agenda/nueva/', perezosa('citas.crear_cita'), name='crear_cita'),
+    path('agenda/detalle/<int:pk>/', perezosa('citas.detalle_cita'), name='detalle_cita'),
+    path('agenda/editar/<int:pk>/', perezosa('citas.editar_cita'), name='editar_cita'),
+    path('agenda/cancelar/<int:pk>/', perezosa('citas.eliminar_cita'), name='eliminar_cita'),
+    path('agenda/confirmar/<int:pk>/', perezosa('citas.confirmar_cita'), name='confirmar_cita'),
+    path('agenda/confirmar-dia/', perezosa('citas.confirmar_citas_dia'), name='confirmar_citas_dia'),
+    path('agenda/cancelar-bloque/', perezosa('citas.cancelar_bloque_citas'), name='cancelar_bloque_citas'),
+    path('agenda/grilla/', perezosa('citas.grilla_citas'), name='grilla_citas'),
+    path('api/citas/topes/', perezosa('citas.topes_cita'), name='topes_cita'),
+    path('api/agenda/grilla/', perezosa('citas.grilla_citas_json'), name='grilla_citas_json'),
+    path('api/agenda/cupos-libres/', perezosa('citas.cupos_libres'), name='cupos_libres'),
+    path('api/agenda/primeros-libres/', perezosa('citas.primeros_libres'), name='primeros_libres'),
 
     # --- Rutas CRUD Tutores ---
-    path('tutores/', listar_tutores, name='listar_tutores'),
-    path('tutores/nuevo/', crear_tutor, name='crear_tutor'),
-    path('tutores/editar/<int:pk>/', editar_tutor, name='editar_tutor'),
-    path('tutores/eliminar/<int:pk>/', eliminar_tutor, name='eliminar_tutor'),
+    path('tutores/', perezosa('tutores.listar_tutores'), name='listar_tutores'),
+    path('tutores/nuevo/', perezosa('tutores.crear_tutor'), name='crear_tutor'),
+    path('tutores/editar/<int:pk>/', perezosa('tutores.editar_tutor'), name='editar_tutor'),
+    path('tutores/eliminar/<int:pk>/', perezosa('tutores.eliminar_tutor'), name='eliminar_tutor'),
+    path('tutores/purgas/<int:purga_id>/', perezosa('tutores.purga_tutor'), name='purga_tutor'),
 
     # --- Rutas CRUD Pacientes ---
-    path('pacientes/', listar_pacientes, name='listar_pacientes'),
-    path('pacientes/nuevo/', crear_paciente, name='crear_paciente'),
-    path('pacientes/editar/<int:pk>/', editar_paciente, name='editar_paciente'),
-    path('pacientes/eliminar/<int:pk>/', eliminar_paciente, name='eliminar_paciente'),
+    path('pacientes/', perezosa('pacientes.listar_pacientes'), name='listar_pacientes'),
+    path('pacientes/nuevo/', perezosa('pacientes.crear_paciente'), name='crear_paciente'),
+    path('pacientes/editar/<int:pk>/', perezosa('pacientes.editar_paciente'), name='editar_paciente'),
+    path('pacientes/eliminar/<int:pk>/', perezosa('pacientes.eliminar_paciente'), name='eliminar_paciente'),
 
     # --- Rutas de Gestión de Horarios ---
-    path('horarios/', listar_horarios_vet, name='listar_horarios_vet'),
-    path('horarios/gestionar/<str:vet_id>/', gestionar_horarios, name='gestionar_horarios'),
-    path('horarios/eliminar/<int:pk>/', eliminar_horario, name='eliminar_horario'),
+    path('horarios/', perezosa('horarios.listar_horarios_vet'), name='listar_horarios_vet'),
+    path('horarios/gestionar/<str:vet_id>/', perezosa('horarios.gestionar_horarios'), name='gestionar_horarios'),
+    path('horarios/eliminar/<int:pk>/', perezosa('horarios.eliminar_horario'), name='eliminar_horario'),
     
     # --- Rutas de Gestión de Personal ---
-    path('personal/', gestionar_personal, name='gestionar_personal'),
-    path('personal/eliminar/<int:pk>/', eliminar_personal, name='eliminar_personal'),
-
-
+    path('personal/', perezosa('personal.gestionar_personal'), name='gestionar_personal'),
+    path('personal/eliminar/<int:pk>/', perezosa('personal.eliminar_personal'), name='eliminar_personal'),
 
     # --- Rutas de Ficha Médica ---
-    path('paciente/<int:paciente_id>/ficha/', ficha_medica_paciente, name='ficha_medica'),
-    path('paciente/<int:paciente_id>/vacuna/agregar/', agregar_vacuna, name='agregar_vacuna'),
-    path('paciente/<int:paciente_id>/cirugia/agregar/', agregar_cirugia, name='agregar_cirugia'),
-    path('paciente/<int:paciente_id>/alergia/agregar/', agregar_alergia, name='agregar_alergia'),
-    path('alergia/<int:alergia_id>/toggle/', toggle_alergia, name='toggle_alergia'),
+    path('paciente/<int:paciente_id>/ficha/', perezosa('ficha.ficha_medica_paciente'), name='ficha_medica'),
+    path('paciente/<int:paciente_id>/vacuna/agregar/', perezosa('ficha.agregar_vacuna'), name='agregar_vacuna'),
+    path('paciente/<int:paciente_id>/cirugia/agregar/', perezosa('ficha.agregar_cirugia'), name='agregar_cirugia'),
+    path('paciente/<int:paciente_id>/alergia/agregar/', perezosa('ficha.agregar_alergia'), name='agregar_alergia'),
+    path('alergia/<int:alergia_id>/toggle/', perezosa('ficha.toggle_alergia'), name='toggle_alergia'),
+    path('paciente/<int:paciente_id>/historial/agregar/', perezosa('ficha.agregar_historial'), name='agregar_historial'),
     
     # --- Rutas de Historial Clínico ---
     # path('historiales/', listar_historiales, name='listar_historiales'),
@@ -135,37 +73,37 @@ urlpatterns = [
     # path('historiales/eliminar/<int:pk>/', eliminar_historial, name='eliminar_historial'),
     
     # --- Rutas de Reportes ---
-    path('reportes/', reportes_view, name='reportes'),
+    path('reportes/', perezosa('reportes.reportes_view'), name='reportes'),
+    path('api/reportes/analitica/', perezosa('reportes.analitica_ingresos'), name='analitica_ingresos'),
 
     # --- Rutas de Gestión de Usuarios ---
-    path('gestion-usuarios/', gestion_usuarios, name='gestion_usuarios'),
-    path('gestion-usuarios/nuevo/', crear_usuario, name='crear_usuario'),
-    path('gestion-usuarios/veterinario/nuevo/', crear_veterinario, name='crear_veterinario'),
-    path('gestion-usuarios/<int:usuario_id>/editar/', editar_usuario, name='editar_usuario'),
-    path('gestion-usuarios/<int:usuario_id>/eliminar/', eliminar_usuario, name='eliminar_usuario'),
+    path('gestion-usuarios/', perezosa('personal.gestion_usuarios'), name='gestion_usuarios'),
+    path('gestion-usuarios/nuevo/', perezosa('personal.crear_usuario'), name='crear_usuario'),
+    path('gestion-usuarios/veterinario/nuevo/', perezosa('personal.crear_veterinario'), name='crear_veterinario'),
+    path('gestion-usuarios/<int:usuario_id>/editar/', perezosa('personal.editar_usuario'), name='editar_usuario'),
+    path('gestion-usuarios/<int:usuario_id>/eliminar/', perezosa('personal.eliminar_usuario'), name='eliminar_usuario'),
 
     # --- Rutas de Citas Actuales ---
-    path('citas-actuales/', listar_citas_actuales, name='listar_citas_actuales'),
-    path('citas-actuales/finalizar/<int:pk>/', finalizar_cita, name='finalizar_cita'),
-
-        # --- Rutas de Citas Actuales ---
-    path('citas-actuales/', listar_citas_actuales, name='listar_citas_actuales'),
-    path('citas/<int:cita_id>/finalizar/', finalizar_cita, name='finalizar_cita'),
-    path('citas/<int:cita_id>/cancelar/', cancelar_cita, name='cancelar_cita'),
-    
-    # --- Rutas de Ficha Médica ---
-    path('paciente/<int:paciente_id>/ficha/', ficha_medica_paciente, name='ficha_medica'),
-    path('paciente/<int:paciente_id>/vacuna/agregar/', agregar_vacuna, name='agregar_vacuna'),
-    path('paciente/<int:paciente_id>/cirugia/agregar/', agregar_cirugia, name='agregar_cirugia'),
-    path('paciente/<int:paciente_id>/alergia/agregar/', agregar_alergia, name='agregar_alergia'),
-    path('alergia/<int:alergia_id>/toggle/', toggle_alergia, name='toggle_alergia'),
-    path('paciente/<int:paciente_id>/historial/agregar/', agregar_historial, name='agregar_historial'),
+    path('citas-actuales/', perezosa('citas_actuales.listar_citas_actuales'), name='listar_citas_actuales'),
+    path('citas-actuales/eventos/', perezosa('citas_actuales.eventos_citas_actuales'), name='eventos_citas_actuales'),
+    path('citas/<int:cita_id>/finalizar/', perezosa('citas_actuales.finalizar_cita'), name='finalizar_cita'),
+    path('citas/<int:cita_id>/cancelar/', perezosa('citas_actuales.cancelar_cita'), name='cancelar_cita'),
     
     # --- Rutas de Pagos ---
-    path('pagos/cuentas-por-cobrar/', cuentas_por_cobrar, name='cuentas_por_cobrar'),
-    path('pagos/<int:pago_id>/abono/', registrar_abono, name='registrar_abono'),
+    path('pagos/cuentas-por-cobrar/', perezosa('pagos.cuentas_por_cobrar'), name='cuentas_por_cobrar'),
+    path('pagos/<int:pago_id>/abono/', perezosa('pagos.registrar_abono'), name='registrar_abono'),
+
+    # --- Perfilado (solo ADMIN) y métricas ---
+    path('perfiles/', perezosa('diagnostico.perfiles'), name='perfiles'),
+    path('perfiles/<str:nombre>.<str:extension>', perezosa('diagnostico.descargar_perfil'), name='descargar_perfil'),
+    path('metricas/', perezosa('diagnostico.metricas_prometheus'), name='metricas'),
     
     # --- API Dashboard ---
-    path('api/dashboard-data/', dashboard_data, name='dashboard_data'),
-
-]
\ No newline at end of file
+    path('api/dashboard-data/', perezosa('reportes.dashboard_data'), name='dashboard_data'),
+    path('api/tutores/por-rut/', perezosa('tutores.tutor_por_rut'), name='tutor_por_rut'),
+    path('api/tutores/por-contacto/', perezosa('tutores.tutor_por_contacto'), name='tutor_por_contacto'),
+    path('api/pacientes/<int:paciente_id>/timeline/', perezosa('ficha.timeline_paciente'), name='timeline_paciente'),
+    path('api/purgas/<int:purga_id>/', perezosa('tutores.purga_tutor_estado'), name='purga_tutor_estado'),
+    path('api/pacientes/<int:paciente_id>/auditoria/', perezosa('ficha.auditoria_paciente'), name='auditoria_paciente'),
+
+]
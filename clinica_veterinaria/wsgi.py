@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'clinica_veterinaria.settings')
 
 application = get_wsgi_application()
+
+# Pre-compilar los templates antes de atender la primera request del worker
+if settings.PRECARGAR_TEMPLATES:
+    from core.template_warmup import precargar_templates
+    precargar_templates()
@@ -1,13 +1,25 @@
 # core/admin.py
 
+import io
+
 from django.contrib import admin
 from django import forms
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
 from .models import (
     Usuario, Veterinario, Tutor, Paciente,
-    Cita, HistorialClinico, HorarioDisponible,
-    Vacuna, Cirugia, Alergia, Pago, Abono
+    Cita, HistorialClinico, HorarioDisponible, CupoAgenda,
+    Vacuna, Cirugia, Alergia, Pago, Abono, BarridoInasistencias, PurgaTutor,
+    CitaArchivada, HistorialClinicoArchivado, RegistroAuditoria
+)
+from . import agenda
+from .forms import CitaAdminForm
+from .importacion import (
+    ImportadorTutores, ImportadorPacientes, COLUMNAS_TUTOR, COLUMNAS_PACIENTE, leer_csv, verificar_codificacion
 )
 
 # ===============================================================
@@ -103,23 +115,92 @@ class VeterinarioAdmin(admin.ModelAdmin):
     list_display = ('usuario', 'rut', 'especialidad', 'telefono')
     search_fields = ('usuario__nombre', 'usuario__apellido', 'rut')
 
+class ImportarCSVForm(forms.Form):
+    """Archivos para la importación masiva de tutores y pacientes"""
+    tutores = forms.FileField(required=False, label="CSV de tutores")
+    pacientes = forms.FileField(required=False, label="CSV de pacientes")
+    delimitador = forms.ChoiceField(choices=[(',', 'Coma (,)'), (';', 'Punto y coma (;)')], initial=',')
+    lote = forms.IntegerField(min_value=1, max_value=10000, initial=1000, label="Filas por lote")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('tutores') and not cleaned_data.get('pacientes'):
+            raise forms.ValidationError("Seleccione al menos un archivo.")
+        return cleaned_data
+
 @admin.register(Tutor)
 class TutorAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'apellido', 'rut', 'telefono', 'email')
     search_fields = ('nombre', 'apellido', 'rut')
+    change_list_template = 'admin/core/tutor/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('importar/', self.admin_site.admin_view(self.importar_csv), name='core_tutor_importar'),
+        ]
+        return urls + super().get_urls()
+
+    def importar_csv(self, request):
+        """Importación masiva desde CSV (ver core/importacion.py)"""
+        if not (self.has_add_permission(request) and request.user.has_perm('core.add_paciente')):
+            raise PermissionDenied
+        resultados = []
+        form = ImportarCSVForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            # Los tutores primero, para que los pacientes del mismo envío puedan referenciarlos
+            for campo, clase in (('tutores', ImportadorTutores), ('pacientes', ImportadorPacientes)):
+                subido = form.cleaned_data[campo]
+                if not subido:
+                    continue
+                try:
+                    # Todo el archivo se verifica antes de insertar el primer lote
+                    verificar_codificacion(subido.file)
+                    archivo = io.TextIOWrapper(subido.file, encoding='utf-8-sig', newline='')
+                    importador = clase(lote=form.cleaned_data['lote']).importar(
+                        leer_csv(archivo, form.cleaned_data['delimitador'])
+                    )
+                except ValidationError as e:
+                    self.message_user(request, f"{subido.name}: {'; '.join(e.messages)}", level='error')
+                    continue
+                resultados.append({'archivo': subido.name, 'tipo': campo, 'importador': importador})
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar tutores y pacientes',
+            'form': form,
+            'resultados': resultados,
+            'columnas_tutor': COLUMNAS_TUTOR,
+            'columnas_paciente': COLUMNAS_PACIENTE,
+        }
+        return TemplateResponse(request, 'admin/core/tutor/importar_csv.html', context)
 
 @admin.register(Paciente)
 class PacienteAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'especie', 'raza', 'tutor', 'activo')
+    list_display = ('nombre', 'especie', 'raza', 'tutor', 'activo', 'eliminado_en')
     list_filter = ('especie', 'sexo', 'activo')
     search_fields = ('nombre', 'tutor__nombre', 'tutor__apellido')
+    actions = ['reactivar']
+
+    def get_queryset(self, request):
+        # Incluye a los dados de baja (``todos``, el manager por defecto) para poder reactivarlos
+        return Paciente.todos.select_related('tutor')
+
+    @admin.action(description="Reactivar pacientes dados de baja")
+    def reactivar(self, request, queryset):
+        cantidad = queryset.filter(activo=False).update(activo=True, eliminado_en=None, updated_at=timezone.now())
+        self.message_user(request, f"{cantidad} paciente(s) reactivados.")
 
 @admin.register(Cita)
 class CitaAdmin(admin.ModelAdmin):
+    form = CitaAdminForm
     list_display = ('paciente', 'veterinario', 'fecha_hora', 'estado')
     list_filter = ('estado', 'veterinario')
     search_fields = ('paciente__nombre', 'veterinario__usuario__nombre')
 
+    def save_model(self, request, obj, form, change):
+        # Con el veterinario bloqueado, como las vistas de la agenda
+        agenda.guardar_cita(obj)
+
 @admin.register(HistorialClinico)
 class HistorialClinicoAdmin(admin.ModelAdmin):
     list_display = ('paciente', 'veterinario', 'fecha_atencion')
@@ -163,4 +244,76 @@ class AbonoAdmin(admin.ModelAdmin):
     list_display = ['id', 'pago', 'monto', 'metodo_pago', 'fecha', 'registrado_por']
     list_filter = ['metodo_pago', 'fecha']
     search_fields = ['pago__cita__paciente__nombre']
-    readonly_fields = ['fecha']
\ No newline at end of file
+    readonly_fields = ['fecha']
+
+@admin.register(BarridoInasistencias)
+class BarridoInasistenciasAdmin(admin.ModelAdmin):
+    list_display = ['iniciado', 'finalizado', 'corte', 'marcadas', 'lotes', 'simulacion']
+    list_filter = ['simulacion']
+    readonly_fields = ['iniciado', 'finalizado', 'corte', 'marcadas', 'lotes', 'simulacion']
+
+@admin.register(PurgaTutor)
+class PurgaTutorAdmin(admin.ModelAdmin):
+    list_display = ['tutor', 'estado', 'iniciada', 'finalizada', 'filas_borradas', 'solicitada_por']
+    list_filter = ['estado']
+    readonly_fields = [
+        'tutor_id', 'tutor', 'solicitada_por', 'estado', 'iniciada', 'actualizada', 'finalizada',
+        'pasos_total', 'pasos_completados', 'filas_borradas', 'detalle', 'error'
+    ]
+
+
+class SoloLecturaAdmin(admin.ModelAdmin):
+    """El archivo solo se modifica con el comando archivar_registros."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CitaArchivada)
+class CitaArchivadaAdmin(SoloLecturaAdmin):
+    list_display = ['id', 'paciente', 'veterinario', 'fecha_hora', 'estado', 'monto', 'archivada_en']
+    list_filter = ['estado']
+    date_hierarchy = 'fecha_hora'
+    list_select_related = ['paciente', 'veterinario__usuario']
+    search_fields = ['paciente__nombre']
+
+
+@admin.register(HistorialClinicoArchivado)
+class HistorialClinicoArchivadoAdmin(SoloLecturaAdmin):
+    list_display = ['id', 'paciente', 'veterinario', 'fecha_atencion', 'motivo', 'archivada_en']
+    date_hierarchy = 'fecha_atencion'
+    list_select_related = ['paciente', 'veterinario__usuario']
+    search_fields = ['paciente__nombre', 'motivo']
+
+
+@admin.register(RegistroAuditoria)
+class RegistroAuditoriaAdmin(SoloLecturaAdmin):
+    list_display = ['fecha', 'accion', 'modelo', 'objeto_id', 'paciente_id', 'usuario_email']
+    list_filter = ['accion', 'modelo']
+    search_fields = ['=paciente_id', '=objeto_id', 'usuario_email']
+    date_hierarchy = 'fecha'
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CupoAgenda)
+class CupoAgendaAdmin(admin.ModelAdmin):
+    """Los cupos se derivan de los horarios (core/cupos.py): solo consulta."""
+    list_display = ['veterinario', 'inicio', 'fin', 'cita']
+    list_filter = ['veterinario', ('cita', admin.EmptyFieldListFilter)]
+    date_hierarchy = 'inicio'
+    list_select_related = ['veterinario__usuario', 'cita__paciente']
+    raw_id_fields = ['cita']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,147 @@
+# core/agenda.py
+
+"""
+Duración de las citas y detección de topes en la agenda de cada veterinario.
+
+Una cita ocupa ``[fecha_hora, fecha_hora + duracion)``. Solo ocupan la agenda
+las citas en ``ESTADOS_OCUPAN``; una cancelada o una inasistencia libera su
+bloque.
+
+- En PostgreSQL una restricción de exclusión (migración 0016, índice GiST
+  sobre el rango de cada cita) impide guardar dos citas activas que se topen
+  para el mismo veterinario, incluso con reservas simultáneas.
+- En la aplicación (y en SQLite) la consulta de topes usa el índice
+  ``(veterinario, fecha_hora)``: como ninguna cita dura más de
+  ``DURACION_MAX``, solo pueden topar las que empiezan en
+  ``(inicio - DURACION_MAX, fin)``, un rango acotado del índice.
+- ``IndiceIntervalos`` hace lo mismo en memoria sobre las citas de un
+  veterinario y un día ya cargadas (una consulta), para revisar muchos
+  horarios candidatos sin volver a la base de datos.
+"""
+
+import bisect
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .estados_cita import ESTADOS_PENDIENTES, rango_del_dia
+from .models import Cita, Veterinario
+
+ESTADOS_OCUPAN = ESTADOS_PENDIENTES + ['EN_CURSO']
+DURACION_POR_DEFECTO = 30
+DURACION_MAX = 240
+# Restricción de exclusión de PostgreSQL (migración 0016)
+RESTRICCION = 'cita_sin_topes'
+
+# Fragmentos del motivo (en minúsculas) -> duración sugerida en minutos
+DURACIONES_POR_MOTIVO = [
+    (('cirug', 'operaci', 'esteriliz', 'castra'), 120),
+    (('urgenc', 'emergenc'), 45),
+    (('vacun', 'control', 'desparasit', 'curaci'), 15),
+]
+
+
+def duracion_para(motivo):
+    """Duración sugerida según el motivo de la consulta."""
+    texto = (motivo or '').lower()
+    for fragmentos, minutos in DURACIONES_POR_MOTIVO:
+        if any(f in texto for f in fragmentos):
+            return minutos
+    return DURACION_POR_DEFECTO
+
+
+def fin_de(cita):
+    return cita.fecha_hora + datetime.timedelta(minutes=cita.duracion)
+
+
+def citas_que_topan(veterinario, inicio, fin, excluir=None):
+    """Citas activas del veterinario que se topan con ``[inicio, fin)``."""
+    candidatas = Cita.objects.filter(
+        veterinario=veterinario,
+        estado__in=ESTADOS_OCUPAN,
+        fecha_hora__gt=inicio - datetime.timedelta(minutes=DURACION_MAX),
+        fecha_hora__lt=fin,
+    ).select_related('paciente').order_by('fecha_hora')
+    if excluir is not None:
+        candidatas = candidatas.exclude(pk=excluir)
+    return [c for c in candidatas if fin_de(c) > inicio]
+
+
+class IndiceIntervalos:
+    """
+    Citas de un veterinario ordenadas por inicio. ``topes`` busca por
+    bisección el tramo de inicios posibles, así cada consulta cuesta
+    O(log n + k) con k el número de citas en la ventana de ``DURACION_MAX``.
+    """
+
+    def __init__(self, citas=()):
+        self._inicios = []
+        self._citas = []
+        for cita in citas:
+            self.agregar(cita)
+
+    def __len__(self):
+        return len(self._citas)
+
+    def agregar(self, cita):
+        i = bisect.bisect_right(self._inicios, cita.fecha_hora)
+        self._inicios.insert(i, cita.fecha_hora)
+        self._citas.insert(i, cita)
+
+    def topes(self, inicio, fin, excluir=None):
+        desde = bisect.bisect_right(self._inicios, inicio - datetime.timedelta(minutes=DURACION_MAX))
+        hasta = bisect.bisect_left(self._inicios, fin)
+        return [
+            c for c in self._citas[desde:hasta]
+            if fin_de(c) > inicio and (excluir is None or c.pk != excluir)
+        ]
+
+    def libre(self, inicio, fin, excluir=None):
+        return not self.topes(inicio, fin, excluir)
+
+
+def indice_del_dia(veterinario, fecha):
+    """``IndiceIntervalos`` con las citas activas del veterinario en ``fecha`` (una consulta)."""
+    inicio, fin = rango_del_dia(fecha)
+    return IndiceIntervalos(Cita.objects.filter(
+        veterinario=veterinario,
+        estado__in=ESTADOS_OCUPAN,
+        fecha_hora__gt=inicio - datetime.timedelta(minutes=DURACION_MAX),
+        fecha_hora__lt=fin,
+    ).select_related('paciente'))
+
+
+def hora_local(fecha_hora):
+    return timezone.localtime(fecha_hora).strftime('%H:%M')
+
+
+def mensaje_tope(topes):
+    cita = topes[0]
+    return (
+        f"El veterinario ya tiene una cita de {cita.paciente.nombre} entre "
+        f"{hora_local(cita.fecha_hora)} y {hora_local(fin_de(cita))}."
+    )
+
+
+def guardar_cita(cita):
+    """
+    Guarda la cita si no topa con otra del mismo veterinario. La fila del
+    veterinario se bloquea mientras se revisa y se guarda, así dos reservas
+    simultáneas para él se atienden de a una; en PostgreSQL la restricción de
+    exclusión es además la última palabra. Lanza ``ValidationError`` si topa.
+    """
+    try:
+        with transaction.atomic():
+            list(Veterinario.objects.select_for_update().filter(pk=cita.veterinario_id).values_list('pk'))
+            if cita.estado in ESTADOS_OCUPAN:
+                topes = citas_que_topan(cita.veterinario_id, cita.fecha_hora, fin_de(cita), excluir=cita.pk)
+                if topes:
+                    raise ValidationError(mensaje_tope(topes))
+            cita.save()
+    except IntegrityError as e:
+        if RESTRICCION not in str(e):
+            raise
+        raise ValidationError("El veterinario ya tiene una cita en ese horario.")
+    return cita
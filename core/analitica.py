@@ -0,0 +1,167 @@
+# core/analitica.py
+
+"""
+Tablas dinámicas de ingresos: visitas, monto facturado y monto cobrado de las
+citas REALIZADO, por período (día, semana o mes) y por veterinario, especie,
+método de pago del pago y método de pago de cada abono, con subtotales.
+
+Todo sale de una sola consulta. La base (cita -> paciente, pago y abonos)
+se arma con el ORM, que resuelve el truncado de fechas con zona horaria en
+cada motor; luego se agrupa con SQL directo:
+
+- PostgreSQL: ``GROUP BY GROUPING SETS``, con ``GROUPING()`` para distinguir
+  una fila de subtotal de un valor NULL (p. ej. cita sin pago).
+- Otros motores (SQLite): un ``SELECT`` por conjunto unidos con ``UNION ALL``
+  sobre la misma CTE, con la marca de agrupación como literal.
+
+Una cita con varios abonos aparece una vez por abono en la base. Para no
+multiplicar la cita, visitas y facturado se cuentan solo en su primera fila
+(``ROW_NUMBER()`` por cita); cobrado suma cada abono. Al agrupar por método
+del abono, la visita y lo facturado quedan en el método del primer abono.
+"""
+
+import datetime
+
+from django.db import connection
+from django.db.models import DateField, DecimalField, F, Value, Window
+from django.db.models.functions import Coalesce, RowNumber, Trunc
+from django.utils import timezone
+
+from .estados_cita import rango_del_dia
+from .models import Cita, Pago, Veterinario, especie_choices
+
+PERIODOS = {'dia': 'day', 'semana': 'week', 'mes': 'month'}
+
+# nombre público -> columna de la base
+DIMENSIONES = {
+    'veterinario': 'veterinario_id',
+    'especie': 'especie',
+    'metodo_pago': 'metodo_pago',
+    'metodo_abono': 'metodo_abono',
+}
+
+
+def _base(desde, hasta, periodo):
+    tz = timezone.get_current_timezone()
+    inicio, _ = rango_del_dia(desde)
+    _, fin = rango_del_dia(hasta)
+    return (
+        Cita.objects.filter(estado='REALIZADO', fecha_hora__gte=inicio, fecha_hora__lt=fin)
+        .order_by()
+        .values(
+            'veterinario_id',
+            periodo=Trunc('fecha_hora', PERIODOS[periodo], output_field=DateField(), tzinfo=tz),
+            especie=F('paciente__especie'),
+            metodo_pago=F('pago__metodo_pago_principal'),
+            metodo_abono=F('pago__abonos__metodo_pago'),
+            monto_cita=Coalesce(F('monto'), Value(0), output_field=DecimalField()),
+            cobrado=Coalesce(F('pago__abonos__monto'), Value(0), output_field=DecimalField()),
+            orden=Window(RowNumber(), partition_by=[F('id')], order_by=F('pago__abonos__id').asc()),
+        )
+    )
+
+
+def conjuntos(dimensiones):
+    """
+    Conjuntos de agrupación: cada dimensión por período y en total, más el
+    subtotal de cada período y el total general.
+    """
+    columnas = [DIMENSIONES[d] for d in dimensiones]
+    resultado = []
+    for columna in columnas:
+        resultado += [('periodo', columna), (columna,)]
+    return resultado + [('periodo',), ()]
+
+
+def _sql(base_sql, columnas, grupos):
+    qn = connection.ops.quote_name
+    todas = ['periodo'] + columnas
+    medidas = (
+        f"SUM(CASE WHEN {qn('orden')} = 1 THEN 1 ELSE 0 END) AS visitas, "
+        f"SUM(CASE WHEN {qn('orden')} = 1 THEN {qn('monto_cita')} ELSE 0 END) AS facturado, "
+        f"SUM({qn('cobrado')}) AS cobrado"
+    )
+    cte = f"WITH base AS ({base_sql}) "
+    if connection.vendor == 'postgresql':
+        marcas = ', '.join(f"GROUPING({qn(c)}) AS g_{c}" for c in todas)
+        sets = ', '.join('(' + ', '.join(qn(c) for c in grupo) + ')' for grupo in grupos)
+        return (
+            f"{cte}SELECT {', '.join(qn(c) for c in todas)}, {marcas}, {medidas} "
+            f"FROM base GROUP BY GROUPING SETS ({sets})"
+        )
+    selects = []
+    for grupo in grupos:
+        valores = ', '.join(qn(c) if c in grupo else f'NULL AS {qn(c)}' for c in todas)
+        marcas = ', '.join(f"{0 if c in grupo else 1} AS g_{c}" for c in todas)
+        agrupar = f" GROUP BY {', '.join(qn(c) for c in grupo)}" if grupo else ''
+        selects.append(f"SELECT {valores}, {marcas}, {medidas} FROM base{agrupar}")
+    return cte + ' UNION ALL '.join(selects)
+
+
+def _fecha(valor):
+    if valor is None or isinstance(valor, datetime.date) and not isinstance(valor, datetime.datetime):
+        return valor
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+
+def pivote(desde, hasta, periodo='mes', dimensiones=tuple(DIMENSIONES)):
+    """
+    Retorna ``{'filas': [...], 'total': {...}}``. Cada fila trae ``periodo``
+    (``None`` en los totales de todo el rango), ``dimension`` (``None`` en los
+    subtotales por período), ``clave``, ``etiqueta`` y las medidas
+    ``visitas``, ``facturado`` y ``cobrado``.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo}")
+    dimensiones = [d for d in DIMENSIONES if d in dimensiones]
+    columnas = [DIMENSIONES[d] for d in dimensiones]
+    base_sql, parametros = _base(desde, hasta, periodo).query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(_sql(base_sql, columnas, conjuntos(dimensiones)), parametros)
+        nombres = [c[0] for c in cursor.description]
+        filas = [dict(zip(nombres, fila)) for fila in cursor.fetchall()]
+
+    etiquetas = _etiquetas(filas)
+    resultado = {'filas': [], 'total': None}
+    for fila in filas:
+        medidas = {
+            'visitas': int(fila['visitas'] or 0),
+            'facturado': float(fila['facturado'] or 0),
+            'cobrado': float(fila['cobrado'] or 0),
+        }
+        agrupadas = [d for d in dimensiones if not fila[f'g_{DIMENSIONES[d]}']]
+        con_periodo = not fila['g_periodo']
+        if not agrupadas and not con_periodo:
+            resultado['total'] = medidas
+            continue
+        dimension = agrupadas[0] if agrupadas else None
+        clave = fila[DIMENSIONES[dimension]] if dimension else None
+        resultado['filas'].append({
+            'periodo': _fecha(fila['periodo']) if con_periodo else None,
+            'dimension': dimension,
+            'clave': clave,
+            'etiqueta': etiquetas.get(dimension, {}).get(clave, clave or 'Sin dato') if dimension else None,
+            **medidas,
+        })
+    resultado['filas'].sort(key=lambda f: (
+        f['periodo'] is None, f['periodo'] or datetime.date.min, f['dimension'] or '', str(f['etiqueta'] or '')
+    ))
+    resultado['total'] = resultado['total'] or {'visitas': 0, 'facturado': 0.0, 'cobrado': 0.0}
+    return resultado
+
+
+def _etiquetas(filas):
+    metodos = dict(Pago.METODO_PAGO_CHOICES)
+    ids = {f['veterinario_id'] for f in filas if f.get('veterinario_id') is not None}
+    veterinarios = {
+        v.pk: str(v) for v in Veterinario.objects.filter(pk__in=ids).select_related('usuario')
+    } if ids else {}
+    return {
+        'veterinario': veterinarios,
+        'especie': dict(especie_choices),
+        'metodo_pago': metodos,
+        'metodo_abono': metodos,
+    }
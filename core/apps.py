@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from . import auditoria
+        auditoria.conectar()
+        from . import metricas
+        metricas.conectar()
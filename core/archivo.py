@@ -0,0 +1,154 @@
+# core/archivo.py
+
+"""
+Archivo de citas e historiales clínicos antiguos.
+
+Las filas anteriores a un corte se mueven (INSERT ... SELECT + DELETE, por
+lotes y en transacciones cortas) a tablas de archivo con las mismas
+columnas e id (ver los modelos ``*Archivada``/``*Archivado``):
+
+- Citas en estado final (REALIZADO, CANCELADA, NO_ASISTIO) sin saldo
+  pendiente, junto con su pago, sus abonos y el historial asociado. Las
+  citas con deuda se quedan en las tablas activas (cuentas por cobrar).
+- Historiales clínicos antiguos cuya cita ya no esté en la tabla activa o
+  que no tengan cita.
+
+Los DELETE directos no envían ``post_delete``: cada lote deja un registro de
+auditoría ``MASIVA`` (ver core/auditoria.py).
+
+La lectura es explícita: la ficha y los reportes incluyen el archivo solo
+cuando se pide (``?archivo=1``).
+"""
+
+from itertools import chain
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import auditoria, cache_reportes
+from .models import (
+    Cita, Pago, Abono, HistorialClinico, CupoAgenda,
+    CitaArchivada, PagoArchivado, AbonoArchivado, HistorialClinicoArchivado
+)
+
+ESTADOS_FINALES = ['REALIZADO', 'CANCELADA', 'NO_ASISTIO']
+# Límite de parámetros por sentencia (SQLite antiguo admite 999)
+MAX_PARAMETROS = 500
+
+
+def _trozos(ids):
+    for i in range(0, len(ids), MAX_PARAMETROS):
+        yield ids[i:i + MAX_PARAMETROS]
+
+
+def _mover(origen, destino, ids, ahora):
+    """Copia las filas ``ids`` de ``origen`` a ``destino`` (mismas columnas)."""
+    qn = connection.ops.quote_name
+    columnas = ', '.join(
+        qn(f.column) for f in destino._meta.concrete_fields if f.name != 'archivada_en'
+    )
+    with connection.cursor() as cursor:
+        for trozo in _trozos(ids):
+            marcadores = ', '.join(['%s'] * len(trozo))
+            cursor.execute(
+                f"INSERT INTO {qn(destino._meta.db_table)} ({columnas}, {qn('archivada_en')}) "
+                f"SELECT {columnas}, %s FROM {qn(origen._meta.db_table)} WHERE {qn('id')} IN ({marcadores})",
+                [ahora, *trozo],
+            )
+
+
+def _borrar(modelo, ids):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for trozo in _trozos(ids):
+            marcadores = ', '.join(['%s'] * len(trozo))
+            cursor.execute(
+                f"DELETE FROM {qn(modelo._meta.db_table)} WHERE {qn('id')} IN ({marcadores})", trozo
+            )
+
+
+def citas_archivables(corte):
+    return (
+        Cita.objects.filter(fecha_hora__lt=corte, estado__in=ESTADOS_FINALES)
+        .filter(Q(pago__isnull=True) | Q(pago__estado='PAGADO'))
+        .order_by('fecha_hora')
+    )
+
+
+def historiales_archivables(corte):
+    # Los que tienen una cita activa esperan a que se archive la cita
+    return HistorialClinico.objects.filter(fecha_atencion__lt=corte, cita__isnull=True).order_by('fecha_atencion')
+
+
+def archivar_citas(corte, lote=500):
+    """
+    Archiva por lotes las citas anteriores a ``corte`` con sus pagos, abonos e
+    historiales. Genera la cantidad de citas movidas en cada lote.
+    """
+    while True:
+        with transaction.atomic():
+            filas = list(citas_archivables(corte).values_list('pk', 'fecha_hora')[:lote])
+            if not filas:
+                return
+            ids = [pk for pk, _ in filas]
+            pagos = list(Pago.objects.filter(cita_id__in=ids).values_list('pk', flat=True))
+            abonos = list(Abono.objects.filter(pago_id__in=pagos).values_list('pk', flat=True))
+            historiales = list(HistorialClinico.objects.filter(cita_id__in=ids).values_list('pk', flat=True))
+            ahora = timezone.now()
+            # Padres antes que hijos al copiar; al revés al borrar
+            _mover(Cita, CitaArchivada, ids, ahora)
+            _mover(Pago, PagoArchivado, pagos, ahora)
+            _mover(Abono, AbonoArchivado, abonos, ahora)
+            _mover(HistorialClinico, HistorialClinicoArchivado, historiales, ahora)
+            _borrar(Abono, abonos)
+            _borrar(Pago, pagos)
+            _borrar(HistorialClinico, historiales)
+            # El DELETE directo no aplica el SET_NULL de los cupos que aún apunten a ellas
+            CupoAgenda.objects.filter(cita_id__in=ids).update(cita=None)
+            _borrar(Cita, ids)
+            auditoria.auditar_borrado_masivo(Cita, 'archivo', ids, {
+                Cita._meta.db_table: len(ids),
+                Pago._meta.db_table: len(pagos),
+                Abono._meta.db_table: len(abonos),
+                HistorialClinico._meta.db_table: len(historiales),
+            })
+            # Los reportes sin archivo de esos meses cambian
+            meses = {cache_reportes.mes_de(fecha) for _, fecha in filas}
+            transaction.on_commit(lambda: cache_reportes.invalidar_meses(meses))
+        yield len(ids)
+        if len(ids) < lote:
+            return
+
+
+def archivar_historiales(corte, lote=500):
+    """Archiva por lotes los historiales sin cita activa anteriores a ``corte``."""
+    while True:
+        with transaction.atomic():
+            ids = list(historiales_archivables(corte).values_list('pk', flat=True)[:lote])
+            if not ids:
+                return
+            _mover(HistorialClinico, HistorialClinicoArchivado, ids, timezone.now())
+            _borrar(HistorialClinico, ids)
+            auditoria.auditar_borrado_masivo(HistorialClinico, 'archivo', ids, {HistorialClinico._meta.db_table: len(ids)})
+        yield len(ids)
+        if len(ids) < lote:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+def historial_con_archivo(paciente, historial):
+    """``historial`` (consultas activas) más las archivadas, por fecha descendente."""
+    archivados = HistorialClinicoArchivado.objects.filter(paciente=paciente).select_related('veterinario__usuario')
+    return sorted(chain(historial, archivados), key=lambda h: h.fecha_atencion, reverse=True)
+
+
+def citas_archivadas_realizadas(fecha_inicio, fecha_fin, paciente=None):
+    """Citas archivadas REALIZADO del rango (las que suma el reporte de ingresos)."""
+    archivadas = CitaArchivada.objects.filter(estado='REALIZADO', fecha_hora__date__range=[fecha_inicio, fecha_fin])
+    if paciente:
+        archivadas = archivadas.filter(paciente=paciente)
+    return archivadas
@@ -0,0 +1,177 @@
+# core/arranque.py
+
+"""
+Costo de arranque en frío: lo que paga un worker recién levantado antes de
+responder su primera petición.
+
+``medir_arranque`` lanza procesos nuevos de Python (uno por repetición) que
+ejecutan ``medir`` y devuelven:
+
+- ``setup_ms``: importar Django, ``django.setup()`` (apps, modelos, señales)
+  y armar la cadena de middlewares, como hace ``get_wsgi_application``.
+- ``urls_ms``: importar ``ROOT_URLCONF`` y construir el índice de rutas.
+- ``primera_ms`` / ``segunda_ms``: la primera petición a ``ruta`` a través
+  del handler WSGI y una segunda ya en caliente.
+- ``proceso_ms``: el proceso completo visto desde afuera (incluye levantar
+  el intérprete).
+- ``vistas_tras_urls`` / ``vistas_tras_primera``: módulos de
+  ``core.views`` importados en cada punto.
+
+``comparar`` revisa que las URL no importen vistas, que la primera petición
+cargue solo el módulo de su vista y, si hay una medición de referencia,
+que ningún tiempo la supere en más de ``tolerancia`` (y ``margen_ms``, para
+que el ruido en tiempos chicos no cuente como regresión). La referencia
+versionada es ``REFERENCIA`` en la raíz del repositorio; build.sh y los tests
+comparan contra ella con márgenes amplios, porque se midió en otra máquina.
+
+Este módulo solo importa la biblioteca estándar al cargarse, para no
+adelantar nada de lo que mide.
+"""
+
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TIEMPOS = ('setup_ms', 'urls_ms', 'primera_ms', 'segunda_ms', 'proceso_ms')
+# Lo que se compara contra la referencia; la segunda petición no es arranque
+COMPARADOS = ('setup_ms', 'urls_ms', 'primera_ms', 'proceso_ms')
+# Medición de referencia (benchmark_arranque --guardar), relativa a BASE_DIR
+REFERENCIA = 'arranque.json'
+
+
+def _vistas_cargadas():
+    return sorted(nombre for nombre in sys.modules if nombre.startswith('core.views.'))
+
+
+def _pedir(aplicacion, ruta):
+    estado = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': ruta,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    respuesta = aplicacion(environ, lambda status, headers, exc_info=None: estado.append(status))
+    try:
+        for _ in respuesta:
+            pass
+    finally:
+        if hasattr(respuesta, 'close'):
+            respuesta.close()
+    return int(estado[0].split()[0])
+
+
+def medir(ruta):
+    """Lado del proceso hijo: mide y escribe el resultado como JSON en stdout."""
+    inicio = time.perf_counter()
+    from django.core.wsgi import get_wsgi_application
+    aplicacion = get_wsgi_application()
+    fin_setup = time.perf_counter()
+
+    from django.urls import get_resolver, resolve
+    get_resolver().reverse_dict
+    fin_urls = time.perf_counter()
+    vistas_tras_urls = _vistas_cargadas()
+
+    estado = _pedir(aplicacion, ruta)
+    fin_primera = time.perf_counter()
+    vistas_tras_primera = _vistas_cargadas()
+
+    _pedir(aplicacion, ruta)
+    fin_segunda = time.perf_counter()
+
+    print(json.dumps({
+        'ruta': ruta,
+        'estado': estado,
+        'modulo_vista': resolve(ruta).func.__module__,
+        'setup_ms': (fin_setup - inicio) * 1000,
+        'urls_ms': (fin_urls - fin_setup) * 1000,
+        'primera_ms': (fin_primera - fin_urls) * 1000,
+        'segunda_ms': (fin_segunda - fin_primera) * 1000,
+        'modulos': len(sys.modules),
+        'vistas_tras_urls': vistas_tras_urls,
+        'vistas_tras_primera': vistas_tras_primera,
+    }))
+
+
+def medir_arranque(ruta='/login/', repeticiones=5, directorio=None):
+    """
+    Mide ``repeticiones`` arranques en procesos nuevos con la misma
+    configuración (``DJANGO_SETTINGS_MODULE``) que el proceso actual.
+    Retorna la mediana de cada tiempo y los datos del primer proceso.
+    """
+    from django.conf import settings
+
+    directorio = directorio or str(settings.BASE_DIR)
+    entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+    corridas = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run(
+            [sys.executable, '-c', f'from core.arranque import medir; medir({ruta!r})'],
+            cwd=directorio, env=entorno, capture_output=True, text=True, check=False,
+        )
+        proceso_ms = (time.perf_counter() - inicio) * 1000
+        if proceso.returncode != 0:
+            raise RuntimeError(f"El proceso de medición falló:\n{proceso.stderr.strip()}")
+        corrida = json.loads(proceso.stdout.strip().splitlines()[-1])
+        corrida['proceso_ms'] = proceso_ms
+        corridas.append(corrida)
+
+    resultado = dict(corridas[0])
+    for clave in TIEMPOS:
+        resultado[clave] = round(statistics.median(c[clave] for c in corridas), 1)
+    resultado['repeticiones'] = repeticiones
+    return resultado
+
+
+def cargar_referencia(ruta=None):
+    """La referencia en ``ruta`` (default: la versionada); None si no existe."""
+    if ruta is None:
+        from django.conf import settings
+        ruta = os.path.join(settings.BASE_DIR, REFERENCIA)
+        if not os.path.exists(ruta):
+            return None
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar(resultado, referencia=None, tolerancia=0.25, margen_ms=20):
+    """Lista de problemas (vacía si el arranque está bien)."""
+    problemas = []
+    if resultado['estado'] >= 500:
+        problemas.append(f"{resultado['ruta']} respondió {resultado['estado']}")
+    if resultado['vistas_tras_urls']:
+        problemas.append(
+            "Importar las URL cargó vistas: " + ', '.join(resultado['vistas_tras_urls'])
+            + " (registrarlas con perezosa())"
+        )
+    ajenas = [m for m in resultado['vistas_tras_primera'] if m != resultado['modulo_vista']]
+    if ajenas:
+        problemas.append(
+            f"La primera petición a {resultado['ruta']} cargó además: " + ', '.join(ajenas)
+        )
+    for clave in COMPARADOS if referencia else ():
+        if clave not in referencia:
+            continue
+        limite = referencia[clave] * (1 + tolerancia) + margen_ms
+        if resultado[clave] > limite:
+            problemas.append(
+                f"{clave}: {resultado[clave]:.1f} ms supera la referencia "
+                f"({referencia[clave]:.1f} ms + {tolerancia:.0%} + {margen_ms} ms = {limite:.1f} ms)"
+            )
+    return problemas
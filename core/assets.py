@@ -0,0 +1,178 @@
+# core/assets.py
+
+"""
+Pipeline de archivos estáticos.
+
+En el build (ver build.sh) se descargan las librerías que antes se cargaban
+desde CDN a ``vendor/`` (fuera de los estáticos servidos) y se empaquetan
+junto a nuestro JavaScript en un único ``static/dist/app.js`` (y un
+``static/dist/app.css``). Luego
+``collectstatic`` les agrega el hash de contenido al nombre y genera las
+variantes .gz/.br que WhiteNoise sirve con caché de largo plazo.
+
+Cada librería tiene su sha256 fijado en ``vendor.sha256`` (formato de
+``sha256sum``, versionado en el repositorio). Un archivo descargado que no
+coincide detiene el build; al cambiar de versión se regenera con
+``construir_assets --fijar-hashes`` y se revisa el diff antes de confirmarlo.
+"""
+
+import hashlib
+import re
+import shutil
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+
+BASE_DIR = Path(settings.BASE_DIR)
+VENDOR_DIR = BASE_DIR / 'vendor'
+HASHES_VENDOR = BASE_DIR / 'vendor.sha256'
+DIST_DIR = BASE_DIR / 'static' / 'dist'
+
+CDN = 'https://cdn.jsdelivr.net/npm'
+
+# (ruta local dentro de vendor/, URL de origen) — versiones fijas
+VENDOR = [
+    ('bootstrap/bootstrap.min.css', f'{CDN}/bootstrap@5.3.3/dist/css/bootstrap.min.css'),
+    ('bootstrap/bootstrap.bundle.min.js', f'{CDN}/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js'),
+    ('bootstrap-icons/bootstrap-icons.min.css', f'{CDN}/bootstrap-icons@1.11.3/font/bootstrap-icons.min.css'),
+    ('bootstrap-icons/fonts/bootstrap-icons.woff2', f'{CDN}/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2'),
+    ('bootstrap-icons/fonts/bootstrap-icons.woff', f'{CDN}/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff'),
+    ('chartjs/chart.umd.min.js', f'{CDN}/chart.js@4.4.0/dist/chart.umd.min.js'),
+]
+
+# Orden de concatenación: las librerías antes que el código que las usa
+BUNDLE_JS = [
+    'vendor/bootstrap/bootstrap.bundle.min.js',
+    'vendor/chartjs/chart.umd.min.js',
+    'static/js/theme.js',
+    'static/js/dashboard-charts.js',
+    'static/js/horarios.js',
+]
+BUNDLE_CSS = [
+    'vendor/bootstrap/bootstrap.min.css',
+    'vendor/bootstrap-icons/bootstrap-icons.min.css',
+]
+# Archivos que deben acompañar al bundle CSS (origen, ruta relativa a dist/)
+BUNDLE_FONTS = [
+    ('vendor/bootstrap-icons/fonts/bootstrap-icons.woff2', 'fonts/bootstrap-icons.woff2'),
+    ('vendor/bootstrap-icons/fonts/bootstrap-icons.woff', 'fonts/bootstrap-icons.woff'),
+]
+
+# collectstatic intenta resolver los source maps referenciados y falla si no existen
+SOURCE_MAP_RE = re.compile(r'^\s*(//|/\*)# sourceMappingURL=.*$', re.MULTILINE)
+# Las fuentes de bootstrap-icons traen un hash como query string; el manifest ya versiona
+FONT_QUERY_RE = re.compile(r'(fonts/bootstrap-icons\.woff2?)\?[0-9a-f]+')
+
+
+class VendorInvalido(Exception):
+    """Una librería externa no tiene hash fijado o su contenido no coincide con él."""
+
+
+def sha256(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def leer_hashes(ruta=None):
+    """``{ruta dentro de vendor/: sha256}`` según ``vendor.sha256``."""
+    ruta = Path(ruta or HASHES_VENDOR)
+    if not ruta.exists():
+        return {}
+    hashes = {}
+    for linea in ruta.read_text(encoding='utf-8').splitlines():
+        linea = linea.strip()
+        if not linea or linea.startswith('#'):
+            continue
+        valor, archivo = linea.split(maxsplit=1)
+        hashes[archivo.lstrip('*')] = valor.lower()
+    return hashes
+
+
+def _descargar(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as respuesta:
+        return respuesta.read()
+
+
+def descargar_vendor(forzar=False, timeout=30, hashes=None):
+    """
+    Descarga las librerías externas que falten (o cuyo contenido no coincida
+    con su hash) y las verifica. Retorna la lista de rutas descargadas.
+    Lanza ``VendorInvalido`` si falta un hash o una descarga no coincide.
+    """
+    hashes = leer_hashes() if hashes is None else hashes
+    descargados = []
+    for ruta, url in VENDOR:
+        esperado = hashes.get(ruta)
+        if esperado is None:
+            raise VendorInvalido(f"vendor/{ruta} no tiene sha256 fijado en {HASHES_VENDOR.name}")
+        destino = VENDOR_DIR / ruta
+        if destino.exists() and not forzar and sha256(destino.read_bytes()) == esperado:
+            continue
+        contenido = _descargar(url, timeout)
+        obtenido = sha256(contenido)
+        if obtenido != esperado:
+            raise VendorInvalido(f"{url}: sha256 {obtenido}, se esperaba {esperado}")
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_bytes(contenido)
+        descargados.append(ruta)
+    return descargados
+
+
+def fijar_hashes(timeout=30):
+    """Descarga cada librería y reescribe ``vendor.sha256``. Retorna ``{ruta: sha256}``."""
+    hashes = {ruta: sha256(_descargar(url, timeout)) for ruta, url in VENDOR}
+    lineas = [
+        '# sha256 de las librerías de vendor/ (ver core/assets.py).',
+        '# Regenerar con: python manage.py construir_assets --fijar-hashes',
+    ]
+    lineas += [f'{valor}  {ruta}' for ruta, valor in hashes.items()]
+    HASHES_VENDOR.write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+    return hashes
+
+
+def _leer(ruta):
+    return (BASE_DIR / ruta).read_text(encoding='utf-8')
+
+
+def minificar_js(codigo):
+    import rjsmin
+    return rjsmin.jsmin(codigo)
+
+
+def construir_js(minificar=True):
+    partes = []
+    for ruta in BUNDLE_JS:
+        codigo = SOURCE_MAP_RE.sub('', _leer(ruta))
+        if minificar and not ruta.startswith('vendor/'):
+            codigo = minificar_js(codigo)
+        partes.append(f'/* {ruta} */\n{codigo.strip()}')
+    return ';\n'.join(partes) + ';\n'
+
+
+def construir_css():
+    partes = []
+    for ruta in BUNDLE_CSS:
+        codigo = SOURCE_MAP_RE.sub('', _leer(ruta))
+        codigo = FONT_QUERY_RE.sub(r'\1', codigo)
+        partes.append(f'/* {ruta} */\n{codigo.strip()}')
+    return '\n'.join(partes) + '\n'
+
+
+def construir_bundles(minificar=True):
+    """Escribe dist/app.js, dist/app.css y sus fuentes. Retorna {ruta: bytes}."""
+    DIST_DIR.mkdir(parents=True, exist_ok=True)
+    salida = {
+        'app.js': construir_js(minificar=minificar),
+        'app.css': construir_css(),
+    }
+    tamanos = {}
+    for nombre, contenido in salida.items():
+        destino = DIST_DIR / nombre
+        destino.write_text(contenido, encoding='utf-8')
+        tamanos[f'dist/{nombre}'] = destino.stat().st_size
+    for origen, destino in BUNDLE_FONTS:
+        destino = DIST_DIR / destino
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(BASE_DIR / origen, destino)
+        tamanos[f'dist/{destino.relative_to(DIST_DIR).as_posix()}'] = destino.stat().st_size
+    return tamanos
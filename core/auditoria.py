@@ -0,0 +1,272 @@
+# core/auditoria.py
+
+"""
+Registro de auditoría de los cambios clínicos y de pagos.
+
+Las señales ``post_save``/``post_delete`` de los modelos de ``AUDITADOS``
+calculan la diferencia contra los valores con que se cargó la instancia
+(guardados en ``post_init``, sin consultas extra) y dejan un
+``RegistroAuditoria`` sin guardar en un buffer en memoria:
+
+- Solo entra al buffer si la transacción se confirma (``on_commit``); un
+  cambio revertido no queda registrado.
+- El buffer se escribe con un solo ``bulk_create`` al terminar la petición
+  (después de enviar la respuesta) o al juntar ``AUDITORIA_LOTE`` registros,
+  así guardar una consulta o un abono no suma un INSERT por objeto.
+- Si el proceso muere, se pierden a lo más los registros aún en el buffer.
+
+Las transiciones masivas de citas y los borrados por SQL directo (purga y
+archivo) dejan un solo registro ``MASIVA`` por operación o lote.
+
+El paciente de cada registro se toma de las relaciones ya cargadas; si no lo
+están (p. ej. un ``Abono`` cuyo pago no trae la cita), se resuelve al vaciar
+el buffer con una consulta por modelo.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from .estados_cita import citas_transicionadas
+from .models import (
+    Abono, Alergia, Cirugia, Cita, HistorialClinico, Pago, RegistroAuditoria, Vacuna
+)
+
+logger = logging.getLogger(__name__)
+
+# modelo -> ruta hasta el id del paciente
+AUDITADOS = {
+    HistorialClinico: 'paciente_id',
+    Vacuna: 'paciente_id',
+    Cirugia: 'paciente_id',
+    Alergia: 'paciente_id',
+    Cita: 'paciente_id',
+    Pago: 'cita__paciente_id',
+    Abono: 'pago__cita__paciente_id',
+}
+IGNORADOS = {'created_at', 'updated_at'}
+
+_contexto = threading.local()
+
+
+class AuditoriaMiddleware:
+    """Deja disponible el usuario de la petición para los registros de auditoría."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _contexto.request = request
+        try:
+            return self.get_response(request)
+        finally:
+            _contexto.request = None
+
+
+def _usuario():
+    request = getattr(_contexto, 'request', None)
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.pk, usuario.email
+    return None, ''
+
+
+class Buffer:
+    """Registros confirmados pendientes de escribir, compartido por los hilos del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._registros = []
+
+    def __len__(self):
+        return len(self._registros)
+
+    def agregar(self, registro):
+        with self._lock:
+            self._registros.append(registro)
+            lleno = len(self._registros) >= settings.AUDITORIA_LOTE
+        if lleno:
+            self.vaciar()
+
+    def vaciar(self):
+        with self._lock:
+            registros, self._registros = self._registros, []
+        if not registros:
+            return 0
+        try:
+            _resolver_pacientes(registros)
+            RegistroAuditoria.objects.bulk_create(registros, batch_size=500)
+        except DatabaseError:
+            logger.exception("No se pudieron guardar %s registros de auditoría", len(registros))
+            self._reintentar(registros)
+            return 0
+        return len(registros)
+
+    def _reintentar(self, registros):
+        # Vuelven al buffer delante de los que llegaron entre medio, para el próximo vaciado
+        with self._lock:
+            self._registros = registros + self._registros
+            sobrantes = len(self._registros) - settings.AUDITORIA_MAX_PENDIENTES
+            if sobrantes > 0:
+                del self._registros[:sobrantes]
+        if sobrantes > 0:
+            logger.error("Se descartaron %s registros de auditoría: buffer lleno sin poder escribir", sobrantes)
+
+
+buffer = Buffer()
+
+
+# ---------------------------------------------------------------------------
+# Captura
+# ---------------------------------------------------------------------------
+
+def _campos(modelo):
+    return [f for f in modelo._meta.concrete_fields if f.name not in IGNORADOS]
+
+
+def _valores(instance):
+    # Los campos diferidos (.only/.defer) no están en __dict__ y se omiten
+    return {f.attname: instance.__dict__[f.attname] for f in _campos(type(instance)) if f.attname in instance.__dict__}
+
+
+def _paciente_id(instance, ruta):
+    """Id del paciente usando solo relaciones ya cargadas; ``None`` si falta alguna."""
+    *relaciones, campo = ruta.split('__')
+    objeto = instance
+    for nombre in relaciones:
+        if not objeto._meta.get_field(nombre).is_cached(objeto):
+            return None
+        objeto = getattr(objeto, nombre)
+    return getattr(objeto, campo)
+
+
+def _registrar(instance, accion, cambios):
+    usuario_id, email = _usuario()
+    registro = RegistroAuditoria(
+        fecha=timezone.now(),
+        usuario_id=usuario_id,
+        usuario_email=email,
+        modelo=type(instance).__name__,
+        objeto_id=instance.pk,
+        paciente_id=_paciente_id(instance, AUDITADOS[type(instance)]),
+        accion=accion,
+        cambios=cambios,
+    )
+    transaction.on_commit(lambda: buffer.agregar(registro))
+
+
+def recordar_valores(sender, instance, **kwargs):
+    instance._auditoria_original = _valores(instance)
+
+
+def auditar_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    actual = _valores(instance)
+    if created:
+        cambios = {campo: [None, valor] for campo, valor in actual.items() if valor not in (None, '')}
+    else:
+        original = getattr(instance, '_auditoria_original', {})
+        cambios = {
+            campo: [original[campo], valor]
+            for campo, valor in actual.items()
+            if campo in original and original[campo] != valor
+        }
+        if not cambios:
+            return
+    instance._auditoria_original = actual
+    _registrar(instance, 'CREAR' if created else 'MODIFICAR', cambios)
+
+
+def auditar_eliminacion(sender, instance, **kwargs):
+    valores = getattr(instance, '_auditoria_original', None) or _valores(instance)
+    _registrar(instance, 'ELIMINAR', {campo: [valor, None] for campo, valor in valores.items()})
+
+
+def auditar_transicion_masiva(sender, estado, origenes, cantidad, veterinario_id, desde, hasta, **kwargs):
+    # Se envía ya confirmada la transacción (ver estados_cita.transicionar)
+    usuario_id, email = _usuario()
+    buffer.agregar(RegistroAuditoria(
+        fecha=timezone.now(),
+        usuario_id=usuario_id,
+        usuario_email=email,
+        modelo='Cita',
+        accion='MASIVA',
+        cambios={
+            'estado': [origenes, estado],
+            'cantidad': cantidad,
+            'veterinario_id': veterinario_id,
+            'desde': desde,
+            'hasta': hasta,
+        },
+    ))
+
+
+def auditar_borrado_masivo(modelo, operacion, ids, filas, usuario=None, paciente_id=None):
+    """
+    Un registro MASIVA por lote borrado con SQL directo (core/purga.py,
+    core/archivo.py): esos DELETE no envían ``post_delete``. ``filas`` son las
+    filas borradas por tabla.
+    """
+    usuario_id, email = (usuario.pk, usuario.email) if usuario else _usuario()
+    ids = list(ids)
+    registro = RegistroAuditoria(
+        fecha=timezone.now(),
+        usuario_id=usuario_id,
+        usuario_email=email,
+        modelo=modelo.__name__,
+        objeto_id=ids[0] if len(ids) == 1 else None,
+        paciente_id=paciente_id,
+        accion='MASIVA',
+        cambios={
+            'operacion': operacion,
+            'ids': ids,
+            'filas': filas,
+            'total': sum(filas.values()),
+        },
+    )
+    transaction.on_commit(lambda: buffer.agregar(registro))
+
+
+def _resolver_pacientes(registros):
+    pendientes = {}
+    for registro in registros:
+        if registro.paciente_id is None and registro.objeto_id is not None and registro.accion not in ('ELIMINAR', 'MASIVA'):
+            pendientes.setdefault(registro.modelo, []).append(registro)
+    modelos = {modelo.__name__: modelo for modelo in AUDITADOS}
+    for nombre, lista in pendientes.items():
+        ruta = AUDITADOS[modelos[nombre]]
+        ids = dict(modelos[nombre]._base_manager.filter(
+            pk__in={r.objeto_id for r in lista}
+        ).values_list('pk', ruta))
+        for registro in lista:
+            registro.paciente_id = ids.get(registro.objeto_id)
+
+
+def conectar():
+    """Conecta las señales; se llama desde ``CoreConfig.ready``."""
+    for modelo in AUDITADOS:
+        uid = f'auditoria_{modelo.__name__}'
+        post_init.connect(recordar_valores, sender=modelo, dispatch_uid=uid)
+        post_save.connect(auditar_guardado, sender=modelo, dispatch_uid=uid)
+        post_delete.connect(auditar_eliminacion, sender=modelo, dispatch_uid=uid)
+    citas_transicionadas.connect(auditar_transicion_masiva, sender=Cita, dispatch_uid='auditoria_masiva')
+    request_finished.connect(lambda **kwargs: buffer.vaciar(), weak=False, dispatch_uid='auditoria_vaciar')
+    atexit.register(buffer.vaciar)
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+def registros_paciente(paciente_id):
+    """Registros de auditoría de un paciente, del más reciente al más antiguo."""
+    # Lo que aún está en el buffer de este proceso también debe aparecer
+    buffer.vaciar()
+    return RegistroAuditoria.objects.filter(paciente_id=paciente_id).order_by('-fecha', '-id')
@@ -0,0 +1,121 @@
+# core/cache_reportes.py
+
+"""
+Caché de resultados del reporte de ingresos (``reportes_view``).
+
+Cada resultado se guarda bajo una clave con sus parámetros (fecha de inicio,
+fecha de fin, paciente, incluir archivo) y con la versión de cada mes que
+cubre el rango. La versión de un mes cambia solo cuando una cita de ese mes
+cambia de estado o de monto, o se borra; así un reporte de meses cerrados se
+sigue sirviendo de la caché indefinidamente y solo se recalculan los que
+tocan el mes en curso (o un mes que se haya corregido).
+
+Las claves antiguas no se borran: quedan huérfanas y el backend de caché las
+descarta por antigüedad. Una versión que el backend haya descartado se
+recrea con un valor nuevo (basado en el reloj), nunca con uno ya usado, para
+que no vuelva a coincidir con un resultado viejo.
+
+Las operaciones masivas que no pasan por ``save()`` (purgas) invalidan todo
+con la versión global.
+
+Se guardan solo datos planos (filas como diccionarios y el total), nunca
+instancias del ORM, y un resultado de más de ``REPORTES_CACHE_MAX_BYTES``
+serializado no se guarda: se calcula en cada petición.
+"""
+
+import datetime
+import hashlib
+import pickle
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+PREFIJO = 'reportes'
+CLAVE_GLOBAL = f'{PREFIJO}:v:global'
+
+
+def _clave_mes(mes):
+    return f'{PREFIJO}:v:{mes:%Y-%m}'
+
+
+def _nueva_version():
+    return time.time_ns()
+
+
+def mes_de(fecha_hora):
+    """Primer día del mes (hora local) de una fecha con hora."""
+    return timezone.localtime(fecha_hora).date().replace(day=1)
+
+
+def meses_entre(inicio, fin):
+    """Primer día de cada mes desde el mes de ``inicio`` hasta el de ``fin``, ambos incluidos."""
+    mes = inicio.replace(day=1)
+    meses = []
+    while mes <= fin:
+        meses.append(mes)
+        mes = (mes + datetime.timedelta(days=32)).replace(day=1)
+    return meses
+
+
+def versiones(meses):
+    """Versión global y de cada mes, creando las que falten (una lectura a la caché)."""
+    claves = [CLAVE_GLOBAL] + [_clave_mes(m) for m in meses]
+    valores = cache.get_many(claves)
+    for clave in claves:
+        if clave not in valores:
+            # add() no pisa la versión si otro proceso la creó entre medio
+            cache.add(clave, _nueva_version(), None)
+            valores[clave] = cache.get(clave)
+    return [valores[clave] for clave in claves]
+
+
+def clave_reporte(fecha_inicio, fecha_fin, paciente_id=None, incluir_archivo=False):
+    firma = hashlib.md5(
+        ':'.join(str(v) for v in versiones(meses_entre(fecha_inicio, fecha_fin))).encode()
+    ).hexdigest()
+    return (
+        f'{PREFIJO}:r:{fecha_inicio:%Y%m%d}:{fecha_fin:%Y%m%d}:'
+        f'{paciente_id or "-"}:{int(bool(incluir_archivo))}:{firma}'
+    )
+
+
+def obtener(fecha_inicio, fecha_fin, paciente_id, incluir_archivo, calcular):
+    """
+    Resultado del reporte desde la caché; si no está (o cambió algún mes del
+    rango) se calcula con ``calcular()`` y se guarda sin vencimiento, salvo
+    que supere ``REPORTES_CACHE_MAX_BYTES``.
+    """
+    clave = clave_reporte(fecha_inicio, fecha_fin, paciente_id, incluir_archivo)
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = calcular()
+        if len(pickle.dumps(resultado, pickle.HIGHEST_PROTOCOL)) <= settings.REPORTES_CACHE_MAX_BYTES:
+            cache.set(clave, resultado, None)
+    return resultado
+
+
+def _subir(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # No existía: ningún resultado en caché depende de ella
+        cache.set(clave, _nueva_version(), None)
+
+
+def invalidar_meses(meses):
+    for mes in set(meses):
+        _subir(_clave_mes(mes))
+
+
+def invalidar_rango(desde, hasta):
+    """Invalida los meses de ``[desde, hasta]`` (fechas con hora); sin límites, todo."""
+    if desde is None or hasta is None:
+        invalidar_todo()
+    else:
+        invalidar_meses(meses_entre(mes_de(desde), mes_de(hasta)))
+
+
+def invalidar_todo():
+    _subir(CLAVE_GLOBAL)
@@ -0,0 +1,347 @@
+# core/carga.py
+
+"""
+Prueba de carga local: simula recepción, veterinarios y administración
+contra un servidor ya levantado (``runserver`` o gunicorn) que use la misma
+base de datos, para planificar capacidad.
+
+Cada usuario virtual es un hilo con su propia sesión (cookies y CSRF, solo
+biblioteca estándar). Inicia sesión con un usuario de su rol y repite
+acciones elegidas al azar según el ``MIX`` de ese rol: revisar la agenda,
+crear citas, finalizarlas, registrar abonos, abrir fichas y consultar el
+panel. Las redirecciones no se siguen: cada petición medida es una sola
+ruta.
+
+Los ids que usan las acciones (pacientes, veterinarios, citas por
+finalizar, pagos con saldo) se leen de la base antes de empezar. Las
+citas y los pagos se reparten entre los hilos, así dos usuarios virtuales
+nunca finalizan la misma cita.
+"""
+
+import datetime
+import http.cookiejar
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from django.urls import reverse
+from django.utils import timezone
+
+from .estados_cita import TRANSICIONES
+from .models import Cita, Paciente, Pago, Usuario, Veterinario
+
+PERCENTILES = (50, 95, 99)
+METODOS_PAGO = ['EFECTIVO', 'DEBITO', 'CREDITO', 'TRANSFERENCIA']
+
+
+# ---------------------------------------------------------------
+# Sesión HTTP de un usuario virtual
+# ---------------------------------------------------------------
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Sesion:
+    """Cliente HTTP con cookies; ``get``/``post`` retornan el código de estado."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones
+        )
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def _abrir(self, request):
+        try:
+            with self.opener.open(request, timeout=self.timeout) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as e:
+            # Las redirecciones (no seguidas) y los errores llegan por aquí
+            e.read()
+            return e.code
+        except OSError:
+            # Sin respuesta: conexión rechazada o timeout
+            return 0
+
+    def get(self, ruta, parametros=None):
+        url = self.base_url + ruta
+        if parametros:
+            url += '?' + urllib.parse.urlencode(parametros)
+        return self._abrir(urllib.request.Request(url))
+
+    def post(self, ruta, datos):
+        return self._abrir(urllib.request.Request(
+            self.base_url + ruta,
+            data=urllib.parse.urlencode({**datos, 'csrfmiddlewaretoken': self._csrf()}).encode(),
+            headers={'Referer': self.base_url + ruta, 'X-CSRFToken': self._csrf()},
+        ))
+
+    def iniciar(self, email, password):
+        self.get(reverse('login'))
+        return self.post(reverse('login'), {'email': email, 'password': password}) == 302
+
+
+# ---------------------------------------------------------------
+# Datos compartidos y acciones
+# ---------------------------------------------------------------
+
+class Datos:
+    """Ids que usan las acciones, leídos una vez de la base."""
+
+    def __init__(self, semilla=None):
+        self.rnd = random.Random(semilla)
+        self.pacientes = list(Paciente.objects.values_list('pk', flat=True))
+        self.veterinarios = list(Veterinario.objects.values_list('pk', flat=True))
+        ahora = timezone.now()
+        self._lock = threading.Lock()
+        self._citas = list(
+            Cita.objects.filter(
+                estado__in=[e for e, destinos in TRANSICIONES.items() if 'REALIZADO' in destinos],
+                fecha_hora__lte=ahora + datetime.timedelta(days=30),
+            )
+            .values_list('pk', flat=True)
+        )
+        self._pagos = list(Pago.objects.filter(saldo_pendiente__gt=1000).values_list('pk', flat=True))
+        self.rnd.shuffle(self._citas)
+        self.rnd.shuffle(self._pagos)
+
+    def _tomar(self, lista):
+        with self._lock:
+            return lista.pop() if lista else None
+
+    def cita_por_finalizar(self):
+        return self._tomar(self._citas)
+
+    def pago_con_saldo(self):
+        return self._tomar(self._pagos)
+
+
+def _fecha_cercana(rnd):
+    return timezone.localdate() + datetime.timedelta(days=rnd.randint(-3, 14))
+
+
+def ver_agenda(sesion, datos, rnd):
+    return 'listar_citas', sesion.get(reverse('listar_citas'), {'fecha': _fecha_cercana(rnd).isoformat()})
+
+
+def ver_grilla(sesion, datos, rnd):
+    return 'grilla_citas', sesion.get(reverse('grilla_citas'), {'fecha': _fecha_cercana(rnd).isoformat()})
+
+
+def buscar_hora(sesion, datos, rnd):
+    return 'primeros_libres', sesion.get(reverse('primeros_libres'), {'duracion': rnd.choice([15, 30, 45])})
+
+
+def crear_cita(sesion, datos, rnd):
+    # Hora hábil al azar: parte de ellas topará con otra cita, como en recepción
+    fecha = timezone.localdate() + datetime.timedelta(days=rnd.randint(1, 30))
+    hora = datetime.time(rnd.randint(9, 16), rnd.choice([0, 15, 30, 45]))
+    return 'crear_cita', sesion.post(reverse('crear_cita'), {
+        'paciente': rnd.choice(datos.pacientes),
+        'veterinario': rnd.choice(datos.veterinarios),
+        'fecha_hora': datetime.datetime.combine(fecha, hora).strftime('%Y-%m-%dT%H:%M'),
+        'duracion': rnd.choice([15, 30, 45]),
+        'motivo_consulta': 'Prueba de carga',
+    })
+
+
+def ver_ficha(sesion, datos, rnd):
+    return 'ficha_medica', sesion.get(reverse('ficha_medica', args=[rnd.choice(datos.pacientes)]))
+
+
+def ver_citas_actuales(sesion, datos, rnd):
+    return 'listar_citas_actuales', sesion.get(reverse('listar_citas_actuales'))
+
+
+def finalizar_cita(sesion, datos, rnd):
+    cita_id = datos.cita_por_finalizar()
+    if cita_id is None:
+        return ver_ficha(sesion, datos, rnd)
+    pago_inmediato = rnd.random() < 0.6
+    return 'finalizar_cita', sesion.post(reverse('finalizar_cita', args=[cita_id]), {
+        'monto': rnd.randint(10, 80) * 1000,
+        'observaciones': 'Prueba de carga',
+        **({'pago_inmediato': 'on', 'metodo_pago': rnd.choice(METODOS_PAGO)} if pago_inmediato else {}),
+    })
+
+
+def ver_panel(sesion, datos, rnd):
+    return 'panel', sesion.get(reverse('panel'))
+
+
+def consultar_dashboard(sesion, datos, rnd):
+    return 'dashboard_data', sesion.get(reverse('dashboard_data'))
+
+
+def ver_reportes(sesion, datos, rnd):
+    return 'reportes', sesion.get(reverse('reportes'))
+
+
+def ver_cuentas(sesion, datos, rnd):
+    return 'cuentas_por_cobrar', sesion.get(reverse('cuentas_por_cobrar'))
+
+
+def registrar_abono(sesion, datos, rnd):
+    pago_id = datos.pago_con_saldo()
+    if pago_id is None:
+        return ver_cuentas(sesion, datos, rnd)
+    return 'registrar_abono', sesion.post(reverse('registrar_abono', args=[pago_id]), {
+        'monto': 1000, 'metodo_pago': rnd.choice(METODOS_PAGO),
+    })
+
+
+# Acción -> peso, por rol
+MIX = {
+    'RECEPCIONISTA': {
+        ver_agenda: 30, ver_grilla: 10, buscar_hora: 10, crear_cita: 20, ver_ficha: 20, ver_panel: 10,
+    },
+    'VETERINARIO': {
+        ver_citas_actuales: 30, ver_ficha: 35, finalizar_cita: 15, ver_agenda: 15, ver_panel: 5,
+    },
+    'ADMIN': {
+        consultar_dashboard: 35, ver_panel: 10, ver_reportes: 10, ver_cuentas: 10, registrar_abono: 15,
+        ver_agenda: 20,
+    },
+}
+
+
+# ---------------------------------------------------------------
+# Ejecución y resultados
+# ---------------------------------------------------------------
+
+class Resultados:
+    """Latencias y errores por ruta, compartidos entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.inicio = self.fin = None
+
+    def registrar(self, ruta, estado, ms):
+        with self._lock:
+            self.latencias[ruta].append(ms)
+            if estado == 0 or estado >= 400:
+                self.errores[ruta] += 1
+
+    @property
+    def segundos(self):
+        return max((self.fin or time.monotonic()) - self.inicio, 1e-9)
+
+    def resumen(self):
+        """
+        Una fila por ruta (más ``TOTAL``) con peticiones, req/s, percentiles en
+        ms y % de error. ``TOTAL`` no cuenta el inicio de sesión, dominado por
+        el hash de la contraseña y que ocurre una vez por usuario virtual.
+        """
+        filas = []
+        todas, errores = [], 0
+        for ruta in sorted(self.latencias):
+            tiempos = self.latencias[ruta]
+            if ruta != 'login':
+                todas.extend(tiempos)
+                errores += self.errores[ruta]
+            filas.append(self._fila(ruta, tiempos, self.errores[ruta]))
+        filas.append(self._fila('TOTAL', todas, errores))
+        return filas
+
+    def _fila(self, ruta, tiempos, errores):
+        return {
+            'ruta': ruta,
+            'peticiones': len(tiempos),
+            'por_segundo': len(tiempos) / self.segundos,
+            **{f'p{p}': percentil(tiempos, p) for p in PERCENTILES},
+            'errores': errores,
+            'error_pct': 100 * errores / len(tiempos) if tiempos else 0,
+        }
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano; ``None`` sin valores."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[max(0, -(-len(ordenados) * p // 100) - 1)]
+
+
+def usuario_virtual(base_url, rol, email, password, datos, resultados, detener, peticiones, pausa, semilla):
+    rnd = random.Random(semilla)
+    acciones, pesos = zip(*MIX[rol].items())
+    sesion = Sesion(base_url)
+    inicio = time.perf_counter()
+    ok = sesion.iniciar(email, password)
+    resultados.registrar('login', 302 if ok else 401, (time.perf_counter() - inicio) * 1000)
+    if not ok:
+        return
+    while not detener.is_set() and (peticiones is None or peticiones.tomar()):
+        accion = rnd.choices(acciones, pesos)[0]
+        inicio = time.perf_counter()
+        ruta, estado = accion(sesion, datos, rnd)
+        resultados.registrar(ruta, estado, (time.perf_counter() - inicio) * 1000)
+        if pausa:
+            time.sleep(rnd.uniform(0, 2 * pausa))
+
+
+class Cupo:
+    """Contador de peticiones restantes compartido por los hilos."""
+
+    def __init__(self, total):
+        self._restantes = total
+        self._lock = threading.Lock()
+
+    def tomar(self):
+        with self._lock:
+            if self._restantes <= 0:
+                return False
+            self._restantes -= 1
+            return True
+
+
+def ejecutar(base_url, usuarios_por_rol, password, dominio='@demo.cl', duracion=None, peticiones=None,
+             pausa=0, semilla=None):
+    """
+    Lanza ``usuarios_por_rol`` (``{'RECEPCIONISTA': 4, ...}``) usuarios virtuales
+    hasta que pasen ``duracion`` segundos o se hagan ``peticiones`` en total.
+    Inician sesión con los usuarios activos de cada rol cuyo email termina en
+    ``dominio`` (los de ``crear_datos_demo``). Retorna ``Resultados``.
+    """
+    datos = Datos(semilla)
+    resultados = Resultados()
+    detener = threading.Event()
+    cupo = Cupo(peticiones) if peticiones is not None else None
+    hilos = []
+    for rol, cantidad in usuarios_por_rol.items():
+        emails = list(
+            Usuario.objects.filter(rol=rol, is_active=True, email__endswith=dominio)
+            .order_by('pk').values_list('email', flat=True)
+        )
+        if not cantidad or not emails:
+            continue
+        for i in range(cantidad):
+            hilos.append(threading.Thread(
+                target=usuario_virtual,
+                args=(base_url, rol, emails[i % len(emails)], password, datos, resultados, detener, cupo, pausa,
+                      None if semilla is None else semilla + len(hilos)),
+                daemon=True,
+            ))
+    resultados.inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    if duracion is not None:
+        detener.wait(duracion)
+        detener.set()
+    for hilo in hilos:
+        hilo.join()
+    resultados.fin = time.monotonic()
+    return resultados
@@ -0,0 +1,43 @@
+# core/checks.py
+
+"""
+Checks del sistema de la app (``manage.py check``; también corren al iniciar
+runserver, migrate y los tests).
+"""
+
+import importlib
+
+from django.core import checks
+from django.urls import URLResolver, get_resolver
+
+
+def _patrones(resolver):
+    for patron in resolver.url_patterns:
+        if isinstance(patron, URLResolver):
+            yield from _patrones(patron)
+        else:
+            yield patron
+
+
+@checks.register(checks.Tags.urls)
+def revisar_vistas_perezosas(app_configs, **kwargs):
+    """
+    Importa el destino de cada ``perezosa()`` de las URL (ver core/views): un
+    módulo de vistas roto o un nombre mal escrito aparece aquí y no como un
+    500 en la primera petición.
+    """
+    errores = []
+    for patron in _patrones(get_resolver()):
+        destino = getattr(patron.callback, 'perezosa', None)
+        if destino is None:
+            continue
+        modulo, nombre = destino
+        try:
+            getattr(importlib.import_module(modulo), nombre)
+        except Exception as e:
+            errores.append(checks.Error(
+                f"La ruta '{patron.pattern}' usa {modulo}.{nombre}, que no se puede cargar: {e!r}",
+                hint="Revise el texto de perezosa() en clinica_veterinaria/urls.py y que el módulo importe sin errores.",
+                id='core.E001',
+            ))
+    return errores
@@ -0,0 +1,40 @@
+# core/contacto.py
+
+"""
+Normalización de datos de contacto de tutores.
+
+Los valores normalizados se guardan en columnas indexadas junto al valor
+ingresado (ver ``Tutor.save``), así una búsqueda por teléfono o email es
+una igualdad exacta sobre un índice.
+"""
+
+import re
+
+CODIGO_PAIS = '56'
+
+
+def normalizar_telefono(valor):
+    """
+    Teléfono en formato E.164 (``+56912345678``), o ``None`` si no se reconoce.
+
+    Acepta espacios, guiones, paréntesis y números chilenos sin código de
+    país (9 dígitos: celulares ``9XXXXXXXX`` y fijos ``2XXXXXXXX``...).
+    """
+    valor = str(valor or '').strip()
+    digitos = re.sub(r'\D', '', valor)
+    if valor.startswith('00'):
+        digitos = digitos[2:]
+    elif not valor.startswith('+'):
+        if len(digitos) == 9:
+            digitos = CODIGO_PAIS + digitos
+        elif not (len(digitos) == 11 and digitos.startswith(CODIGO_PAIS)):
+            return None
+    # E.164: hasta 15 dígitos, sin ceros a la izquierda
+    if not 8 <= len(digitos) <= 15 or digitos.startswith('0'):
+        return None
+    return f'+{digitos}'
+
+
+def normalizar_email(valor):
+    valor = str(valor or '').strip().lower()
+    return valor or None
@@ -0,0 +1,8 @@
+# core/context_processors.py
+
+from django.conf import settings
+
+
+def assets(request):
+    """Indica a los templates si deben cargar los bundles locales o los CDN."""
+    return {'ASSETS_EMPAQUETADOS': settings.ASSETS_EMPAQUETADOS}
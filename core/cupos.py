@@ -0,0 +1,143 @@
+# core/cupos.py
+
+"""
+Cupos de agenda: el horario semanal (``HorarioDisponible``) expandido a
+bloques fechados de ``CUPO_MINUTOS`` minutos para las próximas
+``CUPOS_SEMANAS`` semanas, guardados en ``CupoAgenda`` con la cita que los
+ocupa. "Cupos libres la próxima semana" pasa a ser un recorrido de rango
+sobre un índice (``cupo_libre_inicio_idx``) en lugar de evaluar las reglas.
+
+Mantención incremental:
+
+- Al crear, modificar o eliminar un bloque de horario se rehacen solo los
+  cupos futuros de ese veterinario y ese día de la semana (``regenerar``).
+- Al guardar una cita (o en una transición masiva) se vuelven a marcar los
+  cupos del tramo afectado (``sincronizar``). Al borrarla, la FK
+  ``SET_NULL`` libera sus cupos.
+- El comando ``generar_cupos`` (cron diario) borra los cupos pasados y
+  extiende la ventana un día más.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .agenda import DURACION_MAX, ESTADOS_OCUPAN, IndiceIntervalos
+from .models import Cita, CupoAgenda, HorarioDisponible, Veterinario
+
+CUPO_MINUTOS = 15
+
+
+def horizonte():
+    """Fin (exclusivo) de la ventana de cupos: medianoche local tras ``CUPOS_SEMANAS`` semanas."""
+    ultimo = timezone.localdate() + datetime.timedelta(weeks=settings.CUPOS_SEMANAS)
+    return timezone.make_aware(datetime.datetime.combine(ultimo, datetime.time.min))
+
+
+def _indice_citas(veterinario_id, desde, hasta):
+    return IndiceIntervalos(Cita.objects.filter(
+        veterinario_id=veterinario_id,
+        estado__in=ESTADOS_OCUPAN,
+        fecha_hora__gt=desde - datetime.timedelta(minutes=DURACION_MAX),
+        fecha_hora__lt=hasta,
+    ).order_by())
+
+
+def _expandir(reglas, desde, hasta):
+    """Cupos (sin guardar) de ``reglas`` con inicio en ``[desde, hasta)``."""
+    paso = datetime.timedelta(minutes=CUPO_MINUTOS)
+    cupos = {}
+    fecha = timezone.localtime(desde).date()
+    while True:
+        inicio_dia = timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+        if inicio_dia >= hasta:
+            break
+        for regla in reglas:
+            if regla.dia_semana != fecha.weekday():
+                continue
+            inicio = timezone.make_aware(datetime.datetime.combine(fecha, regla.hora_inicio))
+            fin_regla = timezone.make_aware(datetime.datetime.combine(fecha, regla.hora_fin))
+            while inicio + paso <= fin_regla:
+                if desde <= inicio < hasta:
+                    # Reglas que se topan (p. ej. cargadas por el admin) no duplican cupos
+                    cupos.setdefault(inicio, CupoAgenda(
+                        veterinario_id=regla.veterinario_id, inicio=inicio, fin=inicio + paso
+                    ))
+                inicio += paso
+        fecha += datetime.timedelta(days=1)
+    return sorted(cupos.values(), key=lambda c: c.inicio)
+
+
+def _marcar(cupos, indice):
+    """Asigna a cada cupo la primera cita que lo topa. Retorna los que cambiaron."""
+    cambiados = []
+    for cupo in cupos:
+        topes = indice.topes(cupo.inicio, cupo.fin)
+        cita_id = topes[0].pk if topes else None
+        if cupo.cita_id != cita_id:
+            cupo.cita_id = cita_id
+            cambiados.append(cupo)
+    return cambiados
+
+
+def regenerar(veterinario_id, dia_semana):
+    """
+    Rehace los cupos futuros de un veterinario para un día de la semana a
+    partir de sus reglas vigentes. Retorna la cantidad de cupos creados.
+    """
+    desde, hasta = timezone.now(), horizonte()
+    reglas = list(HorarioDisponible.objects.filter(veterinario_id=veterinario_id, dia_semana=dia_semana))
+    cupos = _expandir(reglas, desde, hasta)
+    _marcar(cupos, _indice_citas(veterinario_id, desde, hasta))
+    with transaction.atomic():
+        # iso_week_day se evalúa en hora local: 1 = lunes
+        CupoAgenda.objects.filter(
+            veterinario_id=veterinario_id, inicio__gte=desde, inicio__iso_week_day=dia_semana + 1
+        ).delete()
+        CupoAgenda.objects.bulk_create(cupos, batch_size=1000)
+    return len(cupos)
+
+
+def sincronizar(veterinario_id, desde, hasta):
+    """Vuelve a marcar libres u ocupados los cupos del veterinario que tocan ``[desde, hasta)``."""
+    cupos = list(CupoAgenda.objects.filter(veterinario_id=veterinario_id, inicio__lt=hasta, fin__gt=desde))
+    if not cupos:
+        return 0
+    cambiados = _marcar(cupos, _indice_citas(veterinario_id, cupos[0].inicio, cupos[-1].fin))
+    CupoAgenda.objects.bulk_update(cambiados, ['cita'], batch_size=500)
+    return len(cambiados)
+
+
+def sincronizar_rango(veterinario_id, desde, hasta):
+    """``sincronizar`` acotado a la ventana vigente; sin veterinario, para todos los del rango."""
+    desde = max(desde or timezone.now(), timezone.now())
+    hasta = min(hasta or horizonte(), horizonte())
+    if desde >= hasta:
+        return 0
+    if veterinario_id is not None:
+        return sincronizar(veterinario_id, desde, hasta)
+    ids = (
+        CupoAgenda.objects.filter(inicio__lt=hasta, fin__gt=desde)
+        .order_by().values_list('veterinario_id', flat=True).distinct()
+    )
+    return sum(sincronizar(vet_id, desde, hasta) for vet_id in list(ids))
+
+
+def generar():
+    """Borra los cupos pasados y rehace la ventana completa. Retorna ``(borrados, creados)``."""
+    borrados, _ = CupoAgenda.objects.filter(fin__lte=timezone.now()).delete()
+    creados = 0
+    for veterinario_id in Veterinario.objects.values_list('pk', flat=True):
+        for dia in range(7):
+            creados += regenerar(veterinario_id, dia)
+    return borrados, creados
+
+
+def libres(desde, hasta, veterinario=None):
+    """Cupos libres con inicio en ``[desde, hasta)``, por fecha."""
+    cupos = CupoAgenda.objects.filter(cita__isnull=True, inicio__gte=desde, inicio__lt=hasta)
+    if veterinario is not None:
+        cupos = cupos.filter(veterinario=veterinario)
+    return cupos.order_by('inicio', 'veterinario_id')
@@ -0,0 +1,287 @@
+# core/dashboard.py
+
+"""
+Datos del dashboard de administración (tarjetas del panel y gráficos de
+ingresos y citas).
+
+Los contadores de las tarjetas salen de una sola consulta y se guardan en la
+caché por ``PANEL_ESTADISTICAS_TTL`` segundos. Vencido ese plazo se siguen
+mostrando (marcados como desactualizados) mientras un hilo los recalcula,
+hasta ``PANEL_ESTADISTICAS_OBSOLETO_MAX``; después se recalculan en la misma
+petición. Si la base de datos falla se muestran los últimos valores conocidos
+con su antigüedad, nunca ceros.
+
+Las cifras de los últimos 12 meses se calculan con una sola consulta
+agrupada por mes. Cada mes tiene una huella (hash corto de sus cifras) y el
+``cursor`` que recibe el cliente es la lista de esas huellas: con él, la API
+puede responder solo los meses cuyas cifras cambiaron.
+"""
+
+import datetime
+import hashlib
+import logging
+import threading
+import time
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Case, Count, Max, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .estados_cita import rango_del_dia
+from .models import Cita, Paciente, Veterinario
+
+logger = logging.getLogger(__name__)
+
+MESES_ESP = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+ESTADOS_AGENDADAS = ['SOLICITADA', 'AGENDADA', 'CONFIRMADA']
+ESTADOS_CANCELADAS = ['CANCELADA', 'NO_ASISTIO']
+ESTADOS_PENDIENTES = ['SOLICITADA', 'AGENDADA']
+CONTADORES = ('total_pacientes', 'total_veterinarios', 'citas_pendientes', 'citas_hoy')
+
+CLAVE_CONTADORES = 'panel:contadores'
+CLAVE_REVALIDANDO = 'panel:contadores:revalidando'
+
+
+# ---------------------------------------------------------------------------
+# Tarjetas del panel
+# ---------------------------------------------------------------------------
+
+def contadores(hoy=None):
+    """
+    Pacientes, veterinarios, citas pendientes y citas de hoy en una sola
+    consulta: los dos primeros como subconsultas y los de citas con
+    agregación condicional sobre una pasada por la tabla.
+    """
+    inicio, fin = rango_del_dia(hoy or timezone.localdate())
+    de_hoy = Q(fecha_hora__gte=inicio, fecha_hora__lt=fin)
+    pendiente = Q(estado__in=ESTADOS_PENDIENTES)
+    citas_sql, citas_params = (
+        Cita.objects.filter(pendiente | de_hoy)
+        .order_by()
+        .values(
+            es_pendiente=Case(When(pendiente, then=Value(1)), default=Value(0)),
+            es_hoy=Case(When(de_hoy, then=Value(1)), default=Value(0)),
+        )
+        .query.sql_with_params()
+    )
+    pacientes_sql, pacientes_params = Paciente.objects.order_by().values('pk').query.sql_with_params()
+    veterinarios_sql, veterinarios_params = Veterinario.objects.order_by().values('pk').query.sql_with_params()
+
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT (SELECT COUNT(*) FROM ({pacientes_sql}) AS p), "
+            f"(SELECT COUNT(*) FROM ({veterinarios_sql}) AS v), "
+            f"COALESCE(SUM(c.{qn('es_pendiente')}), 0), COALESCE(SUM(c.{qn('es_hoy')}), 0) "
+            f"FROM ({citas_sql}) AS c",
+            (*pacientes_params, *veterinarios_params, *citas_params),
+        )
+        pacientes, veterinarios, pendientes, de_hoy = cursor.fetchone()
+    return {
+        'total_pacientes': pacientes,
+        'total_veterinarios': veterinarios,
+        'citas_pendientes': int(pendientes),
+        'citas_hoy': int(de_hoy),
+    }
+
+
+def _leer_cache():
+    # Con DatabaseCache la caché vive en la misma BD y puede fallar igual que ella
+    try:
+        return cache.get(CLAVE_CONTADORES)
+    except DatabaseError:
+        logger.warning("No se pudo leer la caché de estadísticas del panel", exc_info=True)
+        return None
+
+
+def _recalcular():
+    entrada = {'valores': contadores(), 'calculado': time.time()}
+    # Sin vencimiento: si la BD falla más adelante, estos siguen siendo los últimos conocidos
+    try:
+        cache.set(CLAVE_CONTADORES, entrada, None)
+    except DatabaseError:
+        logger.warning("No se pudo guardar en caché las estadísticas del panel", exc_info=True)
+    return entrada
+
+
+def _revalidar():
+    try:
+        _recalcular()
+    except DatabaseError:
+        logger.warning("No se pudieron recalcular las estadísticas del panel", exc_info=True)
+    finally:
+        cache.delete(CLAVE_REVALIDANDO)
+        connection.close()
+
+
+def _revalidar_en_segundo_plano():
+    # Un solo recálculo a la vez entre todos los workers
+    try:
+        libre = cache.add(CLAVE_REVALIDANDO, True, settings.PANEL_ESTADISTICAS_TTL)
+    except DatabaseError:
+        logger.warning("No se pudo reservar el recálculo de las estadísticas del panel", exc_info=True)
+        return
+    if libre:
+        threading.Thread(target=_revalidar, daemon=True).start()
+
+
+def estadisticas_panel():
+    """
+    Contadores del panel: ``{'valores', 'calculado', 'obsoleto', 'error'}``.
+
+    ``valores`` trae ``None`` en cada contador si nunca se pudieron calcular; ``calculado``
+    es la fecha del cálculo; ``obsoleto`` indica que los valores tienen más de
+    ``PANEL_ESTADISTICAS_TTL`` segundos y ``error`` que la BD no respondió.
+    """
+    entrada = _leer_cache()
+    edad = time.time() - entrada['calculado'] if entrada else None
+    obsoleto, error = False, False
+    if entrada is None or edad >= settings.PANEL_ESTADISTICAS_OBSOLETO_MAX:
+        try:
+            entrada = _recalcular()
+        except DatabaseError:
+            logger.exception("No se pudieron calcular las estadísticas del panel")
+            obsoleto, error = True, True
+    elif edad >= settings.PANEL_ESTADISTICAS_TTL:
+        _revalidar_en_segundo_plano()
+        obsoleto = True
+    return {
+        'valores': entrada['valores'] if entrada else dict.fromkeys(CONTADORES),
+        'calculado': (
+            datetime.datetime.fromtimestamp(entrada['calculado'], tz=datetime.timezone.utc) if entrada else None
+        ),
+        'obsoleto': obsoleto,
+        'error': error,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Gráficos
+# ---------------------------------------------------------------------------
+
+
+def resumen_mensual(hoy=None, meses=12):
+    """
+    Retorna una lista (del mes más antiguo al actual) con las cifras de cada mes:
+    ``{'mes': date, 'label', 'ingresos', 'agendadas', 'realizadas', 'canceladas'}``.
+    """
+    hoy = hoy or timezone.localdate()
+    primer_mes = hoy.replace(day=1) - relativedelta(months=meses - 1)
+    tz = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.datetime.combine(primer_mes, datetime.time.min), tz)
+    fin = timezone.make_aware(
+        datetime.datetime.combine(primer_mes + relativedelta(months=meses), datetime.time.min), tz
+    )
+
+    filas = (
+        Cita.objects.filter(fecha_hora__gte=inicio, fecha_hora__lt=fin)
+        .annotate(mes=TruncMonth('fecha_hora', tzinfo=tz))
+        .values('mes')
+        .annotate(
+            ingresos=Sum('monto', filter=Q(estado='REALIZADO')),
+            agendadas=Count('id', filter=Q(estado__in=ESTADOS_AGENDADAS)),
+            realizadas=Count('id', filter=Q(estado='REALIZADO')),
+            canceladas=Count('id', filter=Q(estado__in=ESTADOS_CANCELADAS)),
+        )
+    )
+    por_mes = {}
+    for fila in filas:
+        mes = fila['mes']
+        if isinstance(mes, datetime.datetime):
+            mes = mes.date()
+        por_mes[mes] = fila
+
+    resumen = []
+    for i in range(meses):
+        mes = primer_mes + relativedelta(months=i)
+        fila = por_mes.get(mes, {})
+        resumen.append({
+            'mes': mes,
+            'label': MESES_ESP[mes.month - 1],
+            'ingresos': float(fila.get('ingresos') or 0),
+            'agendadas': fila.get('agendadas', 0),
+            'realizadas': fila.get('realizadas', 0),
+            'canceladas': fila.get('canceladas', 0),
+        })
+    return resumen
+
+
+def huella_mes(mes):
+    datos = f"{mes['ingresos']}|{mes['agendadas']}|{mes['realizadas']}|{mes['canceladas']}"
+    return hashlib.md5(datos.encode()).hexdigest()[:8]
+
+
+def cursor_para(resumen):
+    """Cursor opaco: primer mes de la ventana + huella de cada mes."""
+    huellas = ','.join(huella_mes(mes) for mes in resumen)
+    return f"{resumen[0]['mes']:%Y-%m}:{huellas}"
+
+
+def version_resumen(hoy=None):
+    """
+    ETag barato para ``resumen_mensual``: cambia con la ventana de meses, con
+    cualquier cita creada o modificada (``updated_at`` máximo, que las
+    operaciones masivas también fijan) y con las borradas (total de citas).
+    Permite responder 304 sin ejecutar la agregación de 12 meses.
+    """
+    hoy = hoy or timezone.localdate()
+    version = Cita.objects.aggregate(ultima=Max('updated_at'), total=Count('id'))
+    ultima = version['ultima'].isoformat() if version['ultima'] else ''
+    datos = f"{hoy:%Y-%m}|{ultima}|{version['total']}"
+    return '"%s"' % hashlib.md5(datos.encode()).hexdigest()
+
+
+def meses_cambiados(resumen, cursor):
+    """
+    Índices de los meses cuyas cifras cambiaron respecto al ``cursor``.
+    Retorna ``None`` si el cursor no es válido o corresponde a otra ventana
+    de meses (el cliente debe pedir los datos completos).
+    """
+    try:
+        inicio, huellas = cursor.split(':', 1)
+        huellas = huellas.split(',')
+    except (AttributeError, ValueError):
+        return None
+    if inicio != f"{resumen[0]['mes']:%Y-%m}" or len(huellas) != len(resumen):
+        return None
+    return [i for i, mes in enumerate(resumen) if huella_mes(mes) != huellas[i]]
+
+
+def serializar_completo(resumen):
+    labels = [mes['label'] for mes in resumen]
+    return {
+        'cursor': cursor_para(resumen),
+        'ingresos_mensuales': {
+            'labels': labels,
+            'data': [mes['ingresos'] for mes in resumen],
+        },
+        'citas_por_mes': {
+            'labels': labels,
+            'agendadas': [mes['agendadas'] for mes in resumen],
+            'realizadas': [mes['realizadas'] for mes in resumen],
+            'canceladas': [mes['canceladas'] for mes in resumen],
+        },
+    }
+
+
+def serializar_delta(resumen, indices):
+    return {
+        'cursor': cursor_para(resumen),
+        'delta': True,
+        'cambios': [
+            {
+                'indice': i,
+                'label': resumen[i]['label'],
+                'ingresos': resumen[i]['ingresos'],
+                'agendadas': resumen[i]['agendadas'],
+                'realizadas': resumen[i]['realizadas'],
+                'canceladas': resumen[i]['canceladas'],
+            }
+            for i in indices
+        ],
+    }
@@ -0,0 +1,115 @@
+# core/disponibilidad.py
+
+"""
+Primeras horas disponibles: "¿cuándo es lo primero que hay?" para una
+duración dada, entre todos los veterinarios (o los de una especialidad).
+
+Por cada veterinario un generador recorre sus bloques de horario día a día
+y salta las citas activas con ``IndiceIntervalos`` (ver core/agenda.py),
+entregando en orden los inicios libres, alineados a ``PASO_MINUTOS`` desde
+el inicio del bloque. Los horarios ofrecidos a un mismo veterinario no se
+topan entre sí: tras cada uno se sigue desde su fin.
+
+``heapq.merge`` mezcla los generadores con una cola de prioridad por hora
+de inicio y se corta al llegar a ``k``. Las citas de cada veterinario se
+cargan por semanas y solo cuando el recorrido llega a ellas, así que el
+costo depende de cuánto haya que avanzar para juntar ``k`` horarios y no
+del largo de la ventana.
+"""
+
+import datetime
+import heapq
+from itertools import islice
+
+from django.utils import timezone
+
+from .agenda import DURACION_MAX, ESTADOS_OCUPAN, IndiceIntervalos, fin_de
+from .estados_cita import rango_del_dia
+from .models import Cita, HorarioDisponible, Veterinario
+
+PASO_MINUTOS = 15
+# Días de citas que se cargan de una vez para cada veterinario
+DIAS_POR_CARGA = 7
+
+
+def _alinear(momento, base, paso):
+    """Primer instante ``base + n * paso`` (n >= 0) que no sea anterior a ``momento``."""
+    if momento <= base:
+        return base
+    return base + -(-(momento - base) // paso) * paso
+
+
+def _cargar_citas(veterinario_id, desde, hasta):
+    return IndiceIntervalos(Cita.objects.filter(
+        veterinario_id=veterinario_id,
+        estado__in=ESTADOS_OCUPAN,
+        fecha_hora__gt=desde - datetime.timedelta(minutes=DURACION_MAX),
+        fecha_hora__lt=hasta,
+    ).order_by())
+
+
+def horarios_libres(veterinario_id, reglas, desde, hasta, duracion, ahora=None):
+    """
+    Genera en orden los inicios (aware) de ``duracion`` minutos libres del
+    veterinario entre las fechas ``desde`` y ``hasta`` (ambas incluidas).
+    ``reglas`` son sus bloques de ``HorarioDisponible``.
+    """
+    ahora = ahora or timezone.now()
+    paso = datetime.timedelta(minutes=PASO_MINUTOS)
+    largo = datetime.timedelta(minutes=duracion)
+    por_dia = {}
+    for regla in sorted(reglas, key=lambda r: r.hora_inicio):
+        por_dia.setdefault(regla.dia_semana, []).append(regla)
+
+    indice, cargado_hasta = None, None
+    fecha = desde
+    while fecha <= hasta:
+        bloques = por_dia.get(fecha.weekday())
+        if bloques:
+            if cargado_hasta is None or fecha >= cargado_hasta:
+                cargado_hasta = min(fecha + datetime.timedelta(days=DIAS_POR_CARGA), hasta + datetime.timedelta(days=1))
+                indice = _cargar_citas(veterinario_id, rango_del_dia(fecha)[0], rango_del_dia(cargado_hasta)[0])
+            siguiente = ahora
+            for regla in bloques:
+                base = timezone.make_aware(datetime.datetime.combine(fecha, regla.hora_inicio))
+                fin_bloque = timezone.make_aware(datetime.datetime.combine(fecha, regla.hora_fin))
+                inicio = _alinear(siguiente, base, paso)
+                while inicio + largo <= fin_bloque:
+                    topes = indice.topes(inicio, inicio + largo)
+                    if topes:
+                        inicio = _alinear(max(fin_de(c) for c in topes), base, paso)
+                        continue
+                    yield inicio
+                    siguiente = inicio + largo
+                    inicio = _alinear(siguiente, base, paso)
+        fecha += datetime.timedelta(days=1)
+
+
+def primeros_libres(desde, hasta, duracion, k=5, especialidad=None):
+    """
+    Los ``k`` primeros horarios libres de ``duracion`` minutos entre las
+    fechas ``desde`` y ``hasta`` (incluidas), de cualquier veterinario con
+    horario (de la ``especialidad`` indicada, si se da). Lista de
+    ``{'inicio', 'fin', 'veterinario'}`` ordenada por inicio.
+    """
+    veterinarios = Veterinario.objects.filter(usuario__is_active=True).select_related('usuario').order_by('pk')
+    if especialidad:
+        veterinarios = veterinarios.filter(especialidad__icontains=especialidad)
+    veterinarios = {v.pk: v for v in veterinarios}
+    reglas = {}
+    for regla in HorarioDisponible.objects.filter(veterinario_id__in=veterinarios).order_by():
+        reglas.setdefault(regla.veterinario_id, []).append(regla)
+
+    ahora = timezone.now()
+
+    def etiquetar(veterinario_id):
+        # (inicio, veterinario_id): el empate en la hora se resuelve por veterinario
+        for inicio in horarios_libres(veterinario_id, reglas[veterinario_id], desde, hasta, duracion, ahora):
+            yield inicio, veterinario_id
+
+    cola = heapq.merge(*(etiquetar(vet_id) for vet_id in reglas))
+    largo = datetime.timedelta(minutes=duracion)
+    return [
+        {'inicio': inicio, 'fin': inicio + largo, 'veterinario': veterinarios[vet_id]}
+        for inicio, vet_id in islice(cola, k)
+    ]
@@ -0,0 +1,154 @@
+# core/estados_cita.py
+
+"""
+Máquina de estados de ``Cita`` (ver ``estado_cita_choices``).
+
+Define las transiciones permitidas y ofrece operaciones masivas que cambian
+el estado de muchas citas con un solo ``UPDATE ... WHERE estado IN (...)``.
+Como ``QuerySet.update()`` no dispara ``post_save``, cada operación masiva
+envía una única señal ``citas_transicionadas`` al confirmarse la transacción.
+"""
+
+import datetime
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Cita, estado_cita_choices
+
+# estado actual -> estados a los que puede pasar
+TRANSICIONES = {
+    'SOLICITADA': {'AGENDADA', 'CANCELADA'},
+    'AGENDADA': {'CONFIRMADA', 'EN_CURSO', 'REALIZADO', 'CANCELADA', 'NO_ASISTIO'},
+    'CONFIRMADA': {'EN_CURSO', 'REALIZADO', 'CANCELADA', 'NO_ASISTIO'},
+    'EN_CURSO': {'REALIZADO', 'CANCELADA'},
+    'REALIZADO': set(),
+    'CANCELADA': set(),
+    'NO_ASISTIO': set(),
+}
+
+# Citas que todavía deben ocurrir
+ESTADOS_PENDIENTES = ['SOLICITADA', 'AGENDADA', 'CONFIRMADA']
+
+# Señal enviada una vez por operación masiva.
+# Argumentos: estado, origenes, cantidad, veterinario_id, desde, hasta y marca
+# (el updated_at con que quedaron todas las citas del lote)
+citas_transicionadas = Signal()
+
+
+def puede_transicionar(estado_actual, estado_nuevo):
+    return estado_nuevo in TRANSICIONES.get(estado_actual, set())
+
+
+def validar_transicion(estado_actual, estado_nuevo):
+    if not puede_transicionar(estado_actual, estado_nuevo):
+        actual = dict(estado_cita_choices).get(estado_actual, estado_actual)
+        nuevo = dict(estado_cita_choices).get(estado_nuevo, estado_nuevo)
+        raise ValidationError(f"Una cita en estado «{actual}» no puede pasar a «{nuevo}».")
+
+
+def estados_origen(estado_nuevo):
+    """Estados desde los que se puede llegar a ``estado_nuevo``."""
+    return sorted(e for e, destinos in TRANSICIONES.items() if estado_nuevo in destinos)
+
+
+def rango_del_dia(fecha):
+    """Inicio y fin (aware, hora local) de un día, para filtrar por ``fecha_hora``."""
+    tz = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min), tz)
+    return inicio, inicio + datetime.timedelta(days=1)
+
+
+def transicionar(estado_nuevo, veterinario=None, desde=None, hasta=None, origenes=None, ids=None, **campos):
+    """
+    Pasa a ``estado_nuevo`` todas las citas del rango ``[desde, hasta)`` (y del
+    veterinario, si se indica) que estén en un estado de origen válido.
+
+    ``origenes`` permite restringir los estados de origen (deben ser válidos) e
+    ``ids`` limita la operación a esas citas (para procesar por lotes).
+    ``campos`` se actualizan junto con el estado. Retorna la cantidad de citas
+    actualizadas.
+    """
+    if estado_nuevo not in TRANSICIONES:
+        raise ValidationError(f"Estado desconocido: {estado_nuevo}")
+    validos = estados_origen(estado_nuevo)
+    if origenes is not None:
+        invalidos = set(origenes) - set(validos)
+        if invalidos:
+            raise ValidationError(
+                f"No se puede pasar de {', '.join(sorted(invalidos))} a {estado_nuevo}."
+            )
+        validos = sorted(origenes)
+
+    citas = Cita.objects.filter(estado__in=validos)
+    if veterinario is not None:
+        citas = citas.filter(veterinario=veterinario)
+    if desde is not None:
+        citas = citas.filter(fecha_hora__gte=desde)
+    if hasta is not None:
+        citas = citas.filter(fecha_hora__lt=hasta)
+    if ids is not None:
+        citas = citas.filter(pk__in=ids)
+
+    marca = timezone.now()
+    with transaction.atomic():
+        # updated_at se fija explícitamente (update() no aplica auto_now); todas las
+        # filas del lote quedan con la misma marca, que identifica al lote
+        cantidad = citas.update(estado=estado_nuevo, updated_at=marca, **campos)
+        if cantidad:
+            veterinario_id = getattr(veterinario, 'pk', veterinario)
+            transaction.on_commit(lambda: citas_transicionadas.send(
+                sender=Cita,
+                estado=estado_nuevo,
+                origenes=validos,
+                cantidad=cantidad,
+                veterinario_id=veterinario_id,
+                desde=desde,
+                hasta=hasta,
+                marca=marca,
+            ))
+    return cantidad
+
+
+def confirmar_solicitadas_del_dia(fecha, veterinario=None):
+    """Pasa a AGENDADA todas las citas SOLICITADA de un día."""
+    desde, hasta = rango_del_dia(fecha)
+    return transicionar('AGENDADA', veterinario=veterinario, desde=desde, hasta=hasta, origenes=['SOLICITADA'])
+
+
+def cancelar_bloque(veterinario, desde, hasta, motivo):
+    """Cancela las citas pendientes de un veterinario en ``[desde, hasta)``."""
+    return transicionar(
+        'CANCELADA', veterinario=veterinario, desde=desde, hasta=hasta,
+        origenes=ESTADOS_PENDIENTES,
+        notas_recepcion=f"CANCELADA: {motivo}",
+    )
+
+
+def marcar_inasistencias(corte, lote=1000, pausa=0):
+    """
+    Pasa a NO_ASISTIO las citas AGENDADA/CONFIRMADA anteriores a ``corte``, en
+    lotes de ``lote`` citas (cada lote es una transacción corta).
+
+    Genera ``(cantidad, hasta)`` por lote. Es idempotente: las citas marcadas
+    salen del filtro, así que cada lote vuelve a leer desde el principio por el
+    índice (estado, fecha_hora).
+    """
+    origenes = ['AGENDADA', 'CONFIRMADA']
+    pendientes = Cita.objects.filter(estado__in=origenes, fecha_hora__lt=corte).order_by('fecha_hora')
+    while True:
+        filas = list(pendientes.values_list('pk', 'fecha_hora')[:lote])
+        if not filas:
+            return
+        ids = [pk for pk, _ in filas]
+        # El rango solo acota el evento del lote; los ids ya determinan las filas
+        desde, hasta = filas[0][1], filas[-1][1] + datetime.timedelta(microseconds=1)
+        cantidad = transicionar('NO_ASISTIO', desde=desde, hasta=hasta, origenes=origenes, ids=ids)
+        yield cantidad, hasta
+        if len(filas) < lote:
+            return
+        if pausa:
+            time.sleep(pausa)
@@ -0,0 +1,337 @@
+# core/eventos.py
+
+"""
+Eventos de cambios en citas (creada, cambio de estado, cancelada...).
+
+Las operaciones masivas de core/estados_cita.py generan un solo evento
+``'lote'`` en lugar de uno por cita.
+
+Hay dos fuentes de eventos, según ``settings.CITAS_EVENTOS_BACKEND``:
+
+- ``'memoria'``: las señales de ``Cita`` (ver core/signals.py) publican en un
+  broadcaster en proceso y cada conexión SSE recibe los eventos por una cola.
+  Solo ve los cambios hechos en el mismo proceso, así que sirve con un worker.
+- ``'db'``: cada conexión consulta periódicamente las citas con
+  ``(updated_at, id)`` posterior al último evento enviado. Funciona con varios
+  workers, a costa de una consulta pequeña cada pocos segundos.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Cita
+
+# Tamaño de página al leer cambios desde la BD
+LOTE_BD = 100
+
+class Broadcaster:
+    """Pub/sub en proceso con un historial corto para reenviar eventos al reconectar."""
+
+    def __init__(self, historial=500, tamano_cola=1000):
+        self._lock = threading.Lock()
+        self._suscriptores = set()
+        self._historial = deque(maxlen=historial)
+        self._secuencia = itertools.count(1)
+        self._tamano_cola = tamano_cola
+        # Identifica este proceso: un Last-Event-ID de otro proceso no se puede reenviar
+        self.origen = uuid.uuid4().hex[:8]
+
+    @property
+    def tiene_suscriptores(self):
+        return bool(self._suscriptores)
+
+    @property
+    def ultimo_id(self):
+        with self._lock:
+            return self._historial[-1]['id'] if self._historial else f"{self.origen}:0"
+
+    def suscribir(self):
+        cola = queue.Queue(maxsize=self._tamano_cola)
+        with self._lock:
+            self._suscriptores.add(cola)
+        return cola
+
+    def desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores.discard(cola)
+
+    def publicar(self, evento):
+        with self._lock:
+            evento['id'] = f"{self.origen}:{next(self._secuencia)}"
+            self._historial.append(evento)
+            suscriptores = list(self._suscriptores)
+        for cola in suscriptores:
+            try:
+                cola.put_nowait(evento)
+            except queue.Full:
+                # Un cliente que no consume no debe bloquear a los demás
+                pass
+
+    def desde(self, ultimo_id):
+        """Eventos del historial posteriores a ``ultimo_id`` (vacío si es de otro proceso)."""
+        try:
+            origen, secuencia = ultimo_id.split(':')
+            secuencia = int(secuencia)
+        except (AttributeError, ValueError):
+            return []
+        if origen != self.origen:
+            return []
+        with self._lock:
+            return [e for e in self._historial if int(e['id'].split(':')[1]) > secuencia]
+
+
+broadcaster = Broadcaster()
+
+
+class LimiteConexiones:
+    """
+    Cuenta las conexiones SSE abiertas en este proceso. Cada una ocupa un hilo
+    de gunicorn hasta ``CITAS_EVENTOS_DURACION_MAX`` segundos, así que se
+    limitan para que siempre queden hilos libres para el resto del sitio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.activas = 0
+
+    def ocupar(self, maximo):
+        with self._lock:
+            if self.activas >= maximo:
+                return False
+            self.activas += 1
+            return True
+
+    def liberar(self):
+        with self._lock:
+            self.activas -= 1
+
+
+conexiones = LimiteConexiones()
+
+
+class StreamConCupo:
+    """
+    Iterador que libera el cupo de ``conexiones`` al cerrarse. Django llama a
+    ``close()`` al terminar la respuesta, aunque el generador no llegue a iniciarse.
+    """
+
+    def __init__(self, generador):
+        self._generador = generador
+        self._abierto = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._generador)
+
+    def close(self):
+        if self._abierto:
+            self._abierto = False
+            self._generador.close()
+            conexiones.liberar()
+
+
+def evento_cita(cita, tipo):
+    return {
+        'tipo': tipo,
+        'cita_id': cita.pk,
+        'estado': cita.estado,
+        'veterinario_id': cita.veterinario_id,
+        'fecha': timezone.localtime(cita.fecha_hora).date().isoformat(),
+        'fecha_hora': cita.fecha_hora.isoformat(),
+    }
+
+
+def evento_lote(estado, cantidad, veterinario_id, desde, hasta, marca):
+    """Evento de una transición masiva; ``marca`` es el updated_at común del lote."""
+    def dia(valor):
+        return timezone.localtime(valor).date().isoformat() if valor else None
+    # hasta es exclusivo: el último día incluido es el del instante anterior
+    ultimo = hasta - timedelta(microseconds=1) if hasta else None
+    return {
+        'tipo': 'lote',
+        'estado': estado,
+        'cantidad': cantidad,
+        'veterinario_id': veterinario_id,
+        'desde': dia(desde),
+        'hasta': dia(ultimo),
+        'marca': marca.isoformat(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Filtros y formato SSE
+# ---------------------------------------------------------------------------
+
+def coincide(evento, veterinario_id=None, desde=None, hasta=None):
+    if veterinario_id and evento['veterinario_id'] not in (None, veterinario_id):
+        return False
+    if evento['tipo'] == 'lote':
+        # El lote cubre un rango de días (abierto si es None): basta con que se solapen
+        inicio, fin = evento['desde'], evento['hasta']
+    else:
+        inicio = fin = evento['fecha']
+    if desde and fin and fin < desde.isoformat():
+        return False
+    if hasta and inicio and inicio > hasta.isoformat():
+        return False
+    return True
+
+
+def formatear_sse(evento, request, cita=None, filtros=None):
+    """Mensaje SSE con el evento y, salvo al eliminar, el HTML de la(s) fila(s)."""
+    datos = {k: v for k, v in evento.items() if k != 'id'}
+    if evento['tipo'] == 'lote':
+        citas = _filtrar(
+            _citas_con_relaciones().filter(
+                updated_at=datetime.fromisoformat(evento['marca']), estado=evento['estado']
+            ),
+            filtros or {}
+        )
+        datos['filas'] = [
+            {
+                'cita_id': cita.pk,
+                'html': render_to_string('core/fila_cita_actual.html', {'cita': cita}, request=request),
+            }
+            for cita in citas
+        ]
+        return f"id: {evento['id']}\nevent: lote\ndata: {json.dumps(datos)}\n\n"
+    if evento['tipo'] != 'eliminada':
+        if cita is None:
+            cita = _citas_con_relaciones().filter(pk=evento['cita_id']).first()
+        if cita is None:
+            return ''
+        datos['html'] = render_to_string('core/fila_cita_actual.html', {'cita': cita}, request=request)
+    return f"id: {evento['id']}\nevent: cita\ndata: {json.dumps(datos)}\n\n"
+
+
+def _citas_con_relaciones():
+    return Cita.objects.select_related('paciente__tutor', 'veterinario__usuario')
+
+
+def _filtrar(citas, filtros):
+    if filtros.get('veterinario_id'):
+        citas = citas.filter(veterinario_id=filtros['veterinario_id'])
+    if filtros.get('desde'):
+        citas = citas.filter(fecha_hora__date__gte=filtros['desde'])
+    if filtros.get('hasta'):
+        citas = citas.filter(fecha_hora__date__lte=filtros['hasta'])
+    return citas
+
+
+def _tipo_desde_bd(cita, estado_anterior=None):
+    """Mismos tipos que publica core/signals.py, deducidos de la fila."""
+    if abs((cita.updated_at - cita.created_at).total_seconds()) < 1:
+        return 'creada'
+    if cita.estado == 'CANCELADA':
+        return 'cancelada'
+    # Sin el estado anterior (cita no vista en esta conexión) se asume un
+    # cambio de estado, que es casi todo lo que modifica una cita ya creada.
+    if estado_anterior is None or estado_anterior != cita.estado:
+        return 'estado'
+    return 'actualizada'
+
+
+def _cambios_bd(citas, desde):
+    """Citas con ``updated_at >= desde`` en orden ``(updated_at, id)``.
+
+    Pagina por keyset en vez de cortar en ``LOTE_BD``: así no se pierden filas
+    que comparten ``updated_at`` (un lote de estados_cita) en el borde de página.
+    """
+    clave = None
+    while True:
+        pagina = citas.filter(updated_at__gte=desde)
+        if clave:
+            pagina = pagina.filter(Q(updated_at__gt=clave[0]) | Q(updated_at=clave[0], pk__gt=clave[1]))
+        pagina = list(pagina.order_by('updated_at', 'pk')[:LOTE_BD])
+        yield from pagina
+        if len(pagina) < LOTE_BD:
+            return
+        clave = (pagina[-1].updated_at, pagina[-1].pk)
+
+
+def _cursor_desde_id(ultimo_id):
+    """``'db:<updated_at>|<id>'`` -> ``(updated_at, id)``; None si no es válido."""
+    if not ultimo_id or not ultimo_id.startswith('db:'):
+        return None
+    marca, _, pk = ultimo_id[3:].partition('|')
+    try:
+        return datetime.fromisoformat(marca), int(pk or 0)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Generadores de eventos
+# ---------------------------------------------------------------------------
+
+def stream_eventos(request, ultimo_id=None, **filtros):
+    """Generador de texto SSE; termina tras ``CITAS_EVENTOS_DURACION_MAX`` segundos."""
+    backend = settings.CITAS_EVENTOS_BACKEND
+    limite = time.monotonic() + settings.CITAS_EVENTOS_DURACION_MAX
+    # Indica al navegador cuánto esperar antes de reconectar
+    yield f"retry: {settings.CITAS_EVENTOS_REINTENTO_MS}\n\n"
+    if backend == 'db':
+        yield from _stream_db(request, ultimo_id, limite, filtros)
+    else:
+        yield from _stream_memoria(request, ultimo_id, limite, filtros)
+
+
+def _stream_memoria(request, ultimo_id, limite, filtros):
+    cola = broadcaster.suscribir()
+    try:
+        for evento in broadcaster.desde(ultimo_id):
+            if coincide(evento, **filtros):
+                yield formatear_sse(evento, request, filtros=filtros)
+        while time.monotonic() < limite:
+            try:
+                evento = cola.get(timeout=settings.CITAS_EVENTOS_HEARTBEAT)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            if coincide(evento, **filtros):
+                yield formatear_sse(evento, request, filtros=filtros)
+    finally:
+        broadcaster.desuscribir(cola)
+
+
+def _stream_db(request, ultimo_id, limite, filtros):
+    cursor = _cursor_desde_id(ultimo_id) or (timezone.now(), 0)
+    # Cada consulta vuelve a leer una ventana anterior al cursor: una transacción
+    # que confirma tarde deja un updated_at más antiguo que el último enviado.
+    ventana = timedelta(seconds=settings.CITAS_EVENTOS_VENTANA_SEGUNDOS)
+    # cita_id -> (updated_at, estado) de lo ya enviado, para no repetir filas de la ventana
+    enviados = {}
+
+    citas = _filtrar(_citas_con_relaciones(), filtros)
+
+    ultimo_envio = time.monotonic()
+    while time.monotonic() < limite:
+        for cita in _cambios_bd(citas, cursor[0] - ventana):
+            anterior = enviados.get(cita.pk)
+            if anterior and anterior[0] == cita.updated_at:
+                continue
+            evento = evento_cita(cita, _tipo_desde_bd(cita, anterior[1] if anterior else None))
+            enviados[cita.pk] = (cita.updated_at, cita.estado)
+            cursor = max(cursor, (cita.updated_at, cita.pk))
+            evento['id'] = f"db:{cursor[0].isoformat()}|{cursor[1]}"
+            yield formatear_sse(evento, request, cita)
+            ultimo_envio = time.monotonic()
+        # Lo que quedó fuera de la ventana ya no se vuelve a leer
+        enviados = {pk: v for pk, v in enviados.items() if v[0] >= cursor[0] - ventana}
+        if time.monotonic() - ultimo_envio >= settings.CITAS_EVENTOS_HEARTBEAT:
+            yield ": ping\n\n"
+            ultimo_envio = time.monotonic()
+        time.sleep(settings.CITAS_EVENTOS_POLL_SEGUNDOS)
@@ -1,5 +1,7 @@
 # core/forms.py
 
+import datetime
+
 from django import forms
 from .models import (
     Cita, Paciente, Veterinario, Tutor, HorarioDisponible,
@@ -8,9 +10,27 @@ from .models import (
 )
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from . import agenda
+from .rut import formatear_rut
+
+class TopesCitaMixin:
+    """Revisa que la cita no tope con otra activa del mismo veterinario (ver core/agenda.py)"""
+
+    def validar_topes(self, cleaned_data):
+        fecha_hora = cleaned_data.get('fecha_hora')
+        veterinario = cleaned_data.get('veterinario')
+        estado = cleaned_data.get('estado', self.instance.estado)
+        if not fecha_hora or not veterinario or estado not in agenda.ESTADOS_OCUPAN:
+            return
+        duracion = cleaned_data.get('duracion') or agenda.duracion_para(cleaned_data.get('motivo_consulta'))
+        fin = fecha_hora + datetime.timedelta(minutes=duracion)
+        topes = agenda.citas_que_topan(veterinario, fecha_hora, fin, excluir=self.instance.pk)
+        if topes:
+            raise ValidationError(agenda.mensaje_tope(topes))
+
 
 # --- Formulario de Cita (Versión ÚNICA con validación) ---
-class CitaForm(forms.ModelForm):
+class CitaForm(TopesCitaMixin, forms.ModelForm):
     paciente = forms.ModelChoiceField(
         queryset=Paciente.objects.all(),
         label="Paciente",
@@ -23,23 +43,33 @@ class CitaForm(forms.ModelForm):
     )
     class Meta:
         model = Cita
-        fields = ['paciente', 'veterinario', 'fecha_hora', 'motivo_consulta']
+        fields = ['paciente', 'veterinario', 'fecha_hora', 'duracion', 'motivo_consulta']
         widgets = {
             'fecha_hora': forms.DateTimeInput(
                 attrs={'class': 'form-control', 'type': 'datetime-local'},
                 format='%Y-%m-%dT%H:%M'
             ),
+            'duracion': forms.NumberInput(
+                attrs={'class': 'form-control', 'min': 5, 'max': agenda.DURACION_MAX, 'step': 5}
+            ),
             'motivo_consulta': forms.Textarea(
                 attrs={'class': 'form-control', 'rows': 4}
             ),
         }
         labels = {
             'fecha_hora': 'Fecha y Hora',
+            'duracion': 'Duración (minutos)',
             'motivo_consulta': 'Motivo de la Consulta',
         }
     
     def __init__(self, *args, **kwargs):
         super(CitaForm, self).__init__(*args, **kwargs)
+        # Vacía: se sugiere según el motivo (ver agenda.duracion_para)
+        self.fields['duracion'].required = False
+        self.fields['duracion'].help_text = 'Si se deja vacía se calcula según el motivo.'
+        if not self.instance.pk:
+            self.initial.pop('duracion', None)
+            self.fields['duracion'].initial = None
         if self.instance and self.instance.fecha_hora:
             self.initial['fecha_hora'] = self.instance.fecha_hora.strftime('%Y-%m-%dT%H:%M')
 
@@ -49,6 +79,9 @@ class CitaForm(forms.ModelForm):
         fecha_hora = cleaned_data.get("fecha_hora")
         veterinario = cleaned_data.get("veterinario")
 
+        if not cleaned_data.get('duracion'):
+            cleaned_data['duracion'] = agenda.duracion_para(cleaned_data.get('motivo_consulta'))
+
         if not fecha_hora or not veterinario:
             return cleaned_data
 
@@ -57,6 +90,7 @@ class CitaForm(forms.ModelForm):
 
         dia_semana = fecha_hora.weekday()
         hora_cita = fecha_hora.time()
+        fin = fecha_hora + datetime.timedelta(minutes=cleaned_data['duracion'])
         
         horarios_vet = HorarioDisponible.objects.filter(
             veterinario=veterinario, 
@@ -66,26 +100,29 @@ class CitaForm(forms.ModelForm):
         if not horarios_vet.exists():
             raise ValidationError(f"El veterinario seleccionado no trabaja el día {fecha_hora.strftime('%A')}.")
 
+        # La cita completa (inicio y término) debe caber en un bloque
         disponible_en_horario = False
         for bloque in horarios_vet:
-            if bloque.hora_inicio <= hora_cita < bloque.hora_fin:
+            if bloque.hora_inicio <= hora_cita and fin.date() == fecha_hora.date() and fin.time() <= bloque.hora_fin:
                 disponible_en_horario = True
                 break
         
         if not disponible_en_horario:
             raise ValidationError("La hora seleccionada está fuera del horario laboral del veterinario.")
 
-        citas_existentes = Cita.objects.filter(
-            veterinario=veterinario,
-            fecha_hora=fecha_hora
-        )
-        
-        if self.instance.pk:
-            citas_existentes = citas_existentes.exclude(pk=self.instance.pk)
-        
-        if citas_existentes.exists():
-            raise ValidationError("El veterinario ya tiene una cita agendada a esta misma hora.")
+        self.validar_topes(cleaned_data)
+        return cleaned_data
 
+
+class CitaAdminForm(TopesCitaMixin, forms.ModelForm):
+    """Cita en el admin: admite fechas pasadas y fuera de horario, pero no topes con otra cita"""
+    class Meta:
+        model = Cita
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        self.validar_topes(cleaned_data)
         return cleaned_data
 
 
@@ -103,6 +140,13 @@ class TutorForm(forms.ModelForm):
             'direccion': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
 
+    def clean_rut(self):
+        # Acepta 12.345.678-k y lo guarda como 12345678-K
+        rut = formatear_rut(self.cleaned_data.get('rut'))
+        if Tutor.objects.filter(rut_normalizado=rut).exclude(pk=self.instance.pk).exists():
+            raise ValidationError("Ya existe un tutor con este RUT.")
+        return rut
+
 
 # --- Formulario de Paciente (Versión ÚNICA) ---
 class PacienteForm(forms.ModelForm):
@@ -219,34 +263,11 @@ class VeterinarioForm(forms.ModelForm):
             'telefono': forms.TextInput(attrs={'class': 'form-control', 'placeholder': '+56912345678'}),
         }
 
-
-# --- Formulario para Finalizar Cita (Veterinario/Admin) ---
-class CitaFinalizarForm(forms.ModelForm):
-    class Meta:
-        model = Cita
-        fields = ['monto', 'tipo_pago', 'observaciones_veterinario']
-        widgets = {
-            'monto': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Ej: 25000'}),
-            'tipo_pago': forms.Select(attrs={'class': 'form-select'}),
-            'observaciones_veterinario': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Diagnóstico, tratamiento, etc.'}),
-        }
-        labels = {
-            'observaciones_veterinario': 'Observaciones y Diagnóstico'
-        }
-    
-    def clean_monto(self):
-        monto = self.cleaned_data.get('monto')
-        if not monto:
-            raise ValidationError("Debe ingresar el monto de la consulta.")
-        if monto < 0:
-            raise ValidationError("El monto no puede ser negativo.")
-        return monto
-
-    def clean_tipo_pago(self):
-        tipo_pago = self.cleaned_data.get('tipo_pago')
-        if not tipo_pago:
-            raise ValidationError("Debe seleccionar un tipo de pago.")
-        return tipo_pago
+    def clean_rut(self):
+        rut = formatear_rut(self.cleaned_data.get('rut'))
+        if Veterinario.objects.filter(rut_normalizado=rut).exclude(pk=self.instance.pk).exists():
+            raise ValidationError("Ya existe un veterinario con este RUT.")
+        return rut
 
 
 # --- Formulario de Reportes ---
@@ -267,6 +288,89 @@ class ReporteForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-select'})
     )
+    incluir_archivo = forms.BooleanField(
+        label="Incluir citas archivadas",
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+class AnaliticaForm(forms.Form):
+    """Parámetros de la API de tablas dinámicas de ingresos (ver core/analitica.py)"""
+    fecha_inicio = forms.DateField(required=True)
+    fecha_fin = forms.DateField(required=True)
+    periodo = forms.ChoiceField(
+        choices=[('dia', 'Día'), ('semana', 'Semana'), ('mes', 'Mes')], required=False
+    )
+    dimensiones = forms.MultipleChoiceField(
+        choices=[
+            ('veterinario', 'Veterinario'),
+            ('especie', 'Especie'),
+            ('metodo_pago', 'Método de pago'),
+            ('metodo_abono', 'Método de pago del abono'),
+        ],
+        required=False
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        inicio, fin = cleaned_data.get('fecha_inicio'), cleaned_data.get('fecha_fin')
+        if inicio and fin:
+            if fin < inicio:
+                raise forms.ValidationError("La fecha fin debe ser posterior a la fecha inicio.")
+            if cleaned_data.get('periodo') == 'dia' and (fin - inicio).days > 366:
+                raise forms.ValidationError("Por día se puede consultar a lo más un año.")
+        cleaned_data['periodo'] = cleaned_data.get('periodo') or 'mes'
+        return cleaned_data
+
+class TopesCitaForm(forms.Form):
+    """Parámetros de la API de topes de agenda (ver core/agenda.py)"""
+    veterinario = forms.ModelChoiceField(queryset=Veterinario.objects.all())
+    fecha_hora = forms.DateTimeField(input_formats=['%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M'])
+    duracion = forms.IntegerField(min_value=1, max_value=agenda.DURACION_MAX, required=False)
+    motivo = forms.CharField(required=False)
+    excluir = forms.IntegerField(required=False, help_text='Cita que se está editando')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cleaned_data['duracion'] = cleaned_data.get('duracion') or agenda.duracion_para(cleaned_data.get('motivo'))
+        return cleaned_data
+
+
+class CuposLibresForm(forms.Form):
+    """Parámetros de la API de cupos libres (ver core/cupos.py)"""
+    desde = forms.DateField(required=False, help_text='Primer día (default: hoy)')
+    dias = forms.IntegerField(min_value=1, max_value=31, required=False, help_text='Días a revisar (default: 7)')
+    veterinario = forms.ModelChoiceField(queryset=Veterinario.objects.all(), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cleaned_data['desde'] = cleaned_data.get('desde') or timezone.localdate()
+        cleaned_data['dias'] = cleaned_data.get('dias') or 7
+        return cleaned_data
+
+
+class PrimerosLibresForm(forms.Form):
+    """Parámetros de la API de primeras horas disponibles (ver core/disponibilidad.py)"""
+    DIAS_MAX = 90
+
+    desde = forms.DateField(required=False, help_text='Primer día (default: hoy)')
+    hasta = forms.DateField(required=False, help_text='Último día, incluido (default: 30 días después de desde)')
+    duracion = forms.IntegerField(min_value=1, max_value=agenda.DURACION_MAX, required=False)
+    motivo = forms.CharField(required=False)
+    especialidad = forms.CharField(required=False, max_length=100)
+    k = forms.IntegerField(min_value=1, max_value=50, required=False, help_text='Horarios a entregar (default: 5)')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        desde = cleaned_data['desde'] = cleaned_data.get('desde') or timezone.localdate()
+        hasta = cleaned_data['hasta'] = cleaned_data.get('hasta') or desde + datetime.timedelta(days=30)
+        if hasta < desde:
+            raise ValidationError("La fecha final no puede ser anterior a la inicial.")
+        if (hasta - desde).days > self.DIAS_MAX:
+            raise ValidationError(f"La ventana no puede superar {self.DIAS_MAX} días.")
+        cleaned_data['duracion'] = cleaned_data.get('duracion') or agenda.duracion_para(cleaned_data.get('motivo'))
+        cleaned_data['k'] = cleaned_data.get('k') or 5
+        return cleaned_data
 
 # ============================================================================
 # FORMS PARA FICHA MÉDICA
@@ -385,6 +489,46 @@ class CancelarCitaForm(forms.Form):
         label='Motivo de Cancelación'
     )
 
+class CancelarBloqueForm(forms.Form):
+    """Cancela en una sola operación las citas pendientes de un veterinario en un horario"""
+    veterinario = forms.ModelChoiceField(
+        queryset=Veterinario.objects.all(),
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Veterinario'
+    )
+    fecha = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Fecha'
+    )
+    hora_desde = forms.TimeField(
+        widget=forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+        label='Desde'
+    )
+    hora_hasta = forms.TimeField(
+        widget=forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+        label='Hasta'
+    )
+    motivo = forms.CharField(
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+        label='Motivo de Cancelación'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        hora_desde = cleaned_data.get('hora_desde')
+        hora_hasta = cleaned_data.get('hora_hasta')
+        if hora_desde and hora_hasta and hora_desde >= hora_hasta:
+            raise ValidationError("La hora de inicio debe ser anterior a la hora de término.")
+        return cleaned_data
+
+class ConfirmarCitasDiaForm(forms.Form):
+    """Confirma las citas SOLICITADA de un día, opcionalmente de un solo veterinario"""
+    fecha = forms.DateField(required=False)
+    veterinario = forms.ModelChoiceField(
+        queryset=Veterinario.objects.all(),
+        required=False
+    )
+
 class AbonoForm(forms.Form):
     """Formulario para registrar un abono/pago parcial"""
     monto = forms.DecimalField(
@@ -0,0 +1,148 @@
+# core/grilla.py
+
+"""
+Grilla del día: una fila por veterinario y una columna por bloque de
+``PASO_MINUTOS`` minutos, para ver la agenda de toda la clínica de una vez.
+
+Se cargan con dos consultas los bloques de horario del día de la semana y
+las citas del día (con paciente y veterinario); la matriz se arma en Python.
+Cada fila se entrega comprimida en tramos consecutivos (``celdas``) con su
+ancho en columnas, de modo que el template dibuja una celda por tramo y no
+una por bloque.
+"""
+
+import datetime
+
+from django.utils import timezone
+
+from .agenda import ESTADOS_OCUPAN, fin_de
+from .estados_cita import rango_del_dia
+from .models import Cita, HorarioDisponible
+
+PASO_MINUTOS = 15
+# Horario mostrado cuando el día no tiene bloques ni citas
+INICIO_POR_DEFECTO = datetime.time(9, 0)
+FIN_POR_DEFECTO = datetime.time(18, 0)
+
+ESTADOS_GRILLA = ESTADOS_OCUPAN + ['REALIZADO']
+
+FUERA, LIBRE, CITA = 'fuera', 'libre', 'cita'
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _minutos_locales(fecha_hora, fecha):
+    local = timezone.localtime(fecha_hora)
+    return (local.date() - fecha).days * 24 * 60 + local.hour * 60 + local.minute
+
+
+def grilla_del_dia(fecha):
+    """
+    Retorna ``{'fecha', 'paso', 'columnas', 'filas'}``. ``columnas`` son las horas
+    (``datetime.time``) de inicio de cada bloque; cada fila trae el
+    ``veterinario`` y sus ``celdas``: ``{'tipo', 'inicio', 'ancho', 'cita'}``,
+    con ``tipo`` ``fuera`` (sin horario), ``libre`` o ``cita``.
+    """
+    horarios = list(
+        HorarioDisponible.objects.filter(dia_semana=fecha.weekday())
+        .select_related('veterinario__usuario')
+        .order_by()
+    )
+    inicio, fin = rango_del_dia(fecha)
+    citas = list(
+        Cita.objects.filter(fecha_hora__gte=inicio, fecha_hora__lt=fin, estado__in=ESTADOS_GRILLA)
+        .select_related('paciente', 'veterinario__usuario')
+        .order_by('fecha_hora', 'id')
+    )
+
+    veterinarios = {h.veterinario_id: h.veterinario for h in horarios}
+    veterinarios.update({c.veterinario_id: c.veterinario for c in citas if c.veterinario_id not in veterinarios})
+
+    # Rango visible: de lo más temprano a lo más tarde, redondeado al paso
+    tramos_citas = [
+        (c, _minutos_locales(c.fecha_hora, fecha), _minutos_locales(fin_de(c), fecha)) for c in citas
+    ]
+    extremos = [(_minutos(h.hora_inicio), _minutos(h.hora_fin)) for h in horarios]
+    extremos += [(desde, hasta) for _, desde, hasta in tramos_citas]
+    if extremos:
+        primero = min(d for d, _ in extremos) // PASO_MINUTOS * PASO_MINUTOS
+        ultimo = min(max(h for _, h in extremos), 24 * 60)
+    else:
+        primero, ultimo = _minutos(INICIO_POR_DEFECTO), _minutos(FIN_POR_DEFECTO)
+    n = max(-(-(ultimo - primero) // PASO_MINUTOS), 1)
+
+    def columna(minutos):
+        return min(max((minutos - primero) // PASO_MINUTOS, 0), n)
+
+    matriz = {vet_id: [FUERA] * n for vet_id in veterinarios}
+    for h in horarios:
+        fila = matriz[h.veterinario_id]
+        for i in range(columna(_minutos(h.hora_inicio)), columna(_minutos(h.hora_fin) + PASO_MINUTOS - 1)):
+            fila[i] = LIBRE
+    for cita, desde, hasta in tramos_citas:
+        fila = matriz[cita.veterinario_id]
+        # Una cita ocupa al menos su bloque de inicio; si hay topes gana la primera
+        for i in range(columna(desde), max(columna(hasta + PASO_MINUTOS - 1), columna(desde) + 1)):
+            if not isinstance(fila[i], Cita):
+                fila[i] = cita
+
+    filas = []
+    for vet_id, veterinario in sorted(veterinarios.items(), key=lambda v: str(v[1])):
+        filas.append({'veterinario': veterinario, 'celdas': _comprimir(matriz[vet_id])})
+
+    return {
+        'fecha': fecha,
+        'paso': PASO_MINUTOS,
+        'columnas': [datetime.time(*divmod(primero + i * PASO_MINUTOS, 60)) for i in range(n)],
+        'filas': filas,
+    }
+
+
+def _comprimir(fila):
+    celdas = []
+    for i, valor in enumerate(fila):
+        if celdas and celdas[-1]['_valor'] is valor:
+            celdas[-1]['ancho'] += 1
+            continue
+        celdas.append({
+            '_valor': valor,
+            'tipo': CITA if isinstance(valor, Cita) else valor,
+            'inicio': i,
+            'ancho': 1,
+            'cita': valor if isinstance(valor, Cita) else None,
+        })
+    for celda in celdas:
+        del celda['_valor']
+    return celdas
+
+
+def serializar(grilla):
+    return {
+        'fecha': grilla['fecha'].isoformat(),
+        'paso_minutos': grilla['paso'],
+        'columnas': [c.strftime('%H:%M') for c in grilla['columnas']],
+        'veterinarios': [
+            {
+                'id': fila['veterinario'].pk,
+                'nombre': str(fila['veterinario']),
+                'celdas': [
+                    {
+                        'tipo': celda['tipo'],
+                        'inicio': celda['inicio'],
+                        'ancho': celda['ancho'],
+                        **({'cita': {
+                            'id': celda['cita'].pk,
+                            'paciente': celda['cita'].paciente.nombre,
+                            'estado': celda['cita'].estado,
+                            'hora': timezone.localtime(celda['cita'].fecha_hora).strftime('%H:%M'),
+                            'duracion': celda['cita'].duracion,
+                        }} if celda['cita'] else {}),
+                    }
+                    for celda in fila['celdas']
+                ],
+            }
+            for fila in grilla['filas']
+        ],
+    }
@@ -0,0 +1,246 @@
+# core/importacion.py
+
+"""
+Importación masiva de tutores y pacientes desde CSV.
+
+Los archivos se leen fila a fila (nunca se cargan completos en memoria). Cada
+fila se valida en Python (RUT, especie, largos, fechas...) y las válidas se
+insertan con ``bulk_create`` en lotes, cada uno dentro de su propio
+savepoint: si un lote choca con la BD (p. ej. un RUT creado entre medio), se
+reintenta fila a fila y solo las filas en conflicto quedan en el reporte.
+
+Los pacientes se enlazan con su tutor por la columna ``tutor_rut``, usando un
+diccionario RUT -> id cargado una sola vez al comenzar.
+
+Antes de insertar nada se recorre el archivo una vez para verificar su
+codificación (``verificar_codificacion``): un byte inválido a mitad del
+archivo no debe dejar guardados los lotes anteriores.
+
+Columnas (la primera fila del archivo son los encabezados):
+
+- tutores: rut, nombre, apellido, telefono, email, direccion
+- pacientes: tutor_rut, nombre, especie, raza, sexo, fecha_nacimiento, color,
+  peso, observaciones
+"""
+
+import codecs
+import csv
+import datetime
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .contacto import normalizar_email, normalizar_telefono
+from .models import Tutor, Paciente, especie_choices, sexo_choices
+from .rut import formatear_rut
+
+COLUMNAS_TUTOR = ['rut', 'nombre', 'apellido', 'telefono', 'email', 'direccion']
+COLUMNAS_PACIENTE = [
+    'tutor_rut', 'nombre', 'especie', 'raza', 'sexo', 'fecha_nacimiento', 'color', 'peso', 'observaciones'
+]
+
+# Se acepta el código o la etiqueta, sin distinguir mayúsculas: 'CANINO' o 'Perro'
+ESPECIES = {texto.upper(): codigo for codigo, etiqueta in especie_choices for texto in (codigo, etiqueta)}
+SEXOS = {texto.upper(): codigo for codigo, etiqueta in sexo_choices for texto in (codigo, etiqueta)}
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']
+
+
+def verificar_codificacion(archivo, encoding='utf-8-sig', bloque=64 * 1024):
+    """
+    Decodifica por bloques ``archivo`` (binario, con ``seek``) sin guardar el
+    texto y lo deja de nuevo al inicio. Lanza ``ValidationError`` si algún
+    byte no corresponde a ``encoding``.
+    """
+    decodificador = codecs.getincrementaldecoder(encoding)()
+    leidos = 0
+    try:
+        while True:
+            datos = archivo.read(bloque)
+            decodificador.decode(datos, final=not datos)
+            if not datos:
+                break
+            leidos += len(datos)
+    except UnicodeDecodeError as e:
+        raise ValidationError(
+            f"El archivo no está en {encoding} (byte inválido cerca de la posición {leidos + e.start})."
+        )
+    finally:
+        archivo.seek(0)
+
+
+def leer_csv(archivo, delimitador=','):
+    """``DictReader`` sobre un archivo de texto abierto con ``newline=''``."""
+    lector = csv.DictReader(archivo, delimiter=delimitador)
+    encabezados = [c.strip().lower() for c in (lector.fieldnames or [])]
+    lector.fieldnames = encabezados
+    return lector
+
+
+class Importador:
+    """Valida filas y las inserta por lotes. Las subclases definen ``construir``."""
+
+    modelo = None
+    columnas = []
+    obligatorias = []
+
+    def __init__(self, lote=1000):
+        self.lote = lote
+        self.procesadas = 0
+        self.creadas = 0
+        self.errores = []  # (número de fila en el archivo, mensaje)
+        self.segundos = 0.0
+        self._pendientes = []
+
+    @property
+    def filas_por_segundo(self):
+        return self.procesadas / self.segundos if self.segundos else 0
+
+    def importar(self, lector):
+        inicio = time.perf_counter()
+        faltantes = [c for c in self.obligatorias if c not in (lector.fieldnames or [])]
+        if faltantes:
+            raise ValidationError(f"Faltan columnas: {', '.join(faltantes)}")
+        # La fila 1 son los encabezados
+        for numero, fila in enumerate(lector, start=2):
+            self.procesadas += 1
+            try:
+                objeto = self.construir(fila)
+            except ValidationError as e:
+                self.errores.append((numero, '; '.join(e.messages)))
+                continue
+            self._pendientes.append((numero, objeto))
+            if len(self._pendientes) >= self.lote:
+                self.guardar()
+        self.guardar()
+        self.segundos = time.perf_counter() - inicio
+        return self
+
+    def guardar(self):
+        pendientes, self._pendientes = self._pendientes, []
+        if not pendientes:
+            return
+        try:
+            with transaction.atomic():
+                self.modelo.objects.bulk_create([objeto for _, objeto in pendientes])
+            self.creadas += len(pendientes)
+        except IntegrityError:
+            # Se reintenta fila a fila para aislar las que chocan con la BD
+            for numero, objeto in pendientes:
+                objeto.pk = None
+                try:
+                    with transaction.atomic():
+                        self.modelo.objects.bulk_create([objeto])
+                    self.creadas += 1
+                except IntegrityError as e:
+                    self.errores.append((numero, f"Error de base de datos: {e}"))
+
+    # --- Validación de campos --------------------------------------------
+
+    def texto(self, fila, campo, columna=None):
+        columna = columna or campo
+        valor = (fila.get(columna) or '').strip()
+        if not valor and columna in self.obligatorias:
+            raise ValidationError(f"La columna «{columna}» es obligatoria.")
+        largo = self.modelo._meta.get_field(campo).max_length
+        if largo and len(valor) > largo:
+            raise ValidationError(f"«{columna}» supera los {largo} caracteres.")
+        return valor
+
+
+class ImportadorTutores(Importador):
+    modelo = Tutor
+    columnas = COLUMNAS_TUTOR
+    obligatorias = ['rut', 'nombre', 'apellido', 'telefono']
+
+    def __init__(self, lote=1000):
+        super().__init__(lote)
+        # RUT ya registrados o vistos antes en el archivo
+        self.ruts = set(Tutor.objects.exclude(rut_normalizado=None).values_list('rut_normalizado', flat=True))
+
+    def construir(self, fila):
+        rut = formatear_rut(self.texto(fila, 'rut'))
+        if rut in self.ruts:
+            raise ValidationError(f"El RUT {rut} ya existe.")
+        email = self.texto(fila, 'email') or None
+        if email:
+            validate_email(email)
+        telefono = self.texto(fila, 'telefono')
+        # Columnas normalizadas: bulk_create no llama a Tutor.save()
+        tutor = Tutor(
+            rut=rut,
+            rut_normalizado=rut,
+            nombre=self.texto(fila, 'nombre'),
+            apellido=self.texto(fila, 'apellido'),
+            telefono=telefono,
+            telefono_e164=normalizar_telefono(telefono),
+            email=email,
+            email_normalizado=normalizar_email(email),
+            direccion=self.texto(fila, 'direccion'),
+        )
+        self.ruts.add(rut)
+        return tutor
+
+
+class ImportadorPacientes(Importador):
+    modelo = Paciente
+    columnas = COLUMNAS_PACIENTE
+    # Sin sexo la fila se rechaza: antes quedaba 'M' sin avisar
+    obligatorias = ['tutor_rut', 'nombre', 'especie', 'sexo']
+
+    def __init__(self, lote=1000):
+        super().__init__(lote)
+        self.tutores = dict(Tutor.objects.exclude(rut_normalizado=None).values_list('rut_normalizado', 'id'))
+
+    def construir(self, fila):
+        rut = formatear_rut((fila.get('tutor_rut') or '').strip())
+        if rut not in self.tutores:
+            raise ValidationError(f"No existe un tutor con RUT {rut}.")
+
+        especie = ESPECIES.get(self.texto(fila, 'especie').upper())
+        if especie is None:
+            raise ValidationError(f"Especie inválida: «{fila.get('especie')}».")
+
+        sexo = self.texto(fila, 'sexo')
+        if sexo.upper() not in SEXOS:
+            raise ValidationError(f"Sexo inválido: «{sexo}» (use M o H).")
+
+        return Paciente(
+            tutor_id=self.tutores[rut],
+            nombre=self.texto(fila, 'nombre'),
+            especie=especie,
+            raza=self.texto(fila, 'raza'),
+            sexo=SEXOS[sexo.upper()],
+            fecha_nacimiento=self.fecha(fila.get('fecha_nacimiento')),
+            color=self.texto(fila, 'color'),
+            peso=self.peso(fila.get('peso')),
+            observaciones=self.texto(fila, 'observaciones'),
+        )
+
+    def fecha(self, valor):
+        valor = (valor or '').strip()
+        if not valor:
+            return None
+        for formato in FORMATOS_FECHA:
+            try:
+                fecha = datetime.datetime.strptime(valor, formato).date()
+            except ValueError:
+                continue
+            if fecha > datetime.date.today():
+                raise ValidationError("La fecha de nacimiento no puede ser futura.")
+            return fecha
+        raise ValidationError(f"Fecha de nacimiento inválida: «{valor}».")
+
+    def peso(self, valor):
+        valor = (valor or '').strip().replace(',', '.')
+        if not valor:
+            return None
+        try:
+            peso = Decimal(valor)
+        except InvalidOperation:
+            raise ValidationError(f"Peso inválido: «{valor}».")
+        if peso <= 0 or peso >= 1000:
+            raise ValidationError(f"Peso fuera de rango: «{valor}».")
+        return peso.quantize(Decimal('0.01'))
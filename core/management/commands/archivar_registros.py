@@ -0,0 +1,55 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.archivo import archivar_citas, archivar_historiales, citas_archivables, historiales_archivables
+from core.estados_cita import rango_del_dia
+
+# El dashboard y los reportes mensuales trabajan con los últimos 12 meses
+DIAS_MINIMOS = 366
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a las tablas de archivo las citas finalizadas y pagadas (con su pago, "
+        "abonos e historial) y los historiales clínicos más antiguos que --dias. "
+        "Procesa por lotes, cada uno en su propia transacción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.ARCHIVO_DIAS,
+                            help=f'Antigüedad mínima en días (default: {settings.ARCHIVO_DIAS})')
+        parser.add_argument('--lote', type=int, default=500, help='Citas por transacción (default: 500)')
+        parser.add_argument('--simular', action='store_true', help='Solo contar los registros que se archivarían')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        if options['dias'] < DIAS_MINIMOS:
+            raise CommandError(f"--dias debe ser al menos {DIAS_MINIMOS}: el dashboard usa los últimos 12 meses")
+        fecha = timezone.localdate() - datetime.timedelta(days=options['dias'])
+        corte, _ = rango_del_dia(fecha)
+
+        if options['simular']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Se archivarían {citas_archivables(corte).count()} cita(s) y "
+                f"{historiales_archivables(corte).count()} historial(es) sin cita anteriores al {fecha:%d/%m/%Y}"
+            ))
+            return
+
+        inicio = time.monotonic()
+        totales = {}
+        for nombre, fases in (('citas', archivar_citas), ('historiales', archivar_historiales)):
+            totales[nombre] = 0
+            for lote, cantidad in enumerate(fases(corte, lote=options['lote']), start=1):
+                totales[nombre] += cantidad
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"  {nombre}, lote {lote}: {cantidad}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivadas {totales['citas']} cita(s) y {totales['historiales']} historial(es) sin cita "
+            f"anteriores al {fecha:%d/%m/%Y}, {time.monotonic() - inicio:.1f} s"
+        ))
@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import arranque
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque en frío en procesos nuevos: import de Django y la app, import de "
+        "las URL y tiempo hasta la primera respuesta. Falla si las URL cargan vistas, si la "
+        "primera petición carga vistas ajenas o si algún tiempo empeora respecto de la referencia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ruta', default='/login/', help='Ruta de la primera petición (default: %(default)s)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Procesos a medir; se usa la mediana (default: 5)')
+        parser.add_argument(
+            '--referencia',
+            help=f'JSON de una medición anterior (--guardar) contra el que comparar (default: {arranque.REFERENCIA})'
+        )
+        parser.add_argument('--tolerancia', type=float, default=0.25, help='Empeoramiento relativo aceptado (default: 0.25)')
+        parser.add_argument('--margen-ms', type=float, default=20, help='Margen absoluto en ms además de la tolerancia (default: 20)')
+        parser.add_argument('--guardar', help='Guardar la medición en este archivo JSON para usarla de referencia')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser mayor que 0")
+        referencia = None
+        # Al guardar una referencia nueva no se compara contra la versionada
+        if options['referencia'] or not options['guardar']:
+            try:
+                referencia = arranque.cargar_referencia(options['referencia'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer la referencia: {e}")
+
+        try:
+            resultado = arranque.medir_arranque(options['ruta'], options['repeticiones'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Arranque en frío, {options['ruta']} (estado {resultado['estado']}), "
+            f"mediana de {resultado['repeticiones']} proceso(s):"
+        )
+        self.stdout.write(f"{'':<12} {'ms':>8} {'referencia':>11}")
+        for clave in arranque.TIEMPOS:
+            anterior = f"{referencia[clave]:>11.1f}" if referencia and clave in referencia else f"{'-':>11}"
+            self.stdout.write(f"{clave:<12} {resultado[clave]:>8.1f} {anterior}")
+        self.stdout.write(
+            f"Módulos cargados: {resultado['modulos']}; vistas tras la primera petición: "
+            + (', '.join(resultado['vistas_tras_primera']) or '-')
+        )
+
+        if options['guardar']:
+            with open(options['guardar'], 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, indent=2)
+            self.stdout.write(f"Medición guardada en {options['guardar']}")
+
+        problemas = arranque.comparar(resultado, referencia, options['tolerancia'], options['margen_ms'])
+        if problemas:
+            raise CommandError("Regresión en el arranque:\n- " + '\n- '.join(problemas))
+        self.stdout.write(self.style.SUCCESS("Arranque sin regresiones"))
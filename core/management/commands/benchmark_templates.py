@@ -0,0 +1,192 @@
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+
+from core.forms import (
+    CitaForm, TutorForm, PacienteForm, PersonalForm, VeterinarioForm,
+    CitaFinalizarForm, ReporteForm, VacunaForm, CirugiaForm, AlergiaForm,
+    HorarioMultipleForm, CancelarCitaForm, CancelarBloqueForm, AbonoForm, HistorialClinicoForm
+)
+from core.models import Usuario, Cita, Pago, PurgaTutor
+from core.seed import crear_datos_demo
+from core.template_warmup import listar_templates
+
+# Formulario que recibe cada template en su vista real
+FORMULARIOS = {
+    'core/agregar_historial.html': HistorialClinicoForm,
+    'core/alergia_form.html': AlergiaForm,
+    'core/cancelar_cita.html': CancelarCitaForm,
+    'core/cirugia_form.html': CirugiaForm,
+    'core/cita_form.html': CitaForm,
+    'core/finalizar_cita.html': CitaFinalizarForm,
+    'core/gestionar_horarios.html': HorarioMultipleForm,
+    'core/gestionar_personal.html': PersonalForm,
+    'core/historial_form.html': HistorialClinicoForm,
+    'core/paciente_form.html': PacienteForm,
+    'core/registrar_abono.html': AbonoForm,
+    'core/reportes.html': ReporteForm,
+    'core/tutor_form.html': TutorForm,
+    'core/usuario_form.html': PersonalForm,
+    'core/vacuna_form.html': VacunaForm,
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de renderizado de cada template con contextos poblados. "
+        "Los datos de prueba se crean dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=30, help='Renders por template (default: 30)')
+        parser.add_argument('--template', action='append', dest='templates', help='Medir solo este template (repetible)')
+        parser.add_argument('--tutores', type=int, default=40, help='Tutores a generar para los contextos (default: 40)')
+
+    def handle(self, *args, **options):
+        resultados = []
+        try:
+            with transaction.atomic():
+                datos = crear_datos_demo(n_tutores=options['tutores'])
+                contexto_base = self.construir_contexto(datos)
+                request = self.construir_request(datos['admin'])
+                nombres = options['templates'] or [
+                    n for n in listar_templates() if n.startswith('core/') and n != 'core/base.html'
+                ]
+                for nombre in nombres:
+                    resultados.append(self.medir(nombre, contexto_base, request, options['iteraciones']))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        resultados.sort(key=lambda r: r['media'] or 0, reverse=True)
+        self.stdout.write(f"{'Template':<42} {'media ms':>9} {'p95 ms':>8} {'max ms':>8} {'queries':>8} {'KB':>7}")
+        for r in resultados:
+            if r['error']:
+                self.stdout.write(self.style.ERROR(f"{r['nombre']:<42} ERROR: {r['error']}"))
+                continue
+            self.stdout.write(
+                f"{r['nombre']:<42} {r['media']:>9.2f} {r['p95']:>8.2f} {r['max']:>8.2f} "
+                f"{r['queries']:>8} {r['kb']:>7.1f}"
+            )
+
+    def construir_request(self, usuario):
+        request = RequestFactory().get('/panel/')
+        request.user = usuario
+        request.resolver_match = resolve('/panel/')
+        return request
+
+    def construir_contexto(self, datos):
+        hoy = timezone.localdate()
+        cita = next(c for c in datos['citas'] if c.estado in ('AGENDADA', 'CONFIRMADA', 'SOLICITADA'))
+        pago = Pago.objects.select_related('cita__paciente__tutor').filter(
+            pk__in=[p.pk for p in datos['pagos']]
+        ).first()
+        paciente = datos['pacientes'][0]
+        veterinario = datos['veterinarios'][0]
+        usuarios = Usuario.objects.filter(pk__in=[u.pk for u in datos['usuarios']]).select_related('veterinario')
+        citas = list(
+            Cita.objects.filter(pk__in=[c.pk for c in datos['citas']])
+            .select_related('paciente__tutor', 'veterinario__usuario')
+            .order_by('fecha_hora')[:50]
+        )
+        historial = [h for h in datos['historiales'] if h.paciente_id == paciente.pk]
+        # Purga a medio camino (se revierte con el resto de los datos)
+        tutor = datos['tutores'][-1]
+        purga = PurgaTutor.objects.create(
+            tutor_id=tutor.pk, tutor=f'{tutor} ({tutor.rut})', solicitada_por=datos['admin'],
+            estado='EN_CURSO', pasos_total=10, pasos_completados=4, filas_borradas=120,
+            detalle={'core_cita': 80, 'core_historialclinico': 40},
+        )
+        return {
+            # Entidades individuales
+            'cita': cita,
+            'paciente': paciente,
+            'tutor': datos['tutores'][0],
+            'veterinario': veterinario,
+            'horario': datos['horarios'][0],
+            'usuario': datos['usuarios'][2],
+            'pago': pago,
+            'historial': historial[0] if historial else None,
+            'purga': purga,
+            # Listados
+            'citas': citas,
+            'pacientes': datos['pacientes'],
+            'tutores': datos['tutores'],
+            'veterinarios': datos['veterinarios'],
+            'horarios': datos['horarios'][:5],
+            'usuarios': list(usuarios),
+            'personal': list(usuarios),
+            'pagos': Pago.objects.filter(estado='PENDIENTE', pk__in=[p.pk for p in datos['pagos']])
+                                 .select_related('cita__paciente__tutor', 'cita__veterinario'),
+            # Ficha médica
+            'historial_consultas': historial,
+            'vacunas': [v for v in datos['vacunas'] if v.paciente_id == paciente.pk],
+            'cirugias': [c for c in datos['cirugias'] if c.paciente_id == paciente.pk],
+            'alergias': [a for a in datos['alergias'] if a.paciente_id == paciente.pk and a.activa],
+            'alergias_inactivas': [a for a in datos['alergias'] if a.paciente_id == paciente.pk and not a.activa],
+            'vacunas_pendientes': [],
+            # Agenda y panel
+            'current_date': hoy,
+            'previous_day': hoy - datetime.timedelta(days=1),
+            'next_day': hoy + datetime.timedelta(days=1),
+            'fecha_agenda': hoy.strftime('%Y-%m-%d'),
+            'selected_vet_id': None,
+            'hoy': hoy,
+            'filtro_actual': 'hoy',
+            'total_pacientes': len(datos['pacientes']),
+            'total_veterinarios': len(datos['veterinarios']),
+            'citas_pendientes': 0,
+            'citas_hoy': 0,
+            'total_ingresos': sum(p.monto_total for p in datos['pagos']),
+            'total_adeudado': Pago.objects.aggregate(total=Sum('saldo_pendiente'))['total'] or 0,
+            'titulo': 'Benchmark',
+            'tipo': 'usuario',
+        }
+
+    def medir(self, nombre, contexto_base, request, iteraciones):
+        contexto = dict(contexto_base)
+        if nombre in FORMULARIOS:
+            contexto['form'] = FORMULARIOS[nombre]()
+        if nombre == 'core/veterinario_form.html':
+            contexto['form_usuario'] = PersonalForm(initial={'rol': 'VETERINARIO'})
+            contexto['form_veterinario'] = VeterinarioForm()
+        if nombre == 'core/listar_citas.html':
+            contexto['form_cancelar_bloque'] = CancelarBloqueForm()
+
+        resultado = {'nombre': nombre, 'error': None, 'media': None}
+        try:
+            template = engines['django'].get_template(nombre)
+            # Primer render: compila y calienta cachés (no se mide)
+            html = template.render(contexto, request)
+            tiempos = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(iteraciones):
+                    inicio = time.perf_counter()
+                    template.render(contexto, request)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+        except Exception as e:
+            resultado['error'] = f"{type(e).__name__}: {e}"
+            return resultado
+
+        tiempos.sort()
+        resultado.update({
+            'media': statistics.mean(tiempos),
+            'p95': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+            'max': tiempos[-1],
+            'queries': len(queries) // max(iteraciones, 1),
+            'kb': len(html.encode('utf-8')) / 1024,
+        })
+        return resultado
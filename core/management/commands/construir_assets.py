@@ -0,0 +1,47 @@
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import HASHES_VENDOR, VendorInvalido, descargar_vendor, construir_bundles, fijar_hashes
+
+
+class Command(BaseCommand):
+    help = (
+        "Descarga las librerías externas (Bootstrap, Bootstrap Icons, Chart.js) a vendor/ "
+        "y genera los bundles minificados static/dist/app.js y static/dist/app.css."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar-descarga', action='store_true', help='Volver a descargar las librerías aunque existan')
+        parser.add_argument('--sin-minificar', action='store_true', help='Concatenar sin minificar nuestro JavaScript')
+        parser.add_argument(
+            '--fijar-hashes', action='store_true',
+            help=f'Descargar las librerías y reescribir {HASHES_VENDOR.name} (al cambiar de versión; revisar el diff)'
+        )
+
+    def handle(self, *args, **options):
+        if options['fijar_hashes']:
+            try:
+                hashes = fijar_hashes()
+            except URLError as e:
+                raise CommandError(f"No se pudieron descargar las librerías externas: {e}")
+            for ruta, valor in hashes.items():
+                self.stdout.write(f"  {valor}  {ruta}")
+            self.stdout.write(f"Hashes escritos en {HASHES_VENDOR.name}; revisa el diff antes de confirmarlo.")
+            return
+
+        try:
+            descargados = descargar_vendor(forzar=options['forzar_descarga'])
+        except URLError as e:
+            raise CommandError(f"No se pudieron descargar las librerías externas: {e}")
+        except VendorInvalido as e:
+            raise CommandError(f"Librería externa rechazada: {e}")
+        for ruta in descargados:
+            self.stdout.write(f"  ↓ vendor/{ruta}")
+
+        try:
+            tamanos = construir_bundles(minificar=not options['sin_minificar'])
+        except FileNotFoundError as e:
+            raise CommandError(f"Falta un archivo para el bundle: {e.filename}")
+        for ruta, tamano in tamanos.items():
+            self.stdout.write(f"  ✓ {ruta} ({tamano / 1024:.1f} KB)")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.particiones import crear_particiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea por adelantado las particiones mensuales de la tabla de auditoría "
+        "(solo PostgreSQL). Pensado para cron mensual."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=3, help='Meses a crear desde el actual (default: 3)')
+
+    def handle(self, *args, **options):
+        if options['meses'] < 1:
+            raise CommandError("--meses debe ser mayor que 0")
+        if connection.vendor != 'postgresql':
+            self.stdout.write(f"La base de datos ({connection.vendor}) no usa particiones; nada que hacer.")
+            return
+        creadas = crear_particiones(connection, timezone.localdate(), meses=options['meses'])
+        self.stdout.write(self.style.SUCCESS(f"Particiones listas: {', '.join(creadas)}"))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import cupos
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los cupos de agenda pasados y vuelve a expandir los horarios de todos "
+        "los veterinarios en cupos para las próximas CUPOS_SEMANAS semanas. Pensado "
+        "para cron diario: así la ventana avanza un día cada vez."
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        borrados, creados = cupos.generar()
+        self.stdout.write(self.style.SUCCESS(
+            f"{borrados} cupo(s) pasados borrados, {creados} cupo(s) generados "
+            f"antes del {cupos.horizonte():%d/%m/%Y}, {time.monotonic() - inicio:.1f} s"
+        ))
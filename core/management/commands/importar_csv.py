@@ -0,0 +1,61 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacion import ImportadorPacientes, ImportadorTutores, leer_csv, verificar_codificacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa tutores y/o pacientes desde archivos CSV (ver core/importacion.py para las columnas). "
+        "Los tutores se importan primero, así los pacientes del mismo proceso pueden referenciarlos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tutores', help='CSV de tutores')
+        parser.add_argument('--pacientes', help='CSV de pacientes (columna tutor_rut)')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por bulk_create (default: 1000)')
+        parser.add_argument('--delimitador', default=',', help="Separador de columnas (default: ','; Excel suele usar ';')")
+        parser.add_argument('--encoding', default='utf-8-sig', help='Codificación de los archivos (default: utf-8-sig)')
+        parser.add_argument('--reporte', help='Escribir las filas con error en este CSV')
+
+    def handle(self, *args, **options):
+        if not options['tutores'] and not options['pacientes']:
+            raise CommandError("Indique --tutores y/o --pacientes")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+
+        errores = []
+        for opcion, clase in (('tutores', ImportadorTutores), ('pacientes', ImportadorPacientes)):
+            ruta = options[opcion]
+            if not ruta:
+                continue
+            try:
+                # Todo el archivo se verifica antes de insertar el primer lote
+                with open(ruta, 'rb') as binario:
+                    verificar_codificacion(binario, options['encoding'])
+                with open(ruta, newline='', encoding=options['encoding']) as archivo:
+                    importador = clase(lote=options['lote']).importar(leer_csv(archivo, options['delimitador']))
+            except OSError as e:
+                raise CommandError(f"No se pudo leer {ruta}: {e}")
+            except ValidationError as e:
+                raise CommandError(f"{ruta}: {'; '.join(e.messages)}")
+
+            self.stdout.write(
+                f"{opcion}: {importador.creadas} creados, {len(importador.errores)} con error, "
+                f"{importador.procesadas} filas en {importador.segundos:.2f} s "
+                f"({importador.filas_por_segundo:,.0f} filas/s)"
+            )
+            for numero, mensaje in importador.errores[:20]:
+                self.stderr.write(f"  {ruta}:{numero}: {mensaje}")
+            if len(importador.errores) > 20:
+                self.stderr.write(f"  ... y {len(importador.errores) - 20} más")
+            errores.extend((ruta, numero, mensaje) for numero, mensaje in importador.errores)
+
+        if options['reporte'] and errores:
+            with open(options['reporte'], 'w', newline='', encoding='utf-8') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['archivo', 'fila', 'error'])
+                escritor.writerows(errores)
+            self.stdout.write(f"Reporte de errores: {options['reporte']}")
@@ -0,0 +1,57 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.estados_cita import marcar_inasistencias, rango_del_dia
+from core.models import BarridoInasistencias, Cita
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca como NO_ASISTIO las citas AGENDADA/CONFIRMADA de días anteriores. "
+        "Procesa por lotes cortos y deja un registro por ejecución; se puede correr "
+        "desde cron tantas veces como se quiera."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--antes-de', help='Marcar citas anteriores a esta fecha YYYY-MM-DD (default: hoy)')
+        parser.add_argument('--lote', type=int, default=1000, help='Citas por transacción (default: 1000)')
+        parser.add_argument('--pausa', type=float, default=0, help='Segundos de espera entre lotes (default: 0)')
+        parser.add_argument('--simular', action='store_true', help='Solo contar las citas que se marcarían')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        try:
+            fecha = datetime.date.fromisoformat(options['antes_de']) if options['antes_de'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--antes-de debe tener el formato YYYY-MM-DD")
+        # Una fecha futura marcaría como inasistencias citas que aún no ocurren
+        if fecha > timezone.localdate():
+            raise CommandError("--antes-de no puede ser posterior a hoy")
+        corte, _ = rango_del_dia(fecha)
+
+        # El registro se crea al inicio: una ejecución interrumpida queda sin 'finalizado'
+        barrido = BarridoInasistencias.objects.create(corte=corte, simulacion=options['simular'])
+        inicio = time.monotonic()
+
+        if options['simular']:
+            barrido.marcadas = Cita.objects.filter(
+                estado__in=['AGENDADA', 'CONFIRMADA'], fecha_hora__lt=corte
+            ).count()
+        else:
+            for cantidad, hasta in marcar_inasistencias(corte, lote=options['lote'], pausa=options['pausa']):
+                barrido.marcadas += cantidad
+                barrido.lotes += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"  lote {barrido.lotes}: {cantidad} cita(s) hasta {timezone.localtime(hasta):%d/%m/%Y %H:%M}")
+        barrido.finalizado = timezone.now()
+        barrido.save(update_fields=['marcadas', 'lotes', 'finalizado'])
+
+        accion = "se marcarían" if options['simular'] else "marcadas como NO_ASISTIO"
+        self.stdout.write(self.style.SUCCESS(
+            f"{barrido.marcadas} cita(s) anteriores al {fecha:%d/%m/%Y} {accion} "
+            f"en {barrido.lotes} lote(s), {time.monotonic() - inicio:.1f} s"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_warmup import precargar_templates
+
+
+class Command(BaseCommand):
+    help = "Compila todos los templates del proyecto y reporta los que tengan errores de sintaxis."
+
+    def handle(self, *args, **options):
+        compilados, errores, segundos = precargar_templates()
+        for nombre, error in errores:
+            self.stderr.write(f"  ✗ {nombre}: {error}")
+        self.stdout.write(f"{compilados} template(s) compilados en {segundos * 1000:.1f} ms")
+        if errores:
+            raise CommandError(f"{len(errores)} template(s) con errores")
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import carga
+from core.seed import PASSWORD_DEMO, crear_datos_demo
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga local contra un servidor ya levantado (runserver o gunicorn) que "
+        "use esta misma base de datos. Simula recepcionistas, veterinarios y administradores "
+        "y reporta throughput, p50/p95/p99 y tasa de error por ruta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL base del servidor (default: %(default)s)')
+        parser.add_argument('--recepcionistas', type=int, default=4, help='Usuarios virtuales de recepción (default: 4)')
+        parser.add_argument('--veterinarios', type=int, default=3, help='Usuarios virtuales veterinarios (default: 3)')
+        parser.add_argument('--admins', type=int, default=1, help='Usuarios virtuales administradores (default: 1)')
+        parser.add_argument('--duracion', type=float, default=60, help='Segundos de prueba (default: 60)')
+        parser.add_argument('--peticiones', type=int, help='Detener tras este total de peticiones (en vez de --duracion)')
+        parser.add_argument('--pausa', type=float, default=0.5, help='Pausa media entre acciones de un usuario, en segundos (default: 0.5)')
+        parser.add_argument('--password', default=PASSWORD_DEMO, help='Contraseña de los usuarios (default: la de crear_datos_demo)')
+        parser.add_argument('--dominio', default='@demo.cl', help='Sufijo del email de los usuarios a usar (default: %(default)s)')
+        parser.add_argument('--sembrar', type=int, metavar='TUTORES', help='Crear antes datos de demostración con esta cantidad de tutores')
+        parser.add_argument('--semilla', type=int, help='Semilla para repetir la misma secuencia de acciones')
+        parser.add_argument('--json', dest='archivo_json', help='Guardar además el resumen en este archivo JSON')
+
+    def handle(self, *args, **options):
+        if options['peticiones'] is not None and options['peticiones'] < 1:
+            raise CommandError("--peticiones debe ser mayor que 0")
+        if options['sembrar']:
+            with transaction.atomic():
+                datos = crear_datos_demo(n_tutores=options['sembrar'])
+            self.stdout.write(f"Datos de demostración: {len(datos['citas'])} cita(s), {len(datos['pacientes'])} paciente(s)")
+
+        usuarios = {
+            'RECEPCIONISTA': options['recepcionistas'],
+            'VETERINARIO': options['veterinarios'],
+            'ADMIN': options['admins'],
+        }
+        self.stdout.write(
+            f"Carga contra {options['url']}: "
+            + ', '.join(f"{n} {rol.lower()}" for rol, n in usuarios.items() if n)
+        )
+        resultados = carga.ejecutar(
+            options['url'], usuarios, options['password'], dominio=options['dominio'],
+            duracion=None if options['peticiones'] else options['duracion'],
+            peticiones=options['peticiones'], pausa=options['pausa'], semilla=options['semilla'],
+        )
+        filas = resultados.resumen()
+        if filas[-1]['peticiones'] == 0:
+            raise CommandError("No se hizo ninguna petición: revisa que haya usuarios de cada rol y el servidor esté arriba")
+
+        def ms(valor):
+            return f"{valor:>8.1f}" if valor is not None else f"{'-':>8}"
+
+        self.stdout.write(f"\n{'Ruta':<24} {'peticiones':>10} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'error %':>8}")
+        for fila in filas:
+            linea = (
+                f"{fila['ruta']:<24} {fila['peticiones']:>10} {fila['por_segundo']:>7.1f} "
+                f"{ms(fila['p50'])} {ms(fila['p95'])} {ms(fila['p99'])} {fila['error_pct']:>8.1f}"
+            )
+            self.stdout.write(self.style.ERROR(linea) if fila['errores'] else linea)
+        self.stdout.write(f"\n{resultados.segundos:.1f} s")
+
+        if options['archivo_json']:
+            with open(options['archivo_json'], 'w', encoding='utf-8') as f:
+                json.dump({'segundos': resultados.segundos, 'usuarios': usuarios, 'rutas': filas}, f, indent=2)
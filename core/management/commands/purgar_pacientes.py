@@ -0,0 +1,43 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.purga import pacientes_purgables, purgar_pacientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina definitivamente los pacientes dados de baja hace más de --dias, con sus "
+        "citas, pagos, abonos y ficha médica. Procesa por lotes cortos; pensado para cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=30, help='Días desde la baja (default: 30)')
+        parser.add_argument('--lote', type=int, default=100, help='Pacientes por transacción (default: 100)')
+        parser.add_argument('--simular', action='store_true', help='Solo contar los pacientes que se eliminarían')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        if options['dias'] < 0:
+            raise CommandError("--dias no puede ser negativo")
+        corte = timezone.now() - datetime.timedelta(days=options['dias'])
+
+        if options['simular']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Se eliminarían {pacientes_purgables(corte).count()} paciente(s) dados de baja "
+                f"antes del {timezone.localtime(corte):%d/%m/%Y %H:%M}"
+            ))
+            return
+
+        inicio = time.monotonic()
+        total = 0
+        for lote, cantidad in enumerate(purgar_pacientes(corte, lote=options['lote']), start=1):
+            total += cantidad
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  lote {lote}: {cantidad} paciente(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} paciente(s) eliminados definitivamente, {time.monotonic() - inicio:.1f} s"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.purga import purgas_abandonadas, reanudar_purgas
+
+
+class Command(BaseCommand):
+    help = (
+        "Retoma las purgas de tutores abandonadas (sin avance en PURGA_ABANDONADA_MINUTOS), "
+        "por ejemplo porque se reinició el worker que las ejecutaba. Pensado para cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por sentencia DELETE (default: 1000)')
+        parser.add_argument('--simular', action='store_true', help='Solo listar las purgas abandonadas')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+
+        if options['simular']:
+            for purga in purgas_abandonadas().order_by('iniciada'):
+                self.stdout.write(f"  {purga} - sin avance desde {timezone.localtime(purga.actualizada):%d/%m/%Y %H:%M}")
+            return
+
+        total = 0
+        for purga in reanudar_purgas(lote=options['lote']):
+            total += 1
+            estilo = self.style.SUCCESS if purga.estado == 'COMPLETADA' else self.style.ERROR
+            self.stdout.write(estilo(f"  {purga}: {purga.filas_borradas} registro(s) eliminados"))
+        self.stdout.write(self.style.SUCCESS(f"{total} purga(s) reanudada(s)"))
@@ -0,0 +1,269 @@
+# core/metricas.py
+
+"""
+Latencia por nombre de URL, en memoria del proceso.
+
+``MetricasMiddleware`` mide cada petición y la suma a tres histogramas del
+nombre de su URL (``listar_citas``, ``ficha_medica``, ``dashboard_data``...):
+
+- ``total``: desde que entra al middleware hasta que sale la respuesta.
+- ``db``: tiempo dentro de las consultas SQL (``execute_wrapper`` sobre las
+  conexiones de la petición).
+- ``plantilla``: tiempo renderizando plantillas. Incluye las consultas que
+  se disparan desde la plantilla (querysets perezosos), que también cuentan
+  en ``db``.
+
+Los histogramas usan ``BUCKETS`` fijos, así que sumarlos o restarlos entre
+procesos o instantes es exacto y los percentiles se estiman dentro del
+bucket igual que ``histogram_quantile`` de Prometheus.
+
+Salidas:
+
+- ``/metricas/``: formato de texto de Prometheus, solo desde ``METRICAS_IPS``
+  o para un ADMIN con sesión.
+- Logger ``core.acceso``: una línea JSON por petición (si
+  ``METRICAS_ACCESO_LOG``).
+- Logger ``core.metricas``: cada ``METRICAS_RESUMEN_SEGUNDOS`` una línea JSON
+  con cantidad y p50/p95/p99 por URL del último intervalo, para seguir la
+  deriva del p95 en los logs.
+
+Con varios workers de gunicorn cada uno lleva sus propios histogramas; el
+scraper de Prometheus los ve como instancias distintas.
+"""
+
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+logger_acceso = logging.getLogger('core.acceso')
+
+# Límites superiores en segundos; el último bucket (+Inf) queda implícito
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMPONENTES = ('total', 'db', 'plantilla')
+PERCENTILES = (50, 95, 99)
+SIN_RUTA = 'sin_ruta'
+
+_actual = threading.local()
+
+
+class Histograma:
+    """Conteos por bucket (no acumulados), suma y cantidad de observaciones."""
+
+    def __init__(self, conteos=None, suma=0.0):
+        self.conteos = list(conteos) if conteos else [0] * (len(BUCKETS) + 1)
+        self.suma = suma
+
+    @property
+    def cantidad(self):
+        return sum(self.conteos)
+
+    def observar(self, segundos):
+        self.conteos[bisect.bisect_left(BUCKETS, segundos)] += 1
+        self.suma += segundos
+
+    def copia(self):
+        return Histograma(self.conteos, self.suma)
+
+    def menos(self, anterior):
+        """Observaciones hechas desde ``anterior`` (una copia previa de este histograma)."""
+        return Histograma([a - b for a, b in zip(self.conteos, anterior.conteos)], self.suma - anterior.suma)
+
+    def percentil(self, p):
+        """Estimación del percentil ``p`` interpolando dentro del bucket; ``None`` si está vacío."""
+        cantidad = self.cantidad
+        if not cantidad:
+            return None
+        objetivo = cantidad * p / 100
+        acumulado = 0
+        for i, conteo in enumerate(self.conteos):
+            if conteo and acumulado + conteo >= objetivo:
+                if i == len(BUCKETS):
+                    # Sobre el último límite no hay con qué interpolar
+                    return BUCKETS[-1]
+                inferior = BUCKETS[i - 1] if i else 0.0
+                return inferior + (BUCKETS[i] - inferior) * (objetivo - acumulado) / conteo
+            acumulado += conteo
+        return BUCKETS[-1]
+
+
+class Registro:
+    """Histogramas por ``(nombre de URL, componente)``, compartidos por los hilos del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._anteriores = {}
+        self._proximo_resumen = None
+
+    def observar(self, ruta, tiempos):
+        with self._lock:
+            for componente, segundos in tiempos.items():
+                histograma = self._histogramas.get((ruta, componente))
+                if histograma is None:
+                    histograma = self._histogramas[(ruta, componente)] = Histograma()
+                histograma.observar(segundos)
+
+    def copia(self):
+        with self._lock:
+            return {clave: h.copia() for clave, h in self._histogramas.items()}
+
+    def reiniciar(self):
+        with self._lock:
+            self._histogramas, self._anteriores, self._proximo_resumen = {}, {}, None
+
+    def resumen(self, desde=None):
+        """
+        ``{ruta: {'peticiones': n, 'total': {'p50': ms, ...}, 'db': ..., 'plantilla': ...}}``
+        con las observaciones posteriores a ``desde`` (una ``copia()`` anterior).
+        """
+        datos = {}
+        for (ruta, componente), histograma in sorted(self.copia().items()):
+            if desde and (ruta, componente) in desde:
+                histograma = histograma.menos(desde[(ruta, componente)])
+            if not histograma.cantidad:
+                continue
+            fila = datos.setdefault(ruta, {})
+            if componente == 'total':
+                fila['peticiones'] = histograma.cantidad
+            fila[componente] = {f'p{p}': round(histograma.percentil(p) * 1000, 1) for p in PERCENTILES}
+        return datos
+
+    def resumir_si_corresponde(self):
+        """Registra en ``core.metricas`` el resumen del intervalo cuando se cumple ``METRICAS_RESUMEN_SEGUNDOS``."""
+        ahora = time.monotonic()
+        with self._lock:
+            if self._proximo_resumen is None:
+                self._proximo_resumen = ahora + settings.METRICAS_RESUMEN_SEGUNDOS
+            if ahora < self._proximo_resumen:
+                return
+            self._proximo_resumen = ahora + settings.METRICAS_RESUMEN_SEGUNDOS
+            anteriores = self._anteriores
+        actuales = self.copia()
+        with self._lock:
+            self._anteriores = actuales
+        resumen = self.resumen(desde=anteriores)
+        if resumen:
+            logger.info(json.dumps({'resumen': resumen, 'segundos': settings.METRICAS_RESUMEN_SEGUNDOS}))
+
+    def prometheus(self):
+        """Los histogramas en formato de texto de Prometheus 0.0.4."""
+        histogramas = self.copia()
+        lineas = []
+        for componente in COMPONENTES:
+            nombre = 'clinica_peticion_segundos' if componente == 'total' else f'clinica_peticion_{componente}_segundos'
+            lineas.append(f'# HELP {nombre} {AYUDA[componente]}')
+            lineas.append(f'# TYPE {nombre} histogram')
+            for (ruta, comp), histograma in sorted(histogramas.items()):
+                if comp != componente:
+                    continue
+                etiqueta = f'vista="{ruta}"'
+                acumulado = 0
+                for limite, conteo in zip((*BUCKETS, '+Inf'), histograma.conteos):
+                    acumulado += conteo
+                    lineas.append(f'{nombre}_bucket{{{etiqueta},le="{limite}"}} {acumulado}')
+                lineas.append(f'{nombre}_sum{{{etiqueta}}} {histograma.suma:.6f}')
+                lineas.append(f'{nombre}_count{{{etiqueta}}} {acumulado}')
+        return '\n'.join(lineas) + '\n'
+
+
+AYUDA = {
+    'total': 'Duración de la petición por nombre de URL.',
+    'db': 'Tiempo en consultas SQL por nombre de URL.',
+    'plantilla': 'Tiempo renderizando plantillas por nombre de URL.',
+}
+
+registro = Registro()
+
+
+class Medicion:
+    """Tiempos acumulados de la petición en curso."""
+
+    def __init__(self):
+        self.db = 0.0
+        self.consultas = 0
+        self.plantilla = 0.0
+        self.profundidad = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de las conexiones
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+class MetricasMiddleware:
+    """Mide la petición y la suma a los histogramas; va primero en ``MIDDLEWARE``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = _actual.medicion = Medicion()
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as envolturas:
+                for conexion in connections.all():
+                    envolturas.enter_context(conexion.execute_wrapper(medicion))
+                response = self.get_response(request)
+        finally:
+            _actual.medicion = None
+        total = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        # Las URL sin nombre (404, estáticos) van juntas para no abrir una serie por ruta
+        ruta = (match.view_name if match else None) or SIN_RUTA
+        registro.observar(ruta, {'total': total, 'db': medicion.db, 'plantilla': medicion.plantilla})
+        if settings.METRICAS_ACCESO_LOG:
+            usuario = getattr(request, 'user', None)
+            logger_acceso.info(json.dumps({
+                'vista': ruta,
+                'metodo': request.method,
+                'ruta': request.path,
+                'estado': response.status_code,
+                'ms': round(total * 1000, 1),
+                'db_ms': round(medicion.db * 1000, 1),
+                'consultas': medicion.consultas,
+                'plantilla_ms': round(medicion.plantilla * 1000, 1),
+                'usuario': usuario.pk if usuario is not None and usuario.is_authenticated else None,
+            }))
+        registro.resumir_si_corresponde()
+        return response
+
+
+def _render_medido(render):
+    def envoltura(self, context=None, request=None):
+        medicion = getattr(_actual, 'medicion', None)
+        if medicion is None or medicion.profundidad:
+            # Fuera de una petición, o render_to_string anidado: lo cuenta el de afuera
+            return render(self, context, request)
+        medicion.profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            medicion.plantilla += time.perf_counter() - inicio
+            medicion.profundidad -= 1
+
+    envoltura.medido = True
+    return envoltura
+
+
+def conectar():
+    """Envuelve el render del backend de plantillas de Django (una vez, desde ``CoreConfig.ready``)."""
+    if not getattr(Template.render, 'medido', False):
+        Template.render = _render_medido(Template.render)
+
+
+def desde_red_local(request):
+    return request.META.get('REMOTE_ADDR') in settings.METRICAS_IPS
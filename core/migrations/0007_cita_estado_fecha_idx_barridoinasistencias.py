@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_pago_abono'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarridoInasistencias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iniciado', models.DateTimeField(auto_now_add=True)),
+                ('finalizado', models.DateTimeField(blank=True, help_text='Vacío si la ejecución no terminó', null=True)),
+                ('corte', models.DateTimeField(help_text='Se marcaron las citas anteriores a este instante')),
+                ('marcadas', models.PositiveIntegerField(default=0, help_text='Citas pasadas a NO_ASISTIO')),
+                ('lotes', models.PositiveIntegerField(default=0)),
+                ('simulacion', models.BooleanField(default=False, help_text='Ejecución sin cambios (--simular)')),
+            ],
+            options={
+                'verbose_name': 'Barrido de inasistencias',
+                'verbose_name_plural': 'Barridos de inasistencias',
+                'ordering': ['-iniciado'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['estado', 'fecha_hora'], name='cita_estado_fecha_idx'),
+        ),
+    ]
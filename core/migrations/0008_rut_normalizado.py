@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+from core.rut import normalizar_rut
+
+HELP = "RUT validado en formato canónico (ver core/rut.py); vacío si el RUT no es válido"
+
+
+def poblar_rut_normalizado(apps, schema_editor):
+    """
+    Calcula el RUT normalizado de los registros existentes. Los RUT inválidos
+    y los que repiten uno ya normalizado (mismo RUT escrito distinto) quedan
+    en NULL para no romper el índice único; se pueden corregir editándolos.
+    """
+    for nombre in ('Tutor', 'Veterinario'):
+        modelo = apps.get_model('core', nombre)
+        vistos = set()
+        cambios = []
+        for objeto in modelo.objects.order_by('pk').only('pk', 'rut').iterator(chunk_size=2000):
+            rut = normalizar_rut(objeto.rut)
+            if rut in vistos:
+                rut = None
+            if rut:
+                vistos.add(rut)
+                objeto.rut_normalizado = rut
+                cambios.append(objeto)
+            if len(cambios) >= 2000:
+                modelo.objects.bulk_update(cambios, ['rut_normalizado'])
+                cambios = []
+        modelo.objects.bulk_update(cambios, ['rut_normalizado'])
+
+
+# El índice único se crea en 0009, en otra transacción: en PostgreSQL no se puede
+# alterar una tabla con eventos de triggers pendientes del backfill.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_cita_estado_fecha_idx_barridoinasistencias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutor',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, editable=False, help_text=HELP, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='veterinario',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, editable=False, help_text=HELP, max_length=10, null=True),
+        ),
+        migrations.RunPython(poblar_rut_normalizado, migrations.RunPython.noop),
+    ]
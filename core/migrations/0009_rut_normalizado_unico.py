@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+HELP = "RUT validado en formato canónico (ver core/rut.py); vacío si el RUT no es válido"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_rut_normalizado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tutor',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, editable=False, help_text=HELP, max_length=10, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='veterinario',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, editable=False, help_text=HELP, max_length=10, null=True, unique=True),
+        ),
+    ]
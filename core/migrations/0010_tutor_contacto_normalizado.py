@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+from core.contacto import normalizar_email, normalizar_telefono
+
+
+def poblar_contacto_normalizado(apps, schema_editor):
+    Tutor = apps.get_model('core', 'Tutor')
+    cambios = []
+    for tutor in Tutor.objects.only('pk', 'telefono', 'email').iterator(chunk_size=2000):
+        tutor.telefono_e164 = normalizar_telefono(tutor.telefono)
+        tutor.email_normalizado = normalizar_email(tutor.email)
+        cambios.append(tutor)
+        if len(cambios) >= 2000:
+            Tutor.objects.bulk_update(cambios, ['telefono_e164', 'email_normalizado'])
+            cambios = []
+    Tutor.objects.bulk_update(cambios, ['telefono_e164', 'email_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_rut_normalizado_unico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutor',
+            name='email_normalizado',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Email en minúsculas, para búsquedas exactas', max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='tutor',
+            name='telefono_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Teléfono en formato E.164 (ver core/contacto.py), para buscar por número entrante', max_length=16, null=True),
+        ),
+        migrations.RunPython(poblar_contacto_normalizado, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_tutor_contacto_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alergia',
+            index=models.Index(fields=['paciente', 'fecha_deteccion', 'id'], name='alergia_paciente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cirugia',
+            index=models.Index(fields=['paciente', 'fecha_cirugia', 'id'], name='cirugia_paciente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['paciente', 'fecha_hora', 'id'], name='cita_paciente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialclinico',
+            index=models.Index(fields=['paciente', 'fecha_atencion', 'id'], name='historial_paciente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacuna',
+            index=models.Index(fields=['paciente', 'fecha_aplicacion', 'id'], name='vacuna_paciente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_indices_timeline_paciente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CitaArchivada',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('fecha_hora', models.DateTimeField()),
+                ('motivo_consulta', models.TextField()),
+                ('estado', models.CharField(choices=[('SOLICITADA', 'Solicitada por Veterinario'), ('AGENDADA', 'Agendada'), ('CONFIRMADA', 'Confirmada'), ('EN_CURSO', 'En Curso'), ('REALIZADO', 'Realizado'), ('CANCELADA', 'Cancelada'), ('NO_ASISTIO', 'No Asistió')], max_length=20)),
+                ('notas_recepcion', models.TextField(blank=True)),
+                ('monto', models.DecimalField(blank=True, decimal_places=0, max_digits=10, null=True)),
+                ('tipo_pago', models.CharField(blank=True, choices=[('DEBITO', 'Débito'), ('CREDITO', 'Crédito'), ('EFECTIVO', 'Efectivo')], max_length=20, null=True)),
+                ('observaciones_veterinario', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archivada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('creada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas_archivadas', to='core.paciente')),
+                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='citas_archivadas', to='core.veterinario')),
+            ],
+            options={
+                'verbose_name': 'Cita archivada',
+                'verbose_name_plural': 'Citas archivadas',
+                'ordering': ['-fecha_hora'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialClinicoArchivado',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('cita_id', models.IntegerField(blank=True, null=True)),
+                ('fecha_atencion', models.DateTimeField()),
+                ('motivo', models.TextField()),
+                ('diagnostico', models.TextField()),
+                ('tratamiento', models.TextField()),
+                ('notas', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archivada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historiales_archivados', to='core.paciente')),
+                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.veterinario')),
+            ],
+            options={
+                'verbose_name': 'Historial clínico archivado',
+                'verbose_name_plural': 'Historiales clínicos archivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='PagoArchivado',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('monto_total', models.DecimalField(decimal_places=0, max_digits=10)),
+                ('monto_pagado', models.DecimalField(decimal_places=0, max_digits=10)),
+                ('saldo_pendiente', models.DecimalField(decimal_places=0, max_digits=10)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PARCIAL', 'Pago Parcial'), ('PAGADO', 'Pagado')], max_length=20)),
+                ('metodo_pago_principal', models.CharField(blank=True, choices=[('EFECTIVO', 'Efectivo'), ('DEBITO', 'Débito'), ('CREDITO', 'Crédito'), ('TRANSFERENCIA', 'Transferencia')], max_length=20, null=True)),
+                ('fecha_pago_completo', models.DateTimeField(blank=True, null=True)),
+                ('notas', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archivada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cita', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pago', to='core.citaarchivada')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AbonoArchivado',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('monto', models.DecimalField(decimal_places=0, max_digits=10)),
+                ('metodo_pago', models.CharField(choices=[('EFECTIVO', 'Efectivo'), ('DEBITO', 'Débito'), ('CREDITO', 'Crédito'), ('TRANSFERENCIA', 'Transferencia')], max_length=20)),
+                ('fecha', models.DateTimeField()),
+                ('notas', models.TextField(blank=True)),
+                ('archivada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('registrado_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('pago', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='abonos', to='core.pagoarchivado')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='citaarchivada',
+            index=models.Index(fields=['paciente', 'fecha_hora', 'id'], name='citaarch_paciente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='citaarchivada',
+            index=models.Index(fields=['fecha_hora'], name='citaarch_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialclinicoarchivado',
+            index=models.Index(fields=['paciente', 'fecha_atencion', 'id'], name='histarch_paciente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:35
+
+from django.db import migrations, models
+
+
+def fechar_bajas_existentes(apps, schema_editor):
+    # Los pacientes que ya estaban inactivos quedan purgables desde su última modificación
+    Paciente = apps.get_model('core', 'Paciente')
+    Paciente.objects.filter(activo=False, eliminado_en__isnull=True).update(eliminado_en=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_archivo_citas_historiales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Fecha de baja (eliminación lógica)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['nombre'], name='paciente_activo_nombre_idx'),
+        ),
+        migrations.RunPython(fechar_bajas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_paciente_baja_logica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgaTutor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tutor_id', models.IntegerField(db_index=True)),
+                ('tutor', models.CharField(help_text='Nombre y RUT del tutor eliminado', max_length=220)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_CURSO', 'En curso'), ('COMPLETADA', 'Completada'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('iniciada', models.DateTimeField(auto_now_add=True)),
+                ('finalizada', models.DateTimeField(blank=True, null=True)),
+                ('pasos_total', models.PositiveIntegerField(default=0)),
+                ('pasos_completados', models.PositiveIntegerField(default=0)),
+                ('filas_borradas', models.PositiveIntegerField(default=0)),
+                ('detalle', models.JSONField(default=dict, help_text='Filas borradas por tabla')),
+                ('error', models.TextField(blank=True)),
+                ('solicitada_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Purga de tutor',
+                'verbose_name_plural': 'Purgas de tutores',
+                'ordering': ['-iniciada'],
+            },
+        ),
+    ]
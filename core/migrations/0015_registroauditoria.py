@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:41
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+from core.particiones import crear_particiones, particionar_tabla
+
+
+def particionar_por_mes(apps, schema_editor):
+    # Solo PostgreSQL; en otros motores la tabla queda normal
+    particionar_tabla(schema_editor.connection, [
+        ('auditoria_objeto_idx', ['modelo', 'objeto_id']),
+        ('auditoria_paciente_idx', ['paciente_id', 'fecha']),
+    ])
+    crear_particiones(schema_editor.connection, timezone.localdate(), meses=3)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_purgatutor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario_id', models.IntegerField(blank=True, null=True)),
+                ('usuario_email', models.CharField(blank=True, max_length=254)),
+                ('modelo', models.CharField(max_length=50)),
+                ('objeto_id', models.BigIntegerField(blank=True, null=True)),
+                ('paciente_id', models.IntegerField(blank=True, null=True)),
+                ('accion', models.CharField(choices=[('CREAR', 'Creación'), ('MODIFICAR', 'Modificación'), ('ELIMINAR', 'Eliminación'), ('MASIVA', 'Cambio masivo')], max_length=10)),
+                ('cambios', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='{campo: [antes, después]}')),
+            ],
+            options={
+                'verbose_name': 'Registro de auditoría',
+                'verbose_name_plural': 'Registros de auditoría',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['modelo', 'objeto_id'], name='auditoria_objeto_idx'), models.Index(fields=['paciente_id', 'fecha'], name='auditoria_paciente_idx')],
+            },
+        ),
+        migrations.RunPython(particionar_por_mes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:51
+
+import django.core.validators
+from django.db import migrations, models
+
+ESTADOS_OCUPAN = "('SOLICITADA', 'AGENDADA', 'CONFIRMADA', 'EN_CURSO')"
+# Rango de la cita como timestamp UTC: timestamptz + interval no es inmutable
+# y no puede ir en un índice; timestamp + interval sí
+RANGO = (
+    "tsrange(fecha_hora AT TIME ZONE 'UTC', "
+    "(fecha_hora AT TIME ZONE 'UTC') + duracion * interval '1 minute')"
+)
+
+
+def crear_restriccion_topes(apps, schema_editor):
+    # Solo PostgreSQL; en otros motores el tope se revisa en core/agenda.py
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        # Citas activas que ya se topaban (antes solo se revisaba la hora exacta).
+        # No se corrigen solas: acortarlas cambiaría citas ya acordadas.
+        cursor.execute(f"""
+            SELECT id, siguiente_id, veterinario_id, fecha_hora, duracion
+            FROM (
+                SELECT id, veterinario_id, fecha_hora, duracion,
+                       LEAD(id) OVER w AS siguiente_id,
+                       LEAD(fecha_hora) OVER w AS siguiente
+                FROM core_cita WHERE estado IN {ESTADOS_OCUPAN}
+                WINDOW w AS (PARTITION BY veterinario_id ORDER BY fecha_hora, id)
+            ) t
+            WHERE siguiente < fecha_hora + duracion * interval '1 minute'
+            ORDER BY veterinario_id, fecha_hora
+        """)
+        topes = cursor.fetchall()
+        if topes:
+            detalle = '\n'.join(
+                f"  cita {cita} (veterinario {vet}, {inicio:%Y-%m-%d %H:%M} UTC, {minutos} min) topa con la cita {otra}"
+                for cita, otra, vet, inicio, minutos in topes[:50]
+            )
+            if len(topes) > 50:
+                detalle += f"\n  ... y {len(topes) - 50} más"
+            raise RuntimeError(
+                f"Hay {len(topes)} cita(s) activa(s) que se topan con otra del mismo veterinario. "
+                f"Reprograme o cancele una de cada par y vuelva a ejecutar migrate:\n{detalle}"
+            )
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        cursor.execute(f"""
+            ALTER TABLE core_cita ADD CONSTRAINT cita_sin_topes
+            EXCLUDE USING gist (veterinario_id WITH =, {RANGO} WITH &&)
+            WHERE (estado IN {ESTADOS_OCUPAN})
+        """)
+
+
+def quitar_restriccion_topes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE core_cita DROP CONSTRAINT IF EXISTS cita_sin_topes")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_registroauditoria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cita',
+            name='duracion',
+            field=models.PositiveSmallIntegerField(default=30, help_text='Duración en minutos (la cita ocupa [fecha_hora, fecha_hora + duracion))', validators=[django.core.validators.MaxValueValidator(240)]),
+        ),
+        migrations.AddField(
+            model_name='citaarchivada',
+            name='duracion',
+            field=models.PositiveSmallIntegerField(default=30),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['veterinario', 'fecha_hora'], name='cita_vet_fecha_idx'),
+        ),
+        migrations.RunPython(crear_restriccion_topes, quitar_restriccion_topes),
+    ]
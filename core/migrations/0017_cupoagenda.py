@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_cita_duracion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CupoAgenda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('fin', models.DateTimeField()),
+                ('cita', models.ForeignKey(blank=True, help_text='Cita que ocupa el cupo (vacío: libre)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cupos', to='core.cita')),
+                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cupos', to='core.veterinario')),
+            ],
+            options={
+                'verbose_name': 'Cupo de agenda',
+                'verbose_name_plural': 'Cupos de agenda',
+                'ordering': ['inicio', 'veterinario'],
+                'indexes': [models.Index(condition=models.Q(('cita__isnull', True)), fields=['inicio'], name='cupo_libre_inicio_idx')],
+                'constraints': [models.UniqueConstraint(fields=('veterinario', 'inicio'), name='cupo_vet_inicio_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cupoagenda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['updated_at', 'id'], name='cita_actualizada_idx'),
+        ),
+    ]
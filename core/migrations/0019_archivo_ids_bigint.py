@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_cita_actualizada_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='abonoarchivado',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='citaarchivada',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='historialclinicoarchivado',
+            name='cita_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='historialclinicoarchivado',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='pagoarchivado',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_archivo_ids_bigint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registroauditoria',
+            name='paciente_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='registroauditoria',
+            name='usuario_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
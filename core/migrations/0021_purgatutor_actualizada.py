@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def descartar_duplicadas(apps, schema_editor):
+    # Antes de la restricción: si un tutor tiene varias purgas activas se deja la más antigua
+    PurgaTutor = apps.get_model('core', 'PurgaTutor')
+    vistos = set()
+    for purga in PurgaTutor.objects.filter(estado__in=['PENDIENTE', 'EN_CURSO']).order_by('iniciada', 'pk'):
+        if purga.tutor_id in vistos:
+            purga.estado = 'ERROR'
+            purga.error = 'Purga duplicada del mismo tutor'
+            purga.save(update_fields=['estado', 'error'])
+        vistos.add(purga.tutor_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_auditoria_ids_bigint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purgatutor',
+            name='actualizada',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(descartar_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='purgatutor',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_CURSO'])), fields=('tutor_id',), name='purga_tutor_activa_unica'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:04
+
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_purgatutor_actualizada'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='paciente',
+            options={'default_manager_name': 'todos'},
+        ),
+        migrations.AlterModelManagers(
+            name='paciente',
+            managers=[
+                ('todos', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='purgatutor',
+            name='tutor_id',
+            field=models.BigIntegerField(db_index=True),
+        ),
+    ]
@@ -3,8 +3,14 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator
+from django.utils import timezone
 import datetime
 
+from .contacto import normalizar_email, normalizar_telefono
+from .rut import normalizar_rut
+
 # ============================================================================
 # CHOICES
 # ============================================================================
@@ -26,6 +32,11 @@ sexo_choices = [
     ("M", "Macho"),
     ("H", "Hembra"),
 ]
+tipo_pago_choices = [
+    ('DEBITO', 'Débito'),
+    ('CREDITO', 'Crédito'),
+    ('EFECTIVO', 'Efectivo'),
+]
 estado_cita_choices = [
     ("SOLICITADA", "Solicitada por Veterinario"),
     ("AGENDADA", "Agendada"),
@@ -93,13 +104,39 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
 # MODELO VETERINARIO
 # ============================================================================
 
+def rut_normalizado_para(objeto):
+    """
+    RUT normalizado que corresponde guardar en ``objeto`` (Tutor o Veterinario).
+    La migración 0008 dejó en NULL los RUT que repetían otro ya normalizado;
+    esas filas lo conservan en NULL mientras otra fila tenga ese RUT, para que
+    guardarlas (p. ej. al cambiar el teléfono) no choque con el índice único.
+    """
+    rut = normalizar_rut(objeto.rut)
+    if rut and not objeto._state.adding and objeto.rut_normalizado is None:
+        duplicado = type(objeto)._base_manager.filter(rut_normalizado=rut).exclude(pk=objeto.pk).exists()
+        if duplicado:
+            return None
+    return rut
+
+
 class Veterinario(models.Model):
     usuario = models.OneToOneField(Usuario, on_delete=models.CASCADE, primary_key=True, help_text="Usuario asociado al veterinario")
     rut = models.CharField(max_length=12, unique=True, help_text="RUT sin puntos, con guión. Ej: 12345678-9")
+    rut_normalizado = models.CharField(
+        max_length=10, unique=True, null=True, blank=True, editable=False,
+        help_text="RUT validado en formato canónico (ver core/rut.py); vacío si el RUT no es válido"
+    )
     especialidad = models.CharField(max_length=100, blank=True, help_text="Especialidad del veterinario. Ej: Cirugía, Medicina Interna")
     telefono = models.CharField(max_length=15, help_text="Teléfono del veterinario. Ej: +56912345678")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    def save(self, *args, **kwargs):
+        self.rut_normalizado = rut_normalizado_para(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'rut' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'rut_normalizado'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Dr(a). {self.usuario.nombre} {self.usuario.apellido}"
 
@@ -111,11 +148,41 @@ class Tutor(models.Model):
     nombre = models.CharField(max_length=100, help_text="Nombre del tutor (dueño)")
     apellido = models.CharField(max_length=100, help_text="Apellido del tutor")
     rut = models.CharField(max_length=12, unique=True, help_text="RUT sin puntos, con guión. Ej: 12345678-9")
+    rut_normalizado = models.CharField(
+        max_length=10, unique=True, null=True, blank=True, editable=False,
+        help_text="RUT validado en formato canónico (ver core/rut.py); vacío si el RUT no es válido"
+    )
     telefono = models.CharField(max_length=15, help_text="Teléfono de contacto")
+    telefono_e164 = models.CharField(
+        max_length=16, null=True, blank=True, editable=False, db_index=True,
+        help_text="Teléfono en formato E.164 (ver core/contacto.py), para buscar por número entrante"
+    )
     email = models.EmailField(blank=True, null=True, help_text="Correo electrónico (opcional)")
+    email_normalizado = models.CharField(
+        max_length=254, null=True, blank=True, editable=False, db_index=True,
+        help_text="Email en minúsculas, para búsquedas exactas"
+    )
     direccion = models.TextField(blank=True, help_text="Dirección del tutor")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # campo ingresado -> columna normalizada que se mantiene en save()
+    CAMPOS_NORMALIZADOS = {
+        'rut': 'rut_normalizado',
+        'telefono': 'telefono_e164',
+        'email': 'email_normalizado',
+    }
+
+    def save(self, *args, **kwargs):
+        self.rut_normalizado = rut_normalizado_para(self)
+        self.telefono_e164 = normalizar_telefono(self.telefono)
+        self.email_normalizado = normalizar_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derivados = {self.CAMPOS_NORMALIZADOS[c] for c in update_fields if c in self.CAMPOS_NORMALIZADOS}
+            kwargs['update_fields'] = {*update_fields, *derivados}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
 
@@ -123,6 +190,13 @@ class Tutor(models.Model):
 # MODELO PACIENTE (MASCOTA)
 # ============================================================================
 
+class PacienteActivoManager(models.Manager):
+    """``Paciente.objects``: excluye los pacientes dados de baja (``activo=False``)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(activo=True)
+
+
 class Paciente(models.Model):
     tutor = models.ForeignKey(Tutor, on_delete=models.CASCADE, help_text="Tutor (dueño) de la mascota")
     nombre = models.CharField(max_length=100, help_text="Nombre de la mascota")
@@ -134,11 +208,33 @@ class Paciente(models.Model):
     peso = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Peso en kilogramos")
     observaciones = models.TextField(blank=True, help_text="Observaciones generales (alergias, condiciones especiales, etc.)")
     activo = models.BooleanField(default=True, help_text="Indica si el paciente está activo")
+    eliminado_en = models.DateTimeField(null=True, blank=True, editable=False, help_text="Fecha de baja (eliminación lógica)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # ``objects`` filtra a los activos, pero el manager por defecto de Django
+    # (``_default_manager``: admin, formularios de FK, dumpdata, relaciones
+    # inversas) es ``todos``, para que las citas e historiales de un paciente
+    # dado de baja sigan siendo editables y exportables.
+    objects = PacienteActivoManager()
+    todos = models.Manager()
+
+    class Meta:
+        default_manager_name = 'todos'
+        indexes = [
+            # Solo los activos: los listados filtran siempre por activo=True y ordenan por nombre
+            models.Index(fields=['nombre'], condition=models.Q(activo=True), name='paciente_activo_nombre_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre} ({self.especie}) - Tutor: {self.tutor.nombre}"
 
+    def dar_de_baja(self):
+        """Eliminación lógica: el paciente desaparece de los listados; se purga con purgar_pacientes."""
+        self.activo = False
+        self.eliminado_en = timezone.now()
+        self.save(update_fields=['activo', 'eliminado_en', 'updated_at'])
+
 # ============================================================================
 # MODELO CITA
 # ============================================================================
@@ -147,6 +243,11 @@ class Cita(models.Model):
     paciente = models.ForeignKey(Paciente, on_delete=models.CASCADE, help_text="Mascota que será atendida")
     veterinario = models.ForeignKey(Veterinario, on_delete=models.PROTECT, help_text="Veterinario que atenderá la cita")
     fecha_hora = models.DateTimeField(help_text="Fecha y hora de la cita")
+    duracion = models.PositiveSmallIntegerField(
+        default=30,
+        validators=[MaxValueValidator(240)],
+        help_text="Duración en minutos (la cita ocupa [fecha_hora, fecha_hora + duracion))"
+    )
     motivo_consulta = models.TextField(help_text="Motivo de la consulta")
     estado = models.CharField(
         max_length=20, 
@@ -167,11 +268,7 @@ class Cita(models.Model):
     monto = models.DecimalField(max_digits=10, decimal_places=0, null=True, blank=True, help_text="Monto total de la consulta")
     tipo_pago = models.CharField(
         max_length=20,
-        choices=[
-            ('DEBITO', 'Débito'),
-            ('CREDITO', 'Crédito'),
-            ('EFECTIVO', 'Efectivo')
-        ],
+        choices=tipo_pago_choices,
         null=True,
         blank=True,
         help_text="Tipo de pago realizado"
@@ -179,6 +276,19 @@ class Cita(models.Model):
     observaciones_veterinario = models.TextField(blank=True, help_text="Observaciones y resumen de la atención por parte del veterinario")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Búsquedas por estado y fecha: pendientes del día, barrido de inasistencias
+            models.Index(fields=['estado', 'fecha_hora'], name='cita_estado_fecha_idx'),
+            # Línea de tiempo del paciente (keyset por fecha, ver core/timeline.py)
+            models.Index(fields=['paciente', 'fecha_hora', 'id'], name='cita_paciente_fecha_idx'),
+            # Topes en la agenda de cada veterinario (ver core/agenda.py)
+            models.Index(fields=['veterinario', 'fecha_hora'], name='cita_vet_fecha_idx'),
+            # Cursor (updated_at, id) del feed en vivo con el backend 'db' (ver core/eventos.py)
+            models.Index(fields=['updated_at', 'id'], name='cita_actualizada_idx'),
+        ]
+
     def __str__(self):
         return f"Cita: {self.paciente.nombre} - {self.fecha_hora} ({self.estado})"
 
@@ -196,6 +306,12 @@ class HistorialClinico(models.Model):
     notas = models.TextField(blank=True, help_text="Notas adicionales del veterinario")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['paciente', 'fecha_atencion', 'id'], name='historial_paciente_fecha_idx'),
+        ]
+
     def __str__(self):
         return f"Historial: {self.paciente.nombre} - {self.fecha_atencion}"
 
@@ -239,6 +355,38 @@ class HorarioDisponible(models.Model):
             if max(self.hora_inicio, horario.hora_inicio) < min(self.hora_fin, horario.hora_fin):
                 raise ValidationError(f"Este horario se solapa con un bloque existente ({horario.hora_inicio.strftime('%H:%M')} - {horario.hora_fin.strftime('%H:%M')}).")
 
+# ============================================================================
+# MODELO: CUPOS DE AGENDA (horario expandido a fechas concretas)
+# ============================================================================
+class CupoAgenda(models.Model):
+    """Bloque fechado de la agenda de un veterinario, libre u ocupado (ver core/cupos.py)"""
+    veterinario = models.ForeignKey(Veterinario, on_delete=models.CASCADE, related_name='cupos')
+    inicio = models.DateTimeField()
+    fin = models.DateTimeField()
+    cita = models.ForeignKey(
+        Cita, on_delete=models.SET_NULL, null=True, blank=True, related_name='cupos',
+        help_text='Cita que ocupa el cupo (vacío: libre)'
+    )
+
+    class Meta:
+        ordering = ['inicio', 'veterinario']
+        verbose_name = 'Cupo de agenda'
+        verbose_name_plural = 'Cupos de agenda'
+        constraints = [
+            models.UniqueConstraint(fields=['veterinario', 'inicio'], name='cupo_vet_inicio_uniq'),
+        ]
+        indexes = [
+            # "Cupos libres entre tal y tal fecha": recorrido de rango solo sobre los libres
+            models.Index(fields=['inicio'], condition=models.Q(cita__isnull=True), name='cupo_libre_inicio_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.veterinario} - {timezone.localtime(self.inicio):%d/%m/%Y %H:%M} ({'ocupado' if self.cita_id else 'libre'})"
+
+    @property
+    def libre(self):
+        return self.cita_id is None
+
 # ============================================================================
 # MODELO: VACUNA
 # ============================================================================
@@ -278,6 +426,7 @@ class Vacuna(models.Model):
 
     class Meta:
         ordering = ['-fecha_aplicacion']
+        indexes = [models.Index(fields=['paciente', 'fecha_aplicacion', 'id'], name='vacuna_paciente_fecha_idx')]
         verbose_name = "Vacuna"
         verbose_name_plural = "Vacunas"
 
@@ -319,6 +468,7 @@ class Cirugia(models.Model):
 
     class Meta:
         ordering = ['-fecha_cirugia']
+        indexes = [models.Index(fields=['paciente', 'fecha_cirugia', 'id'], name='cirugia_paciente_fecha_idx')]
         verbose_name = "Cirugía"
         verbose_name_plural = "Cirugías"
 
@@ -378,6 +528,7 @@ class Alergia(models.Model):
 
     class Meta:
         ordering = ['-activa', '-severidad', '-fecha_deteccion']
+        indexes = [models.Index(fields=['paciente', 'fecha_deteccion', 'id'], name='alergia_paciente_fecha_idx')]
         verbose_name = "Alergia/Condición"
         verbose_name_plural = "Alergias/Condiciones"
 
@@ -434,4 +585,195 @@ class Abono(models.Model):
         return f'Abono ${self.monto} - {self.pago.cita.paciente.nombre} ({self.fecha.strftime("%d/%m/%Y")})'
     
     class Meta:
-        ordering = ['-fecha']
\ No newline at end of file
+        ordering = ['-fecha']
+
+# ============================================================================
+# MODELO: BARRIDO DE INASISTENCIAS
+# ============================================================================
+
+class BarridoInasistencias(models.Model):
+    """Resumen de una ejecución del comando marcar_inasistencias"""
+    iniciado = models.DateTimeField(auto_now_add=True)
+    finalizado = models.DateTimeField(null=True, blank=True, help_text='Vacío si la ejecución no terminó')
+    corte = models.DateTimeField(help_text='Se marcaron las citas anteriores a este instante')
+    marcadas = models.PositiveIntegerField(default=0, help_text='Citas pasadas a NO_ASISTIO')
+    lotes = models.PositiveIntegerField(default=0)
+    simulacion = models.BooleanField(default=False, help_text='Ejecución sin cambios (--simular)')
+
+    def __str__(self):
+        return f'Barrido {self.iniciado:%d/%m/%Y %H:%M}: {self.marcadas} citas'
+
+    class Meta:
+        ordering = ['-iniciado']
+        verbose_name = 'Barrido de inasistencias'
+        verbose_name_plural = 'Barridos de inasistencias'
+
+# ============================================================================
+# MODELO: PURGA DE TUTORES
+# ============================================================================
+
+class PurgaTutor(models.Model):
+    """Progreso de la eliminación de un tutor con todo su historial (ver core/purga.py)"""
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_CURSO', 'En curso'),
+        ('COMPLETADA', 'Completada'),
+        ('ERROR', 'Error'),
+    ]
+    # Sin FK: el tutor deja de existir al terminar
+    tutor_id = models.BigIntegerField(db_index=True)
+    tutor = models.CharField(max_length=220, help_text='Nombre y RUT del tutor eliminado')
+    solicitada_por = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='+')
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='PENDIENTE')
+    iniciada = models.DateTimeField(auto_now_add=True)
+    # Latido: se actualiza en cada paso; si deja de avanzar la purga quedó abandonada
+    actualizada = models.DateTimeField(default=timezone.now)
+    finalizada = models.DateTimeField(null=True, blank=True)
+    pasos_total = models.PositiveIntegerField(default=0)
+    pasos_completados = models.PositiveIntegerField(default=0)
+    filas_borradas = models.PositiveIntegerField(default=0)
+    detalle = models.JSONField(default=dict, help_text='Filas borradas por tabla')
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Purga de {self.tutor} ({self.get_estado_display()})'
+
+    @property
+    def porcentaje(self):
+        return round(100 * self.pasos_completados / self.pasos_total) if self.pasos_total else 0
+
+    class Meta:
+        ordering = ['-iniciada']
+        verbose_name = 'Purga de tutor'
+        verbose_name_plural = 'Purgas de tutores'
+        constraints = [
+            # Una sola purga activa por tutor
+            models.UniqueConstraint(
+                fields=['tutor_id'], condition=models.Q(estado__in=['PENDIENTE', 'EN_CURSO']),
+                name='purga_tutor_activa_unica',
+            ),
+        ]
+
+# ============================================================================
+# MODELO: AUDITORÍA
+# ============================================================================
+
+class RegistroAuditoria(models.Model):
+    """Cambio en un registro clínico o de pago. Solo se insertan filas (ver core/auditoria.py)."""
+    ACCION_CHOICES = [
+        ('CREAR', 'Creación'),
+        ('MODIFICAR', 'Modificación'),
+        ('ELIMINAR', 'Eliminación'),
+        ('MASIVA', 'Cambio masivo'),
+    ]
+    # En PostgreSQL la tabla está particionada por mes sobre esta columna
+    fecha = models.DateTimeField(default=timezone.now)
+    # Sin FK: el registro debe sobrevivir al usuario, al paciente y al objeto
+    usuario_id = models.BigIntegerField(null=True, blank=True)
+    usuario_email = models.CharField(max_length=254, blank=True)
+    modelo = models.CharField(max_length=50)
+    objeto_id = models.BigIntegerField(null=True, blank=True)
+    paciente_id = models.BigIntegerField(null=True, blank=True)
+    accion = models.CharField(max_length=10, choices=ACCION_CHOICES)
+    cambios = models.JSONField(default=dict, encoder=DjangoJSONEncoder, help_text='{campo: [antes, después]}')
+
+    def __str__(self):
+        return f'{self.get_accion_display()} {self.modelo} #{self.objeto_id} ({self.fecha:%d/%m/%Y %H:%M})'
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = 'Registro de auditoría'
+        verbose_name_plural = 'Registros de auditoría'
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id'], name='auditoria_objeto_idx'),
+            models.Index(fields=['paciente_id', 'fecha'], name='auditoria_paciente_idx'),
+        ]
+
+# ============================================================================
+# MODELOS DE ARCHIVO (CITAS E HISTORIALES ANTIGUOS)
+# ============================================================================
+# Copias de Cita, Pago, Abono e HistorialClinico con las mismas columnas y los
+# mismos id. El comando archivar_registros mueve aquí las filas antiguas (ver
+# core/archivo.py) para que las tablas activas y sus índices se mantengan chicos.
+
+class CitaArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    paciente = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='citas_archivadas')
+    veterinario = models.ForeignKey(Veterinario, on_delete=models.PROTECT, related_name='citas_archivadas')
+    fecha_hora = models.DateTimeField()
+    duracion = models.PositiveSmallIntegerField(default=30)
+    motivo_consulta = models.TextField()
+    estado = models.CharField(max_length=20, choices=estado_cita_choices)
+    notas_recepcion = models.TextField(blank=True)
+    creada_por = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    monto = models.DecimalField(max_digits=10, decimal_places=0, null=True, blank=True)
+    tipo_pago = models.CharField(max_length=20, choices=tipo_pago_choices, null=True, blank=True)
+    observaciones_veterinario = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archivada_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-fecha_hora']
+        verbose_name = 'Cita archivada'
+        verbose_name_plural = 'Citas archivadas'
+        indexes = [
+            models.Index(fields=['paciente', 'fecha_hora', 'id'], name='citaarch_paciente_fecha_idx'),
+            models.Index(fields=['fecha_hora'], name='citaarch_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cita archivada: {self.paciente.nombre} - {self.fecha_hora} ({self.estado})"
+
+
+class PagoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    cita = models.OneToOneField(CitaArchivada, on_delete=models.CASCADE, related_name='pago')
+    monto_total = models.DecimalField(max_digits=10, decimal_places=0)
+    monto_pagado = models.DecimalField(max_digits=10, decimal_places=0)
+    saldo_pendiente = models.DecimalField(max_digits=10, decimal_places=0)
+    estado = models.CharField(max_length=20, choices=Pago.ESTADO_PAGO_CHOICES)
+    metodo_pago_principal = models.CharField(max_length=20, choices=Pago.METODO_PAGO_CHOICES, null=True, blank=True)
+    fecha_pago_completo = models.DateTimeField(null=True, blank=True)
+    notas = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archivada_en = models.DateTimeField(default=timezone.now)
+
+
+class AbonoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    pago = models.ForeignKey(PagoArchivado, on_delete=models.CASCADE, related_name='abonos')
+    monto = models.DecimalField(max_digits=10, decimal_places=0)
+    metodo_pago = models.CharField(max_length=20, choices=Pago.METODO_PAGO_CHOICES)
+    fecha = models.DateTimeField()
+    registrado_por = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='+')
+    notas = models.TextField(blank=True)
+    archivada_en = models.DateTimeField(default=timezone.now)
+
+
+class HistorialClinicoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    paciente = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='historiales_archivados')
+    # Id de la cita asociada, que puede estar activa o archivada
+    cita_id = models.BigIntegerField(null=True, blank=True)
+    veterinario = models.ForeignKey(Veterinario, on_delete=models.PROTECT, related_name='+')
+    fecha_atencion = models.DateTimeField()
+    motivo = models.TextField()
+    diagnostico = models.TextField()
+    tratamiento = models.TextField()
+    notas = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archivada_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Historial clínico archivado'
+        verbose_name_plural = 'Historiales clínicos archivados'
+        indexes = [
+            models.Index(fields=['paciente', 'fecha_atencion', 'id'], name='histarch_paciente_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Historial archivado: {self.paciente.nombre} - {self.fecha_atencion}"
+
@@ -0,0 +1,70 @@
+# core/particiones.py
+
+"""
+Particiones mensuales de la tabla de auditoría (solo PostgreSQL).
+
+La tabla ``core_registroauditoria`` se crea particionada por rango sobre
+``fecha`` (ver la migración 0015): una partición por mes más una partición
+por defecto para lo que llegue fuera de rango. Consultar o borrar un mes
+completo toca solo su partición.
+
+Las particiones de los meses siguientes se crean por adelantado con el
+comando ``crear_particiones_auditoria`` (cron mensual): PostgreSQL no permite
+crear la partición de un mes si la partición por defecto ya tiene filas de
+ese mes. En otros motores la tabla es normal y estas funciones no hacen nada.
+"""
+
+import datetime
+
+TABLA = 'core_registroauditoria'
+
+
+def inicio_de_mes(fecha, desplazamiento=0):
+    mes = fecha.month - 1 + desplazamiento
+    return datetime.date(fecha.year + mes // 12, mes % 12 + 1, 1)
+
+
+def nombre_particion(mes):
+    return f'{TABLA}_{mes:%Y%m}'
+
+
+def crear_particiones(connection, desde, meses=3):
+    """Crea (si faltan) las particiones de ``meses`` meses a partir del mes de ``desde``."""
+    if connection.vendor != 'postgresql':
+        return []
+    qn = connection.ops.quote_name
+    creadas = []
+    with connection.cursor() as cursor:
+        for i in range(meses):
+            inicio, fin = inicio_de_mes(desde, i), inicio_de_mes(desde, i + 1)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(nombre_particion(inicio))} PARTITION OF {qn(TABLA)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [inicio.isoformat(), fin.isoformat()],
+            )
+            creadas.append(nombre_particion(inicio))
+    return creadas
+
+
+def particionar_tabla(connection, indices):
+    """
+    Convierte la tabla (recién creada y vacía) en una tabla particionada por
+    ``fecha``. La clave primaria pasa a ser ``(id, fecha)``, porque PostgreSQL
+    exige que incluya la columna de partición. ``indices`` son pares
+    ``(nombre, columnas)`` que se recrean sobre la tabla particionada.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    qn = connection.ops.quote_name
+    plana = f'{TABLA}_plana'
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(TABLA)} RENAME TO {qn(plana)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(TABLA)} (LIKE {qn(plana)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY RANGE ({qn('fecha')})"
+        )
+        cursor.execute(f"DROP TABLE {qn(plana)}")
+        cursor.execute(f"ALTER TABLE {qn(TABLA)} ADD PRIMARY KEY ({qn('id')}, {qn('fecha')})")
+        for nombre, columnas in indices:
+            cursor.execute(f"CREATE INDEX {qn(nombre)} ON {qn(TABLA)} ({', '.join(qn(c) for c in columnas)})")
+        cursor.execute(f"CREATE TABLE {qn(TABLA + '_default')} PARTITION OF {qn(TABLA)} DEFAULT")
@@ -0,0 +1,192 @@
+# core/perfilado.py
+
+"""
+Perfilado a pedido de una petición, para ver en producción por qué una
+página está lenta.
+
+Un usuario ADMIN agrega ``?perfilar=1`` a la URL (o envía la cabecera
+``X-Perfilar: 1``) y la petición se ejecuta bajo ``cProfile``. En
+``PERFILADO_DIR`` quedan:
+
+- ``<nombre>.prof``: estadísticas de cProfile (``python -m pstats``,
+  snakeviz...).
+- ``<nombre>.folded``: pilas colapsadas (``a;b;c muestras`` por línea) para
+  ``flamegraph.pl`` o speedscope. Las toma un hilo que mira la pila de la
+  petición cada ``PERFILADO_INTERVALO_MS``: el grafo de llamadas de
+  cProfile no alcanza para reconstruir pilas cuando hay recursión, y la
+  cadena de middlewares de Django lo es.
+- ``<nombre>.json``: ruta, método, duración y quién la pidió, para el
+  listado en ``/perfiles/``.
+
+Con ``?perfilar=muestreo`` (o ``X-Perfilar: muestreo``) solo se muestrea, sin
+cProfile: altera menos los tiempos de código con muchas llamadas cortas y
+deja el ``.folded`` sin ``.prof``.
+
+Sin el parámetro ni la cabecera el middleware solo revisa la query string y
+una cabecera del ``META``: no hay costo para el resto de las peticiones.
+Se conservan los ``PERFILADO_MAX`` perfiles más recientes.
+"""
+
+import cProfile
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+PARAMETRO = 'perfilar'
+CABECERA = 'HTTP_X_PERFILAR'
+CPROFILE, MUESTREO = 'cprofile', 'muestreo'
+EXTENSIONES = ('.prof', '.folded', '.json')
+
+
+class PerfiladoMiddleware:
+    """Perfila la petición si un ADMIN lo pide; va después de ``AuthenticationMiddleware``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if PARAMETRO not in request.META.get('QUERY_STRING', '') and CABECERA not in request.META:
+            return self.get_response(request)
+        modo = _modo_pedido(request)
+        usuario = getattr(request, 'user', None)
+        if modo is None or not (usuario and usuario.is_authenticated and usuario.rol == 'ADMIN'):
+            return self.get_response(request)
+        return perfilar(request, self.get_response, modo)
+
+
+def _modo_pedido(request):
+    valor = request.GET.get(PARAMETRO) or request.META.get(CABECERA)
+    if not valor or valor in ('0', 'no'):
+        return None
+    return MUESTREO if valor == MUESTREO else CPROFILE
+
+
+def directorio():
+    os.makedirs(settings.PERFILADO_DIR, exist_ok=True)
+    return settings.PERFILADO_DIR
+
+
+def perfilar(request, get_response, modo=CPROFILE):
+    """Ejecuta ``get_response(request)`` perfilado, guarda los archivos y marca la respuesta."""
+    nombre = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:4]}"
+    base = os.path.join(directorio(), nombre)
+    perfil = cProfile.Profile() if modo == CPROFILE else None
+    muestreador = Muestreador(threading.get_ident(), settings.PERFILADO_INTERVALO_MS / 1000)
+    inicio = time.perf_counter()
+    muestreador.start()
+    try:
+        response = perfil.runcall(get_response, request) if perfil else get_response(request)
+    finally:
+        muestreador.detener()
+    milisegundos = (time.perf_counter() - inicio) * 1000
+
+    if perfil:
+        perfil.dump_stats(base + '.prof')
+    with open(base + '.folded', 'w', encoding='utf-8') as f:
+        for pila, valor in sorted(muestreador.pilas.items()):
+            f.write(f"{pila} {valor}\n")
+    match = getattr(request, 'resolver_match', None)
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'nombre': nombre,
+            'fecha': timezone.now().isoformat(),
+            'modo': modo,
+            'metodo': request.method,
+            'ruta': request.get_full_path(),
+            'vista': match.view_name if match else None,
+            'estado': response.status_code,
+            'milisegundos': round(milisegundos, 1),
+            'usuario': request.user.email,
+        }, f)
+    limpiar()
+    response['X-Perfil'] = nombre
+    return response
+
+
+def _prefijos():
+    # Rutas que se recortan de los archivos (proyecto y paquetes), para que las etiquetas se lean
+    rutas = sorted((ruta for ruta in sys.path if ruta), key=len, reverse=True)
+    return [ruta + os.sep for ruta in (str(settings.BASE_DIR), *rutas)]
+
+
+class Muestreador(threading.Thread):
+    """Toma la pila del hilo ``objetivo`` cada ``intervalo`` segundos."""
+
+    def __init__(self, objetivo, intervalo):
+        super().__init__(daemon=True)
+        self.objetivo = objetivo
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._prefijos = _prefijos()
+        self._etiquetas = {}
+
+    def _etiqueta(self, codigo):
+        etiqueta = self._etiquetas.get(codigo)
+        if etiqueta is None:
+            archivo = codigo.co_filename
+            for prefijo in self._prefijos:
+                if archivo.startswith(prefijo):
+                    archivo = archivo[len(prefijo):]
+                    break
+            etiqueta = self._etiquetas[codigo] = f"{archivo}:{codigo.co_name}:{codigo.co_firstlineno}"
+        return etiqueta
+
+    def run(self):
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self.objetivo)
+            marcos = []
+            while frame is not None:
+                marcos.append(self._etiqueta(frame.f_code))
+                frame = frame.f_back
+            if marcos:
+                self.pilas[';'.join(reversed(marcos))] += 1
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+
+
+def recientes():
+    """Metadatos de los perfiles guardados, del más nuevo al más antiguo."""
+    carpeta = settings.PERFILADO_DIR
+    if not os.path.isdir(carpeta):
+        return []
+    perfiles = []
+    for archivo in os.listdir(carpeta):
+        if not archivo.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(carpeta, archivo), encoding='utf-8') as f:
+                perfil = json.load(f)
+            perfil['fecha'] = datetime.datetime.fromisoformat(perfil['fecha'])
+        except (OSError, ValueError, KeyError):
+            continue
+        perfiles.append(perfil)
+    perfiles.sort(key=lambda p: p['nombre'], reverse=True)
+    return perfiles
+
+
+def ruta_archivo(nombre, extension):
+    """Ruta de un archivo de perfil existente; ``None`` si el nombre no es de un perfil guardado."""
+    if extension not in EXTENSIONES or not any(p['nombre'] == nombre for p in recientes()):
+        return None
+    ruta = os.path.join(settings.PERFILADO_DIR, nombre + extension)
+    return ruta if os.path.exists(ruta) else None
+
+
+def limpiar():
+    for perfil in recientes()[settings.PERFILADO_MAX:]:
+        for extension in EXTENSIONES:
+            try:
+                os.remove(os.path.join(settings.PERFILADO_DIR, perfil['nombre'] + extension))
+            except FileNotFoundError:
+                pass
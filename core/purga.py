@@ -0,0 +1,261 @@
+# core/purga.py
+
+"""
+Eliminación definitiva de tutores y pacientes con todo su historial.
+
+``Model.delete()`` carga en Python el grafo completo (pacientes -> citas ->
+pagos -> abonos, historiales, vacunas...) antes de borrar fila a fila. Aquí
+el orden de borrado se calcula una sola vez recorriendo las relaciones
+``on_delete`` de los modelos (``Plan``), y cada tabla se vacía con
+``DELETE ... WHERE id IN (subconsulta)`` limitado a ``lote`` filas por
+sentencia, hijos antes que padres. Las relaciones SET_NULL se anulan antes de
+borrar al padre y una PROTECT/RESTRICT con filas detiene la purga.
+
+Los borrados son SQL directo: no se envían señales ``pre_delete``/``post_delete``;
+en su lugar cada ejecución deja un registro de auditoría ``MASIVA``.
+
+- ``purgar_pacientes``: pacientes dados de baja (ver ``Paciente.dar_de_baja``).
+- ``iniciar_purga_tutor``: elimina un tutor en segundo plano y registra el
+  avance en ``PurgaTutor``. Si el proceso muere a medias, la purga deja de
+  actualizar su latido y ``reanudar_purgas`` (comando del mismo nombre) la
+  retoma.
+"""
+
+import functools
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
+
+from . import auditoria, cache_reportes
+from .models import Paciente, PurgaTutor, Tutor
+
+logger = logging.getLogger(__name__)
+
+
+class Plan:
+    """Pasos para borrar filas de ``modelo`` y todo lo que depende de ellas."""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.pasos = []  # (accion, modelo, campo anulado o None, ruta hasta la raíz)
+        self._visitar(modelo, 'pk')
+
+    def _visitar(self, modelo, ruta):
+        for relacion in modelo._meta.related_objects:
+            if relacion.many_to_many:
+                continue
+            hijo = relacion.related_model
+            campo = relacion.field
+            ruta_hijo = campo.name if ruta == 'pk' else f'{campo.name}__{ruta}'
+            if relacion.on_delete is models.CASCADE:
+                self._visitar(hijo, ruta_hijo)
+            elif relacion.on_delete is models.SET_NULL:
+                self.pasos.append(('anular', hijo, campo, ruta_hijo))
+            elif relacion.on_delete in (models.PROTECT, models.RESTRICT):
+                self.pasos.append(('proteger', hijo, campo, ruta_hijo))
+        self.pasos.append(('borrar', modelo, None, ruta))
+
+    def filas(self, modelo, ruta, ids):
+        return modelo._base_manager.filter(**{f'{ruta}__in': ids})
+
+    @property
+    def total_borrados(self):
+        return sum(1 for accion, *_ in self.pasos if accion == 'borrar')
+
+    def ejecutar(self, ids, lote=1000, progreso=None, usuario=None):
+        """
+        Borra las filas ``ids`` del modelo raíz y sus dependencias. ``progreso``
+        se llama con ``(modelo, filas, pasos_terminados)`` tras cada sentencia.
+        Retorna las filas borradas por tabla.
+
+        Deja un registro de auditoría ``MASIVA`` con lo borrado, también si la
+        purga se detiene a medias.
+        """
+        ids = list(ids)
+        borradas = {}
+        try:
+            self._ejecutar(ids, lote, progreso, borradas)
+        finally:
+            if any(borradas.values()):
+                paciente_id = ids[0] if self.modelo is Paciente and len(ids) == 1 else None
+                auditoria.auditar_borrado_masivo(
+                    self.modelo, 'purga', ids, borradas, usuario=usuario, paciente_id=paciente_id
+                )
+        return borradas
+
+    def _ejecutar(self, ids, lote, progreso, borradas):
+        terminados = 0
+        for accion, modelo, campo, ruta in self.pasos:
+            filas = self.filas(modelo, ruta, ids)
+            if accion == 'proteger':
+                if filas.exists():
+                    raise models.ProtectedError(
+                        f"Hay registros de {modelo._meta.verbose_name_plural} que impiden la eliminación.",
+                        set(filas[:10]),
+                    )
+                continue
+            if accion == 'anular':
+                filas.update(**{campo.name: None})
+                continue
+            tabla = modelo._meta.db_table
+            borradas.setdefault(tabla, 0)
+            while True:
+                cantidad = _borrar_lote(modelo, filas, lote)
+                borradas[tabla] += cantidad
+                if cantidad < lote:
+                    terminados += 1
+                if progreso:
+                    progreso(modelo, cantidad, terminados)
+                if cantidad < lote:
+                    break
+
+
+def _borrar_lote(modelo, filas, lote):
+    """``DELETE FROM tabla WHERE id IN (SELECT id ... LIMIT lote)`` en su propia transacción."""
+    subconsulta, parametros = filas.order_by().values('pk')[:lote].query.sql_with_params()
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        # La subconsulta va envuelta: algunos motores no aceptan LIMIT directo dentro de IN
+        cursor.execute(
+            f"DELETE FROM {qn(modelo._meta.db_table)} WHERE {qn(modelo._meta.pk.column)} IN "
+            f"(SELECT * FROM ({subconsulta}) AS lote)",
+            parametros,
+        )
+        return cursor.rowcount
+
+
+@functools.cache
+def plan(modelo):
+    """El plan de cada modelo se calcula una vez por proceso."""
+    return Plan(modelo)
+
+
+# ---------------------------------------------------------------------------
+# Pacientes dados de baja
+# ---------------------------------------------------------------------------
+
+def pacientes_purgables(corte):
+    """Pacientes dados de baja antes de ``corte``."""
+    return Paciente.todos.filter(activo=False, eliminado_en__lt=corte).order_by('eliminado_en')
+
+
+def purgar_pacientes(corte, lote=100):
+    """Borra los pacientes purgables por lotes. Genera los pacientes borrados en cada lote."""
+    while True:
+        ids = list(pacientes_purgables(corte).values_list('pk', flat=True)[:lote])
+        if not ids:
+            return
+        plan(Paciente).ejecutar(ids)
+        cache_reportes.invalidar_todo()
+        yield len(ids)
+        if len(ids) < lote:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Tutores
+# ---------------------------------------------------------------------------
+
+ESTADOS_ACTIVOS = ['PENDIENTE', 'EN_CURSO']
+
+
+def iniciar_purga_tutor(tutor, usuario=None):
+    """
+    Crea el registro ``PurgaTutor`` y lanza la purga al confirmarse la
+    transacción: en un hilo si ``settings.PURGA_ASINCRONA``, si no en línea.
+    Si ya hay una purga activa para el tutor, retorna esa (y la relanza si
+    quedó abandonada).
+    """
+    with transaction.atomic():
+        # Bloquea al tutor: dos solicitudes a la vez no crean dos purgas
+        list(Tutor.objects.select_for_update().filter(pk=tutor.pk).values_list('pk', flat=True))
+        activa = PurgaTutor.objects.filter(tutor_id=tutor.pk, estado__in=ESTADOS_ACTIVOS).first()
+        if activa:
+            if purgas_abandonadas().filter(pk=activa.pk).exists() and _reclamar(activa):
+                _lanzar(activa.pk)
+            return activa
+        try:
+            with transaction.atomic():
+                purga = PurgaTutor.objects.create(
+                    tutor_id=tutor.pk,
+                    tutor=f"{tutor.nombre} {tutor.apellido} ({tutor.rut})",
+                    solicitada_por=usuario,
+                    pasos_total=plan(Tutor).total_borrados,
+                )
+        except IntegrityError:
+            # Motores sin bloqueo de filas (SQLite): la restricción purga_tutor_activa_unica
+            return PurgaTutor.objects.get(tutor_id=tutor.pk, estado__in=ESTADOS_ACTIVOS)
+        _lanzar(purga.pk)
+    return purga
+
+
+def _lanzar(purga_id):
+    if settings.PURGA_ASINCRONA:
+        hilo = threading.Thread(target=ejecutar_purga_tutor, args=(purga_id,), daemon=True)
+        transaction.on_commit(hilo.start)
+    else:
+        transaction.on_commit(lambda: ejecutar_purga_tutor(purga_id))
+
+
+def purgas_abandonadas():
+    """
+    Purgas activas sin latido en ``PURGA_ABANDONADA_MINUTOS``: el proceso que
+    las ejecutaba terminó (p. ej. se recicló el worker) sin marcarlas.
+    """
+    limite = timezone.now() - timedelta(minutes=settings.PURGA_ABANDONADA_MINUTOS)
+    return PurgaTutor.objects.filter(estado__in=ESTADOS_ACTIVOS, actualizada__lt=limite)
+
+
+def _reclamar(purga):
+    """Renueva el latido solo si nadie lo hizo desde que se leyó: un único proceso la retoma."""
+    return PurgaTutor.objects.filter(
+        pk=purga.pk, estado__in=ESTADOS_ACTIVOS, actualizada=purga.actualizada
+    ).update(actualizada=timezone.now()) == 1
+
+
+def reanudar_purgas(lote=1000):
+    """
+    Retoma en línea las purgas abandonadas; los DELETE por subconsulta se
+    pueden repetir sin problema. Genera cada purga reanudada ya terminada.
+    """
+    for purga in purgas_abandonadas().order_by('iniciada'):
+        if not _reclamar(purga):
+            continue
+        ejecutar_purga_tutor(purga.pk, lote=lote)
+        yield PurgaTutor.objects.get(pk=purga.pk)
+
+
+def ejecutar_purga_tutor(purga_id, lote=1000):
+    purga = PurgaTutor.objects.get(pk=purga_id)
+    purga.estado = 'EN_CURSO'
+    purga.actualizada = timezone.now()
+    purga.save(update_fields=['estado', 'actualizada'])
+
+    def progreso(modelo, filas, terminados):
+        if filas:
+            tabla = str(modelo._meta.verbose_name_plural)
+            purga.detalle[tabla] = purga.detalle.get(tabla, 0) + filas
+            purga.filas_borradas += filas
+        purga.pasos_completados = terminados
+        purga.actualizada = timezone.now()
+        purga.save(update_fields=['detalle', 'filas_borradas', 'pasos_completados', 'actualizada'])
+
+    try:
+        plan(Tutor).ejecutar([purga.tutor_id], lote=lote, progreso=progreso, usuario=purga.solicitada_por)
+        purga.estado = 'COMPLETADA'
+        purga.pasos_completados = purga.pasos_total
+    except Exception as e:
+        logger.exception("Falló la purga del tutor %s", purga.tutor_id)
+        purga.estado = 'ERROR'
+        purga.error = str(e)
+    finally:
+        # También si falló a medias: los lotes ya borrados quedan confirmados
+        cache_reportes.invalidar_todo()
+        purga.finalizada = purga.actualizada = timezone.now()
+        purga.save(update_fields=['estado', 'pasos_completados', 'error', 'finalizada', 'actualizada'])
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
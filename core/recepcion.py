@@ -0,0 +1,74 @@
+# core/recepcion.py
+
+"""
+Búsquedas rápidas de recepción: encontrar al tutor que llama o que llega.
+
+Todas las búsquedas son igualdades sobre columnas normalizadas e indexadas
+(``rut_normalizado``, ``telefono_e164``, ``email_normalizado``). La ficha
+que se retorna incluye los pacientes activos y la próxima cita de cada
+tutor con un número fijo de consultas (tutores, pacientes y citas), sin
+importar cuántos tutores coincidan.
+"""
+
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.utils import timezone
+
+from .estados_cita import ESTADOS_PENDIENTES
+from .models import Cita, Paciente, Tutor
+
+# Un mismo teléfono puede ser de varios integrantes de una familia
+MAX_RESULTADOS = 10
+
+
+def buscar_tutores(**filtro):
+    """
+    Tutores que cumplen ``filtro`` (una igualdad sobre una columna indexada),
+    con ``pacientes_activos`` y ``proxima_cita`` ya cargados.
+    """
+    ahora = timezone.now()
+    proxima = (
+        Cita.objects.filter(
+            paciente__tutor=OuterRef('pk'), paciente__activo=True,
+            estado__in=ESTADOS_PENDIENTES, fecha_hora__gte=ahora,
+        )
+        .order_by('fecha_hora')
+        .values('pk')[:1]
+    )
+    tutores = list(
+        Tutor.objects.filter(**filtro)
+        .annotate(proxima_cita_id=Subquery(proxima))
+        .prefetch_related(Prefetch(
+            'paciente_set',
+            queryset=Paciente.objects.order_by('nombre'),
+            to_attr='pacientes_activos',
+        ))
+        .order_by('apellido', 'nombre')[:MAX_RESULTADOS]
+    )
+    ids = [t.proxima_cita_id for t in tutores if t.proxima_cita_id]
+    citas = Cita.objects.select_related('paciente', 'veterinario__usuario').in_bulk(ids) if ids else {}
+    for tutor in tutores:
+        tutor.proxima_cita = citas.get(tutor.proxima_cita_id)
+    return tutores
+
+
+def serializar_tutor(tutor):
+    cita = tutor.proxima_cita
+    return {
+        'id': tutor.pk,
+        'rut': tutor.rut,
+        'nombre': tutor.nombre,
+        'apellido': tutor.apellido,
+        'telefono': tutor.telefono,
+        'email': tutor.email,
+        'pacientes': [
+            {'id': p.pk, 'nombre': p.nombre, 'especie': p.especie}
+            for p in tutor.pacientes_activos
+        ],
+        'proxima_cita': {
+            'id': cita.pk,
+            'fecha_hora': timezone.localtime(cita.fecha_hora).isoformat(),
+            'paciente': cita.paciente.nombre,
+            'veterinario': str(cita.veterinario),
+            'estado': cita.estado,
+        } if cita else None,
+    }
@@ -0,0 +1,50 @@
+# core/rut.py
+
+"""
+Utilidades para RUT chilenos.
+
+El formato canónico del proyecto es sin puntos, con guión y la K en
+mayúscula (``12345678-9``), como indica la ayuda de ``Tutor.rut``.
+"""
+
+import re
+
+from django.core.exceptions import ValidationError
+
+# Acepta puntos y espacios opcionales, y el guión opcional antes del dígito verificador
+RUT_RE = re.compile(r'^(\d{1,8})-?([\dK])$')
+
+
+def digito_verificador(numero):
+    """Calcula el dígito verificador (módulo 11) de un RUT chileno."""
+    suma, factor = 0, 2
+    for digito in reversed(str(numero)):
+        suma += int(digito) * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - (suma % 11)
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+def formatear_rut(valor):
+    """
+    Valida ``valor`` (con o sin puntos/guión, k minúscula) y lo retorna en el
+    formato canónico. Lanza ``ValidationError`` si el formato o el dígito
+    verificador no son válidos.
+    """
+    limpio = re.sub(r'[.\s]', '', str(valor or '')).upper()
+    coincidencia = RUT_RE.match(limpio)
+    if not coincidencia:
+        raise ValidationError(f"RUT con formato inválido: «{valor}».")
+    numero, dv = coincidencia.groups()
+    numero = numero.lstrip('0') or '0'
+    if digito_verificador(numero) != dv:
+        raise ValidationError(f"RUT con dígito verificador incorrecto: «{valor}».")
+    return f"{numero}-{dv}"
+
+
+def normalizar_rut(valor):
+    """Formato canónico de ``valor``, o ``None`` si no es un RUT válido."""
+    try:
+        return formatear_rut(valor)
+    except ValidationError:
+        return None
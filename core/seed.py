@@ -0,0 +1,228 @@
+# core/seed.py
+
+"""
+Datos de demostración reproducibles.
+
+Se usan en los benchmarks y pruebas de carga para contar con una base
+poblada (usuarios de cada rol, tutores, pacientes, citas, pagos y ficha
+médica) sin tener que ingresarla a mano.
+"""
+
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from . import agenda
+from .models import (
+    Usuario, Veterinario, Tutor, Paciente, Cita, HorarioDisponible,
+    HistorialClinico, Vacuna, Cirugia, Alergia, Pago, Abono,
+    especie_choices
+)
+from .rut import digito_verificador
+
+PASSWORD_DEMO = 'demo12345'
+
+NOMBRES = ['Ana', 'Pedro', 'María', 'José', 'Camila', 'Diego', 'Valentina', 'Felipe', 'Javiera', 'Tomás']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda']
+MASCOTAS = ['Luna', 'Max', 'Rocky', 'Nala', 'Simba', 'Toby', 'Kira', 'Coco', 'Milo', 'Lola']
+MOTIVOS = ['Control anual', 'Vacunación', 'Vómitos', 'Cojera', 'Dermatitis', 'Esterilización']
+
+
+def rut_demo(numero):
+    # Ya en formato canónico: sirve también como rut_normalizado (bulk_create no llama a save())
+    return f"{numero}-{digito_verificador(numero)}"
+
+
+def crear_datos_demo(n_veterinarios=3, n_tutores=20, pacientes_por_tutor=2,
+                     citas_por_paciente=3, semilla=42):
+    """
+    Pobla la base con datos de demostración y retorna un diccionario con los
+    objetos creados, agrupados por modelo.
+
+    Todos los usuarios quedan con la contraseña ``PASSWORD_DEMO``.
+    """
+    rnd = random.Random(semilla)
+    ahora = timezone.now().replace(minute=0, second=0, microsecond=0)
+    password = make_password(PASSWORD_DEMO)
+    sufijo = rnd.randint(1000, 9999)
+
+    # Usuarios: un admin, un recepcionista y N veterinarios
+    usuarios = [
+        Usuario(email=f'admin{sufijo}@demo.cl', nombre='Admin', apellido='Demo', rol='ADMIN', password=password),
+        Usuario(email=f'recepcion{sufijo}@demo.cl', nombre='Recepción', apellido='Demo', rol='RECEPCIONISTA', password=password),
+    ]
+    for i in range(n_veterinarios):
+        usuarios.append(Usuario(
+            email=f'vet{i}.{sufijo}@demo.cl',
+            nombre=rnd.choice(NOMBRES),
+            apellido=rnd.choice(APELLIDOS),
+            rol='VETERINARIO',
+            password=password,
+        ))
+    Usuario.objects.bulk_create(usuarios)
+    usuarios = list(Usuario.objects.filter(email__endswith=f'{sufijo}@demo.cl').order_by('id'))
+    admin, recepcionista = usuarios[0], usuarios[1]
+
+    base_rut = rnd.randint(5_000_000, 20_000_000)
+    veterinarios = Veterinario.objects.bulk_create([
+        Veterinario(
+            usuario=usuario,
+            rut=rut_demo(base_rut + i),
+            rut_normalizado=rut_demo(base_rut + i),
+            especialidad=rnd.choice(['', 'Cirugía', 'Medicina Interna', 'Dermatología']),
+            telefono=f'+5699{rnd.randint(1000000, 9999999)}',
+        )
+        for i, usuario in enumerate(usuarios[2:])
+    ])
+
+    horarios = HorarioDisponible.objects.bulk_create([
+        HorarioDisponible(
+            veterinario=vet,
+            dia_semana=dia,
+            hora_inicio=datetime.time(9, 0),
+            hora_fin=datetime.time(18, 0),
+        )
+        for vet in veterinarios
+        for dia in range(5)
+    ])
+
+    tutores = []
+    for i in range(n_tutores):
+        telefono = f'+5698{rnd.randint(1000000, 9999999)}'
+        email = f'tutor{i}.{sufijo}@demo.cl'
+        rut = rut_demo(base_rut + n_veterinarios + i)
+        # Ya normalizados: bulk_create no llama a Tutor.save()
+        tutores.append(Tutor(
+            nombre=rnd.choice(NOMBRES),
+            apellido=rnd.choice(APELLIDOS),
+            rut=rut,
+            rut_normalizado=rut,
+            telefono=telefono,
+            telefono_e164=telefono,
+            email=email,
+            email_normalizado=email,
+            direccion='Av. Siempre Viva 742',
+        ))
+    tutores = Tutor.objects.bulk_create(tutores)
+
+    pacientes = Paciente.objects.bulk_create([
+        Paciente(
+            tutor=tutor,
+            nombre=rnd.choice(MASCOTAS),
+            especie=rnd.choice(especie_choices)[0],
+            sexo=rnd.choice(['M', 'H']),
+            fecha_nacimiento=datetime.date(2015, 1, 1) + datetime.timedelta(days=rnd.randint(0, 3000)),
+            peso=rnd.randint(2, 40),
+        )
+        for tutor in tutores
+        for _ in range(pacientes_por_tutor)
+    ])
+
+    citas = []
+    agendas = {vet.pk: agenda.IndiceIntervalos() for vet in veterinarios}
+    for paciente in pacientes:
+        for _ in range(citas_por_paciente):
+            fecha_hora = ahora + datetime.timedelta(days=rnd.randint(-330, 30), hours=rnd.randint(-3, 3))
+            if fecha_hora < ahora:
+                estado = rnd.choice(['REALIZADO', 'REALIZADO', 'CANCELADA', 'NO_ASISTIO'])
+            else:
+                estado = rnd.choice(['SOLICITADA', 'AGENDADA', 'CONFIRMADA'])
+            veterinario = rnd.choice(veterinarios)
+            motivo = rnd.choice(MOTIVOS)
+            cita = Cita(
+                paciente=paciente,
+                veterinario=veterinario,
+                fecha_hora=fecha_hora,
+                duracion=agenda.duracion_para(motivo),
+                motivo_consulta=motivo,
+                estado=estado,
+                creada_por=recepcionista,
+                monto=rnd.randint(10, 80) * 1000 if estado == 'REALIZADO' else None,
+            )
+            # Las citas activas no se topan (en PostgreSQL la restricción lo impide)
+            if estado in agenda.ESTADOS_OCUPAN:
+                if agendas[veterinario.pk].topes(fecha_hora, agenda.fin_de(cita)):
+                    cita.estado = 'CANCELADA'
+                else:
+                    agendas[veterinario.pk].agregar(cita)
+            citas.append(cita)
+    citas = Cita.objects.bulk_create(citas)
+
+    realizadas = [cita for cita in citas if cita.estado == 'REALIZADO']
+    pagos = Pago.objects.bulk_create([
+        Pago(
+            cita=cita,
+            monto_total=cita.monto,
+            monto_pagado=cita.monto if i % 3 else 0,
+            saldo_pendiente=0 if i % 3 else cita.monto,
+            estado='PAGADO' if i % 3 else 'PENDIENTE',
+            metodo_pago_principal=rnd.choice(Pago.METODO_PAGO_CHOICES)[0] if i % 3 else None,
+        )
+        for i, cita in enumerate(realizadas)
+    ])
+    abonos = Abono.objects.bulk_create([
+        Abono(pago=pago, monto=pago.monto_pagado, metodo_pago=pago.metodo_pago_principal, registrado_por=recepcionista)
+        for pago in pagos if pago.estado == 'PAGADO'
+    ])
+
+    historiales = HistorialClinico.objects.bulk_create([
+        HistorialClinico(
+            paciente=cita.paciente,
+            cita=cita,
+            veterinario=cita.veterinario,
+            fecha_atencion=cita.fecha_hora,
+            motivo=cita.motivo_consulta,
+            diagnostico='Paciente estable',
+            tratamiento='Control en 30 días',
+        )
+        for cita in realizadas
+    ])
+    vacunas = Vacuna.objects.bulk_create([
+        Vacuna(
+            paciente=paciente,
+            nombre_vacuna=rnd.choice(['Rabia', 'Parvovirus', 'Triple Felina']),
+            fecha_aplicacion=ahora.date() - datetime.timedelta(days=rnd.randint(30, 400)),
+            proxima_dosis=ahora.date() + datetime.timedelta(days=rnd.randint(-30, 300)),
+            veterinario=rnd.choice(veterinarios),
+        )
+        for paciente in pacientes
+    ])
+    cirugias = Cirugia.objects.bulk_create([
+        Cirugia(
+            paciente=paciente,
+            tipo_cirugia='Esterilización',
+            fecha_cirugia=ahora.date() - datetime.timedelta(days=rnd.randint(30, 900)),
+            veterinario=rnd.choice(veterinarios),
+            descripcion='Procedimiento sin complicaciones',
+            costo=120000,
+        )
+        for paciente in pacientes[::4]
+    ])
+    alergias = Alergia.objects.bulk_create([
+        Alergia(
+            paciente=paciente,
+            descripcion='Alergia a la penicilina',
+            fecha_deteccion=ahora.date() - datetime.timedelta(days=rnd.randint(30, 900)),
+            activa=bool(i % 2),
+        )
+        for i, paciente in enumerate(pacientes[::3])
+    ])
+
+    return {
+        'admin': admin,
+        'recepcionista': recepcionista,
+        'usuarios': usuarios,
+        'veterinarios': veterinarios,
+        'horarios': horarios,
+        'tutores': tutores,
+        'pacientes': pacientes,
+        'citas': citas,
+        'pagos': pagos,
+        'abonos': abonos,
+        'historiales': historiales,
+        'vacunas': vacunas,
+        'cirugias': cirugias,
+        'alergias': alergias,
+    }
@@ -0,0 +1,119 @@
+# core/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from . import cache_reportes, cupos
+from .agenda import ESTADOS_OCUPAN, fin_de
+from .estados_cita import citas_transicionadas
+from .eventos import broadcaster, evento_cita, evento_lote
+from .models import Cita, HorarioDisponible
+
+
+@receiver(post_init, sender=Cita)
+def recordar_estado_cita(sender, instance, **kwargs):
+    # Estado con el que se cargó la cita, para detectar cambios al guardar sin otra consulta
+    instance._estado_original = instance.estado
+    # Monto y fecha originales: los usa la invalidación del caché de reportes
+    instance._monto_original = instance.monto
+    instance._fecha_original = instance.fecha_hora
+    # Tramo que ocupaba en la agenda, para volver a marcar sus cupos
+    instance._tramo_original = _tramo(instance)
+
+
+def _tramo(cita):
+    if cita.fecha_hora is None:
+        return None
+    return (cita.veterinario_id, cita.fecha_hora, fin_de(cita), cita.estado in ESTADOS_OCUPAN)
+
+
+@receiver(post_save, sender=Cita)
+def sincronizar_cupos_cita(sender, instance, created, raw=False, **kwargs):
+    tramo = _tramo(instance)
+    original = None if created else instance._tramo_original
+    if raw or tramo == original:
+        return
+    tramos = [t[:3] for t in (original, tramo) if t]
+    instance._tramo_original = tramo
+    transaction.on_commit(lambda: [cupos.sincronizar_rango(*t) for t in tramos])
+
+
+@receiver(post_save, sender=Cita)
+def invalidar_reportes_cita(sender, instance, created, raw=False, **kwargs):
+    # Va antes que notificar_cambio_cita, que actualiza _estado_original
+    if raw:
+        return
+    if created:
+        cambio = instance.estado == 'REALIZADO'
+    else:
+        cambio = (
+            instance.estado != instance._estado_original
+            or instance.monto != instance._monto_original
+            or instance.fecha_hora != instance._fecha_original
+        )
+    if cambio:
+        meses = [cache_reportes.mes_de(f) for f in (instance._fecha_original, instance.fecha_hora) if f]
+        transaction.on_commit(lambda: cache_reportes.invalidar_meses(meses))
+    instance._monto_original = instance.monto
+    instance._fecha_original = instance.fecha_hora
+
+
+@receiver(post_save, sender=Cita)
+def notificar_cambio_cita(sender, instance, created, **kwargs):
+    if created:
+        tipo = 'creada'
+    elif instance.estado != instance._estado_original:
+        tipo = 'cancelada' if instance.estado == 'CANCELADA' else 'estado'
+    else:
+        tipo = 'actualizada'
+    instance._estado_original = instance.estado
+    evento = evento_cita(instance, tipo)
+    # Publicar solo si la transacción se confirma
+    transaction.on_commit(lambda: broadcaster.publicar(evento))
+
+
+@receiver(post_delete, sender=Cita)
+def notificar_cita_eliminada(sender, instance, **kwargs):
+    # El evento se arma ahora: después del delete la instancia queda sin pk
+    evento = evento_cita(instance, 'eliminada')
+    transaction.on_commit(lambda: broadcaster.publicar(evento))
+    mes = cache_reportes.mes_de(instance.fecha_hora)
+    transaction.on_commit(lambda: cache_reportes.invalidar_meses([mes]))
+
+
+@receiver(citas_transicionadas, sender=Cita)
+def notificar_transicion_masiva(sender, estado, cantidad, veterinario_id, desde, hasta, marca, **kwargs):
+    # La señal ya se envía al confirmar la transacción: un solo evento por lote
+    broadcaster.publicar(evento_lote(estado, cantidad, veterinario_id, desde, hasta, marca))
+
+
+@receiver(citas_transicionadas, sender=Cita)
+def invalidar_reportes_transicion(sender, estado, origenes, desde, hasta, **kwargs):
+    # El reporte solo cuenta citas REALIZADO: las demás transiciones no lo cambian
+    if estado == 'REALIZADO' or 'REALIZADO' in origenes:
+        cache_reportes.invalidar_rango(desde, hasta)
+
+
+@receiver(citas_transicionadas, sender=Cita)
+def sincronizar_cupos_transicion(sender, estado, origenes, veterinario_id, desde, hasta, **kwargs):
+    # Entre estados que ocupan la agenda (p. ej. confirmar) los cupos no cambian
+    if estado in ESTADOS_OCUPAN and set(origenes) <= set(ESTADOS_OCUPAN):
+        return
+    cupos.sincronizar_rango(veterinario_id, desde, hasta)
+
+
+@receiver(post_init, sender=HorarioDisponible)
+def recordar_regla_horario(sender, instance, **kwargs):
+    instance._regla_original = (instance.veterinario_id, instance.dia_semana)
+
+
+@receiver(post_save, sender=HorarioDisponible)
+@receiver(post_delete, sender=HorarioDisponible)
+def regenerar_cupos_horario(sender, instance, raw=False, **kwargs):
+    # Solo el veterinario y día de la semana de la regla (y los anteriores si cambiaron)
+    if raw:
+        return
+    reglas = {instance._regla_original, (instance.veterinario_id, instance.dia_semana)}
+    reglas.discard((None, None))
+    transaction.on_commit(lambda: [cupos.regenerar(*regla) for regla in reglas])
@@ -0,0 +1,53 @@
+# core/template_warmup.py
+
+"""
+Precarga (pre-compilación) de templates.
+
+Con el loader cacheado cada worker compila un template la primera vez que
+se pide y reutiliza el árbol compilado después. Al precargarlos durante el
+arranque del worker, la primera request no paga ese costo.
+"""
+
+import logging
+import os
+import time
+
+from django.template import engines
+
+logger = logging.getLogger(__name__)
+
+
+def listar_templates(extension='.html'):
+    """Retorna los nombres de los templates del proyecto (ej: 'core/panel.html')."""
+    nombres = []
+    for engine in engines.all():
+        for directorio in engine.engine.dirs:
+            for raiz, _, archivos in os.walk(directorio):
+                for archivo in archivos:
+                    if archivo.endswith(extension):
+                        ruta = os.path.join(raiz, archivo)
+                        nombres.append(os.path.relpath(ruta, directorio).replace(os.sep, '/'))
+    return sorted(set(nombres))
+
+
+def precargar_templates(nombres=None):
+    """
+    Compila los templates indicados (por defecto, todos los del proyecto).
+
+    Retorna una tupla ``(compilados, errores, segundos)``, donde ``errores``
+    es una lista de ``(nombre, excepcion)``. Un template con errores no
+    detiene la precarga del resto.
+    """
+    engine = engines['django']
+    nombres = listar_templates() if nombres is None else nombres
+    compilados = 0
+    errores = []
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        try:
+            engine.get_template(nombre)
+            compilados += 1
+        except Exception as e:
+            errores.append((nombre, e))
+            logger.error("No se pudo precargar el template %s: %s", nombre, e)
+    return compilados, errores, time.perf_counter() - inicio
@@ -1,3 +1,1355 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    agenda, arranque, auditoria, carga, cupos, dashboard, disponibilidad, estados_cita, grilla, metricas, perfilado
+)
+from .eventos import broadcaster, conexiones
+from .purga import iniciar_purga_tutor, plan
+from .models import (
+    Abono, AbonoArchivado, Alergia, BarridoInasistencias, Cirugia, Cita, CitaArchivada, CupoAgenda, HistorialClinico,
+    HistorialClinicoArchivado, HorarioDisponible, Paciente, Pago, PagoArchivado, PurgaTutor, RegistroAuditoria, Tutor, Usuario,
+    Vacuna
+)
+from .rut import formatear_rut
+from .seed import PASSWORD_DEMO, crear_datos_demo
+from .template_warmup import listar_templates, precargar_templates
+
+
+class DatosDemoTestCase(TestCase):
+    """
+    Crea los datos demo una vez por clase (``setUpTestData``) con los
+    argumentos de ``DATOS_DEMO`` e inicia sesión como ``USUARIO`` (None: sin
+    sesión). Cada test corre en una transacción que se revierte.
+    """
+    DATOS_DEMO = dict(n_veterinarios=1, n_tutores=1, pacientes_por_tutor=1, citas_por_paciente=0)
+    USUARIO = 'admin'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_demo(**cls.DATOS_DEMO)
+
+    def setUp(self):
+        if self.USUARIO:
+            self.client.force_login(self.datos[self.USUARIO])
+
+
+class TemplateWarmupTests(TestCase):
+    def test_todos_los_templates_compilan(self):
+        nombres = listar_templates()
+        self.assertIn('core/panel.html', nombres)
+        compilados, errores, _ = precargar_templates(nombres)
+        self.assertEqual(errores, [])
+        self.assertEqual(compilados, len(nombres))
+
+    def test_benchmark_renderiza_la_purga(self):
+        salida = io.StringIO()
+        call_command(
+            'benchmark_templates', templates=['core/purga_tutor.html'], iteraciones=1, tutores=3, stdout=salida
+        )
+        self.assertIn('core/purga_tutor.html', salida.getvalue())
+        self.assertNotIn('ERROR', salida.getvalue())
+
+
+class DashboardDataTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=1, n_tutores=3, pacientes_por_tutor=1, citas_por_paciente=2)
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('dashboard_data')
+
+    def test_respuesta_completa_incluye_cursor(self):
+        data = self.client.get(self.url).json()
+        self.assertIn('cursor', data)
+        self.assertEqual(len(data['ingresos_mensuales']['data']), 12)
+        self.assertEqual(len(data['citas_por_mes']['agendadas']), 12)
+
+    def test_since_retorna_solo_meses_cambiados(self):
+        cursor = self.client.get(self.url).json()['cursor']
+        data = self.client.get(self.url, {'since': cursor}).json()
+        self.assertTrue(data['delta'])
+        self.assertEqual(data['cambios'], [])
+
+        cita = self.datos['citas'][0]
+        Cita.objects.create(
+            paciente=cita.paciente, veterinario=cita.veterinario,
+            fecha_hora=timezone.now(), motivo_consulta='Control', estado='AGENDADA'
+        )
+        data = self.client.get(self.url, {'since': cursor}).json()
+        self.assertEqual([c['indice'] for c in data['cambios']], [11])
+
+    def test_cursor_invalido_retorna_datos_completos(self):
+        data = self.client.get(self.url, {'since': 'basura'}).json()
+        self.assertNotIn('delta', data)
+        self.assertIn('ingresos_mensuales', data)
+
+    def test_if_none_match_retorna_304_sin_agregar(self):
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch('core.views.reportes.resumen_mensual') as resumen:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        resumen.assert_not_called()
+
+        # Una cita modificada o borrada cambia la versión
+        cita = self.datos['citas'][0]
+        cita.monto = 15000
+        cita.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.datos['citas'][1].delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CITAS_EVENTOS_BACKEND='memoria', CITAS_EVENTOS_DURACION_MAX=0)
+class EventosCitasTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=2, pacientes_por_tutor=1, citas_por_paciente=1)
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('eventos_citas_actuales')
+        self.ultimo_id = broadcaster.ultimo_id
+
+    def leer_stream(self, **params):
+        response = self.client.get(self.url, params, HTTP_LAST_EVENT_ID=self.ultimo_id)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def crear_cita(self, veterinario):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Cita.objects.create(
+                paciente=self.datos['pacientes'][0], veterinario=veterinario,
+                fecha_hora=timezone.now(), motivo_consulta='Control'
+            )
+
+    def test_reenvia_eventos_filtrados_con_html_de_la_fila(self):
+        vet_a, vet_b = self.datos['veterinarios']
+        cita = self.crear_cita(vet_a)
+        self.crear_cita(vet_b)
+        contenido = self.leer_stream(veterinario=vet_a.pk, desde=timezone.localdate().isoformat())
+        self.assertEqual(contenido.count('event: cita'), 1)
+        self.assertIn('"tipo": "creada"', contenido)
+        self.assertIn(f'id=\\"cita-{cita.pk}\\"', contenido)
+
+    def test_cancelar_publica_evento_cancelada(self):
+        cita = self.crear_cita(self.datos['veterinarios'][0])
+        cita = Cita.objects.get(pk=cita.pk)
+        cita.estado = 'CANCELADA'
+        with self.captureOnCommitCallbacks(execute=True):
+            cita.save()
+        self.assertEqual(broadcaster._historial[-1]['tipo'], 'cancelada')
+
+    @override_settings(CITAS_EVENTOS_BACKEND='db', CITAS_EVENTOS_DURACION_MAX=0.3, CITAS_EVENTOS_POLL_SEGUNDOS=0.05)
+    def test_backend_db_no_pierde_filas_con_el_mismo_updated_at(self):
+        vet = self.datos['veterinarios'][0]
+        citas = [self.crear_cita(vet) for _ in range(3)]
+        marca = timezone.now() - timezone.timedelta(minutes=5)
+        Cita.objects.filter(pk__in=[c.pk for c in citas]).update(estado='AGENDADA', updated_at=marca)
+        ultimo_id = f"db:{(marca - timezone.timedelta(seconds=1)).isoformat()}|0"
+        # Página más chica que el lote: el corte cae entre filas con el mismo updated_at
+        with mock.patch('core.eventos.LOTE_BD', 2):
+            response = self.client.get(self.url, {'veterinario': vet.pk}, HTTP_LAST_EVENT_ID=ultimo_id)
+            contenido = b''.join(response.streaming_content).decode()
+        for cita in citas:
+            self.assertEqual(contenido.count(f'"cita_id": {cita.pk},'), 1)
+        self.assertIn('"tipo": "estado"', contenido)
+
+    @override_settings(CITAS_EVENTOS_MAX_CONEXIONES=1)
+    def test_sobre_el_cupo_de_conexiones_responde_503(self):
+        abierta = self.client.get(self.url)
+        self.assertEqual(abierta.status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 503)
+        # Al cerrar la primera respuesta se libera el cupo
+        abierta.close()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(conexiones.activas, 0)
+
+    def test_veterinario_recibe_solo_sus_eventos(self):
+        vet = self.datos['veterinarios'][0]
+        self.client.force_login(vet.usuario)
+        response = self.client.get(reverse('listar_citas_actuales'))
+        self.assertIn(f'veterinario={vet.pk}', response.context['eventos_query'])
+
+
+class EstadosCitaTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=2, pacientes_por_tutor=1, citas_por_paciente=1)
+    USUARIO = None
+
+    def setUp(self):
+        super().setUp()
+        self.hoy = timezone.localdate()
+        desde, _ = estados_cita.rango_del_dia(self.hoy)
+        self.citas = [
+            Cita.objects.create(
+                paciente=self.datos['pacientes'][0], veterinario=self.datos['veterinarios'][i % 2],
+                fecha_hora=desde + timezone.timedelta(hours=9 + i), motivo_consulta='Control',
+                estado=estado,
+            )
+            for i, estado in enumerate(['SOLICITADA', 'SOLICITADA', 'SOLICITADA', 'REALIZADO'])
+        ]
+
+    def test_transicion_invalida(self):
+        with self.assertRaises(ValidationError):
+            estados_cita.validar_transicion('REALIZADO', 'CANCELADA')
+        with self.assertRaises(ValidationError):
+            estados_cita.transicionar('AGENDADA', origenes=['CANCELADA'])
+
+    def test_vista_con_transicion_invalida_avisa(self):
+        self.client.force_login(self.datos['admin'])
+        for nombre, cita in (('finalizar_cita', self.citas[0]), ('cancelar_cita', self.citas[3])):
+            respuesta = self.client.post(reverse(nombre, args=[cita.pk]), {'monto': 1000})
+            self.assertRedirects(respuesta, reverse('listar_citas_actuales'), fetch_redirect_response=False)
+
+    def test_confirmar_del_dia_es_un_update_con_una_senal(self):
+        recibidas = []
+        estados_cita.citas_transicionadas.connect(lambda **kw: recibidas.append(kw), weak=False, dispatch_uid='t')
+        self.addCleanup(estados_cita.citas_transicionadas.disconnect, dispatch_uid='t')
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(3):  # savepoint, UPDATE, release
+                cantidad = estados_cita.confirmar_solicitadas_del_dia(self.hoy)
+        self.assertEqual(cantidad, 3)
+        self.assertEqual(len(recibidas), 1)
+        self.assertEqual(recibidas[0]['cantidad'], 3)
+        confirmadas = Cita.objects.filter(updated_at=recibidas[0]['marca'])
+        self.assertEqual(set(confirmadas.values_list('estado', flat=True)), {'AGENDADA'})
+        self.assertEqual(confirmadas.count(), 3)
+        self.assertEqual(broadcaster._historial[-1]['tipo'], 'lote')
+
+    def test_cancelar_bloque_solo_del_veterinario_y_rango(self):
+        vet = self.datos['veterinarios'][0]
+        desde, hasta = estados_cita.rango_del_dia(self.hoy)
+        self.client.force_login(self.datos['admin'])
+        self.client.post(reverse('cancelar_bloque_citas'), {
+            'veterinario': vet.pk, 'fecha': self.hoy.isoformat(),
+            'hora_desde': '00:00', 'hora_hasta': '23:59', 'motivo': 'Capacitación',
+        })
+        canceladas = Cita.objects.filter(pk__in=[c.pk for c in self.citas], estado='CANCELADA')
+        # Solo las SOLICITADA del veterinario (la REALIZADO no se toca)
+        self.assertEqual(sorted(c.pk for c in canceladas), [self.citas[0].pk, self.citas[2].pk])
+        self.assertEqual(canceladas[0].notas_recepcion, 'CANCELADA: Capacitación')
+
+    def test_confirmar_citas_dia_valida_el_veterinario(self):
+        self.client.force_login(self.datos['admin'])
+        url = reverse('confirmar_citas_dia')
+        respuesta = self.client.post(url, {'fecha': self.hoy.isoformat(), 'veterinario': '1 OR 1=1'})
+        self.assertRedirects(respuesta, reverse('listar_citas'), fetch_redirect_response=False)
+        self.assertEqual(Cita.objects.filter(pk__in=[c.pk for c in self.citas], estado='AGENDADA').count(), 0)
+
+        vet = self.datos['veterinarios'][0]
+        respuesta = self.client.post(url, {'fecha': self.hoy.isoformat(), 'veterinario': vet.pk})
+        self.assertEqual(respuesta['Location'], f"{reverse('listar_citas')}?fecha={self.hoy:%Y-%m-%d}&veterinario={vet.pk}")
+        confirmadas = Cita.objects.filter(pk__in=[c.pk for c in self.citas], estado='AGENDADA')
+        self.assertEqual(sorted(c.pk for c in confirmadas), [self.citas[0].pk, self.citas[2].pk])
+
+
+class MarcarInasistenciasTests(DatosDemoTestCase):
+    USUARIO = None
+
+    def setUp(self):
+        super().setUp()
+        ahora = timezone.now()
+        crear = lambda dias, estado: Cita.objects.create(
+            paciente=self.datos['pacientes'][0], veterinario=self.datos['veterinarios'][0],
+            fecha_hora=ahora - timezone.timedelta(days=dias), motivo_consulta='Control', estado=estado,
+        )
+        self.pasadas = [crear(d, e) for d, e in [(3, 'AGENDADA'), (2, 'CONFIRMADA'), (2, 'AGENDADA'), (1, 'AGENDADA')]]
+        self.realizada = crear(2, 'REALIZADO')
+        self.futura = crear(-1, 'AGENDADA')
+
+    def test_marca_por_lotes_y_es_idempotente(self):
+        call_command('marcar_inasistencias', lote=3, stdout=io.StringIO())
+        self.assertEqual(
+            Cita.objects.filter(pk__in=[c.pk for c in self.pasadas], estado='NO_ASISTIO').count(), 4
+        )
+        self.assertEqual(Cita.objects.get(pk=self.realizada.pk).estado, 'REALIZADO')
+        self.assertEqual(Cita.objects.get(pk=self.futura.pk).estado, 'AGENDADA')
+        barrido = BarridoInasistencias.objects.get()
+        self.assertEqual((barrido.marcadas, barrido.lotes), (4, 2))
+        self.assertIsNotNone(barrido.finalizado)
+
+        call_command('marcar_inasistencias', lote=3, stdout=io.StringIO())
+        self.assertEqual(BarridoInasistencias.objects.first().marcadas, 0)
+
+    def test_rechaza_fecha_futura(self):
+        manana = timezone.localdate() + timezone.timedelta(days=1)
+        with self.assertRaisesMessage(CommandError, 'posterior a hoy'):
+            call_command('marcar_inasistencias', antes_de=manana.isoformat(), stdout=io.StringIO())
+        self.assertEqual(Cita.objects.get(pk=self.futura.pk).estado, 'AGENDADA')
+        self.assertFalse(BarridoInasistencias.objects.exists())
+
+
+class ImportacionCSVTests(TestCase):
+    def escribir(self, nombre, contenido):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        ruta = os.path.join(directorio, nombre)
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        return ruta
+
+    def test_formatear_rut(self):
+        self.assertEqual(formatear_rut('12.345.678-5'), '12345678-5')
+        self.assertEqual(formatear_rut('1.000.005-k'), '1000005-K')
+        with self.assertRaises(ValidationError):
+            formatear_rut('12345678-9')
+
+    def test_importa_por_lotes_y_reporta_errores(self):
+        tutores = self.escribir('tutores.csv', (
+            "rut,nombre,apellido,telefono,email\n"
+            "12.345.678-5,Ana,Rojas,+56911111111,ana@example.com\n"
+            "1000005-k,Pedro,Soto,+56922222222,\n"
+            "12345678-9,Malo,DV,+56933333333,\n"
+            "12345678-5,Ana,Duplicada,+56911111111,\n"
+        ))
+        pacientes = self.escribir('pacientes.csv', (
+            "tutor_rut,nombre,especie,sexo,peso\n"
+            "12345678-5,Luna,Perro,H,\"4,5\"\n"
+            "1.000.005-K,Michi,FELINO,M,\n"
+            "12345678-5,Nemo,Pez,M,\n"
+            "11111111-1,Sin tutor,CANINO,M,\n"
+            "12345678-5,Sin sexo,CANINO,,\n"
+        ))
+        reporte = self.escribir('errores.csv', '')
+        call_command(
+            'importar_csv', tutores=tutores, pacientes=pacientes, lote=1, reporte=reporte,
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+        self.assertEqual(sorted(Tutor.objects.values_list('rut', flat=True)), ['1000005-K', '12345678-5'])
+        luna = Paciente.objects.get(nombre='Luna')
+        self.assertEqual((luna.tutor.nombre, luna.especie, str(luna.peso)), ('Ana', 'CANINO', '4.50'))
+        self.assertEqual(Paciente.objects.count(), 2)
+        with open(reporte, encoding='utf-8') as archivo:
+            filas = archivo.read().splitlines()
+        # Encabezado + 2 tutores y 3 pacientes con error
+        self.assertEqual(len(filas), 6)
+        self.assertIn('«sexo» es obligatoria', filas[-1])
+
+    def test_admin_rechaza_archivo_mal_codificado_sin_guardar_nada(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        admin = Usuario.objects.create_superuser(email='admin@example.com', password='x', nombre='A', apellido='B')
+        self.client.force_login(admin)
+        # Un byte Latin-1 más allá del primer bloque que lee el decodificador (8 KB)
+        contenido = (
+            "rut,nombre,apellido,telefono,direccion\n"
+            "12.345.678-5,Ana,Rojas,+56911111111,\n"
+            f"11.111.111-1,Relleno,Largo,+56933333333,{'x' * 10000}\n"
+        ).encode() + "1000005-k,Pedro,Muñoz,+56922222222,\n".encode('latin-1')
+        respuesta = self.client.post(reverse('admin:core_tutor_importar'), {
+            'tutores': SimpleUploadedFile('tutores.csv', contenido), 'delimitador': ',', 'lote': 1,
+        }, follow=True)
+        self.assertFalse(Tutor.objects.exists())
+        self.assertContains(respuesta, 'no está en utf-8-sig')
+
+
+class RutNormalizadoTests(DatosDemoTestCase):
+    USUARIO = 'recepcionista'
+
+    def setUp(self):
+        super().setUp()
+        self.tutor = Tutor.objects.create(
+            nombre='Ana', apellido='Rojas', rut='12.345.678-5', telefono='+56911111111'
+        )
+
+    def test_save_normaliza_rut(self):
+        self.assertEqual(self.tutor.rut_normalizado, '12345678-5')
+        self.tutor.rut = 'no es un rut'
+        self.tutor.save(update_fields=['rut'])
+        self.tutor.refresh_from_db()
+        self.assertIsNone(self.tutor.rut_normalizado)
+
+    def test_guardar_duplicado_heredado_no_choca(self):
+        # Como lo deja la migración 0008: el mismo RUT escrito distinto queda en NULL
+        duplicado = Tutor.objects.create(nombre='Ana', apellido='Rojas', rut='x', telefono='+56911111111')
+        Tutor.objects.filter(pk=duplicado.pk).update(rut='12345678-5', rut_normalizado=None)
+        duplicado = Tutor.objects.get(pk=duplicado.pk)
+        duplicado.telefono = '+56933333333'
+        duplicado.save()
+        duplicado.refresh_from_db()
+        self.assertIsNone(duplicado.rut_normalizado)
+        self.assertEqual(duplicado.telefono_e164, '+56933333333')
+        # Si el RUT se corrige a uno libre, se normaliza de nuevo
+        duplicado.rut = '11.111.111-1'
+        duplicado.save()
+        self.assertEqual(duplicado.rut_normalizado, '11111111-1')
+
+    def test_api_por_rut_en_una_consulta(self):
+        url = reverse('tutor_por_rut')
+        with self.assertNumQueries(4):  # sesión, usuario, tutor (+ próxima cita), pacientes
+            response = self.client.get(url, {'rut': '12345678-5'})
+        self.assertEqual(response.json()['id'], self.tutor.pk)
+        self.assertEqual(self.client.get(url, {'rut': '12.345.678-9'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'rut': '1.000.005-k'}).status_code, 404)
+
+    def test_form_rechaza_rut_duplicado_en_otro_formato(self):
+        from .forms import TutorForm
+        form = TutorForm(data={
+            'nombre': 'Otra', 'apellido': 'Ana', 'rut': '12345678-5', 'telefono': '+56922222222',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('rut', form.errors)
+
+
+class BusquedaContactoTests(DatosDemoTestCase):
+    USUARIO = 'recepcionista'
+
+    def setUp(self):
+        super().setUp()
+        self.tutor = Tutor.objects.create(
+            nombre='Ana', apellido='Rojas', rut='12345678-5', telefono='9 1234 5678', email='Ana@Example.com'
+        )
+        luna = Paciente.objects.create(tutor=self.tutor, nombre='Luna', especie='CANINO')
+        viejo = Paciente.objects.create(tutor=self.tutor, nombre='Viejo', especie='FELINO', activo=False)
+        ahora = timezone.now()
+        # Cita pendiente que quedó de un paciente dado de baja: no es la próxima del tutor
+        Cita.objects.create(
+            paciente=viejo, veterinario=self.datos['veterinarios'][0], motivo_consulta='Control',
+            fecha_hora=ahora + timezone.timedelta(hours=12),
+        )
+        for dias in (5, 2, -1):
+            Cita.objects.create(
+                paciente=luna, veterinario=self.datos['veterinarios'][0], motivo_consulta='Control',
+                fecha_hora=ahora + timezone.timedelta(days=dias),
+            )
+        self.proxima = Cita.objects.get(fecha_hora__gt=ahora + timezone.timedelta(days=1), fecha_hora__lt=ahora + timezone.timedelta(days=3))
+
+    def test_busca_por_telefono_con_pacientes_activos_y_proxima_cita(self):
+        self.assertEqual(self.tutor.telefono_e164, '+56912345678')
+        url = reverse('tutor_por_contacto')
+        with self.assertNumQueries(5):  # sesión, usuario, tutores, pacientes, cita
+            datos = self.client.get(url, {'telefono': '+56 9 1234-5678'}).json()
+        tutor, = datos['resultados']
+        self.assertEqual([p['nombre'] for p in tutor['pacientes']], ['Luna'])
+        self.assertEqual(tutor['proxima_cita']['id'], self.proxima.pk)
+        self.assertEqual(len(self.client.get(url, {'email': ' ANA@example.COM'}).json()['resultados']), 1)
+
+
+class TimelinePacienteTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=3, pacientes_por_tutor=2, citas_por_paciente=4)
+
+    def setUp(self):
+        super().setUp()
+        self.paciente = self.datos['pacientes'][0]
+
+    def test_paginas_mezcladas_cubren_todo_en_orden(self):
+        url = reverse('timeline_paciente', args=[self.paciente.pk])
+        eventos, cursor, paginas = [], None, 0
+        while True:
+            with CaptureQueriesContext(connection) as consultas:
+                datos = self.client.get(url, {'limite': 3, **({'cursor': cursor} if cursor else {})}).json()
+            # sesión, usuario, paciente y a lo más una consulta por fuente no agotada
+            self.assertLessEqual(len(consultas), 3 + 5)
+            eventos += datos['eventos']
+            paginas += 1
+            cursor = datos['cursor']
+            if not cursor:
+                break
+        total = sum(
+            modelo.objects.filter(paciente=self.paciente).count()
+            for modelo in (Cita, HistorialClinico, Vacuna, Cirugia, Alergia)
+        )
+        self.assertGreater(paginas, 2)
+        self.assertEqual(len(eventos), total)
+        self.assertEqual(len({(e['tipo'], e['id']) for e in eventos}), total)
+        fechas = [e['fecha'][:10] for e in eventos]
+        self.assertEqual(fechas, sorted(fechas, reverse=True))
+        self.assertEqual(self.client.get(url, {'cursor': 'no-es-un-cursor'}).status_code, 400)
+
+
+class ArchivoTests(DatosDemoTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.paciente = self.datos['pacientes'][0]
+        veterinario = self.datos['veterinarios'][0]
+        self.antigua = timezone.now() - timezone.timedelta(days=800)
+
+        def crear(estado, pago):
+            cita = Cita.objects.create(
+                paciente=self.paciente, veterinario=veterinario, fecha_hora=self.antigua,
+                motivo_consulta='Control', estado=estado, monto=10000,
+            )
+            HistorialClinico.objects.create(
+                paciente=self.paciente, cita=cita, veterinario=veterinario, fecha_atencion=self.antigua,
+                motivo='Control', diagnostico='Sano', tratamiento='-',
+            )
+            pago = Pago.objects.create(
+                cita=cita, monto_total=10000, monto_pagado=10000 if pago == 'PAGADO' else 0,
+                saldo_pendiente=0 if pago == 'PAGADO' else 10000, estado=pago,
+            )
+            Abono.objects.create(pago=pago, monto=pago.monto_pagado, metodo_pago='EFECTIVO')
+            return cita
+
+        self.pagada = crear('REALIZADO', 'PAGADO')
+        self.con_deuda = crear('REALIZADO', 'PENDIENTE')
+        self.reciente = Cita.objects.create(
+            paciente=self.paciente, veterinario=veterinario, fecha_hora=timezone.now() - timezone.timedelta(days=5),
+            motivo_consulta='Control', estado='REALIZADO',
+        )
+
+    def test_mueve_cita_con_pago_abonos_e_historial(self):
+        with self.assertRaises(CommandError):
+            call_command('archivar_registros', dias=30, stdout=io.StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archivar_registros', dias=730, lote=1, stdout=io.StringIO())
+
+        self.assertFalse(Cita.objects.filter(pk=self.pagada.pk).exists())
+        archivada = CitaArchivada.objects.get()
+        self.assertEqual(archivada.pk, self.pagada.pk)
+        self.assertEqual(archivada.pago.estado, 'PAGADO')
+        self.assertEqual(AbonoArchivado.objects.get().pago, archivada.pago)
+        self.assertEqual(HistorialClinicoArchivado.objects.get().cita_id, self.pagada.pk)
+        # Las citas con saldo pendiente y las recientes siguen activas
+        self.assertEqual(set(Cita.objects.values_list('pk', flat=True)), {self.con_deuda.pk, self.reciente.pk})
+        self.assertEqual((Pago.objects.count(), Abono.objects.count(), HistorialClinico.objects.count()), (1, 1, 1))
+        self.assertEqual(PagoArchivado.objects.count(), 1)
+        # El DELETE directo no envía post_delete: queda un registro MASIVA por lote
+        auditoria.buffer.vaciar()
+        registro = RegistroAuditoria.objects.get(accion='MASIVA', modelo='Cita')
+        self.assertEqual(registro.cambios['operacion'], 'archivo')
+        self.assertEqual(registro.cambios['ids'], [self.pagada.pk])
+        self.assertEqual(registro.cambios['filas']['core_abono'], 1)
+
+        ficha = self.client.get(reverse('ficha_medica', args=[self.paciente.pk]), {'archivo': '1'})
+        self.assertEqual(len(ficha.context['historial_consultas']), 2)
+        fecha = timezone.localdate(self.antigua).isoformat()
+        reporte = {'fecha_inicio': fecha, 'fecha_fin': fecha}
+        self.assertEqual(len(self.client.get(reverse('reportes'), reporte).context['citas']), 1)
+        respuesta = self.client.get(reverse('reportes'), {**reporte, 'incluir_archivo': 'on'})
+        self.assertEqual(len(respuesta.context['citas']), 2)
+        self.assertEqual(respuesta.context['total_ingresos'], 20000)
+
+
+class BajaPacienteTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=1, n_tutores=1, pacientes_por_tutor=2, citas_por_paciente=0)
+
+    def setUp(self):
+        super().setUp()
+        self.paciente, self.otro = self.datos['pacientes']
+        self.pendiente = Cita.objects.create(
+            paciente=self.paciente, veterinario=self.datos['veterinarios'][0],
+            fecha_hora=timezone.now() + timezone.timedelta(days=2), motivo_consulta='Control', estado='AGENDADA',
+        )
+
+    def test_baja_logica_y_purga_por_lotes(self):
+        self.client.post(reverse('eliminar_paciente', args=[self.paciente.pk]))
+        self.assertFalse(Paciente.objects.filter(pk=self.paciente.pk).exists())
+        self.assertTrue(Paciente.todos.filter(pk=self.paciente.pk, activo=False).exists())
+        self.assertEqual(Cita.objects.get(pk=self.pendiente.pk).estado, 'CANCELADA')
+        self.assertNotIn(self.paciente, self.client.get(reverse('listar_pacientes')).context['pacientes'])
+
+        # Dentro del plazo no se purga; con --dias 0 sí, y solo el dado de baja
+        call_command('purgar_pacientes', stdout=io.StringIO())
+        self.assertTrue(Paciente.todos.filter(pk=self.paciente.pk).exists())
+        call_command('purgar_pacientes', dias=0, lote=1, stdout=io.StringIO())
+        self.assertFalse(Paciente.todos.filter(pk=self.paciente.pk).exists())
+        self.assertFalse(Cita.objects.filter(pk=self.pendiente.pk).exists())
+        self.assertTrue(Paciente.objects.filter(pk=self.otro.pk).exists())
+
+
+    def test_manager_por_defecto_incluye_inactivos(self):
+        from .forms import CitaAdminForm
+        self.paciente.dar_de_baja()
+        self.assertIs(Paciente._default_manager, Paciente.todos)
+        self.assertIn(self.paciente, self.paciente.tutor.paciente_set.all())
+        # La cita de un paciente dado de baja se puede seguir editando en el admin
+        form = CitaAdminForm(instance=self.pendiente)
+        self.assertTrue(form.fields['paciente'].queryset.filter(pk=self.paciente.pk).exists())
+
+
+@override_settings(PURGA_ASINCRONA=False)
+class PurgaTutorTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=1, n_tutores=2, pacientes_por_tutor=2, citas_por_paciente=3)
+
+    def setUp(self):
+        super().setUp()
+        self.tutor, self.otro = self.datos['tutores']
+
+    def test_purga_por_lotes_con_progreso(self):
+        pasos = [(accion, modelo.__name__) for accion, modelo, *_ in plan(Tutor).pasos]
+        # Hijos antes que padres
+        self.assertLess(pasos.index(('borrar', 'Abono')), pasos.index(('borrar', 'Pago')))
+        self.assertLess(pasos.index(('borrar', 'Pago')), pasos.index(('borrar', 'Cita')))
+        self.assertLess(pasos.index(('borrar', 'Cita')), pasos.index(('borrar', 'Paciente')))
+        self.assertEqual(pasos[-1], ('borrar', 'Tutor'))
+
+        pacientes = list(Paciente.objects.filter(tutor=self.tutor).values_list('pk', flat=True))
+        citas = Cita.objects.filter(paciente_id__in=pacientes).count()
+        self.assertGreater(citas, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('eliminar_tutor', args=[self.tutor.pk]))
+        purga = PurgaTutor.objects.get()
+        self.assertRedirects(respuesta, reverse('purga_tutor', args=[purga.pk]))
+
+        self.assertFalse(Tutor.objects.filter(pk=self.tutor.pk).exists())
+        self.assertFalse(Paciente.todos.filter(pk__in=pacientes).exists())
+        self.assertFalse(Cita.objects.filter(paciente_id__in=pacientes).exists())
+        self.assertTrue(Cita.objects.filter(paciente__tutor=self.otro).exists())
+        estado = self.client.get(reverse('purga_tutor_estado', args=[purga.pk])).json()
+        self.assertEqual((estado['estado'], estado['porcentaje']), ('COMPLETADA', 100))
+        self.assertEqual(estado['detalle']['citas'], citas)
+
+        auditoria.buffer.vaciar()
+        registro = RegistroAuditoria.objects.get(accion='MASIVA', modelo='Tutor')
+        self.assertEqual((registro.objeto_id, registro.usuario_id), (self.tutor.pk, self.datos['admin'].pk))
+        self.assertEqual(registro.cambios['filas']['core_cita'], citas)
+
+    def test_una_sola_purga_activa_por_tutor(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            primera = iniciar_purga_tutor(self.tutor)
+            self.assertEqual(iniciar_purga_tutor(self.tutor), primera)
+        self.assertEqual(len(callbacks), 1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PurgaTutor.objects.create(tutor_id=self.tutor.pk, tutor='Duplicada')
+
+    def test_reanuda_purgas_abandonadas(self):
+        # El worker murió a medias: la purga quedó EN_CURSO sin latido
+        abandonada = PurgaTutor.objects.create(
+            tutor_id=self.tutor.pk, tutor='Abandonada', estado='EN_CURSO',
+            actualizada=timezone.now() - timezone.timedelta(hours=1),
+        )
+        viva = PurgaTutor.objects.create(tutor_id=self.otro.pk, tutor='En curso', estado='EN_CURSO')
+        call_command('reanudar_purgas', stdout=io.StringIO())
+        abandonada.refresh_from_db()
+        self.assertEqual(abandonada.estado, 'COMPLETADA')
+        self.assertFalse(Tutor.objects.filter(pk=self.tutor.pk).exists())
+        # La que sigue avanzando no se toca
+        viva.refresh_from_db()
+        self.assertEqual(viva.estado, 'EN_CURSO')
+        self.assertTrue(Tutor.objects.filter(pk=self.otro.pk).exists())
+
+
+class AuditoriaTests(DatosDemoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.paciente = self.datos['pacientes'][0]
+        cita = Cita.objects.create(
+            paciente=self.paciente, veterinario=self.datos['veterinarios'][0],
+            fecha_hora=timezone.now(), motivo_consulta='Control', estado='REALIZADO', monto=30000,
+        )
+        self.pago = Pago.objects.create(cita=cita, monto_total=30000, saldo_pendiente=30000)
+        auditoria.buffer.vaciar()
+
+    def test_registra_diferencias_en_lote_al_confirmar(self):
+        antes = RegistroAuditoria.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as consultas:
+                self.client.post(
+                    reverse('registrar_abono', args=[self.pago.pk]), {'monto': 10000, 'metodo_pago': 'EFECTIVO'}
+                )
+        # Abono y pago quedan en el buffer: nada se escribió durante la petición
+        self.assertFalse(any('core_registroauditoria' in q['sql'] for q in consultas))
+        self.assertEqual(len(auditoria.buffer), 2)
+
+        registros = self.client.get(reverse('auditoria_paciente', args=[self.paciente.pk])).json()['registros']
+        self.assertEqual(RegistroAuditoria.objects.count(), antes + 2)
+        por_modelo = {r['modelo']: r for r in registros}
+        self.assertEqual(por_modelo['Pago']['accion'], 'MODIFICAR')
+        self.assertEqual(por_modelo['Pago']['cambios']['monto_pagado'], ['0', '10000'])
+        self.assertEqual(por_modelo['Pago']['cambios']['estado'], ['PENDIENTE', 'PARCIAL'])
+        self.assertEqual(por_modelo['Abono']['accion'], 'CREAR')
+        self.assertEqual(por_modelo['Abono']['usuario'], self.datos['admin'].email)
+
+        # Sin confirmar la transacción no se registra nada
+        with transaction.atomic():
+            HistorialClinico.objects.create(
+                paciente=self.paciente, veterinario=self.datos['veterinarios'][0], fecha_atencion=timezone.now(),
+                motivo='Control', diagnostico='Sano', tratamiento='-',
+            )
+            transaction.set_rollback(True)
+        self.assertEqual(len(auditoria.buffer), 0)
+
+    @override_settings(AUDITORIA_MAX_PENDIENTES=3)
+    def test_error_de_bd_devuelve_los_registros_al_buffer(self):
+        for monto in (1000, 2000):
+            with self.captureOnCommitCallbacks(execute=True):
+                Abono.objects.create(pago=self.pago, monto=monto, metodo_pago='EFECTIVO')
+        antes = RegistroAuditoria.objects.count()
+        with mock.patch.object(RegistroAuditoria.objects, 'bulk_create', side_effect=DatabaseError):
+            self.assertEqual(auditoria.buffer.vaciar(), 0)
+        self.assertEqual(len(auditoria.buffer), 2)
+
+        # Con el buffer sobre el máximo se descartan los más antiguos
+        with self.captureOnCommitCallbacks(execute=True):
+            Abono.objects.create(pago=self.pago, monto=3000, metodo_pago='EFECTIVO')
+            Abono.objects.create(pago=self.pago, monto=4000, metodo_pago='EFECTIVO')
+        with mock.patch.object(RegistroAuditoria.objects, 'bulk_create', side_effect=DatabaseError):
+            auditoria.buffer.vaciar()
+        self.assertEqual(len(auditoria.buffer), 3)
+
+        self.assertEqual(auditoria.buffer.vaciar(), 3)
+        montos = RegistroAuditoria.objects.filter(modelo='Abono').order_by('pk').values_list('cambios__monto', flat=True)
+        self.assertEqual(RegistroAuditoria.objects.count(), antes + 3)
+        self.assertEqual([m[1] for m in montos][-3:], [2000, 3000, 4000])
+
+
+class AnaliticaTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=4, pacientes_por_tutor=2, citas_por_paciente=5)
+
+    def test_pivote_en_una_consulta_cuadra_con_los_totales(self):
+        url = reverse('analitica_ingresos')
+        parametros = {'fecha_inicio': '2000-01-01', 'fecha_fin': '2100-01-01', 'periodo': 'semana'}
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.get(url, parametros).json()
+        # sesión, usuario, la consulta agrupada y los nombres de veterinarios
+        self.assertEqual(len(consultas), 4)
+
+        realizadas = Cita.objects.filter(estado='REALIZADO')
+        self.assertEqual(datos['total']['visitas'], realizadas.count())
+        self.assertEqual(datos['total']['facturado'], float(realizadas.aggregate(s=Sum('monto'))['s'] or 0))
+        cobrado = float(Abono.objects.filter(pago__cita__in=realizadas).aggregate(s=Sum('monto'))['s'] or 0)
+        self.assertEqual(datos['total']['cobrado'], cobrado)
+        for dimension in ('veterinario', 'especie', 'metodo_pago', 'metodo_abono'):
+            filas = [f for f in datos['filas'] if f['dimension'] == dimension and f['periodo'] is None]
+            self.assertEqual(sum(f['visitas'] for f in filas), datos['total']['visitas'])
+            self.assertEqual(sum(f['cobrado'] for f in filas), cobrado)
+        subtotales = [f for f in datos['filas'] if f['dimension'] is None]
+        self.assertEqual(sum(f['facturado'] for f in subtotales), datos['total']['facturado'])
+
+        self.assertEqual(self.client.get(url, {**parametros, 'periodo': 'anio'}).status_code, 400)
+
+
+class ReporteCacheTests(DatosDemoTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        paciente, veterinario = self.datos['pacientes'][0], self.datos['veterinarios'][0]
+        tz = timezone.get_current_timezone()
+        self.enero, self.marzo = [
+            Cita.objects.create(
+                paciente=paciente, veterinario=veterinario, fecha_hora=timezone.datetime(2024, mes, 10, 10, tzinfo=tz),
+                motivo_consulta='Control', estado='REALIZADO', monto=10000,
+            )
+            for mes in (1, 3)
+        ]
+
+    def _reporte(self, inicio, fin):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('reportes'), {'fecha_inicio': inicio, 'fecha_fin': fin})
+        calculado = any('core_cita' in q['sql'] for q in consultas.captured_queries)
+        return respuesta.context['total_ingresos'], calculado
+
+    def test_solo_se_recalculan_los_meses_con_cambios(self):
+        self.assertEqual(self._reporte('2024-01-01', '2024-03-31'), (20000, True))
+        self.assertEqual(self._reporte('2024-01-01', '2024-03-31'), (20000, False))
+        self.assertEqual(self._reporte('2024-01-01', '2024-01-31'), (10000, True))
+
+        # Un cambio que no toca estado ni monto no invalida
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marzo.motivo_consulta = 'Control anual'
+            self.marzo.save()
+        self.assertEqual(self._reporte('2024-01-01', '2024-03-31'), (20000, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marzo.monto = 15000
+            self.marzo.save()
+        self.assertEqual(self._reporte('2024-01-01', '2024-03-31'), (25000, True))
+        # Enero no cambió: sigue en caché
+        self.assertEqual(self._reporte('2024-01-01', '2024-01-31'), (10000, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enero.delete()
+        self.assertEqual(self._reporte('2024-01-01', '2024-01-31'), (0, True))
+
+    def test_guarda_filas_planas_y_omite_resultados_grandes(self):
+        from . import cache_reportes
+        self._reporte('2024-01-01', '2024-03-31')
+        clave = cache_reportes.clave_reporte(timezone.datetime(2024, 1, 1).date(), timezone.datetime(2024, 3, 31).date())
+        filas, total = cache.get(clave)
+        self.assertEqual(total, 20000)
+        self.assertTrue(all(type(f) is dict for f in filas))
+        self.assertEqual(filas[0]['paciente'], self.enero.paciente.nombre)
+
+        with override_settings(REPORTES_CACHE_MAX_BYTES=0):
+            self.assertEqual(self._reporte('2024-01-01', '2024-01-31'), (10000, True))
+            self.assertEqual(self._reporte('2024-01-01', '2024-01-31'), (10000, True))
+
+
+class EstadisticasPanelTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=3, pacientes_por_tutor=2, citas_por_paciente=4)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_contadores_en_una_consulta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            valores = dashboard.contadores()
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(valores, {
+            'total_pacientes': Paciente.objects.count(),
+            'total_veterinarios': Usuario.objects.filter(rol='VETERINARIO').count(),
+            'citas_pendientes': Cita.objects.filter(estado__in=['SOLICITADA', 'AGENDADA']).count(),
+            'citas_hoy': Cita.objects.filter(fecha_hora__date=timezone.localdate()).count(),
+        })
+
+    def test_error_de_bd_muestra_ultimos_valores_con_su_antiguedad(self):
+        with mock.patch.object(dashboard, 'contadores', side_effect=DatabaseError):
+            respuesta = self.client.get(reverse('panel'))
+        self.assertIsNone(respuesta.context['total_pacientes'])
+        self.assertContains(respuesta, 'No se pudieron calcular las estadísticas')
+
+        respuesta = self.client.get(reverse('panel'))
+        self.assertEqual(respuesta.context['total_pacientes'], Paciente.objects.count())
+        self.assertFalse(respuesta.context['estadisticas']['obsoleto'])
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('panel'))
+        self.assertFalse(any('core_cita' in q['sql'] for q in consultas.captured_queries))
+
+        with override_settings(PANEL_ESTADISTICAS_OBSOLETO_MAX=0), \
+                mock.patch.object(dashboard, 'contadores', side_effect=DatabaseError):
+            respuesta = self.client.get(reverse('panel'))
+        self.assertEqual(respuesta.context['total_pacientes'], Paciente.objects.count())
+        self.assertTrue(respuesta.context['estadisticas']['error'])
+        self.assertContains(respuesta, 'la base de datos no respondió')
+
+    def test_error_del_backend_de_cache_no_rompe_el_panel(self):
+        # DatabaseCache: leer o escribir la caché falla junto con la BD
+        with mock.patch.object(dashboard.cache, 'get', side_effect=DatabaseError), \
+                mock.patch.object(dashboard.cache, 'set', side_effect=DatabaseError):
+            respuesta = self.client.get(reverse('panel'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['total_pacientes'], Paciente.objects.count())
+        self.assertFalse(respuesta.context['estadisticas']['error'])
+
+        with mock.patch.object(dashboard.cache, 'get', side_effect=DatabaseError), \
+                mock.patch.object(dashboard, 'contadores', side_effect=DatabaseError):
+            respuesta = self.client.get(reverse('panel'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.context['estadisticas']['error'])
+
+
+class TopesAgendaTests(DatosDemoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.veterinario = self.datos['veterinarios'][0]
+        hoy = timezone.localdate()
+        self.lunes = hoy + timezone.timedelta(days=7 - hoy.weekday())
+
+    def _agendar(self, hora, motivo, duracion=''):
+        return self.client.post(reverse('crear_cita'), {
+            'paciente': self.datos['pacientes'][0].pk,
+            'veterinario': self.veterinario.pk,
+            'fecha_hora': f'{self.lunes.isoformat()}T{hora}',
+            'duracion': duracion,
+            'motivo_consulta': motivo,
+        })
+
+    def test_rechaza_citas_que_se_topan(self):
+        self.assertEqual(self._agendar('10:00', 'Cirugía de rodilla').status_code, 302)
+        cirugia = Cita.objects.get()
+        self.assertEqual(cirugia.duracion, 120)
+
+        respuesta = self._agendar('11:30', 'Consulta general')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('entre 10:00 y 12:00', respuesta.context['form'].non_field_errors()[0])
+        # Tampoco si termina fuera del bloque del veterinario (9:00 a 18:00)
+        self.assertEqual(self._agendar('17:45', 'Consulta general', duracion=30).status_code, 200)
+        self.assertEqual(self._agendar('12:00', 'Vacunación').status_code, 302)
+        self.assertEqual(Cita.objects.count(), 2)
+
+        url = reverse('topes_cita')
+        datos = self.client.get(url, {
+            'veterinario': self.veterinario.pk, 'fecha_hora': f'{self.lunes.isoformat()}T11:50', 'duracion': 20,
+        }).json()
+        self.assertFalse(datos['libre'])
+        self.assertEqual(len(datos['topes']), 2)
+        datos = self.client.get(url, {
+            'veterinario': self.veterinario.pk, 'fecha_hora': f'{self.lunes.isoformat()}T10:30',
+            'motivo': 'Control', 'excluir': cirugia.pk,
+        }).json()
+        self.assertTrue(datos['libre'])
+        self.assertEqual(datos['duracion'], 15)
+        self.assertEqual(self.client.get(url, {'veterinario': self.veterinario.pk}).status_code, 400)
+
+        # El índice en memoria responde lo mismo que la consulta
+        indice = agenda.indice_del_dia(self.veterinario, self.lunes)
+        inicio, _ = estados_cita.rango_del_dia(self.lunes)
+        for minutos in range(8 * 60, 14 * 60, 5):
+            desde = inicio + timezone.timedelta(minutes=minutos)
+            hasta = desde + timezone.timedelta(minutes=25)
+            self.assertEqual(
+                [c.pk for c in indice.topes(desde, hasta)],
+                [c.pk for c in agenda.citas_que_topan(self.veterinario, desde, hasta)],
+            )
+
+    def test_admin_revisa_topes_y_guarda_con_agenda(self):
+        from django.contrib.admin import site
+        from django.forms.models import model_to_dict
+        from .forms import CitaAdminForm
+        inicio, _ = estados_cita.rango_del_dia(self.lunes)
+        cita = Cita.objects.create(
+            paciente=self.datos['pacientes'][0], veterinario=self.veterinario,
+            fecha_hora=inicio + timezone.timedelta(hours=10), duracion=60, motivo_consulta='Control',
+        )
+        datos = {**model_to_dict(cita, exclude=['id']), 'fecha_hora': cita.fecha_hora + timezone.timedelta(minutes=30)}
+        form = CitaAdminForm(data=datos)
+        self.assertFalse(form.is_valid())
+        self.assertIn('entre 10:00 y 11:00', form.non_field_errors()[0])
+        # Una cancelada no ocupa la agenda, y el admin sí puede registrar citas pasadas
+        self.assertTrue(CitaAdminForm(data={**datos, 'estado': 'CANCELADA'}).is_valid())
+        form = CitaAdminForm(data={**datos, 'fecha_hora': timezone.now() - timezone.timedelta(days=3)})
+        self.assertTrue(form.is_valid(), form.errors)
+
+        cita_admin = site._registry[Cita]
+        cita_admin.save_model(None, form.save(commit=False), form, change=False)
+        self.assertEqual(Cita.objects.count(), 2)
+        tope = Cita(**{**datos, 'paciente': cita.paciente, 'veterinario': self.veterinario})
+        with self.assertRaises(ValidationError):
+            cita_admin.save_model(None, tope, None, change=False)
+
+
+class GrillaAgendaTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=3, n_tutores=2, pacientes_por_tutor=1, citas_por_paciente=0)
+
+    def setUp(self):
+        super().setUp()
+        hoy = timezone.localdate()
+        self.lunes = hoy + timezone.timedelta(days=7 - hoy.weekday())
+        inicio, _ = estados_cita.rango_del_dia(self.lunes)
+        self.cita = Cita.objects.create(
+            paciente=self.datos['pacientes'][0], veterinario=self.datos['veterinarios'][0],
+            fecha_hora=inicio + timezone.timedelta(hours=10), duracion=45, motivo_consulta='Control',
+        )
+
+    def test_grilla_en_dos_consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            datos = grilla.grilla_del_dia(self.lunes)
+        self.assertEqual(len(consultas), 2)
+        self.assertEqual(len(datos['filas']), 3)
+        # Horario demo: 9:00 a 18:00 en bloques de 15 minutos
+        self.assertEqual(len(datos['columnas']), 36)
+        for fila in datos['filas']:
+            self.assertEqual(sum(c['ancho'] for c in fila['celdas']), 36)
+
+        respuesta = self.client.get(reverse('grilla_citas_json'), {'fecha': self.lunes.isoformat()}).json()
+        fila = next(v for v in respuesta['veterinarios'] if v['id'] == self.cita.veterinario_id)
+        self.assertEqual(
+            [(c['tipo'], c['inicio'], c['ancho']) for c in fila['celdas']],
+            [('libre', 0, 4), ('cita', 4, 3), ('libre', 7, 29)],
+        )
+        self.assertEqual(fila['celdas'][1]['cita']['id'], self.cita.pk)
+        self.assertContains(
+            self.client.get(reverse('grilla_citas'), {'fecha': self.lunes.isoformat()}), self.cita.paciente.nombre
+        )
+
+
+@override_settings(CUPOS_SEMANAS=2)
+class CuposAgendaTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=1, pacientes_por_tutor=1, citas_por_paciente=0)
+
+    def setUp(self):
+        super().setUp()
+        self.vet, self.otro = self.datos['veterinarios']
+        hoy = timezone.localdate()
+        self.lunes = hoy + timezone.timedelta(days=7 - hoy.weekday())
+        cupos.generar()
+
+    def _cupos_del_dia(self, veterinario, fecha):
+        inicio, fin = estados_cita.rango_del_dia(fecha)
+        return CupoAgenda.objects.filter(veterinario=veterinario, inicio__gte=inicio, inicio__lt=fin)
+
+    def test_horario_regenera_solo_su_dia(self):
+        # Horario demo: 9:00 a 18:00 de lunes a viernes
+        self.assertEqual(self._cupos_del_dia(self.vet, self.lunes).count(), 36)
+        sabado = self.lunes + timezone.timedelta(days=5)
+        self.assertFalse(self._cupos_del_dia(self.vet, sabado).exists())
+        otros = set(CupoAgenda.objects.values_list('pk', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('gestionar_horarios', args=[self.vet.pk]), {
+                'dias_semana': ['5'], 'hora_inicio': '09:00', 'hora_fin': '12:00',
+            })
+        self.assertEqual(self._cupos_del_dia(self.vet, sabado).count(), 12)
+        self.assertFalse(self._cupos_del_dia(self.otro, sabado).exists())
+        # Los cupos de los demás días no se tocaron
+        self.assertTrue(otros <= set(CupoAgenda.objects.values_list('pk', flat=True)))
+
+        horario = HorarioDisponible.objects.get(veterinario=self.vet, dia_semana=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('eliminar_horario', args=[horario.pk]))
+        self.assertFalse(self._cupos_del_dia(self.vet, sabado).exists())
+        self.assertEqual(set(CupoAgenda.objects.values_list('pk', flat=True)), otros)
+
+    def test_citas_ocupan_y_liberan_cupos(self):
+        inicio, _ = estados_cita.rango_del_dia(self.lunes)
+        with self.captureOnCommitCallbacks(execute=True):
+            cita = Cita.objects.create(
+                paciente=self.datos['pacientes'][0], veterinario=self.vet,
+                fecha_hora=inicio + timezone.timedelta(hours=10), duracion=45, motivo_consulta='Control',
+            )
+        ocupados = self._cupos_del_dia(self.vet, self.lunes).filter(cita=cita)
+        self.assertEqual(
+            [timezone.localtime(c.inicio).strftime('%H:%M') for c in ocupados], ['10:00', '10:15', '10:30']
+        )
+
+        parametros = {'desde': self.lunes.isoformat(), 'dias': 1, 'veterinario': self.vet.pk}
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('cupos_libres'), parametros).json()
+        self.assertEqual(len(respuesta['cupos']), 33)
+        self.assertNotIn(timezone.localtime(cita.fecha_hora).isoformat(), [c['inicio'] for c in respuesta['cupos']])
+        self.assertEqual(len([q for q in consultas if 'core_cupoagenda' in q['sql']]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cita.estado = 'CANCELADA'
+            cita.save()
+        self.assertEqual(cupos.libres(*estados_cita.rango_del_dia(self.lunes), self.vet).count(), 36)
+        self.assertEqual(self.client.get(reverse('cupos_libres'), {'dias': 99}).status_code, 400)
+
+
+class PrimerosLibresTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=2, n_tutores=1, pacientes_por_tutor=1, citas_por_paciente=0)
+
+    def setUp(self):
+        super().setUp()
+        self.cirujano, self.dermatologo = self.datos['veterinarios']
+        self.cirujano.especialidad, self.dermatologo.especialidad = 'Cirugía', 'Dermatología'
+        self.cirujano.save()
+        self.dermatologo.save()
+        hoy = timezone.localdate()
+        self.lunes = hoy + timezone.timedelta(days=7 - hoy.weekday())
+        inicio, _ = estados_cita.rango_del_dia(self.lunes)
+        # Cirujano ocupado de 9:00 a 12:00; dermatólogo de 9:00 a 9:45
+        for veterinario, duracion in ((self.cirujano, 180), (self.dermatologo, 45)):
+            Cita.objects.create(
+                paciente=self.datos['pacientes'][0], veterinario=veterinario,
+                fecha_hora=inicio + timezone.timedelta(hours=9), duracion=duracion, motivo_consulta='Cirugía',
+            )
+
+    def _resumen(self, horarios):
+        return [(timezone.localtime(h['inicio']).strftime('%H:%M'), h['veterinario'].pk) for h in horarios]
+
+    def test_mezcla_veterinarios_por_hora(self):
+        fin = self.lunes + timezone.timedelta(days=60)
+        with CaptureQueriesContext(connection) as consultas:
+            horarios = disponibilidad.primeros_libres(self.lunes, fin, 30, k=8)
+        # Veterinarios, horarios y una carga de citas por veterinario, aunque la ventana sea larga
+        self.assertEqual(len(consultas), 4)
+        c, d = self.cirujano.pk, self.dermatologo.pk
+        self.assertEqual(self._resumen(horarios), [
+            ('09:45', d), ('10:15', d), ('10:45', d), ('11:15', d),
+            ('11:45', d), ('12:00', c), ('12:15', d), ('12:30', c),
+        ])
+        self.assertEqual(
+            self._resumen(disponibilidad.primeros_libres(self.lunes, fin, 30, k=1, especialidad='ciru')),
+            [('12:00', c)],
+        )
+
+    def test_api_primeros_libres(self):
+        respuesta = self.client.get(reverse('primeros_libres'), {
+            'desde': self.lunes.isoformat(), 'motivo': 'Cirugía', 'k': 2,
+        }).json()
+        # Cirugía dura 120 minutos: el dermatólogo se libera antes que el cirujano
+        self.assertEqual(respuesta['duracion'], 120)
+        self.assertEqual(
+            [(h['inicio'][11:16], h['veterinario']['id']) for h in respuesta['horarios']],
+            [('09:45', self.dermatologo.pk), ('11:45', self.dermatologo.pk)],
+        )
+        self.assertEqual(self.client.get(reverse('primeros_libres'), {
+            'desde': self.lunes.isoformat(), 'hasta': (self.lunes - timezone.timedelta(days=1)).isoformat(),
+        }).status_code, 400)
+
+
+class PruebaCargaTests(LiveServerTestCase):
+    def test_usuarios_virtuales_contra_servidor(self):
+        crear_datos_demo(n_veterinarios=2, n_tutores=4, pacientes_por_tutor=1, citas_por_paciente=3)
+        # Un rol a la vez: el servidor de pruebas comparte una sola conexión SQLite en memoria
+        for rol in ('RECEPCIONISTA', 'VETERINARIO', 'ADMIN'):
+            resultados = carga.ejecutar(self.live_server_url, {rol: 1}, PASSWORD_DEMO, peticiones=15, semilla=7)
+            filas = {fila['ruta']: fila for fila in resultados.resumen()}
+            self.assertEqual(filas['login']['peticiones'], 1)
+            self.assertEqual(filas['TOTAL']['peticiones'], 15)
+            self.assertEqual(filas['TOTAL']['errores'] + filas['login']['errores'], 0, filas)
+            self.assertLessEqual(filas['TOTAL']['p50'], filas['TOTAL']['p99'])
+
+    def test_percentil_por_rango_mas_cercano(self):
+        valores = list(range(1, 101))
+        self.assertEqual([carga.percentil(valores, p) for p in carga.PERCENTILES], [50, 95, 99])
+        self.assertIsNone(carga.percentil([], 95))
+
+
+class PerfiladoTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=1, n_tutores=2, pacientes_por_tutor=1, citas_por_paciente=1)
+    USUARIO = None
+
+    def setUp(self):
+        super().setUp()
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        ajustes = override_settings(PERFILADO_DIR=self.directorio, PERFILADO_MAX=2, PERFILADO_INTERVALO_MS=1)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _archivos(self):
+        return sorted(os.listdir(self.directorio))
+
+    def _get_lento(self, **kwargs):
+        # Con la plantilla reemplazada por una espera el muestreo alcanza a ver la vista
+        def render_lento(*args, **kwargs):
+            time.sleep(0.05)
+            return HttpResponse()
+
+        with mock.patch('core.views.citas.render', side_effect=render_lento):
+            return self.client.get(reverse('listar_citas'), **kwargs)
+
+    def test_admin_perfila_con_cprofile(self):
+        import pstats
+        self.client.force_login(self.datos['admin'])
+        respuesta = self._get_lento(data={'perfilar': '1'})
+        self.assertEqual(respuesta.status_code, 200)
+        nombre = respuesta['X-Perfil']
+        self.assertEqual(self._archivos(), [nombre + '.folded', nombre + '.json', nombre + '.prof'])
+        stats = pstats.Stats(os.path.join(self.directorio, nombre + '.prof'))
+        self.assertTrue(any(funcion[2] == 'listar_citas' for funcion in stats.stats))
+        with open(os.path.join(self.directorio, nombre + '.folded'), encoding='utf-8') as f:
+            lineas = f.read().splitlines()
+        self.assertTrue(lineas)
+        for linea in lineas:
+            pila, valor = linea.rsplit(' ', 1)
+            self.assertGreater(int(valor), 0)
+        self.assertTrue(any('core/views/citas.py:listar_citas:' in linea for linea in lineas))
+
+        listado = self.client.get(reverse('perfiles'))
+        self.assertEqual(listado.context['perfiles'][0]['vista'], 'listar_citas')
+        self.assertContains(listado, reverse('descargar_perfil', args=[nombre, 'prof']))
+        descarga = self.client.get(reverse('descargar_perfil', args=[nombre, 'folded']))
+        self.assertEqual(b''.join(descarga.streaming_content).decode().splitlines(), lineas)
+        self.assertEqual(self.client.get(reverse('descargar_perfil', args=['..', 'prof'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('descargar_perfil', args=[nombre, 'py'])).status_code, 404)
+
+    def test_muestreo_por_cabecera(self):
+        self.client.force_login(self.datos['admin'])
+        respuesta = self._get_lento(HTTP_X_PERFILAR='muestreo')
+        nombre = respuesta['X-Perfil']
+        self.assertEqual(self._archivos(), [nombre + '.folded', nombre + '.json'])
+        with open(os.path.join(self.directorio, nombre + '.folded'), encoding='utf-8') as f:
+            self.assertIn('core/views/citas.py:listar_citas:', f.read())
+
+    def test_sin_admin_o_sin_parametro_no_perfila(self):
+        self.client.force_login(self.datos['recepcionista'])
+        respuesta = self.client.get(reverse('listar_citas'), {'perfilar': '1'})
+        self.assertNotIn('X-Perfil', respuesta)
+        self.assertRedirects(self.client.get(reverse('perfiles')), reverse('panel'), fetch_redirect_response=False)
+        self.client.force_login(self.datos['admin'])
+        self.assertNotIn('X-Perfil', self.client.get(reverse('listar_citas')))
+        self.assertNotIn('X-Perfil', self.client.get(reverse('listar_citas'), {'perfilar': '0'}))
+        self.assertEqual(self._archivos(), [])
+
+    def test_conserva_los_mas_recientes(self):
+        self.client.force_login(self.datos['admin'])
+        nombres = [self.client.get(reverse('panel'), {'perfilar': '1'})['X-Perfil'] for _ in range(3)]
+        self.assertEqual([p['nombre'] for p in perfilado.recientes()], sorted(nombres, reverse=True)[:2])
+        self.assertEqual(len(self._archivos()), 6)
+
+
+class MetricasTests(DatosDemoTestCase):
+    DATOS_DEMO = dict(n_veterinarios=1, n_tutores=2, pacientes_por_tutor=1, citas_por_paciente=1)
+
+    def setUp(self):
+        super().setUp()
+        metricas.registro.reiniciar()
+        self.addCleanup(metricas.registro.reiniciar)
+
+    def test_histogramas_por_nombre_de_url(self):
+        self.client.get(reverse('listar_citas'))
+        self.client.get(reverse('listar_citas'))
+        self.client.get(reverse('dashboard_data'))
+        self.client.get('/no-existe/')
+        histogramas = metricas.registro.copia()
+        self.assertEqual(histogramas[('listar_citas', 'total')].cantidad, 2)
+        self.assertGreater(histogramas[('listar_citas', 'db')].suma, 0)
+        self.assertGreater(histogramas[('listar_citas', 'plantilla')].suma, 0)
+        self.assertLessEqual(histogramas[('listar_citas', 'plantilla')].suma, histogramas[('listar_citas', 'total')].suma)
+        # JSON: sin plantilla, cae en el primer bucket
+        self.assertEqual(histogramas[('dashboard_data', 'plantilla')].conteos[0], 1)
+        self.assertEqual(histogramas[(metricas.SIN_RUTA, 'total')].cantidad, 1)
+
+    def test_percentil_interpolado_en_el_bucket(self):
+        histograma = metricas.Histograma()
+        for _ in range(10):
+            histograma.observar(0.02)
+        self.assertAlmostEqual(histograma.percentil(50), 0.0175)
+        histograma.observar(60)
+        self.assertEqual(histograma.percentil(99), metricas.BUCKETS[-1])
+        self.assertIsNone(metricas.Histograma().percentil(95))
+        self.assertEqual(histograma.menos(histograma.copia()).cantidad, 0)
+
+    def test_exportacion_prometheus(self):
+        self.client.get(reverse('listar_citas'))
+        texto = self.client.get(reverse('metricas')).content.decode()
+        self.assertIn('# TYPE clinica_peticion_segundos histogram', texto)
+        self.assertIn('clinica_peticion_segundos_bucket{vista="listar_citas",le="+Inf"} 1', texto)
+        self.assertIn('clinica_peticion_db_segundos_count{vista="listar_citas"} 1', texto)
+        self.assertIn('clinica_peticion_plantilla_segundos_sum{vista="listar_citas"}', texto)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='10.1.2.3').status_code, 404)
+        self.client.force_login(self.datos['recepcionista'])
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='10.1.2.3').status_code, 404)
+
+    @override_settings(METRICAS_ACCESO_LOG=True)
+    def test_log_de_acceso_json(self):
+        import json
+        with self.assertLogs('core.acceso', 'INFO') as logs:
+            self.client.get(reverse('listar_citas'))
+        linea = json.loads(logs.records[0].getMessage())
+        self.assertEqual(linea['vista'], 'listar_citas')
+        self.assertEqual(linea['estado'], 200)
+        self.assertEqual(linea['usuario'], self.datos['admin'].pk)
+        self.assertGreater(linea['consultas'], 0)
+
+    @override_settings(METRICAS_RESUMEN_SEGUNDOS=0)
+    def test_resumen_del_intervalo(self):
+        import json
+        with self.assertLogs('core.metricas', 'INFO') as logs:
+            self.client.get(reverse('listar_citas'))
+            self.client.get(reverse('listar_citas'))
+        primero, segundo = [json.loads(r.getMessage())['resumen'] for r in logs.records]
+        self.assertEqual(primero['listar_citas']['peticiones'], 1)
+        # El segundo resume solo lo ocurrido desde el primero
+        self.assertEqual(segundo['listar_citas']['peticiones'], 1)
+        self.assertEqual(set(segundo['listar_citas']), {'peticiones', 'total', 'db', 'plantilla'})
+        self.assertLessEqual(segundo['listar_citas']['total']['p50'], segundo['listar_citas']['total']['p95'])
+
+
+class ArranqueTests(TestCase):
+    def test_urls_no_importan_vistas(self):
+        resultado = arranque.medir_arranque('/login/', repeticiones=1)
+        self.assertEqual(resultado['estado'], 200)
+        self.assertEqual(resultado['vistas_tras_urls'], [])
+        self.assertEqual(resultado['vistas_tras_primera'], ['core.views.autenticacion'])
+        self.assertEqual(arranque.comparar(resultado), [])
+        # Contra la referencia versionada, con margen para otra máquina: detecta
+        # regresiones gruesas (p. ej. volver a importar todas las vistas al inicio)
+        referencia = arranque.cargar_referencia()
+        self.assertIsNotNone(referencia)
+        self.assertEqual(arranque.comparar(resultado, referencia, tolerancia=2, margen_ms=500), [])
+
+    def test_comparar_detecta_regresiones(self):
+        resultado = {
+            'ruta': '/agenda/', 'estado': 302, 'modulo_vista': 'core.views.citas',
+            'vistas_tras_urls': ['core.views.reportes'],
+            'vistas_tras_primera': ['core.views.citas', 'core.views.reportes'],
+            'setup_ms': 300.0, 'urls_ms': 10.0, 'primera_ms': 50.0, 'proceso_ms': 400.0,
+        }
+        referencia = {'setup_ms': 200.0, 'urls_ms': 10.0, 'primera_ms': 45.0, 'proceso_ms': 390.0}
+        problemas = arranque.comparar(resultado, referencia, tolerancia=0.25, margen_ms=20)
+        self.assertEqual(len(problemas), 3)
+        self.assertIn('core.views.reportes', problemas[0])
+        self.assertIn('core.views.reportes', problemas[1])
+        self.assertTrue(problemas[2].startswith('setup_ms'))
+
+    def test_comando_falla_si_empeora_la_referencia(self):
+        import json
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        ruta = os.path.join(directorio, 'arranque.json')
+        with open(ruta, 'w') as f:
+            json.dump({clave: 1.0 for clave in arranque.TIEMPOS}, f)
+        with self.assertRaisesMessage(CommandError, 'proceso_ms'):
+            call_command('benchmark_arranque', repeticiones=1, referencia=ruta, margen_ms=0, stdout=io.StringIO())
+
+    def test_rutas_sin_duplicados(self):
+        from collections import Counter
+        from django.urls import get_resolver, resolve
+        patrones = [p for p in get_resolver().url_patterns if getattr(p, 'name', None)]
+        nombres = Counter(p.name for p in patrones)
+        rutas = Counter(str(p.pattern) for p in patrones)
+        self.assertEqual([n for n, veces in nombres.items() if veces > 1], [])
+        self.assertEqual([r for r, veces in rutas.items() if veces > 1], [])
+        self.assertEqual(resolve(reverse('finalizar_cita', args=[7])).kwargs, {'cita_id': 7})
+
+    def test_check_resuelve_cada_vista_perezosa(self):
+        from types import SimpleNamespace
+        from django.urls import path
+        from .checks import revisar_vistas_perezosas
+        from .views import perezosa
+        self.assertEqual(revisar_vistas_perezosas(None), [])
+        rutas = SimpleNamespace(url_patterns=[
+            path('a/', perezosa('citas.listar_citas')),
+            path('b/', perezosa('citas.no_existe')),
+            path('c/', perezosa('modulo_inexistente.vista')),
+        ])
+        with mock.patch('core.checks.get_resolver', return_value=rutas):
+            errores = revisar_vistas_perezosas(None)
+        self.assertEqual([e.id for e in errores], ['core.E001', 'core.E001'])
+        self.assertIn('core.views.citas.no_existe', errores[0].msg)
+
+
+class AssetsTests(TestCase):
+    def setUp(self):
+        from . import assets
+        self.assets = assets
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        base = assets.Path(self.base)
+        for nombre, valor in {
+            'BASE_DIR': base, 'VENDOR_DIR': base / 'vendor', 'DIST_DIR': base / 'static' / 'dist',
+            'HASHES_VENDOR': base / 'vendor.sha256',
+            'VENDOR': [('lib/lib.min.js', 'https://cdn.test/lib.min.js'), ('lib/lib.css', 'https://cdn.test/lib.css')],
+            'BUNDLE_JS': ['vendor/lib/lib.min.js', 'static/js/app.js'],
+            'BUNDLE_CSS': ['vendor/lib/lib.css'],
+            'BUNDLE_FONTS': [],
+        }.items():
+            parche = mock.patch.object(assets, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.remotos = {
+            'https://cdn.test/lib.min.js': b'var lib=1;\n//# sourceMappingURL=lib.min.js.map\n',
+            'https://cdn.test/lib.css': b'@font-face{src:url(fonts/bootstrap-icons.woff2?24e3eb84)}\n',
+        }
+        self.hashes = {
+            'lib/lib.min.js': assets.sha256(self.remotos['https://cdn.test/lib.min.js']),
+            'lib/lib.css': assets.sha256(self.remotos['https://cdn.test/lib.css']),
+        }
+
+    def _urlopen(self, url, timeout):
+        return io.BytesIO(self.remotos[url])
+
+    def test_descarga_verifica_el_hash_y_empaqueta(self):
+        (self.assets.BASE_DIR / 'static' / 'js').mkdir(parents=True)
+        (self.assets.BASE_DIR / 'static' / 'js' / 'app.js').write_text('function  hola ( ) { return 1 ; }\n')
+        with mock.patch('urllib.request.urlopen', side_effect=self._urlopen) as urlopen:
+            self.assertEqual(self.assets.descargar_vendor(hashes=self.hashes), ['lib/lib.min.js', 'lib/lib.css'])
+            # Ya descargados y con el hash correcto: no se vuelven a pedir
+            self.assertEqual(self.assets.descargar_vendor(hashes=self.hashes), [])
+        self.assertEqual(urlopen.call_count, 2)
+
+        tamanos = self.assets.construir_bundles(minificar=False)
+        self.assertEqual(set(tamanos), {'dist/app.js', 'dist/app.css'})
+        js = (self.assets.DIST_DIR / 'app.js').read_text()
+        self.assertLess(js.index('vendor/lib/lib.min.js'), js.index('static/js/app.js'))
+        self.assertNotIn('sourceMappingURL', js)
+        self.assertIn('url(fonts/bootstrap-icons.woff2)', (self.assets.DIST_DIR / 'app.css').read_text())
+
+    def test_rechaza_descarga_alterada_o_sin_hash(self):
+        self.remotos['https://cdn.test/lib.css'] = b'body{background:url(https://otro.test/x)}'
+        with mock.patch('urllib.request.urlopen', side_effect=self._urlopen):
+            with self.assertRaisesMessage(self.assets.VendorInvalido, 'https://cdn.test/lib.css'):
+                self.assets.descargar_vendor(hashes=self.hashes)
+            with self.assertRaisesMessage(self.assets.VendorInvalido, 'vendor/lib/lib.min.js'):
+                self.assets.descargar_vendor(hashes={})
+        self.assertFalse((self.assets.VENDOR_DIR / 'lib' / 'lib.css').exists())
+
+    def test_fijar_hashes_escribe_el_archivo(self):
+        with mock.patch('urllib.request.urlopen', side_effect=self._urlopen):
+            call_command('construir_assets', fijar_hashes=True, stdout=io.StringIO())
+        self.assertEqual(self.assets.leer_hashes(), self.hashes)
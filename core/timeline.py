@@ -0,0 +1,168 @@
+# core/timeline.py
+
+"""
+Línea de tiempo del paciente: consultas, vacunas, cirugías, alergias y
+citas en un solo listado, de lo más reciente a lo más antiguo.
+
+Cada fuente se consulta ya ordenada por (fecha, id) descendente y con
+paginación por keyset: el cursor guarda, por fuente, la última posición
+entregada, así la página siguiente lee solo ``limite + 1`` filas de cada
+tabla (usando los índices (paciente, fecha)) en lugar de cargar el
+historial completo. Los flujos se mezclan con ``heapq.merge`` (k-way merge).
+"""
+
+import base64
+import datetime
+import heapq
+import json
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Alergia, Cirugia, Cita, HistorialClinico, Vacuna
+
+LIMITE_MAXIMO = 100
+
+
+class Fuente:
+    """Una tabla de la ficha ordenada por ``campo`` (DateField o DateTimeField)."""
+
+    def __init__(self, tipo, modelo, campo, relacionados=()):
+        self.tipo = tipo
+        self.modelo = modelo
+        self.campo = campo
+        self.relacionados = relacionados
+        self.es_fecha_hora = modelo._meta.get_field(campo).get_internal_type() == 'DateTimeField'
+
+    def consultar(self, paciente_id, posicion, cantidad):
+        filas = self.modelo.objects.filter(paciente_id=paciente_id)
+        if posicion is not None:
+            valor, pk = posicion
+            valor = datetime.datetime.fromisoformat(valor) if self.es_fecha_hora else datetime.date.fromisoformat(valor)
+            filas = filas.filter(Q(**{f'{self.campo}__lt': valor}) | Q(**{self.campo: valor, 'pk__lt': pk}))
+        return list(
+            filas.select_related(*self.relacionados).order_by(f'-{self.campo}', '-pk')[:cantidad]
+        )
+
+    def fecha(self, objeto):
+        return getattr(objeto, self.campo)
+
+    def clave(self, objeto):
+        fecha = self.fecha(objeto)
+        if not self.es_fecha_hora:
+            # Los registros con solo fecha se ubican al inicio de ese día
+            fecha = timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+        return (fecha, self.tipo, objeto.pk)
+
+    def posicion(self, objeto):
+        return [self.fecha(objeto).isoformat(), objeto.pk]
+
+    def serializar(self, objeto):
+        fecha = self.fecha(objeto)
+        return {
+            'tipo': self.tipo,
+            'id': objeto.pk,
+            'fecha': (timezone.localtime(fecha) if self.es_fecha_hora else fecha).isoformat(),
+            **self.contenido(objeto),
+        }
+
+    def contenido(self, objeto):
+        raise NotImplementedError
+
+
+class FuenteConsultas(Fuente):
+    def contenido(self, h):
+        return {'titulo': h.motivo, 'detalle': h.diagnostico, 'veterinario': str(h.veterinario)}
+
+
+class FuenteVacunas(Fuente):
+    def contenido(self, v):
+        detalle = f"Próxima dosis: {v.proxima_dosis:%d/%m/%Y}" if v.proxima_dosis else ''
+        return {'titulo': f"Vacuna: {v.nombre_vacuna}", 'detalle': detalle, 'veterinario': str(v.veterinario)}
+
+
+class FuenteCirugias(Fuente):
+    def contenido(self, c):
+        return {'titulo': f"Cirugía: {c.tipo_cirugia}", 'detalle': c.descripcion, 'veterinario': str(c.veterinario)}
+
+
+class FuenteAlergias(Fuente):
+    def contenido(self, a):
+        return {
+            'titulo': f"{a.get_tipo_display()} ({a.get_severidad_display()})",
+            'detalle': a.descripcion,
+            'activa': a.activa,
+        }
+
+
+class FuenteCitas(Fuente):
+    def contenido(self, c):
+        return {
+            'titulo': f"Cita: {c.motivo_consulta}",
+            'detalle': c.get_estado_display(),
+            'veterinario': str(c.veterinario),
+        }
+
+
+FUENTES = [
+    FuenteConsultas('consulta', HistorialClinico, 'fecha_atencion', ('veterinario__usuario',)),
+    FuenteVacunas('vacuna', Vacuna, 'fecha_aplicacion', ('veterinario__usuario',)),
+    FuenteCirugias('cirugia', Cirugia, 'fecha_cirugia', ('veterinario__usuario',)),
+    FuenteAlergias('alergia', Alergia, 'fecha_deteccion'),
+    FuenteCitas('cita', Cita, 'fecha_hora', ('veterinario__usuario',)),
+]
+
+
+def codificar_cursor(estado):
+    return base64.urlsafe_b64encode(json.dumps(estado, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Estado por fuente: ``None`` (desde el inicio), ``[fecha, id]`` o ``False`` (agotada)."""
+    if not cursor:
+        return {}
+    try:
+        estado = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(estado, dict):
+        raise ValueError("Cursor inválido")
+    return estado
+
+
+def pagina(paciente_id, cursor=None, limite=20):
+    """
+    Retorna ``(eventos, siguiente_cursor)``; el cursor es ``None`` en la
+    última página. Lanza ``ValueError`` si el cursor no es válido.
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    estado = decodificar_cursor(cursor)
+
+    leidas = {}
+    flujos = []
+    for fuente in FUENTES:
+        posicion = estado.get(fuente.tipo)
+        if posicion is False:
+            continue
+        # Una fila extra permite saber si la fuente se agota en esta página
+        filas = fuente.consultar(paciente_id, posicion, limite + 1)
+        leidas[fuente.tipo] = len(filas)
+        flujos.append([(fuente.clave(fila), fuente, fila) for fila in filas])
+
+    eventos = []
+    consumidas = {}
+    nuevo_estado = dict(estado)
+    for _, fuente, fila in heapq.merge(*flujos, key=lambda item: item[0], reverse=True):
+        if len(eventos) == limite:
+            break
+        eventos.append(fuente.serializar(fila))
+        consumidas[fuente.tipo] = consumidas.get(fuente.tipo, 0) + 1
+        nuevo_estado[fuente.tipo] = fuente.posicion(fila)
+
+    for tipo, cantidad in leidas.items():
+        if cantidad <= limite and consumidas.get(tipo, 0) == cantidad:
+            nuevo_estado[tipo] = False
+
+    if all(nuevo_estado.get(f.tipo) is False for f in FUENTES):
+        return eventos, None
+    return eventos, codificar_cursor(nuevo_estado)
@@ -0,0 +1,41 @@
+# core/views/__init__.py
+
+"""
+Vistas de la aplicación, un módulo por área (``citas``, ``ficha``,
+``reportes``...).
+
+Las URL no importan los módulos: registran ``perezosa('citas.listar_citas')``
+y el módulo se importa con la primera petición que lo usa. Así un worker
+recién levantado (Render los reinicia tras un rato sin tráfico) atiende el
+login sin cargar formularios, reportes ni ``dateutil``.
+``benchmark_arranque`` verifica que siga siendo así, y el check
+``core.E001`` (core/checks.py) que cada destino se pueda importar.
+
+``perezosa`` solo reenvía la llamada: un decorador que marca la función con
+atributos que lee un middleware (p. ej. ``csrf_exempt``) no se vería, y esa
+vista debe registrarse importada.
+"""
+
+import importlib
+
+
+def perezosa(ruta):
+    """
+    Vista que importa ``core.views.<modulo>`` al primer uso y llama a
+    ``<nombre>``. ``ruta`` es ``'<modulo>.<nombre>'``.
+    """
+    modulo, _, nombre = ruta.rpartition('.')
+    modulo = f'{__name__}.{modulo}'
+    vista = None
+
+    def cargar(request, *args, **kwargs):
+        nonlocal vista
+        if vista is None:
+            vista = getattr(importlib.import_module(modulo), nombre)
+        return vista(request, *args, **kwargs)
+
+    # Para el resolver y los mensajes de error (lookup_str, ResolverMatch._func_path)
+    cargar.__module__, cargar.__name__, cargar.__qualname__ = modulo, nombre, nombre
+    # Para el check que verifica que el destino existe (ver core/checks.py)
+    cargar.perezosa = (modulo, nombre)
+    return cargar
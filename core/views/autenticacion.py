@@ -0,0 +1,51 @@
+# core/views/autenticacion.py
+
+"""Inicio y cierre de sesión, y el panel principal."""
+
+from django.shortcuts import render, redirect
+from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.decorators import login_required
+
+from ..dashboard import estadisticas_panel
+
+
+# -----------------------------------------------------------------
+# VISTAS DE AUTENTICACIÓN
+# -----------------------------------------------------------------
+def login_view(request):
+    if request.user.is_authenticated:
+        return redirect('panel')
+    if request.method == 'POST':
+        email = request.POST.get('email')
+        password = request.POST.get('password')
+        user = authenticate(request, email=email, password=password) 
+        if user is not None:
+            login(request, user)
+            return redirect('panel')
+        else:
+            context = {'error': 'Email o contraseña incorrectos.'}
+            return render(request, 'core/login.html', context)
+    return render(request, 'core/login.html')
+
+def logout_view(request):
+    logout(request)
+    return redirect('login')
+
+# -----------------------------------------------------------------
+# VISTAS DEL PANEL
+# -----------------------------------------------------------------
+
+@login_required(login_url='login')
+def panel_view(request):
+    # Solo mostrar dashboard con estadísticas si es ADMIN
+    if request.user.rol == 'ADMIN':
+        # Contadores en caché; si la BD no responde se muestran los últimos conocidos
+        estadisticas = estadisticas_panel()
+        context = {
+            **estadisticas['valores'],
+            'estadisticas': estadisticas,
+        }
+        return render(request, 'core/panel.html', context)
+    else:
+        # Para otros roles, redirigir a agenda (comportamiento original)
+        return redirect('listar_citas')
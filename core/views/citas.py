@@ -0,0 +1,278 @@
+# core/views/citas.py
+
+"""Agenda: CRUD de citas, grilla del día, topes y búsqueda de horarios libres."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+from django.utils import timezone
+from datetime import timedelta
+from django.urls import reverse
+from django.core.exceptions import ValidationError
+from django.views.decorators.http import require_POST
+
+from ..models import Cita, Veterinario
+from ..forms import CitaForm, CancelarBloqueForm, ConfirmarCitasDiaForm, TopesCitaForm, CuposLibresForm, PrimerosLibresForm
+from .. import agenda, cupos, disponibilidad, estados_cita, grilla
+
+
+# --- CRUD CITAS ---
+
+@login_required(login_url='login')
+def listar_citas(request):
+    date_str = request.GET.get('fecha', None)
+    if date_str:
+        try:
+            current_date = timezone.datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            current_date = timezone.localdate()
+    else:
+        current_date = timezone.localdate()
+    previous_day = current_date - timedelta(days=1)
+    next_day = current_date + timedelta(days=1)
+    vet_id = request.GET.get('veterinario', None)
+    veterinarios = Veterinario.objects.all()
+    citas = Cita.objects.filter(fecha_hora__date=current_date)
+    
+    if vet_id:
+        citas = citas.filter(veterinario=vet_id) 
+    
+    citas = citas.order_by('fecha_hora')
+    context = {
+        'citas': citas,
+        'current_date': current_date,
+        'previous_day': previous_day,
+        'next_day': next_day,
+        'veterinarios': veterinarios,
+        'selected_vet_id': int(vet_id) if vet_id else None,
+        'hay_solicitadas': any(c.estado == 'SOLICITADA' for c in citas),
+        'form_cancelar_bloque': CancelarBloqueForm(initial={
+            'veterinario': vet_id, 'fecha': current_date
+        }),
+    }
+    return render(request, 'core/listar_citas.html', context)
+
+def _fecha_agenda(request):
+    try:
+        return timezone.datetime.strptime(request.GET.get('fecha', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return timezone.localdate()
+
+@login_required(login_url='login')
+def grilla_citas(request):
+    """Agenda del día de todos los veterinarios en una grilla de bloques de 15 minutos."""
+    fecha = _fecha_agenda(request)
+    return render(request, 'core/grilla_citas.html', {
+        'grilla': grilla.grilla_del_dia(fecha),
+        'current_date': fecha,
+        'previous_day': fecha - timedelta(days=1),
+        'next_day': fecha + timedelta(days=1),
+    })
+
+@login_required(login_url='login')
+def grilla_citas_json(request):
+    """API: la misma grilla del día en JSON (celdas comprimidas en tramos)."""
+    return JsonResponse(grilla.serializar(grilla.grilla_del_dia(_fecha_agenda(request))))
+
+@login_required(login_url='login')
+def cupos_libres(request):
+    """
+    API: cupos libres de ``dias`` días desde ``desde`` (opcionalmente de un
+    ``veterinario``), leídos de la tabla de cupos con un recorrido por fecha.
+    """
+    form = CuposLibresForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errores': form.errors}, status=400)
+    datos = form.cleaned_data
+    inicio, _ = estados_cita.rango_del_dia(datos['desde'])
+    fin, _ = estados_cita.rango_del_dia(datos['desde'] + timedelta(days=datos['dias']))
+    libres = cupos.libres(inicio, fin, datos['veterinario']).values_list('veterinario_id', 'inicio', 'fin')
+    return JsonResponse({
+        'desde': datos['desde'].isoformat(),
+        'dias': datos['dias'],
+        'minutos': cupos.CUPO_MINUTOS,
+        'cupos': [
+            {
+                'veterinario': vet_id,
+                'inicio': timezone.localtime(inicio_cupo).isoformat(),
+                'fin': timezone.localtime(fin_cupo).isoformat(),
+            }
+            for vet_id, inicio_cupo, fin_cupo in libres
+        ],
+    })
+
+@login_required(login_url='login')
+def primeros_libres(request):
+    """
+    API: los ``k`` primeros horarios libres de ``duracion`` minutos (o la
+    sugerida para ``motivo``) entre ``desde`` y ``hasta``, de cualquier
+    veterinario o de los de una ``especialidad``.
+    """
+    form = PrimerosLibresForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errores': form.errors}, status=400)
+    datos = form.cleaned_data
+    horarios = disponibilidad.primeros_libres(
+        datos['desde'], datos['hasta'], datos['duracion'], k=datos['k'], especialidad=datos['especialidad']
+    )
+    return JsonResponse({
+        'duracion': datos['duracion'],
+        'horarios': [
+            {
+                'inicio': timezone.localtime(h['inicio']).isoformat(),
+                'fin': timezone.localtime(h['fin']).isoformat(),
+                'veterinario': {
+                    'id': h['veterinario'].pk,
+                    'nombre': str(h['veterinario']),
+                    'especialidad': h['veterinario'].especialidad,
+                },
+            }
+            for h in horarios
+        ],
+    })
+
+@login_required(login_url='login')
+def crear_cita(request):
+    if request.method == 'POST':
+        form = CitaForm(request.POST)
+        if form.is_valid():
+            cita_guardada = form.save(commit=False)
+            cita_guardada.creada_por = request.user 
+            if request.user.rol == 'VETERINARIO':
+                cita_guardada.estado = 'SOLICITADA'
+            else:
+                cita_guardada.estado = 'AGENDADA'
+            try:
+                # Revisa de nuevo el tope con la agenda bloqueada (reservas simultáneas)
+                agenda.guardar_cita(cita_guardada)
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                fecha_cita = cita_guardada.fecha_hora.date().strftime('%Y-%m-%d')
+                return redirect(f"{reverse('listar_citas')}?fecha={fecha_cita}")
+    else:
+        form = CitaForm()
+    return render(request, 'core/cita_form.html', {'form': form}) 
+
+@login_required(login_url='login')
+def editar_cita(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_citas')
+    cita = get_object_or_404(Cita, pk=pk)
+    if request.method == 'POST':
+        form = CitaForm(request.POST, instance=cita)
+        if form.is_valid():
+            try:
+                cita_guardada = agenda.guardar_cita(form.save(commit=False))
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                fecha_cita = cita_guardada.fecha_hora.date().strftime('%Y-%m-%d')
+                return redirect(f"{reverse('listar_citas')}?fecha={fecha_cita}")
+    else:
+        form = CitaForm(instance=cita)
+    return render(request, 'core/cita_form.html', {'form': form})
+
+@login_required(login_url='login')
+def eliminar_cita(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_citas')
+    cita = get_object_or_404(Cita, pk=pk)
+    fecha_cita = cita.fecha_hora.date().strftime('%Y-%m-%d')
+    if request.method == 'POST':
+        cita.delete()
+        return redirect(f"{reverse('listar_citas')}?fecha={fecha_cita}")
+    return render(request, 'core/cita_confirmar_eliminar.html', {'cita': cita})
+
+@login_required(login_url='login')
+def topes_cita(request):
+    """
+    API: citas activas del veterinario que se topan con ``[fecha_hora,
+    fecha_hora + duracion)``. Parámetros: ``veterinario``, ``fecha_hora``,
+    ``duracion`` (o ``motivo`` para sugerirla) y ``excluir`` al editar.
+    """
+    form = TopesCitaForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errores': form.errors}, status=400)
+    datos = form.cleaned_data
+    inicio = datos['fecha_hora']
+    fin = inicio + timedelta(minutes=datos['duracion'])
+    topes = agenda.citas_que_topan(datos['veterinario'], inicio, fin, excluir=datos['excluir'])
+    return JsonResponse({
+        'libre': not topes,
+        'inicio': inicio.isoformat(),
+        'fin': fin.isoformat(),
+        'duracion': datos['duracion'],
+        'topes': [
+            {
+                'id': cita.pk,
+                'paciente': cita.paciente.nombre,
+                'estado': cita.estado,
+                'inicio': timezone.localtime(cita.fecha_hora).isoformat(),
+                'fin': timezone.localtime(agenda.fin_de(cita)).isoformat(),
+            }
+            for cita in topes
+        ],
+    })
+
+@login_required(login_url='login')
+def detalle_cita(request, pk):
+    cita = get_object_or_404(Cita, pk=pk)
+    context = {
+        'cita': cita,
+        'fecha_agenda': cita.fecha_hora.date().strftime('%Y-%m-%d')
+    }
+    return render(request, 'core/detalle_cita.html', context)
+
+@login_required(login_url='login')
+@require_POST
+def confirmar_cita(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('panel')
+    cita = get_object_or_404(Cita, pk=pk, estado='SOLICITADA')
+    cita.estado = 'AGENDADA' 
+    cita.save()
+    fecha_cita = cita.fecha_hora.date().strftime('%Y-%m-%d')
+    return redirect(f"{reverse('listar_citas')}?fecha={fecha_cita}")
+
+@login_required(login_url='login')
+@require_POST
+def confirmar_citas_dia(request):
+    """Confirma (pasa a AGENDADA) todas las citas SOLICITADA del día con un solo UPDATE"""
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('panel')
+    form = ConfirmarCitasDiaForm(request.POST)
+    if not form.is_valid():
+        for errores in form.errors.values():
+            for error in errores:
+                messages.error(request, error)
+        return redirect('listar_citas')
+    fecha = form.cleaned_data['fecha'] or timezone.localdate()
+    veterinario = form.cleaned_data['veterinario']
+    cantidad = estados_cita.confirmar_solicitadas_del_dia(fecha, veterinario=veterinario)
+    messages.success(request, f'{cantidad} cita(s) confirmada(s).')
+    url = f"{reverse('listar_citas')}?fecha={fecha:%Y-%m-%d}"
+    if veterinario:
+        url += f"&veterinario={veterinario.pk}"
+    return redirect(url)
+
+@login_required(login_url='login')
+@require_POST
+def cancelar_bloque_citas(request):
+    """Cancela las citas pendientes de un veterinario en un rango horario del día"""
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('panel')
+    form = CancelarBloqueForm(request.POST)
+    if not form.is_valid():
+        for errores in form.errors.values():
+            for error in errores:
+                messages.error(request, error)
+        return redirect('listar_citas')
+    datos = form.cleaned_data
+    tz = timezone.get_current_timezone()
+    desde = timezone.make_aware(timezone.datetime.combine(datos['fecha'], datos['hora_desde']), tz)
+    hasta = timezone.make_aware(timezone.datetime.combine(datos['fecha'], datos['hora_hasta']), tz)
+    cantidad = estados_cita.cancelar_bloque(datos['veterinario'], desde, hasta, datos['motivo'])
+    messages.warning(request, f'{cantidad} cita(s) cancelada(s).')
+    return redirect(f"{reverse('listar_citas')}?fecha={datos['fecha']:%Y-%m-%d}")
@@ -0,0 +1,192 @@
+# core/views/citas_actuales.py
+
+"""Citas actuales: listado con feed en vivo, finalizar (con pago) y cancelar."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.utils import timezone
+from datetime import date, timedelta
+from urllib.parse import urlencode
+from django.core.exceptions import ValidationError
+
+from ..models import Cita, Pago, Abono
+from ..forms import CitaFinalizarForm, CancelarCitaForm
+from ..eventos import StreamConCupo, conexiones, stream_eventos
+from .. import estados_cita
+
+
+# ============================================================================
+# VISTAS: CITAS ACTUALES (ADMIN/VETERINARIO)
+# ============================================================================
+
+@login_required(login_url='login')
+def listar_citas_actuales(request):
+    if request.user.rol not in ['ADMIN', 'VETERINARIO']:
+        return redirect('panel')
+    
+    hoy = timezone.localdate()
+    filtro = request.GET.get('filtro', 'hoy')
+    
+    # Base query
+    citas = Cita.objects.select_related('paciente', 'paciente__tutor', 'veterinario')
+    
+    # Aplicar filtros de fecha (el mismo rango filtra el feed de eventos en vivo)
+    eventos_filtro = {}
+    if filtro == 'hoy':
+        citas = citas.filter(fecha_hora__date=hoy)
+        eventos_filtro = {'desde': hoy, 'hasta': hoy}
+    elif filtro == 'semana':
+        inicio_semana = hoy - timedelta(days=hoy.weekday())
+        fin_semana = inicio_semana + timedelta(days=6)
+        citas = citas.filter(fecha_hora__date__range=[inicio_semana, fin_semana])
+        eventos_filtro = {'desde': inicio_semana, 'hasta': fin_semana}
+    elif filtro == 'mes':
+        citas = citas.filter(
+            fecha_hora__year=hoy.year,
+            fecha_hora__month=hoy.month
+        )
+        fin_mes = (hoy.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        eventos_filtro = {'desde': hoy.replace(day=1), 'hasta': fin_mes}
+    # Si filtro == 'todas', no aplicamos filtro de fecha
+
+    # El veterinario solo recibe en vivo los cambios de sus propias citas
+    if request.user.rol == 'VETERINARIO' and hasattr(request.user, 'veterinario'):
+        eventos_filtro['veterinario'] = request.user.veterinario.pk
+    
+    # Ordenar
+    citas = citas.order_by('-fecha_hora')
+    
+    return render(request, 'core/listar_citas_actuales.html', {
+        'citas': citas,
+        'hoy': hoy,
+        'filtro_actual': filtro,
+        'eventos_query': urlencode({
+            k: v.isoformat() if isinstance(v, date) else v for k, v in eventos_filtro.items()
+        }),
+    })
+
+@login_required(login_url='login')
+def eventos_citas_actuales(request):
+    """
+    Feed Server-Sent Events con los cambios de citas (creada, estado, cancelada...).
+
+    Filtros opcionales: ``veterinario`` (id), ``desde`` y ``hasta`` (YYYY-MM-DD).
+    La conexión se cierra tras ``CITAS_EVENTOS_DURACION_MAX`` segundos y el
+    navegador reconecta enviando ``Last-Event-ID`` para no perder eventos.
+    Con ``CITAS_EVENTOS_MAX_CONEXIONES`` streams abiertos responde 503.
+    """
+    if request.user.rol not in ['ADMIN', 'VETERINARIO']:
+        return HttpResponseForbidden()
+
+    filtros = {}
+    try:
+        if request.GET.get('veterinario'):
+            filtros['veterinario_id'] = int(request.GET['veterinario'])
+        for campo in ('desde', 'hasta'):
+            if request.GET.get(campo):
+                filtros[campo] = date.fromisoformat(request.GET[campo])
+    except ValueError:
+        return HttpResponseBadRequest('Parámetros de filtro inválidos')
+
+    if not conexiones.ocupar(settings.CITAS_EVENTOS_MAX_CONEXIONES):
+        response = HttpResponse('Demasiadas conexiones en vivo abiertas', status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    response = StreamingHttpResponse(
+        StreamConCupo(stream_eventos(request, request.headers.get('Last-Event-ID'), **filtros)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Evita que un proxy (nginx) acumule el stream en buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required(login_url='login')
+def finalizar_cita(request, cita_id):
+    """Finalizar una cita y registrar pago"""
+    cita = get_object_or_404(Cita, id=cita_id)
+    
+    # Solo veterinarios y admin pueden finalizar
+    if request.user.rol not in ['VETERINARIO', 'ADMIN']:
+        return redirect('panel')
+    
+    try:
+        estados_cita.validar_transicion(cita.estado, 'REALIZADO')
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+        return redirect('listar_citas_actuales')
+    
+    if request.method == 'POST':
+        form = CitaFinalizarForm(request.POST)
+        if form.is_valid():
+            # Actualizar cita
+            cita.estado = 'REALIZADO'
+            cita.monto = form.cleaned_data['monto']
+            cita.observaciones_veterinario = form.cleaned_data['observaciones']
+            cita.save()
+            
+            # Crear registro de pago
+            pago_inmediato = form.cleaned_data.get('pago_inmediato', False)
+            monto = form.cleaned_data['monto']
+            metodo = form.cleaned_data.get('metodo_pago')
+            
+            pago = Pago.objects.create(
+                cita=cita,
+                monto_total=monto,
+                monto_pagado=monto if pago_inmediato else 0,
+                saldo_pendiente=0 if pago_inmediato else monto,
+                estado='PAGADO' if pago_inmediato else 'PENDIENTE',
+                metodo_pago_principal=metodo if pago_inmediato else None,
+                fecha_pago_completo=timezone.now() if pago_inmediato else None
+            )
+            
+            # Si pagó inmediatamente, crear abono
+            if pago_inmediato and metodo:
+                Abono.objects.create(
+                    pago=pago,
+                    monto=monto,
+                    metodo_pago=metodo,
+                    registrado_por=request.user
+                )
+            
+            messages.success(request, f'Cita finalizada exitosamente. Estado de pago: {pago.get_estado_display()}')
+            return redirect('listar_citas_actuales')
+    else:
+        form = CitaFinalizarForm()
+    
+    return render(request, 'core/finalizar_cita.html', {
+        'form': form,
+        'cita': cita
+    })
+
+@login_required(login_url='login')
+def cancelar_cita(request, cita_id):
+    """Cancelar una cita"""
+    cita = get_object_or_404(Cita, id=cita_id)
+    
+    try:
+        estados_cita.validar_transicion(cita.estado, 'CANCELADA')
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+        return redirect('listar_citas_actuales')
+    
+    if request.method == 'POST':
+        form = CancelarCitaForm(request.POST)
+        if form.is_valid():
+            cita.estado = 'CANCELADA'
+            cita.notas_recepcion = f"CANCELADA: {form.cleaned_data['motivo_cancelacion']}"
+            cita.save()
+            
+            messages.warning(request, 'Cita cancelada exitosamente')
+            return redirect('listar_citas_actuales')
+    else:
+        form = CancelarCitaForm()
+    
+    return render(request, 'core/cancelar_cita.html', {
+        'form': form,
+        'cita': cita
+    })
@@ -0,0 +1,42 @@
+# core/views/diagnostico.py
+
+"""Perfiles de rendimiento y métricas de latencia (ver core/perfilado.py y core/metricas.py)."""
+
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.http import HttpResponse, FileResponse, Http404
+
+from .. import metricas, perfilado
+
+
+# ============================================================================
+# VISTAS: DIAGNÓSTICO DE RENDIMIENTO (Solo Admin)
+# ============================================================================
+
+@login_required(login_url='login')
+def perfiles(request):
+    """Perfiles guardados con ?perfilar=1 (ver core/perfilado.py)"""
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    return render(request, 'core/perfiles.html', {
+        'perfiles': perfilado.recientes(),
+        'max_perfiles': settings.PERFILADO_MAX,
+    })
+
+@login_required(login_url='login')
+def descargar_perfil(request, nombre, extension):
+    """Descarga el .prof, .folded o .json de un perfil guardado"""
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    ruta = perfilado.ruta_archivo(nombre, '.' + extension)
+    if ruta is None:
+        raise Http404('Perfil no encontrado')
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre + '.' + extension)
+
+def metricas_prometheus(request):
+    """Histogramas de latencia por URL para Prometheus (ver core/metricas.py)"""
+    es_admin = request.user.is_authenticated and request.user.rol == 'ADMIN'
+    if not (es_admin or metricas.desde_red_local(request)):
+        raise Http404
+    return HttpResponse(metricas.registro.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
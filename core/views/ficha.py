@@ -0,0 +1,203 @@
+# core/views/ficha.py
+
+"""Ficha médica del paciente: historial, vacunas, cirugías, alergias, timeline y auditoría."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils import timezone
+from datetime import date
+
+from ..models import Paciente, HistorialClinico, Vacuna, Cirugia, Alergia, HistorialClinicoArchivado
+from ..forms import VacunaForm, CirugiaForm, AlergiaForm, HistorialClinicoForm
+from .. import archivo, auditoria, timeline
+
+
+# ============================================================================
+# VISTAS DE FICHA MÉDICA
+# ============================================================================
+
+@login_required(login_url='login')
+def ficha_medica_paciente(request, paciente_id):
+    """Vista principal de la ficha médica del paciente con pestañas"""
+    paciente = get_object_or_404(Paciente, id=paciente_id)
+    
+    # Obtener datos para cada sección
+    historial = HistorialClinico.objects.filter(paciente=paciente).order_by('-fecha_atencion')
+    # Las consultas archivadas (ver core/archivo.py) solo se leen si se piden
+    ver_archivo = request.GET.get('archivo') == '1'
+    consultas_archivadas = HistorialClinicoArchivado.objects.filter(paciente=paciente).count()
+    if ver_archivo:
+        historial = archivo.historial_con_archivo(paciente, historial)
+    vacunas = Vacuna.objects.filter(paciente=paciente).order_by('-fecha_aplicacion')
+    cirugias = Cirugia.objects.filter(paciente=paciente).order_by('-fecha_cirugia')
+    alergias = Alergia.objects.filter(paciente=paciente, activa=True).order_by('-severidad')
+    alergias_inactivas = Alergia.objects.filter(paciente=paciente, activa=False).order_by('-fecha_deteccion')
+    
+    # Verificar vacunas pendientes
+    vacunas_pendientes = vacunas.filter(proxima_dosis__lte=date.today(), proxima_dosis__isnull=False)
+    
+    context = {
+        'paciente': paciente,
+        'historial_consultas': historial,
+        'ver_archivo': ver_archivo,
+        'consultas_archivadas': consultas_archivadas,
+        'vacunas': vacunas,
+        'cirugias': cirugias,
+        'alergias': alergias,
+        'alergias_inactivas': alergias_inactivas,
+        'vacunas_pendientes': vacunas_pendientes,
+    }
+    
+    return render(request, 'core/ficha_medica.html', context)
+
+@login_required(login_url='login')
+def timeline_paciente(request, paciente_id):
+    """API: página de la línea de tiempo del paciente (ver core/timeline.py)"""
+    paciente = get_object_or_404(Paciente, id=paciente_id)
+    try:
+        limite = int(request.GET.get('limite', 20))
+        eventos, cursor = timeline.pagina(paciente.pk, request.GET.get('cursor'), limite)
+    except (ValueError, TypeError):
+        return HttpResponseBadRequest("Parámetros inválidos")
+    return JsonResponse({'eventos': eventos, 'cursor': cursor})
+
+@login_required(login_url='login')
+def auditoria_paciente(request, paciente_id):
+    """API: cambios registrados en la ficha y pagos del paciente (ver core/auditoria.py)"""
+    if request.user.rol != 'ADMIN':
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    try:
+        limite = max(1, min(int(request.GET.get('limite', 50)), 500))
+    except ValueError:
+        return HttpResponseBadRequest("Parámetros inválidos")
+    registros = auditoria.registros_paciente(paciente_id)[:limite]
+    return JsonResponse({'registros': [
+        {
+            'fecha': timezone.localtime(r.fecha).isoformat(),
+            'usuario': r.usuario_email,
+            'modelo': r.modelo,
+            'objeto_id': r.objeto_id,
+            'accion': r.accion,
+            'cambios': r.cambios,
+        }
+        for r in registros
+    ]})
+
+@login_required(login_url='login')
+def agregar_vacuna(request, paciente_id):
+    """Vista para agregar un registro de vacuna"""
+    paciente = get_object_or_404(Paciente, id=paciente_id)
+    
+    if request.method == 'POST':
+        form = VacunaForm(request.POST)
+        if form.is_valid():
+            vacuna = form.save(commit=False)
+            vacuna.paciente = paciente
+            vacuna.save()
+            return redirect('ficha_medica', paciente_id=paciente.id)
+    else:
+        form = VacunaForm()
+    
+    context = {
+        'form': form,
+        'paciente': paciente,
+        'titulo': 'Agregar Vacuna'
+    }
+    return render(request, 'core/vacuna_form.html', context)
+
+@login_required(login_url='login')
+def agregar_cirugia(request, paciente_id):
+    """Vista para agregar un registro de cirugía"""
+    paciente = get_object_or_404(Paciente, id=paciente_id)
+    
+    if request.method == 'POST':
+        form = CirugiaForm(request.POST)
+        if form.is_valid():
+            cirugia = form.save(commit=False)
+            cirugia.paciente = paciente
+            cirugia.save()
+            return redirect('ficha_medica', paciente_id=paciente.id)
+    else:
+        form = CirugiaForm()
+    
+    context = {
+        'form': form,
+        'paciente': paciente,
+        'titulo': 'Agregar Cirugía'
+    }
+    return render(request, 'core/cirugia_form.html', context)
+
+@login_required(login_url='login')
+def agregar_alergia(request, paciente_id):
+    """Vista para agregar un registro de alergia/condición"""
+    paciente = get_object_or_404(Paciente, id=paciente_id)
+    
+    if request.method == 'POST':
+        form = AlergiaForm(request.POST)
+        if form.is_valid():
+            alergia = form.save(commit=False)
+            alergia.paciente = paciente
+            alergia.save()
+            return redirect('ficha_medica', paciente_id=paciente.id)
+    else:
+        form = AlergiaForm()
+    
+    context = {
+        'form': form,
+        'paciente': paciente,
+        'titulo': 'Agregar Alergia/Condición'
+    }
+    return render(request, 'core/alergia_form.html', context)
+
+@login_required(login_url='login')
+def toggle_alergia(request, alergia_id):
+    """Vista para activar/desactivar una alergia"""
+    alergia = get_object_or_404(Alergia, id=alergia_id)
+    alergia.activa = not alergia.activa
+    alergia.save()
+    return redirect('ficha_medica', paciente_id=alergia.paciente.id)
+
+
+
+@login_required(login_url='login')
+def agregar_historial(request, paciente_id):
+    """Agregar entrada de historial clínico"""
+    
+    paciente = get_object_or_404(Paciente, id=paciente_id)
+    
+    # Solo veterinarios y admin pueden agregar historial
+    if request.user.rol not in ['VETERINARIO', 'ADMIN']:
+        return redirect('panel')
+    
+    if request.method == 'POST':
+        form = HistorialClinicoForm(request.POST)
+        if form.is_valid():
+            historial = form.save(commit=False)
+            historial.paciente = paciente
+            historial.fecha_atencion = timezone.now()
+            
+            # Asignar veterinario: si es veterinario usa su perfil, si es admin usa el seleccionado
+            if hasattr(request.user, 'veterinario'):
+                historial.veterinario = request.user.veterinario
+            else:
+                # Admin debe seleccionar veterinario del formulario
+                historial.veterinario = form.cleaned_data.get('veterinario')
+                if not historial.veterinario_id:  # Usar veterinario_id en lugar de veterinario
+                    messages.error(request, 'Debe seleccionar un veterinario.')
+                    return render(request, 'core/agregar_historial.html', {
+                        'form': form,
+                        'paciente': paciente
+                    })
+            
+            historial.save()
+            messages.success(request, 'Consulta registrada exitosamente.')
+            return redirect('ficha_medica', paciente_id=paciente_id)
+    else:
+        form = HistorialClinicoForm()
+    
+    return render(request, 'core/agregar_historial.html', {
+        'form': form,
+        'paciente': paciente
+    })
@@ -0,0 +1,87 @@
+# core/views/horarios.py
+
+"""Horarios semanales de los veterinarios (solo ADMIN)."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+
+from ..models import Veterinario, HorarioDisponible
+from ..forms import HorarioMultipleForm
+
+
+# ============================================================================
+# VISTAS: GESTIÓN DE HORARIOS (Solo Admin)
+# ============================================================================
+
+@login_required(login_url='login')
+def listar_horarios_vet(request):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    veterinarios = Veterinario.objects.all()
+    context = { 'veterinarios': veterinarios }
+    return render(request, 'core/listar_horarios_vet.html', context)
+
+@login_required(login_url='login')
+def gestionar_horarios(request, vet_id):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    veterinario = get_object_or_404(Veterinario, pk=vet_id)
+    
+    if request.method == 'POST':
+        form = HorarioMultipleForm(request.POST)
+        if form.is_valid():
+            dias_seleccionados = form.cleaned_data['dias_semana']
+            hora_inicio = form.cleaned_data['hora_inicio']
+            hora_fin = form.cleaned_data['hora_fin']
+            
+            creados = 0
+            errores = []
+            
+            for dia in dias_seleccionados:
+                horario = HorarioDisponible(
+                    veterinario=veterinario,
+                    dia_semana=int(dia),
+                    hora_inicio=hora_inicio,
+                    hora_fin=hora_fin
+                )
+                try:
+                    horario.full_clean()
+                    horario.save()
+                    creados += 1
+                except ValidationError as e:
+                    # Nombre del día
+                    dias_nombres = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+                    dia_nombre = dias_nombres[int(dia)]
+                    errores.append(f"{dia_nombre}: {', '.join(e.messages)}")
+            
+            if creados > 0:
+                messages.success(request, f"✓ Se crearon {creados} horario(s) correctamente")
+            if errores:
+                for error in errores:
+                    messages.warning(request, f"⚠ {error}")
+            
+            return redirect('gestionar_horarios', vet_id=vet_id)
+    else:
+        form = HorarioMultipleForm()
+
+    horarios_existentes = HorarioDisponible.objects.filter(veterinario=veterinario)
+    context = {
+        'form': form,
+        'veterinario': veterinario,
+        'horarios': horarios_existentes
+    }
+    return render(request, 'core/gestionar_horarios.html', context)
+
+@login_required(login_url='login')
+def eliminar_horario(request, pk):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    horario = get_object_or_404(HorarioDisponible, pk=pk)
+    vet_id = horario.veterinario.pk
+    if request.method == 'POST':
+        horario.delete()
+        return redirect('gestionar_horarios', vet_id=vet_id)
+    context = { 'horario': horario }
+    return render(request, 'core/horario_confirmar_eliminar.html', context)
@@ -0,0 +1,82 @@
+# core/views/pacientes.py
+
+"""CRUD de pacientes."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Cita, Paciente
+from ..forms import PacienteForm
+from .. import estados_cita
+
+
+# --- CRUD PACIENTES ---
+@login_required(login_url='login')
+def listar_pacientes(request):
+    if request.user.rol == 'ADMIN' or request.user.rol == 'RECEPCIONISTA':
+        # Admin y recepcionista ven todos los pacientes
+        pacientes = Paciente.objects.all().order_by('nombre')
+    elif request.user.rol == 'VETERINARIO':
+        # Veterinarios solo ven pacientes de sus citas
+        veterinario = request.user.veterinario
+        pacientes_ids = Cita.objects.filter(
+            veterinario=veterinario
+        ).values_list('paciente_id', flat=True).distinct()
+        pacientes = Paciente.objects.filter(id__in=pacientes_ids).order_by('nombre')
+    else:
+        # Otros roles no tienen acceso
+        pacientes = Paciente.objects.none()
+    
+    return render(request, 'core/listar_pacientes.html', {'pacientes': pacientes})
+
+@login_required(login_url='login')
+def crear_paciente(request):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_pacientes') 
+    if request.method == 'POST':
+        form = PacienteForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return redirect('listar_pacientes')
+    else:
+        form = PacienteForm()
+    return render(request, 'core/paciente_form.html', {'form': form})
+
+@login_required(login_url='login')
+def editar_paciente(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_pacientes')
+    paciente = get_object_or_404(Paciente, pk=pk)
+    if request.method == 'POST':
+        form = PacienteForm(request.POST, instance=paciente)
+        if form.is_valid():
+            form.save()
+            return redirect('listar_pacientes')
+    else:
+        form = PacienteForm(instance=paciente)
+    return render(request, 'core/paciente_form.html', {'form': form})
+
+@login_required(login_url='login')
+def eliminar_paciente(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_pacientes')
+    paciente = get_object_or_404(Paciente, pk=pk)
+    if request.method == 'POST':
+        # Baja lógica: borrar en línea cargaría todo el historial del paciente en
+        # memoria; la eliminación real la hace el comando purgar_pacientes
+        with transaction.atomic():
+            paciente.dar_de_baja()
+            canceladas = estados_cita.transicionar(
+                'CANCELADA', desde=timezone.now(), origenes=estados_cita.ESTADOS_PENDIENTES,
+                ids=Cita.objects.filter(paciente=paciente).values('pk'),
+                notas_recepcion="CANCELADA: paciente dado de baja",
+            )
+        mensaje = f"Paciente {paciente.nombre} dado de baja."
+        if canceladas:
+            mensaje += f" Se cancelaron {canceladas} cita(s) pendiente(s)."
+        messages.success(request, mensaje)
+        return redirect('listar_pacientes')
+    return render(request, 'core/paciente_confirmar_eliminar.html', {'paciente': paciente})
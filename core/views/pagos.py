@@ -0,0 +1,81 @@
+# core/views/pagos.py
+
+"""Cuentas por cobrar y abonos."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.db.models import Sum
+from django.utils import timezone
+
+from ..models import Pago, Abono
+from ..forms import AbonoForm
+
+
+# ============================================================================
+# VISTAS: GESTIÓN DE PAGOS
+# ============================================================================
+
+@login_required(login_url='login')
+def cuentas_por_cobrar(request):
+    """Lista de cuentas pendientes de pago"""
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    
+    # Pagos pendientes o parciales
+    pagos = Pago.objects.filter(
+        estado__in=['PENDIENTE', 'PARCIAL']
+    ).select_related('cita', 'cita__paciente', 'cita__paciente__tutor', 'cita__veterinario').order_by('-created_at')
+    
+    total_adeudado = pagos.aggregate(total=Sum('saldo_pendiente'))['total'] or 0
+    
+    return render(request, 'core/cuentas_por_cobrar.html', {
+        'pagos': pagos,
+        'total_adeudado': total_adeudado
+    })
+
+@login_required(login_url='login')
+def registrar_abono(request, pago_id):
+    """Registrar un abono a un pago pendiente"""
+    pago = get_object_or_404(Pago, id=pago_id)
+    
+    if request.method == 'POST':
+        form = AbonoForm(request.POST)
+        if form.is_valid():
+            monto_abono = form.cleaned_data['monto']
+            
+            # Validar que no exceda saldo
+            if monto_abono > pago.saldo_pendiente:
+                messages.error(request, f'El abono (${monto_abono}) excede el saldo pendiente (${pago.saldo_pendiente})')
+                return redirect('registrar_abono', pago_id=pago.id)
+            
+            # Crear abono
+            Abono.objects.create(
+                pago=pago,
+                monto=monto_abono,
+                metodo_pago=form.cleaned_data['metodo_pago'],
+                registrado_por=request.user,
+                notas=form.cleaned_data.get('notas', '')
+            )
+            
+            # Actualizar pago
+            pago.monto_pagado += monto_abono
+            pago.saldo_pendiente -= monto_abono
+            
+            if pago.saldo_pendiente == 0:
+                pago.estado = 'PAGADO'
+                pago.fecha_pago_completo = timezone.now()
+            else:
+                pago.estado = 'PARCIAL'
+            
+            pago.save()
+            
+            messages.success(request, f'Abono de ${monto_abono} registrado correctamente. Saldo restante: ${pago.saldo_pendiente}')
+            return redirect('cuentas_por_cobrar')
+    else:
+        form = AbonoForm()
+    
+    return render(request, 'core/registrar_abono.html', {
+        'form': form,
+        'pago': pago
+    })
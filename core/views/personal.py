@@ -0,0 +1,211 @@
+# core/views/personal.py
+
+"""Personal y cuentas de usuario (solo ADMIN)."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.db import transaction
+
+from ..models import Usuario, Veterinario
+from ..forms import PersonalForm, VeterinarioForm
+
+
+# ============================================================================
+# VISTAS: GESTIÓN DE PERSONAL (Solo Admin)
+# ============================================================================
+
+@login_required(login_url='login')
+def gestionar_personal(request):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    
+    personal = Usuario.objects.filter(is_superuser=False).order_by('rol', 'apellido')
+    
+    # Si es POST, estamos creando o editando
+    if request.method == 'POST':
+        user_id = request.POST.get('user_id')
+        
+        if user_id:  # Editar usuario existente
+            usuario = get_object_or_404(Usuario, pk=user_id)
+            form = PersonalForm(request.POST, instance=usuario)
+        else:  # Crear nuevo usuario
+            form = PersonalForm(request.POST)
+        
+        if form.is_valid():
+            usuario = form.save()
+            
+            # Si es veterinario, manejar el perfil extendido
+            if usuario.rol == 'VETERINARIO':
+                vet_id = request.POST.get('vet_id')
+                if vet_id:  # Editar veterinario existente
+                    veterinario = get_object_or_404(Veterinario, pk=vet_id)
+                    vet_form = VeterinarioForm(request.POST, instance=veterinario)
+                else:  # Crear nuevo veterinario
+                    vet_form = VeterinarioForm(request.POST)
+                
+                if vet_form.is_valid():
+                    veterinario = vet_form.save(commit=False)
+                    veterinario.usuario = usuario
+                    veterinario.save()
+            
+            return redirect('gestionar_personal')
+        # Si el formulario no es válido, continuamos para mostrar errores
+    
+    else:
+        # GET request - mostrar formulario vacío o para edición
+        user_id = request.GET.get('editar')
+        if user_id:
+            usuario = get_object_or_404(Usuario, pk=user_id)
+            form = PersonalForm(instance=usuario)
+            
+            # Si es veterinario, cargar datos del perfil extendido
+            vet_data = None
+            if usuario.rol == 'VETERINARIO' and hasattr(usuario, 'veterinario'):
+                vet_data = usuario.veterinario
+        else:
+            form = PersonalForm()
+            vet_data = None
+    
+    context = {
+        'personal': personal,
+        'form': form,
+        'vet_data': vet_data,
+        'editing_user_id': request.GET.get('editar')
+    }
+    return render(request, 'core/gestionar_personal.html', context)
+
+@login_required(login_url='login')
+def eliminar_personal(request, pk):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    
+    usuario = get_object_or_404(Usuario, pk=pk)
+    if request.method == 'POST':
+        usuario.delete()
+        return redirect('gestionar_personal')
+    
+    return render(request, 'core/personal_confirmar_eliminar.html', {'usuario': usuario})
+
+# ============================================================================
+# VISTAS: GESTIÓN DE USUARIOS (Solo Interfaz por ahora)
+# ============================================================================
+
+@login_required(login_url='login')
+def gestion_usuarios(request):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    usuarios = Usuario.objects.all().order_by('-created_at')
+    return render(request, 'core/gestion_usuarios.html', {'usuarios': usuarios})
+
+@login_required(login_url='login')
+def crear_usuario(request):
+    if request.user.rol != 'ADMIN':
+        return redirect('gestion_usuarios')
+    
+    if request.method == 'POST':
+        form = PersonalForm(request.POST)
+        if form.is_valid():
+            usuario = form.save(commit=False)
+            # Establecer contraseña inicial
+            password = form.cleaned_data.get('password', 'changeme123')
+            usuario.set_password(password)
+            usuario.save()
+            messages.success(request, f'Usuario {usuario.username} creado exitosamente.')
+            return redirect('gestion_usuarios')
+    else:
+        form = PersonalForm()
+    
+    return render(request, 'core/usuario_form.html', {'form': form})
+
+@login_required(login_url='login')
+def crear_veterinario(request):
+    if request.user.rol != 'ADMIN':
+        return redirect('gestion_usuarios')
+    
+    if request.method == 'POST':
+        form_usuario = PersonalForm(request.POST)
+        form_veterinario = VeterinarioForm(request.POST)
+        
+        if form_usuario.is_valid() and form_veterinario.is_valid():
+            with transaction.atomic():
+                # Crear usuario
+                usuario = form_usuario.save(commit=False)
+                usuario.rol = 'VETERINARIO'
+                password = form_usuario.cleaned_data.get('password', 'changeme123')
+                usuario.set_password(password)
+                usuario.save()
+                
+                # Crear perfil veterinario
+                veterinario = form_veterinario.save(commit=False)
+                veterinario.usuario = usuario
+                veterinario.save()
+                
+            messages.success(request, f'Veterinario {usuario.username} creado exitosamente.')
+            return redirect('gestion_usuarios')
+    else:
+        form_usuario = PersonalForm(initial={'rol': 'VETERINARIO'})
+        form_veterinario = VeterinarioForm()
+    
+    context = {
+        'form_usuario': form_usuario,
+        'form_veterinario': form_veterinario
+    }
+    return render(request, 'core/veterinario_form.html', context)
+
+@login_required(login_url='login')
+def editar_usuario(request, usuario_id):
+    if request.user.rol != 'ADMIN':
+        return redirect('gestion_usuarios')
+    
+    usuario = get_object_or_404(Usuario, id=usuario_id)
+    
+    if request.method == 'POST':
+        form = PersonalForm(request.POST, instance=usuario)
+        if form.is_valid():
+            usuario = form.save(commit=False)
+            # Solo actualizar contraseña si se proporciona una nueva
+            new_password = form.cleaned_data.get('password')
+            if new_password:
+                usuario.set_password(new_password)
+            usuario.save()
+            messages.success(request, f'Usuario {usuario.username} actualizado exitosamente.')
+            return redirect('gestion_usuarios')
+    else:
+        form = PersonalForm(instance=usuario)
+    
+    return render(request, 'core/usuario_form.html', {
+        'form': form,
+        'usuario': usuario,
+        'editando': True
+    })
+
+@login_required(login_url='login')
+def eliminar_usuario(request, usuario_id):
+    if request.user.rol != 'ADMIN':
+        return redirect('gestion_usuarios')
+    
+    usuario = get_object_or_404(Usuario, id=usuario_id)
+    
+    # Validaciones de seguridad
+    if usuario.id == request.user.id:
+        messages.error(request, 'No puedes eliminar tu propia cuenta.')
+        return redirect('gestion_usuarios')
+    
+    # Verificar que no sea el último admin
+    if usuario.rol == 'ADMIN':
+        admin_count = Usuario.objects.filter(rol='ADMIN', is_active=True).count()
+        if admin_count <= 1:
+            messages.error(request, 'No puedes eliminar el último administrador del sistema.')
+            return redirect('gestion_usuarios')
+    
+    if request.method == 'POST':
+        nombre_completo = f"{usuario.nombre} {usuario.apellido}"
+        usuario.delete()
+        messages.success(request, f'Usuario {nombre_completo} eliminado exitosamente.')
+        return redirect('gestion_usuarios')
+    
+    return render(request, 'core/confirmar_eliminacion.html', {
+        'usuario': usuario,
+        'tipo': 'usuario'
+    })
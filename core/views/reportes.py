@@ -0,0 +1,151 @@
+# core/views/reportes.py
+
+"""Reportes de ingresos, analítica y datos del dashboard."""
+
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from ..models import Cita, tipo_pago_choices
+from ..forms import ReporteForm, AnaliticaForm
+from ..dashboard import resumen_mensual, version_resumen, meses_cambiados, serializar_completo, serializar_delta
+from .. import analitica, archivo, cache_reportes
+
+
+# ============================================================================
+# VISTAS: REPORTES (Solo Admin)
+# ============================================================================
+
+TIPOS_PAGO = dict(tipo_pago_choices)
+
+
+def _filas_reporte(citas):
+    """
+    Filas del reporte de ingresos como diccionarios (lo que se guarda en la
+    caché): solo las columnas que muestra la tabla, sin instancias del ORM.
+    """
+    filas = citas.order_by('fecha_hora').values(
+        'fecha_hora', 'tipo_pago', 'monto', 'paciente__nombre', 'paciente__tutor__nombre',
+        'paciente__tutor__apellido', 'veterinario__usuario__nombre', 'veterinario__usuario__apellido',
+    )
+    return [
+        {
+            'fecha_hora': f['fecha_hora'],
+            'paciente': f['paciente__nombre'],
+            'tutor': f"{f['paciente__tutor__nombre']} {f['paciente__tutor__apellido']}",
+            'veterinario': f"Dr(a). {f['veterinario__usuario__nombre']} {f['veterinario__usuario__apellido']}",
+            'tipo_pago': TIPOS_PAGO.get(f['tipo_pago'], f['tipo_pago']),
+            'monto': f['monto'],
+        }
+        for f in filas
+    ]
+
+
+@login_required(login_url='login')
+def reportes_view(request):
+    if request.user.rol != 'ADMIN':
+        return redirect('panel')
+    
+    citas = []
+    total_ingresos = 0
+    form = ReporteForm(request.GET or None)
+    
+    if form.is_valid():
+        fecha_inicio = form.cleaned_data['fecha_inicio']
+        fecha_fin = form.cleaned_data['fecha_fin']
+        paciente = form.cleaned_data['paciente']
+        
+        incluir_archivo = form.cleaned_data['incluir_archivo']
+
+        def calcular():
+            # Filtro base: Citas finalizadas en el rango de fechas
+            citas = Cita.objects.filter(
+                estado='REALIZADO',
+                fecha_hora__date__range=[fecha_inicio, fecha_fin]
+            )
+
+            # Filtro opcional por paciente
+            if paciente:
+                citas = citas.filter(paciente=paciente)
+
+            filas = _filas_reporte(citas)
+
+            # Citas archivadas del mismo rango (ver core/archivo.py)
+            if incluir_archivo:
+                archivadas = archivo.citas_archivadas_realizadas(fecha_inicio, fecha_fin, paciente)
+                filas = sorted(filas + _filas_reporte(archivadas), key=lambda f: f['fecha_hora'])
+
+            # Calcular total de ingresos
+            return filas, sum((f['monto'] or 0 for f in filas), 0)
+
+        # Se recalcula solo si cambió alguna cita de los meses del rango (ver core/cache_reportes.py)
+        citas, total_ingresos = cache_reportes.obtener(
+            fecha_inicio, fecha_fin, paciente.pk if paciente else None, incluir_archivo, calcular
+        )
+
+    return render(request, 'core/reportes.html', {
+        'form': form,
+        'citas': citas,
+        'total_ingresos': total_ingresos
+    })
+
+@login_required(login_url='login')
+def analitica_ingresos(request):
+    """
+    API: visitas, facturado y cobrado por período y por veterinario, especie y
+    métodos de pago, con subtotales, en una sola consulta (ver core/analitica.py).
+
+    Parámetros: ``fecha_inicio``, ``fecha_fin``, ``periodo`` (dia/semana/mes) y
+    ``dimensiones`` (repetible; por defecto todas).
+    """
+    if request.user.rol != 'ADMIN':
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    form = AnaliticaForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errores': form.errors}, status=400)
+    datos = form.cleaned_data
+    resultado = analitica.pivote(
+        datos['fecha_inicio'], datos['fecha_fin'], datos['periodo'],
+        datos['dimensiones'] or tuple(analitica.DIMENSIONES),
+    )
+    for fila in resultado['filas']:
+        fila['periodo'] = fila['periodo'].isoformat() if fila['periodo'] else None
+    return JsonResponse({
+        'fecha_inicio': datos['fecha_inicio'].isoformat(),
+        'fecha_fin': datos['fecha_fin'].isoformat(),
+        'periodo': datos['periodo'],
+        **resultado,
+    })
+
+    
+# ============================================================================
+# API ENDPOINTS
+# ============================================================================
+
+@login_required(login_url='login')
+def dashboard_data(request):
+    """
+    API endpoint que retorna datos para gráficos del dashboard.
+
+    - ``?since=<cursor>``: retorna solo los meses cuyas cifras cambiaron desde
+      la respuesta que entregó ese cursor (``{'delta': True, 'cambios': [...]}``).
+      Si el cursor ya no sirve (p. ej. cambió el mes), retorna los datos completos.
+    - ``If-None-Match``: responde 304 si ninguna cita cambió, sin calcular el resumen.
+    """
+    etag = version_resumen()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        resumen = resumen_mensual()
+        since = request.GET.get('since')
+        indices = meses_cambiados(resumen, since) if since else None
+        if indices is None:
+            data = serializar_completo(resumen)
+        else:
+            data = serializar_delta(resumen, indices)
+        response = JsonResponse(data)
+    response['ETag'] = etag
+    # El navegador debe revalidar siempre (con If-None-Match) antes de usar su copia
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
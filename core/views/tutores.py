@@ -0,0 +1,120 @@
+# core/views/tutores.py
+
+"""CRUD de tutores, búsqueda para recepción y purga."""
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+
+from ..models import Tutor, PurgaTutor
+from ..forms import TutorForm
+from ..rut import formatear_rut
+from ..contacto import normalizar_email, normalizar_telefono
+from ..recepcion import buscar_tutores, serializar_tutor
+from ..purga import iniciar_purga_tutor
+
+
+# --- CRUD TUTORES ---
+@login_required(login_url='login')
+def listar_tutores(request):
+    tutores = Tutor.objects.all()
+    rut = request.GET.get('rut', '').strip()
+    if rut:
+        # Búsqueda exacta por el índice de rut_normalizado (acepta puntos, k minúscula...)
+        try:
+            tutores = tutores.filter(rut_normalizado=formatear_rut(rut))
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            tutores = tutores.none()
+    return render(request, 'core/listar_tutores.html', {'tutores': tutores, 'rut_buscado': rut})
+
+@login_required(login_url='login')
+def tutor_por_rut(request):
+    """API: tutor, pacientes activos y próxima cita a partir de un RUT en cualquier formato"""
+    try:
+        rut = formatear_rut(request.GET.get('rut', ''))
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    tutores = buscar_tutores(rut_normalizado=rut)
+    if not tutores:
+        return JsonResponse({'error': f'No existe un tutor con RUT {rut}.'}, status=404)
+    return JsonResponse(serializar_tutor(tutores[0]))
+
+@login_required(login_url='login')
+def tutor_por_contacto(request):
+    """API: tutores con el teléfono (p. ej. el número que está llamando) o email indicado"""
+    if request.GET.get('telefono'):
+        telefono = normalizar_telefono(request.GET['telefono'])
+        if telefono is None:
+            return JsonResponse({'error': 'Teléfono no válido.'}, status=400)
+        tutores = buscar_tutores(telefono_e164=telefono)
+    elif request.GET.get('email'):
+        tutores = buscar_tutores(email_normalizado=normalizar_email(request.GET['email']))
+    else:
+        return JsonResponse({'error': 'Indique telefono o email.'}, status=400)
+    return JsonResponse({'resultados': [serializar_tutor(t) for t in tutores]})
+
+@login_required(login_url='login')
+def crear_tutor(request):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_tutores')
+    if request.method == 'POST':
+        form = TutorForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return redirect('listar_tutores')
+    else:
+        form = TutorForm()
+    return render(request, 'core/tutor_form.html', {'form': form})
+
+@login_required(login_url='login')
+def editar_tutor(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_tutores')
+    tutor = get_object_or_404(Tutor, pk=pk) 
+    if request.method == 'POST':
+        form = TutorForm(request.POST, instance=tutor)
+        if form.is_valid():
+            form.save()
+            return redirect('listar_tutores')
+    else:
+        form = TutorForm(instance=tutor)
+    return render(request, 'core/tutor_form.html', {'form': form})
+
+@login_required(login_url='login')
+def eliminar_tutor(request, pk):
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_tutores')
+    tutor = get_object_or_404(Tutor, pk=pk)
+    if request.method == 'POST':
+        # tutor.delete() cargaría todo su historial en memoria; la purga borra
+        # por lotes con SQL directo, fuera de la petición (ver core/purga.py)
+        purga = iniciar_purga_tutor(tutor, request.user)
+        return redirect('purga_tutor', purga_id=purga.pk)
+    return render(request, 'core/tutor_confirmar_eliminar.html', {'tutor': tutor})
+
+@login_required(login_url='login')
+def purga_tutor(request, purga_id):
+    """Avance de la eliminación de un tutor"""
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return redirect('listar_tutores')
+    purga = get_object_or_404(PurgaTutor, pk=purga_id)
+    return render(request, 'core/purga_tutor.html', {'purga': purga})
+
+@login_required(login_url='login')
+def purga_tutor_estado(request, purga_id):
+    """API: estado de una purga de tutor, para la barra de progreso"""
+    if request.user.rol not in ['ADMIN', 'RECEPCIONISTA']:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    purga = get_object_or_404(PurgaTutor, pk=purga_id)
+    return JsonResponse({
+        'estado': purga.estado,
+        'estado_display': purga.get_estado_display(),
+        'porcentaje': purga.porcentaje,
+        'filas_borradas': purga.filas_borradas,
+        'detalle': purga.detalle,
+        'error': purga.error,
+        'terminada': purga.finalizada is not None,
+    })
@@ -5,6 +5,10 @@ set -o errexit
 # Ejecutar migraciones (por si acaso no se ejecutaron en el build)
 python manage.py migrate --noinput
 
-# Iniciar servidor
-exec gunicorn clinica_veterinaria.wsgi:application
+# Iniciar servidor (workers con hilos: las conexiones SSE de citas actuales
+# quedan abiertas y no deben bloquear un worker completo). Cada conexión SSE
+# ocupa un hilo; CITAS_EVENTOS_MAX_CONEXIONES (por defecto la mitad de los
+# hilos) limita cuántos pueden quedar tomados por el feed en vivo.
+export GUNICORN_THREADS=${GUNICORN_THREADS:-16}
+exec gunicorn clinica_veterinaria.wsgi:application --worker-class gthread --threads ${GUNICORN_THREADS}
 
@@ -1,5 +1,8 @@
 // Dashboard Charts with Chart.js
 // Fetches data from /api/dashboard-data/ and renders 2 charts
+// La última respuesta se guarda en localStorage junto a su cursor; los refrescos
+// siguientes piden ?since=<cursor> y solo reciben los meses que cambiaron.
+// La clave lleva el id del usuario y la página de login borra estas entradas.
 
 document.addEventListener('DOMContentLoaded', function () {
     // Elementos del DOM
@@ -29,166 +32,254 @@ document.addEventListener('DOMContentLoaded', function () {
         };
     }
 
-    // Fetch data from API
-    fetch('/api/dashboard-data/')
-        .then(response => response.json())
-        .then(data => {
-            const colors = getColors();
-
-            // Gráfico 1: Ingresos Mensuales (Line Chart)
-            const ingresosChart = new Chart(ingresosCanvas, {
-                type: 'line',
-                data: {
-                    labels: data.ingresos_mensuales.labels,
-                    datasets: [{
-                        label: 'Ingresos (CLP)',
-                        data: data.ingresos_mensuales.data,
-                        borderColor: 'rgb(75, 192, 192)',
-                        backgroundColor: 'rgba(75, 192, 192, 0.2)',
-                        tension: 0.3,
-                        fill: true,
-                        pointRadius: 4,
-                        pointHoverRadius: 6
-                    }]
+    const API_URL = '/api/dashboard-data/';
+    const CACHE_KEY = 'dashboard-data:' + (ingresosCanvas.dataset.usuario || '');
+    const REFRESH_MS = 60000;
+
+    let ingresosChart = null;
+    let citasChart = null;
+    let cache = leerCache();
+
+    function leerCache() {
+        try {
+            return JSON.parse(localStorage.getItem(CACHE_KEY));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function guardarCache() {
+        try {
+            localStorage.setItem(CACHE_KEY, JSON.stringify(cache));
+        } catch (e) {
+            // Sin espacio o localStorage deshabilitado: seguimos sin caché
+        }
+    }
+
+    // Aplica los meses modificados sobre los datos en caché
+    function aplicarCambios(data, cambios) {
+        cambios.forEach(cambio => {
+            const i = cambio.indice;
+            data.ingresos_mensuales.labels[i] = cambio.label;
+            data.ingresos_mensuales.data[i] = cambio.ingresos;
+            data.citas_por_mes.labels[i] = cambio.label;
+            data.citas_por_mes.agendadas[i] = cambio.agendadas;
+            data.citas_por_mes.realizadas[i] = cambio.realizadas;
+            data.citas_por_mes.canceladas[i] = cambio.canceladas;
+        });
+    }
+
+    function actualizarGraficos(data) {
+        if (!ingresosChart) {
+            crearGraficos(data);
+            return;
+        }
+        ingresosChart.data.labels = data.ingresos_mensuales.labels;
+        ingresosChart.data.datasets[0].data = data.ingresos_mensuales.data;
+        ingresosChart.update();
+
+        citasChart.data.labels = data.citas_por_mes.labels;
+        citasChart.data.datasets[0].data = data.citas_por_mes.agendadas;
+        citasChart.data.datasets[1].data = data.citas_por_mes.realizadas;
+        citasChart.data.datasets[2].data = data.citas_por_mes.canceladas;
+        citasChart.update();
+    }
+
+    function refrescar() {
+        const url = cache ? API_URL + '?since=' + encodeURIComponent(cache.cursor) : API_URL;
+        return fetch(url)
+            .then(response => {
+                if (response.status === 304) {
+                    return null;
+                }
+                return response.json();
+            })
+            .then(respuesta => {
+                if (!respuesta) {
+                    return;
+                }
+                if (respuesta.delta && cache) {
+                    if (respuesta.cambios.length === 0) {
+                        return;
+                    }
+                    aplicarCambios(cache.data, respuesta.cambios);
+                    cache.cursor = respuesta.cursor;
+                } else {
+                    cache = { cursor: respuesta.cursor, data: respuesta };
+                }
+                guardarCache();
+                actualizarGraficos(cache.data);
+            })
+            .catch(error => {
+                console.error('Error loading dashboard data:', error);
+            });
+    }
+
+    function crearGraficos(data) {
+        const colors = getColors();
+
+        // Gráfico 1: Ingresos Mensuales (Line Chart)
+        ingresosChart = new Chart(ingresosCanvas, {
+            type: 'line',
+            data: {
+                labels: data.ingresos_mensuales.labels,
+                datasets: [{
+                    label: 'Ingresos (CLP)',
+                    data: data.ingresos_mensuales.data,
+                    borderColor: 'rgb(75, 192, 192)',
+                    backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                    tension: 0.3,
+                    fill: true,
+                    pointRadius: 4,
+                    pointHoverRadius: 6
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: true,
+                plugins: {
+                    legend: {
+                        display: true,
+                        labels: {
+                            color: colors.textColor
+                        }
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function (context) {
+                                let label = context.dataset.label || '';
+                                if (label) {
+                                    label += ': ';
+                                }
+                                label += '$' + context.parsed.y.toLocaleString('es-CL');
+                                return label;
+                            }
+                        }
+                    }
                 },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {
-                        legend: {
-                            display: true,
-                            labels: {
-                                color: colors.textColor
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        ticks: {
+                            color: colors.textColor,
+                            callback: function (value) {
+                                return '$' + value.toLocaleString('es-CL');
                             }
                         },
-                        tooltip: {
-                            callbacks: {
-                                label: function (context) {
-                                    let label = context.dataset.label || '';
-                                    if (label) {
-                                        label += ': ';
-                                    }
-                                    label += '$' + context.parsed.y.toLocaleString('es-CL');
-                                    return label;
-                                }
-                            }
+                        grid: {
+                            color: colors.gridColor
                         }
                     },
-                    scales: {
-                        y: {
-                            beginAtZero: true,
-                            ticks: {
-                                color: colors.textColor,
-                                callback: function (value) {
-                                    return '$' + value.toLocaleString('es-CL');
-                                }
-                            },
-                            grid: {
-                                color: colors.gridColor
-                            }
+                    x: {
+                        ticks: {
+                            color: colors.textColor
                         },
-                        x: {
-                            ticks: {
-                                color: colors.textColor
-                            },
-                            grid: {
-                                color: colors.gridColor
-                            }
+                        grid: {
+                            color: colors.gridColor
                         }
                     }
                 }
-            });
+            }
+        });
 
-            // Gráfico 2: Citas por Mes (Bar Chart Agrupado)
-            const citasChart = new Chart(citasCanvas, {
-                type: 'bar',
-                data: {
-                    labels: data.citas_por_mes.labels,
-                    datasets: [
-                        {
-                            label: 'Agendadas',
-                            data: data.citas_por_mes.agendadas,
-                            backgroundColor: 'rgba(54, 162, 235, 0.7)',
-                            borderColor: 'rgb(54, 162, 235)',
-                            borderWidth: 1
-                        },
-                        {
-                            label: 'Realizadas',
-                            data: data.citas_por_mes.realizadas,
-                            backgroundColor: 'rgba(75, 192, 192, 0.7)',
-                            borderColor: 'rgb(75, 192, 192)',
-                            borderWidth: 1
-                        },
-                        {
-                            label: 'Canceladas',
-                            data: data.citas_por_mes.canceladas,
-                            backgroundColor: 'rgba(255, 99, 132, 0.7)',
-                            borderColor: 'rgb(255, 99, 132)',
-                            borderWidth: 1
+        // Gráfico 2: Citas por Mes (Bar Chart Agrupado)
+        citasChart = new Chart(citasCanvas, {
+            type: 'bar',
+            data: {
+                labels: data.citas_por_mes.labels,
+                datasets: [
+                    {
+                        label: 'Agendadas',
+                        data: data.citas_por_mes.agendadas,
+                        backgroundColor: 'rgba(54, 162, 235, 0.7)',
+                        borderColor: 'rgb(54, 162, 235)',
+                        borderWidth: 1
+                    },
+                    {
+                        label: 'Realizadas',
+                        data: data.citas_por_mes.realizadas,
+                        backgroundColor: 'rgba(75, 192, 192, 0.7)',
+                        borderColor: 'rgb(75, 192, 192)',
+                        borderWidth: 1
+                    },
+                    {
+                        label: 'Canceladas',
+                        data: data.citas_por_mes.canceladas,
+                        backgroundColor: 'rgba(255, 99, 132, 0.7)',
+                        borderColor: 'rgb(255, 99, 132)',
+                        borderWidth: 1
+                    }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: true,
+                plugins: {
+                    legend: {
+                        display: true,
+                        labels: {
+                            color: colors.textColor
                         }
-                    ]
+                    }
                 },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {
-                        legend: {
-                            display: true,
-                            labels: {
-                                color: colors.textColor
-                            }
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        ticks: {
+                            color: colors.textColor,
+                            stepSize: 1
+                        },
+                        grid: {
+                            color: colors.gridColor
                         }
                     },
-                    scales: {
-                        y: {
-                            beginAtZero: true,
-                            ticks: {
-                                color: colors.textColor,
-                                stepSize: 1
-                            },
-                            grid: {
-                                color: colors.gridColor
-                            }
+                    x: {
+                        ticks: {
+                            color: colors.textColor
                         },
-                        x: {
-                            ticks: {
-                                color: colors.textColor
-                            },
-                            grid: {
-                                color: colors.gridColor
-                            }
+                        grid: {
+                            color: colors.gridColor
                         }
                     }
                 }
-            });
-
-            // Actualizar colores cuando cambie el tema
-            const themeToggle = document.getElementById('theme-toggle');
-            if (themeToggle) {
-                themeToggle.addEventListener('click', function () {
-                    setTimeout(() => {
-                        const newColors = getColors();
-
-                        // Actualizar gráfico de ingresos
-                        ingresosChart.options.plugins.legend.labels.color = newColors.textColor;
-                        ingresosChart.options.scales.y.ticks.color = newColors.textColor;
-                        ingresosChart.options.scales.y.grid.color = newColors.gridColor;
-                        ingresosChart.options.scales.x.ticks.color = newColors.textColor;
-                        ingresosChart.options.scales.x.grid.color = newColors.gridColor;
-                        ingresosChart.update();
-
-                        // Actualizar gráfico de citas
-                        citasChart.options.plugins.legend.labels.color = newColors.textColor;
-                        citasChart.options.scales.y.ticks.color = newColors.textColor;
-                        citasChart.options.scales.y.grid.color = newColors.gridColor;
-                        citasChart.options.scales.x.ticks.color = newColors.textColor;
-                        citasChart.options.scales.x.grid.color = newColors.gridColor;
-                        citasChart.update();
-                    }, 50); // Pequeño delay para que el tema cambie primero
-                });
             }
-        })
-        .catch(error => {
-            console.error('Error loading dashboard data:', error);
         });
+
+        // Actualizar colores cuando cambie el tema
+        const themeToggle = document.getElementById('theme-toggle');
+        if (themeToggle) {
+            themeToggle.addEventListener('click', function () {
+                setTimeout(() => {
+                    const newColors = getColors();
+
+                    // Actualizar gráfico de ingresos
+                    ingresosChart.options.plugins.legend.labels.color = newColors.textColor;
+                    ingresosChart.options.scales.y.ticks.color = newColors.textColor;
+                    ingresosChart.options.scales.y.grid.color = newColors.gridColor;
+                    ingresosChart.options.scales.x.ticks.color = newColors.textColor;
+                    ingresosChart.options.scales.x.grid.color = newColors.gridColor;
+                    ingresosChart.update();
+
+                    // Actualizar gráfico de citas
+                    citasChart.options.plugins.legend.labels.color = newColors.textColor;
+                    citasChart.options.scales.y.ticks.color = newColors.textColor;
+                    citasChart.options.scales.y.grid.color = newColors.gridColor;
+                    citasChart.options.scales.x.ticks.color = newColors.textColor;
+                    citasChart.options.scales.x.grid.color = newColors.gridColor;
+                    citasChart.update();
+                }, 50); // Pequeño delay para que el tema cambie primero
+            });
+        }
+    }
+
+    // Mostrar de inmediato los datos en caché y luego pedir solo lo que cambió
+    if (cache) {
+        crearGraficos(cache.data);
+    }
+    refrescar();
+    setInterval(function () {
+        if (document.visibilityState === 'visible') {
+            refrescar();
+        }
+    }, REFRESH_MS);
 });